@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of the query-processing hot paths, with stored baselines.
+
+Runs without network access: upstream SPARQL requests are answered from
+synthetic results built up front, and entity CSVs are read from
+metadata/entities/. Cases:
+
+- analyze_query: QueryAnalyzer.analyze_query on a mix of generated queries
+- detect_ontology_uris: SPARQLServer._detect_ontology_uris
+- expand_large: _expand_query_with_descendants, one term with 2000 descendants
+- expand_cartesian: _expand_query_with_descendants, three expanded variables
+  batched as a Cartesian product
+- compact_result: _compact_result on 10,000 rows x 6 variables
+- merge_batches: _merge_batch_results on 20 overlapping batches of 1000 rows
+- registry_search: GraphRegistry.search (route_query) on the real catalog
+- query_schema: query_schema parsing the largest entity CSVs
+
+Each case is timed over --repeat rounds, each followed by a round of a
+fixed reference workload. The median ratio of case to reference time
+("relative") is compared with the baseline in
+benchmarks/baselines/hot_paths.json, and cases slower by more than
+--threshold are reported as regressions. Absolute times (shown in ms)
+swing by half between runs on a shared machine; the ratio mostly does
+not. Baselines are still machine-specific: record one with --save on the
+machine you compare on.
+
+Usage:
+    python benchmarks/bench_hot_paths.py                  # run and compare
+    python benchmarks/bench_hot_paths.py --save           # record a new baseline
+    python benchmarks/bench_hot_paths.py --check -k expand  # exit 1 on regression
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+from urllib.error import HTTPError
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mcp_proto_okn.expansion_filter import ExpansionFilter  # noqa: E402
+from mcp_proto_okn.registry import GraphRegistry  # noqa: E402
+from mcp_proto_okn.remote_cache import RemoteTextCache  # noqa: E402
+from mcp_proto_okn.server import QueryAnalyzer, SPARQLServer  # noqa: E402
+
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "hot_paths.json")
+ENTITIES_DIR = os.path.join(ROOT, "metadata", "entities")
+OBO = "http://purl.obolibrary.org/obo/"
+# Minimum duration of one timed round; calls per round are calibrated to it
+ROUND_SECONDS = 0.1
+
+QUESTIONS = [
+    "What drugs treat rheumatoid arthritis?",
+    "Where are PFAS contamination sites near drinking water?",
+    "Which genes are differentially expressed in spaceflight?",
+    "toxicity assays for bisphenol A",
+    "supply chain vulnerabilities in open source software",
+]
+
+
+# ---------------------- Synthetic inputs ---------------------- #
+
+def _term(prefix: str, number: int) -> str:
+    return f"{OBO}{prefix}_{number:07d}"
+
+
+def _queries(count: int, rng: random.Random) -> List[str]:
+    """Generated queries in the style the assistants write."""
+    queries = []
+    for i in range(count):
+        disease = _term("MONDO", rng.randrange(5_000_000))
+        anatomy = _term("UBERON", rng.randrange(2_000_000))
+        limit = f"LIMIT {rng.choice([10, 100, 1000])}" if i % 3 else ""
+        order = "ORDER BY DESC(?count)" if i % 4 == 0 else ""
+        queries.append(f"""
+            PREFIX schema: <http://schema.org/>
+            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+            SELECT ?dataset ?name ?tissue (COUNT(?sample) AS ?count) WHERE {{
+                ?dataset schema:healthCondition <{disease}> ;
+                         schema:name ?name ;
+                         schema:about ?sample .
+                ?sample schema:tissue ?tissue .
+                ?tissue rdfs:subClassOf* <{anatomy}> .
+                FILTER(CONTAINS(LCASE(?name), "case {i}"))
+            }} GROUP BY ?dataset ?name ?tissue {order} {limit}
+        """)
+    return queries
+
+
+def _descendant_bindings(roots: List[str], per_root: int) -> Dict:
+    bindings = [
+        {"root": {"value": root}, "descendant": {"value": f"{root}{n:05d}"}}
+        for root in roots for n in range(per_root)
+    ]
+    return {"head": {"vars": ["root", "descendant"]}, "results": {"bindings": bindings}}
+
+
+def _sparql_result(rows: int, variables: List[str], rng: random.Random) -> Dict:
+    bindings = [
+        {v: {"type": "uri", "value": f"http://example.org/{v}/{rng.randrange(rows)}"} for v in variables}
+        for _ in range(rows)
+    ]
+    return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+
+def _offline_server(endpoint: str = "https://apps.okn.us/spoke-okn/sparql") -> SPARQLServer:
+    """A SPARQLServer whose metadata documents come from metadata/entities/."""
+    def opener(request, timeout):
+        path = os.path.join(ENTITIES_DIR, request.full_url.rsplit("/", 1)[-1])
+        if not os.path.exists(path):
+            raise HTTPError(request.full_url, 404, "Not Found", {}, None)
+        with open(path, "rb") as f:
+            return io.BytesIO(f.read())
+
+    return SPARQLServer(endpoint, metadata_cache=RemoteTextCache(opener=opener),
+                        expansion_filter=ExpansionFilter())
+
+
+def _answer_descendant_queries(server: SPARQLServer, per_root: int) -> None:
+    """Serve descendant queries from prebuilt results keyed by query text."""
+    answers: Dict[str, Dict] = {}
+
+    def run_query(query: str) -> Dict:
+        if query not in answers:
+            roots = sorted({part.split(">")[0] for part in query.split("<") if part.startswith(OBO)})
+            answers[query] = _descendant_bindings(roots, per_root)
+        return answers[query]
+
+    server._run_query = run_query
+
+
+# ---------------------- Cases ---------------------- #
+
+def case_analyze_query() -> Callable[[], None]:
+    analyzer = QueryAnalyzer(edge_predicates_with_props={"http://schema.org/about"})
+    queries = _queries(50, random.Random(1))
+    return lambda: [analyzer.analyze_query(q) for q in queries]
+
+
+def case_detect_ontology_uris() -> Callable[[], None]:
+    server = _offline_server()
+    queries = _queries(50, random.Random(2))
+    return lambda: [server._detect_ontology_uris(q) for q in queries]
+
+
+def case_expand_large() -> Callable[[], None]:
+    server = _offline_server()
+    _answer_descendant_queries(server, per_root=2000)
+    disease = _term("MONDO", 5578)
+    query = f"SELECT ?d ?name WHERE {{ ?d <http://schema.org/healthCondition> <{disease}> ; " \
+            f"<http://schema.org/name> ?name }} LIMIT 100"
+    return lambda: server._expand_query_with_descendants(query, [disease], max_descendants=2000)
+
+
+def case_expand_cartesian() -> Callable[[], None]:
+    server = _offline_server()
+    _answer_descendant_queries(server, per_root=60)
+    terms = [_term("MONDO", 5578), _term("UBERON", 2107), _term("CL", 236)]
+    query = (
+        f"SELECT ?s WHERE {{ ?s <http://schema.org/healthCondition> <{terms[0]}> ; "
+        f"<http://schema.org/tissue> <{terms[1]}> ; <http://schema.org/cellType> <{terms[2]}> }}"
+    )
+    return lambda: server._expand_query_with_descendants(query, terms, max_descendants=2000)
+
+
+def case_compact_result() -> Callable[[], None]:
+    server = _offline_server()
+    result = _sparql_result(10_000, ["a", "b", "c", "d", "e", "f"], random.Random(3))
+    return lambda: server._compact_result(result)
+
+
+def case_merge_batches() -> Callable[[], None]:
+    server = _offline_server()
+    rng = random.Random(4)
+    batches = [server._compact_result(_sparql_result(1000, ["s", "o"], rng)) for _ in range(20)]
+    return lambda: server._merge_batch_results(batches)
+
+
+def case_registry_search() -> Callable[[], None]:
+    registry = GraphRegistry()
+    return lambda: [registry.search(q, limit=10) for q in QUESTIONS]
+
+
+def case_query_schema() -> Callable[[], None]:
+    largest = sorted(
+        (f for f in os.listdir(ENTITIES_DIR) if f.endswith("_entities.csv")),
+        key=lambda f: os.path.getsize(os.path.join(ENTITIES_DIR, f)), reverse=True,
+    )[:3]
+    servers = [
+        _offline_server(f"https://apps.okn.us/{f[:-len('_entities.csv')]}/sparql") for f in largest
+    ]
+    for server in servers:
+        server._metadata_cache.get(server._entity_metadata_url())
+
+    def run():
+        for server in servers:
+            # Parse the CSV every time rather than reusing the parsed copy
+            server._entity_metadata_parsed = None
+            server.query_schema(compact=True)
+    return run
+
+
+CASES: Dict[str, Callable[[], Callable[[], None]]] = {
+    "analyze_query": case_analyze_query,
+    "detect_ontology_uris": case_detect_ontology_uris,
+    "expand_large": case_expand_large,
+    "expand_cartesian": case_expand_cartesian,
+    "compact_result": case_compact_result,
+    "merge_batches": case_merge_batches,
+    "registry_search": case_registry_search,
+    "query_schema": case_query_schema,
+}
+
+
+# ---------------------- Timing and reporting ---------------------- #
+
+def _reference_work() -> None:
+    """Fixed pure-Python workload timed next to every round, as a speed yardstick."""
+    words = [f"term{n % 97}:{n}" for n in range(2000)]
+    counts: Dict[str, int] = {}
+    for word in sorted(words):
+        key = word.split(":", 1)[0]
+        counts[key] = counts.get(key, 0) + 1
+    "|".join(words).lower()
+
+
+def _calls_per_round(fn: Callable[[], None]) -> int:
+    """Warm ``fn`` up and return how many calls fill ROUND_SECONDS."""
+    fn()  # warm-up (and first-use caches)
+    start = time.perf_counter()
+    fn()
+    single = max(time.perf_counter() - start, 1e-6)
+    return max(1, int(ROUND_SECONDS / single))
+
+
+def _round(fn: Callable[[], None], number: int) -> float:
+    """Seconds per call over one round of ``number`` calls."""
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number
+
+
+def time_case(fn: Callable[[], None], repeat: int) -> Tuple[float, float, float]:
+    """Median and minimum milliseconds per call, and the median relative cost.
+
+    The relative cost divides each round by a round of the reference workload
+    run right after it, so slowdowns of the whole machine (CPU steal, frequency
+    scaling) cancel out; it is what regressions are judged on.
+    """
+    number = _calls_per_round(fn)
+    reference_number = _calls_per_round(_reference_work)
+    rounds, relative = [], []
+    # Like timeit: keep collector pauses out of the measurement
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            case_round = _round(fn, number)
+            relative.append(case_round / _round(_reference_work, reference_number))
+            rounds.append(case_round * 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return statistics.median(rounds), min(rounds), statistics.median(relative)
+
+
+def load_baseline(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict, threshold: float) -> List[str]:
+    """Print a comparison table; return the names of regressed cases."""
+    cases = baseline.get("cases", {})
+    if baseline:
+        print(f"baseline: {baseline.get('python')} on {baseline.get('machine')} ({baseline.get('recorded')})")
+    print(f"{'case':<22} {'median ms':>10} {'min ms':>10} {'relative':>10} {'baseline':>10} {'change':>8}  status")
+    regressions = []
+    for name, result in results.items():
+        base = cases.get(name, {}).get("relative")
+        if base:
+            ratio = result["relative"] / base
+            status = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "ok"
+            if status == "REGRESSION":
+                regressions.append(name)
+            change = f"{(ratio - 1) * 100:+.0f}%"
+            base_text = f"{base:.3f}"
+        else:
+            status, change, base_text = "new", "", "-"
+        print(f"{name:<22} {result['median_ms']:>10.3f} {result['min_ms']:>10.3f} "
+              f"{result['relative']:>10.3f} {base_text:>10} {change:>8}  {status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="select", help="Only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=31, help="Timed rounds per case (default: 31)")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline file (default: benchmarks/baselines/hot_paths.json)")
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="Relative slowdown reported as a regression (default: 0.3)")
+    parser.add_argument("--save", action="store_true", help="Record the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any case regressed")
+    args = parser.parse_args()
+
+    results = {}
+    for name, setup in CASES.items():
+        if args.select and args.select not in name:
+            continue
+        median, minimum, relative = time_case(setup(), args.repeat)
+        results[name] = {"median_ms": round(median, 4), "min_ms": round(minimum, 4),
+                         "relative": round(relative, 4)}
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        cases = dict(baseline.get("cases", {}))
+        cases.update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": f"{platform.system()} {platform.machine()}",
+                "recorded": time.strftime("%Y-%m-%d"),
+                "cases": cases,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+    if regressions:
+        print(f"regressed: {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
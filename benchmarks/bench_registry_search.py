@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark GraphRegistry.search (route_query) and select (list_graphs) on a
+synthetic catalog.
+
+Generates a registry of --graphs synthetic graphs whose metadata is drawn
+from the real catalog's vocabulary, then reports the index build time and
+per-query latency percentiles. Routing should stay well under a millisecond
+per query at several thousand graphs; list_graphs is timed for the first
+(uncached) and repeated calls of each filter combination.
+
+Usage:
+    python benchmarks/bench_registry_search.py
+    python benchmarks/bench_registry_search.py --graphs 10000 --queries 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mcp_proto_okn.registry import GraphRegistry  # noqa: E402
+
+QUESTIONS = [
+    "What drugs treat rheumatoid arthritis?",
+    "Where are PFAS contamination sites near drinking water?",
+    "Which genes are differentially expressed in spaceflight?",
+    "flood risk for critical infrastructure",
+    "toxicity assays for bisphenol A",
+    "rural broadband access and health outcomes",
+    "What soil carbon measurements exist for farms?",
+    "supply chain vulnerabilities in open source software",
+]
+
+
+def synthetic_registry(count: int, seed: int = 0):
+    """Synthetic registry entries mixing vocabulary from the real catalog."""
+    real = GraphRegistry().list_all()
+    rng = random.Random(seed)
+    words = sorted({w for g in real for w in g["description_summary"].split()})
+    tags = sorted({t for g in real for t in g["domain_tags"]})
+    classes = sorted({c for g in real for c in g["entity_types"].get("classes", [])})
+    predicates = sorted({p for g in real for p in g["entity_types"].get("predicates", [])})
+    examples = [q for g in real for q in g["example_queries"]]
+    namespaces = sorted({n for g in real for n in g["identifier_namespaces"]})
+    return [
+        {
+            "name": f"synthetic-kg-{i}",
+            "display_name": f"Synthetic KG {i}",
+            "domain_tags": rng.sample(tags, min(3, len(tags))),
+            "description_summary": " ".join(rng.choices(words, k=25)),
+            "entity_types": {
+                "classes": rng.sample(classes, min(8, len(classes))),
+                "predicates": rng.sample(predicates, min(12, len(predicates))),
+            },
+            "identifier_namespaces": rng.sample(namespaces, min(3, len(namespaces))),
+            "example_queries": rng.sample(examples, min(3, len(examples))),
+        }
+        for i in range(count)
+    ]
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return (f"p50 {statistics.median(timings):.3f} ms  "
+            f"p99 {timings[max(int(len(timings) * 0.99) - 1, 0)]:.3f} ms  "
+            f"max {timings[-1]:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graphs", type=int, default=5000, help="Synthetic graphs (default: 5000)")
+    parser.add_argument("--queries", type=int, default=1000, help="Queries to time (default: 1000)")
+    parser.add_argument("--limit", type=int, default=20, help="Graphs returned per query (default: 20)")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(synthetic_registry(args.graphs), f)
+        path = f.name
+    try:
+        start = time.perf_counter()
+        registry = GraphRegistry(path)
+        build_ms = (time.perf_counter() - start) * 1000
+    finally:
+        os.unlink(path)
+
+    timings = []
+    for i in range(args.queries):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        start = time.perf_counter()
+        registry.search(question, limit=args.limit)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"graphs: {args.graphs}  load + index: {build_ms:.0f} ms")
+    print(f"search (limit={args.limit}) over {args.queries} queries: {percentiles(timings)}")
+
+    graphs = registry.list_all()
+    filters = [
+        {"domain": g["domain_tags"][0], "entity_type": g["entity_types"]["classes"][0]}
+        for g in graphs[:args.queries]
+    ]
+    for label in ("uncached", "cached"):
+        timings = []
+        for f in filters:
+            if label == "uncached":
+                registry._select_cache.clear()
+            start = time.perf_counter()
+            registry.select(limit=args.limit, **f)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"list_graphs ({label}, limit={args.limit}) over {len(filters)} filters: {percentiles(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Concurrent-client load test of the unified server's streamable-http transport.
+
+Opens --sessions MCP sessions at once, each calling tools back to back (with
+optional --think-time) in a weighted --mix of list_graphs, get_schema,
+query, multi_graph_query and lookup_uri, and reports per tool the calls,
+throughput, p50/p95/p99 latency and error rate over the measured window.
+Calls in the first --warmup seconds are not counted. A tool result with an
+``error`` key, a protocol error or a failed call counts as an error.
+
+By default the whole stack runs locally with no network access:
+tests/local_endpoint.py serves the fixture graphs as the federation
+endpoint (with --upstream-latency seconds per request), and
+mcp-proto-okn-unified runs in a subprocess pointed at it through
+MCP_PROTO_OKN_FEDERATED_ENDPOINT, reading entity CSVs and descriptions from
+metadata/ instead of GitHub. With --url the load goes to a running server
+instead (e.g. one pod through ``kubectl port-forward``), upstream included.
+
+Several session counts (``--sessions 10,50,100``) run as successive stages
+against the same server, which shows where latency starts to climb. Each
+stage also reports ``mean_in_flight``, the average number of tool calls in
+flight (total call time / window). It is the client-side view of the
+mcp_proto_okn_tool_calls_in_flight gauge, so the stage where p95 is still
+acceptable gives a per-pod value for ``autoscaling.targetToolCallsInFlight``
+in charts/mcp-proto-okn/values.yaml.
+
+Usage:
+    python benchmarks/load_streamable_http.py
+    python benchmarks/load_streamable_http.py --sessions 10,50,100 --duration 60
+    python benchmarks/load_streamable_http.py --mix query=1,lookup_uri=1 --upstream-latency 0.5
+    python benchmarks/load_streamable_http.py --url http://localhost:8000/mcp --json load.json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+LOCAL_ENDPOINT = os.path.join(ROOT, "tests", "local_endpoint.py")
+METADATA_DIR = os.path.join(ROOT, "metadata")
+DEFAULT_MIX = "list_graphs=2,get_schema=1,query=4,multi_graph_query=1,lookup_uri=2"
+
+# Queries match the fixture graphs in tests/fixtures/endpoint/
+TREATS = "<https://purl.org/okn/frink/kg/spoke-okn/schema/TREATS_CtD>"
+ARTHRITIS = "<http://purl.obolibrary.org/obo/MONDO_0005578>"
+RHEUMATOID = "<http://purl.obolibrary.org/obo/MONDO_0008383>"
+
+# Argument sets per tool; each call picks one at random
+CALLS: Dict[str, List[Dict[str, Any]]] = {
+    "list_graphs": [
+        {},
+        {"domain": "biomedical"},
+        {"entity_type": "Gene", "limit": 10},
+    ],
+    "get_schema": [
+        {"graph_name": "spoke-okn"},
+        {"graph_name": "spoke-genelab"},
+    ],
+    "query": [
+        # Expanded to the arthritis subtree through a descendant query to ubergraph
+        {"graph_name": "spoke-okn",
+         "query_string": f"SELECT DISTINCT ?compound WHERE {{ ?compound {TREATS} {ARTHRITIS} }} LIMIT 100"},
+        {"graph_name": "spoke-okn",
+         "query_string": f"SELECT DISTINCT ?compound WHERE {{ ?compound {TREATS} {RHEUMATOID} }} LIMIT 100",
+         "expansion_mode": "postfilter"},
+        {"graph_name": "spoke-okn",
+         "query_string": f"SELECT ?compound ?disease WHERE {{ ?compound {TREATS} ?disease }} LIMIT 100",
+         "auto_expand_descendants": False},
+    ],
+    "multi_graph_query": [
+        {"queries": {
+            graph: f"SELECT ?compound ?disease WHERE {{ ?compound {TREATS} ?disease }} LIMIT 100"
+            for graph in ("spoke-okn", "spoke-genelab")
+        }},
+    ],
+    "lookup_uri": [
+        {"label": "rheumatoid arthritis"},
+        {"label": "osteoarthritis"},
+        {"label": "not a disease"},
+    ],
+}
+
+
+# ---------------------------- Local stack ---------------------------- #
+
+def _metadata_opener(request, timeout):
+    """Answer the GitHub metadata URLs from metadata/ (anything else is a 404)."""
+    parts = urlparse(request.full_url).path.split("/")
+    path = os.path.join(METADATA_DIR, *parts[-2:]) if "metadata" in parts else ""
+    if not path or not os.path.exists(path):
+        raise HTTPError(request.full_url, 404, "Not Found", {}, None)
+    with open(path, "rb") as f:
+        return io.BytesIO(f.read())
+
+
+def serve(port: int) -> None:
+    """Run mcp-proto-okn-unified over streamable-http with offline metadata."""
+    from mcp_proto_okn import remote_cache, unified_server
+
+    remote_cache.urlopen = _metadata_opener
+    sys.argv = ["mcp-proto-okn-unified", "--transport", "streamable-http",
+                "--host", "127.0.0.1", "--port", str(port)]
+    unified_server.main()
+
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"{' '.join(process.args)} exited with status {process.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=1).close()
+            return
+        except HTTPError:
+            return  # Listening; the path does not matter
+        except OSError:
+            time.sleep(0.1)
+    sys.exit(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def local_stack(upstream_latency: float, log_path: Optional[str]):
+    """Start the stand-in endpoint and a unified server; yield the MCP URL."""
+    endpoint_port, server_port = _free_port(), _free_port()
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    processes = []
+    try:
+        endpoint = subprocess.Popen(
+            [sys.executable, LOCAL_ENDPOINT, "--port", str(endpoint_port), "--latency", str(upstream_latency)],
+            stdout=log, stderr=log,
+        )
+        processes.append(endpoint)
+        _wait_until_up(f"http://127.0.0.1:{endpoint_port}/", endpoint)
+
+        env = dict(os.environ,
+                   MCP_PROTO_OKN_FEDERATED_ENDPOINT=f"http://127.0.0.1:{endpoint_port}/sparql",
+                   PYTHONPATH=os.path.join(ROOT, "src"))
+        env.pop("MCP_PROTO_OKN_API_KEY", None)
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", str(server_port)],
+            stdout=log, stderr=log, env=env,
+        )
+        processes.append(server)
+        _wait_until_up(f"http://127.0.0.1:{server_port}/healthz", server)
+        yield f"http://127.0.0.1:{server_port}/mcp"
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if log is not subprocess.DEVNULL:
+            log.close()
+
+
+# ---------------------------- Load ---------------------------- #
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in CALLS:
+            raise argparse.ArgumentTypeError(f"Unknown tool '{name}'. Use: {', '.join(CALLS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _error(result) -> Optional[str]:
+    """Error message of a CallToolResult, or None for a successful call."""
+    if result.isError:
+        return " ".join(getattr(c, "text", "") for c in result.content)[:200] or "isError"
+    payload = result.structuredContent
+    if payload is None and result.content and hasattr(result.content[0], "text"):
+        try:
+            payload = json.loads(result.content[0].text)
+        except ValueError:
+            return None
+    if isinstance(payload, dict) and payload.get("error"):
+        return str(payload["error"])[:200]
+    return None
+
+
+async def _session(url: str, headers: Dict[str, str], mix: Dict[str, float], rng: random.Random,
+                   window: Tuple[float, float], think_time: float,
+                   samples: List[Tuple[str, float, Optional[str]]]) -> None:
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    tools, weights = list(mix), list(mix.values())
+    start, end = window
+    try:
+        async with streamablehttp_client(url, headers=headers, timeout=300) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                while time.perf_counter() < end:
+                    tool = rng.choices(tools, weights)[0]
+                    began = time.perf_counter()
+                    try:
+                        error = _error(await session.call_tool(tool, rng.choice(CALLS[tool])))
+                    except Exception as e:
+                        error = f"{type(e).__name__}: {e}"[:200]
+                    finished = time.perf_counter()
+                    if start <= began and finished <= end:
+                        samples.append((tool, finished - began, error))
+                    if think_time:
+                        await asyncio.sleep(rng.expovariate(1 / think_time))
+    except Exception as e:
+        samples.append(("session", 0.0, f"{type(e).__name__}: {e}"[:200]))
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, min(len(sorted_values) - 1, int(fraction * len(sorted_values) + 0.999999) - 1))
+    return sorted_values[index]
+
+
+def _summarize(samples: List[Tuple[str, float, Optional[str]]], seconds: float) -> Dict[str, Any]:
+    durations = sorted(d for _, d, _ in samples)
+    errors = [e for _, _, e in samples if e is not None]
+    summary = {
+        "calls": len(samples),
+        "throughput_per_s": round(len(samples) / seconds, 2),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+    }
+    if durations:
+        summary.update({
+            f"p{int(q * 100)}_ms": round(_percentile(durations, q) * 1000, 1) for q in (0.5, 0.95, 0.99)
+        })
+    if errors:
+        summary["example_error"] = errors[-1]
+    return summary
+
+
+async def run_stage(url: str, headers: Dict[str, str], sessions: int, mix: Dict[str, float],
+                    duration: float, warmup: float, think_time: float, seed: int) -> Dict[str, Any]:
+    """Run ``sessions`` concurrent sessions; report calls that ran within the measured window."""
+    samples: List[Tuple[str, float, Optional[str]]] = []
+    start = time.perf_counter() + warmup
+    window = (start, start + duration)
+    await asyncio.gather(*(
+        _session(url, headers, mix, random.Random(seed + i), window, think_time, samples)
+        for i in range(sessions)
+    ))
+    by_tool: Dict[str, List] = {}
+    for sample in samples:
+        by_tool.setdefault(sample[0], []).append(sample)
+    calls = [s for s in samples if s[0] != "session"]
+    return {
+        "sessions": sessions,
+        "seconds": duration,
+        "total": _summarize(calls, duration),
+        "mean_in_flight": round(sum(d for _, d, _ in calls) / duration, 2),
+        "failed_sessions": len(by_tool.pop("session", [])),
+        "tools": {tool: _summarize(by_tool[tool], duration) for tool in sorted(by_tool)},
+    }
+
+
+def print_stage(stage: Dict[str, Any]) -> None:
+    print(f"\n{stage['sessions']} sessions, {stage['seconds']:.0f} s: "
+          f"{stage['total']['throughput_per_s']} calls/s, mean in flight {stage['mean_in_flight']}"
+          + (f", {stage['failed_sessions']} sessions failed to open" if stage["failed_sessions"] else ""))
+    print(f"  {'tool':<20}{'calls':>8}{'calls/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    rows = list(stage["tools"].items()) + [("total", stage["total"])]
+    for tool, s in rows:
+        print(f"  {tool:<20}{s['calls']:>8}{s['throughput_per_s']:>10}{s.get('p50_ms', '-'):>10}"
+              f"{s.get('p95_ms', '-'):>10}{s.get('p99_ms', '-'):>10}{s['error_rate']:>9.1%}")
+    for tool, s in stage["tools"].items():
+        if "example_error" in s:
+            print(f"  {tool} error: {s['example_error']}")
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--serve":
+        return serve(int(sys.argv[2]))
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="20",
+                        help="Concurrent MCP sessions; a comma-separated list runs one stage per value (default 20)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per stage (default 30)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds at the start of each stage")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Tool weights (default {DEFAULT_MIX})")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Mean pause in seconds between a session's calls (exponential; default 0)")
+    parser.add_argument("--upstream-latency", type=float, default=0.05,
+                        help="Seconds the local endpoint waits per SPARQL request (default 0.05)")
+    parser.add_argument("--url", help="MCP URL of a running server (default: start a local stack)")
+    parser.add_argument("--api-key", default=os.environ.get("MCP_PROTO_OKN_API_KEY"),
+                        help="Bearer token for --url (default: MCP_PROTO_OKN_API_KEY)")
+    parser.add_argument("--server-log", help="Write the local endpoint and server output to this file")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        session_counts = [int(n) for n in args.sessions.split(",")]
+    except ValueError:
+        parser.error("--sessions takes integers, e.g. 10,50,100")
+    headers = {"Authorization": f"Bearer {args.api_key}"} if args.url and args.api_key else {}
+
+    @contextmanager
+    def target():
+        if args.url:
+            yield args.url
+        else:
+            with local_stack(args.upstream_latency, args.server_log) as url:
+                yield url
+
+    stages = []
+    with target() as url:
+        print(f"Load test of {url}: mix {', '.join(f'{t}={w:g}' for t, w in args.mix.items())}")
+        for sessions in session_counts:
+            stage = asyncio.run(run_stage(url, headers, sessions, args.mix, args.duration, args.warmup,
+                                          args.think_time, args.seed))
+            print_stage(stage)
+            stages.append(stage)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "url": args.url or "local",
+                "mix": args.mix,
+                "think_time": args.think_time,
+                "upstream_latency": None if args.url else args.upstream_latency,
+                "stages": stages,
+            }, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Build the chemical identifier crosswalk (config/chemical_crosswalk.tsv.gz).
+
+Harvests cross-references between CAS numbers, ChEBI, PubChem CIDs,
+InChIKeys, ChEMBL and DSSTox (DTXSID) identifiers from the chemical graphs,
+clusters identifiers that refer to the same substance, and writes one row per
+cluster as a gzip-compressed TSV. The server loads it into an in-process
+index (mcp_proto_okn.crosswalk) for translate_chemical_ids and for joining
+graphs that identify chemicals differently.
+
+Which predicates to harvest is read from metadata/entities/<kg>_entities.csv
+(see extract_entities.py): identifier predicates such as CHEMINF "CAS
+registry number" or coso:casNumber, and generic cross-reference predicates
+(owl:sameAs, skos:exactMatch, oboInOwl:hasDbXref, edam:has_identifier),
+whose values are typed by their form.
+
+Refreshing is incremental. The harvested links of each graph are cached in
+config/chemical_xrefs/<kg>.tsv.gz; only graphs whose cache is older than
+--max-age-days are queried again, and a graph that fails to answer keeps its
+previous cache. The clusters are then rebuilt from all caches. The server
+re-reads the snapshot when the file changes, so a nightly cron job is enough:
+
+    0 4 * * *  cd /srv/mcp-proto-okn && python scripts/build_chemical_crosswalk.py
+
+Usage:
+    python scripts/build_chemical_crosswalk.py
+    python scripts/build_chemical_crosswalk.py --graphs spoke-okn biobricks-ice --max-age-days 0
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mcp_proto_okn.crosswalk import (  # noqa: E402
+    CHEMICAL_ID_TYPES,
+    CHEMICAL_SNAPSHOT_FILENAME,
+    MAX_CLUSTER_SIZE,
+    Crosswalk,
+    cluster_identifiers,
+    detect_chemical_type,
+)
+from mcp_proto_okn.identifier_mapping import IDENTIFIER_BRIDGES  # noqa: E402
+
+ENDPOINT = "https://apps.okn.us/federation/sparql"
+KG_BASE = "https://purl.org/okn/frink/kg/"
+
+ENTITIES_DIR = os.path.join(ROOT, "metadata", "entities")
+CACHE_DIR = os.path.join(ROOT, "config", "chemical_xrefs")
+STATE_FILE = os.path.join(CACHE_DIR, "state.json")
+
+PAGE_SIZE = 50000
+MAX_AGE_DAYS = 7.0
+
+# Graphs known to carry chemical identifiers
+DEFAULT_GRAPHS = sorted({
+    graph for id_type in CHEMICAL_ID_TYPES for graph in IDENTIFIER_BRIDGES.get(id_type, {})
+})
+
+# Predicates whose values are identifiers of one type, matched against "URI label"
+PREDICATE_TYPES = [
+    ("CAS", re.compile(r"CHEMINF_000446|\bcas(?:_?number|_?rn)?\b|cas registry", re.IGNORECASE)),
+    ("ChEBI", re.compile(r"CHEMINF_000407|\bchebi\b", re.IGNORECASE)),
+    ("PubChem", re.compile(r"CHEMINF_000140|pubchem.*\bc?id\b", re.IGNORECASE)),
+    ("InChIKey", re.compile(r"inchi_?key", re.IGNORECASE)),
+    ("ChEMBL", re.compile(r"CHEMINF_000412|chembl identifier", re.IGNORECASE)),
+    ("DTXSID", re.compile(r"dtxsid|dsstox", re.IGNORECASE)),
+]
+
+# Generic cross-reference predicates; values are typed by their form
+XREF_PREDICATES = re.compile(
+    r"owl#sameAs$|schema\.org/sameAs$|skos/core#(?:exact|close)Match$|hasDbXref$|has_dbxref$"
+    r"|edamontology\.org/has_identifier$"
+)
+
+
+def chemical_predicates(kg: str) -> Dict[str, Optional[str]]:
+    """Map each identifier predicate of ``kg`` to its identifier type (None: typed per value)."""
+    path = os.path.join(ENTITIES_DIR, f"{kg}_entities.csv")
+    predicates: Dict[str, Optional[str]] = {}
+    if not os.path.exists(path):
+        return predicates
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            uri = row.get("URI", "")
+            if row.get("Type") != "Predicate" or not uri:
+                continue
+            text = f"{uri} {row.get('Label', '')}"
+            id_type = next((t for t, pattern in PREDICATE_TYPES if pattern.search(text)), None)
+            if id_type:
+                predicates[uri] = id_type
+            elif XREF_PREDICATES.search(uri):
+                predicates.setdefault(uri, None)
+    return predicates
+
+
+def fetch_links(client: SPARQLWrapper, kg: str, predicate: str,
+                id_type: Optional[str]) -> Iterator[Tuple[str, str, str]]:
+    """Yield (subject, id_type, identifier) for one predicate of one graph."""
+    offset = 0
+    while True:
+        client.setQuery(f"""
+            SELECT ?s ?o
+            FROM <{KG_BASE}{kg}>
+            WHERE {{ ?s <{predicate}> ?o }}
+            ORDER BY ?s ?o
+            LIMIT {PAGE_SIZE}
+            OFFSET {offset}
+        """)
+        bindings = client.query().convert()["results"]["bindings"]
+        for b in bindings:
+            value = b["o"]["value"]
+            value_type = id_type or detect_chemical_type(value)
+            if value_type:
+                yield b["s"]["value"], value_type, value
+        if len(bindings) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+
+
+def harvest(kg: str) -> List[Tuple[str, str, str]]:
+    client = SPARQLWrapper(ENDPOINT)
+    client.setReturnFormat(JSON)
+    client.setMethod("POST")
+    client.setTimeout(600)
+    links = []
+    for predicate, id_type in chemical_predicates(kg).items():
+        links.extend(fetch_links(client, kg, predicate, id_type))
+    return links
+
+
+def cache_path(kg: str) -> str:
+    return os.path.join(CACHE_DIR, f"{kg}.tsv.gz")
+
+
+def read_cache(kg: str) -> List[Tuple[str, str, str]]:
+    with gzip.open(cache_path(kg), "rt", encoding="utf-8", newline="") as f:
+        return [tuple(row) for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE) if len(row) == 3]
+
+
+def write_cache(kg: str, links: List[Tuple[str, str, str]]) -> None:
+    tmp_path = cache_path(kg) + ".tmp.gz"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", quoting=csv.QUOTE_NONE, lineterminator="\n")
+        writer.writerows(links)
+    os.replace(tmp_path, cache_path(kg))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graphs", nargs="+", default=DEFAULT_GRAPHS,
+                        help="Graphs to harvest (default: graphs with chemical identifiers)")
+    parser.add_argument("--max-age-days", type=float, default=MAX_AGE_DAYS,
+                        help=f"Re-harvest graphs whose cache is older than this (default: {MAX_AGE_DAYS})")
+    parser.add_argument("--max-cluster-size", type=int, default=MAX_CLUSTER_SIZE,
+                        help=f"Drop clusters with more identifiers than this (default: {MAX_CLUSTER_SIZE})")
+    parser.add_argument("--output", default=os.path.join(ROOT, "config", CHEMICAL_SNAPSHOT_FILENAME),
+                        help="Output path (default: config/chemical_crosswalk.tsv.gz)")
+    args = parser.parse_args()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    state = {}
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            state = json.load(f)
+
+    start = time.time()
+    all_links = []
+    for kg in args.graphs:
+        harvested = state.get(kg, {}).get("harvested", 0)
+        fresh = os.path.exists(cache_path(kg)) and start - harvested < args.max_age_days * 86400
+        if not fresh:
+            try:
+                links = harvest(kg)
+            except Exception as e:
+                print(f"{kg}: harvest failed ({e}); keeping previous cache", file=sys.stderr)
+            else:
+                write_cache(kg, links)
+                state[kg] = {"harvested": start, "links": len(links)}
+                print(f"{kg}: {len(links)} links", file=sys.stderr)
+        if os.path.exists(cache_path(kg)):
+            all_links.extend(read_cache(kg))
+        with open(STATE_FILE, "w") as f:
+            json.dump(state, f, indent=2)
+
+    links = (
+        ((detect_chemical_type(subject) or "", subject), (id_type, value))
+        for subject, id_type, value in all_links
+    )
+    rows = cluster_identifiers(links, max_size=args.max_cluster_size)
+    crosswalk = Crosswalk(CHEMICAL_ID_TYPES, rows)
+    tmp_path = args.output + ".tmp" + (".gz" if args.output.endswith(".gz") else "")
+    crosswalk.write(tmp_path)
+    os.replace(tmp_path, args.output)
+
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"Wrote {args.output}: {len(crosswalk)} clusters from {len(all_links)} links, "
+          f"{size_mb:.1f} MiB ({time.time() - start:.1f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
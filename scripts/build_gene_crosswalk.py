@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Build the gene identifier crosswalk (config/gene_crosswalk.tsv.gz).
+
+Exports the NCBI Gene ID, Ensembl ID and gene symbol of every gene in
+gene-expression-atlas-okn (the gene bridge graph) as a gzip-compressed TSV.
+The server loads it into an in-process index (mcp_proto_okn.crosswalk) for
+translate_gene_ids and gene-bridged joins, instead of querying the bridge
+graph on every call.
+
+The server re-reads the snapshot when the file changes, so refreshing it on
+a schedule only needs this script run periodically, e.g. nightly:
+
+    0 3 * * *  cd /srv/mcp-proto-okn && python scripts/build_gene_crosswalk.py
+
+The file is written to a temporary name and renamed into place, so a running
+server never sees a partial snapshot.
+
+Usage:
+    python scripts/build_gene_crosswalk.py
+    python scripts/build_gene_crosswalk.py --output /tmp/gene_crosswalk.tsv.gz
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Iterator, Tuple
+
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mcp_proto_okn.crosswalk import GENE_ID_TYPES, GENE_SNAPSHOT_FILENAME, Crosswalk  # noqa: E402
+from mcp_proto_okn.identifier_mapping import GENE_BRIDGE_GRAPH  # noqa: E402
+
+ENDPOINT = "https://apps.okn.us/federation/sparql"
+BRIDGE_GRAPH_URI = f"https://purl.org/okn/frink/kg/{GENE_BRIDGE_GRAPH}"
+
+PAGE_SIZE = 50000
+
+
+def fetch_genes(page_size: int = PAGE_SIZE) -> Iterator[Tuple[str, str, str]]:
+    """Yield (ncbi_gene_id, ensembl_id, symbol) for every gene in the bridge graph."""
+    client = SPARQLWrapper(ENDPOINT)
+    client.setReturnFormat(JSON)
+    client.setMethod("POST")
+    client.setTimeout(600)
+
+    offset = 0
+    while True:
+        client.setQuery(f"""
+            PREFIX glab: <https://spoke.ucsf.edu/genelab/>
+            PREFIX biolink: <https://w3id.org/biolink/vocab/>
+            SELECT ?ncbi_gene_id ?ensembl_id ?symbol
+            FROM <{BRIDGE_GRAPH_URI}>
+            WHERE {{
+              ?gene a biolink:Gene .
+              OPTIONAL {{ ?gene glab:ncbi_gene_id ?ncbi_gene_id }}
+              OPTIONAL {{ ?gene glab:ensembl_id ?ensembl_id }}
+              OPTIONAL {{ ?gene biolink:symbol ?symbol }}
+            }}
+            ORDER BY ?gene ?ncbi_gene_id ?ensembl_id ?symbol
+            LIMIT {page_size}
+            OFFSET {offset}
+        """)
+        bindings = client.query().convert()["results"]["bindings"]
+        for b in bindings:
+            yield tuple(
+                b.get(var, {}).get("value", "")
+                for var in ("ncbi_gene_id", "ensembl_id", "symbol")
+            )
+        if len(bindings) < page_size:
+            break
+        offset += page_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.path.join(ROOT, "config", GENE_SNAPSHOT_FILENAME),
+                        help="Output path (default: config/gene_crosswalk.tsv.gz)")
+    args = parser.parse_args()
+
+    start = time.time()
+    crosswalk = Crosswalk(GENE_ID_TYPES, fetch_genes())
+    tmp_path = args.output + ".tmp" + (".gz" if args.output.endswith(".gz") else "")
+    crosswalk.write(tmp_path)
+    os.replace(tmp_path, args.output)
+
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"Wrote {args.output}: {len(crosswalk)} rows, {size_mb:.1f} MiB "
+          f"({time.time() - start:.1f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
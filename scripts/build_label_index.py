@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Build the ontology label snapshot (config/ubergraph_labels.tsv.gz).
+
+Exports rdfs:label and oboInOwl:hasExactSynonym values of ubergraph classes
+as a gzip-compressed TSV (uri, label, match_type). SPARQLServer.lookup_uri
+loads it into an in-process index (mcp_proto_okn.label_index) and only
+queries ubergraph when a label is not in the snapshot.
+
+Only the ontology prefixes listed below (or passed with --prefixes) are
+exported, to keep the snapshot (and server memory) small.
+
+Usage:
+    python scripts/build_label_index.py
+    python scripts/build_label_index.py --prefixes MONDO HP UBERON
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import sys
+import time
+from typing import Iterator, Tuple
+
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mcp_proto_okn.label_index import SNAPSHOT_FILENAME  # noqa: E402
+
+ENDPOINT = "https://apps.okn.us/federation/sparql"
+UBERGRAPH = "https://purl.org/okn/frink/kg/ubergraph"
+
+DEFAULT_PREFIXES = [
+    "MONDO", "DOID", "HP", "GO", "UBERON", "CL", "CHEBI", "SO", "EFO", "MAXO",
+]
+
+PREDICATES = {
+    "exact_label": "http://www.w3.org/2000/01/rdf-schema#label",
+    "exact_synonym": "http://www.geneontology.org/formats/oboInOwl#hasExactSynonym",
+}
+
+PAGE_SIZE = 50000
+
+
+def fetch_labels(prefix: str, page_size: int = PAGE_SIZE) -> Iterator[Tuple[str, str, str]]:
+    """Yield (uri, label, match_type) for all classes with the given OBO prefix."""
+    client = SPARQLWrapper(ENDPOINT)
+    client.setReturnFormat(JSON)
+    client.setMethod("POST")
+    client.setTimeout(600)
+
+    namespace = f"http://purl.obolibrary.org/obo/{prefix}_"
+    for match_type, predicate in PREDICATES.items():
+        offset = 0
+        while True:
+            client.setQuery(f"""
+                SELECT ?uri ?label
+                FROM <{UBERGRAPH}>
+                WHERE {{
+                  ?uri <{predicate}> ?label .
+                  FILTER(STRSTARTS(STR(?uri), "{namespace}"))
+                }}
+                ORDER BY ?uri ?label
+                LIMIT {page_size}
+                OFFSET {offset}
+            """)
+            bindings = client.query().convert()["results"]["bindings"]
+            for b in bindings:
+                # Tabs/newlines would break the TSV; labels never need them
+                label = " ".join(b["label"]["value"].split())
+                yield b["uri"]["value"], label, match_type
+            if len(bindings) < page_size:
+                break
+            offset += page_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefixes", nargs="+", default=DEFAULT_PREFIXES,
+                        help="OBO ontology prefixes to include")
+    parser.add_argument("--output", default=os.path.join(ROOT, "config", SNAPSHOT_FILENAME),
+                        help="Output path (default: config/ubergraph_labels.tsv.gz)")
+    args = parser.parse_args()
+
+    total = 0
+    with gzip.open(args.output, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", quoting=csv.QUOTE_NONE, escapechar="\\", lineterminator="\n")
+        writer.writerow(["uri", "label", "match_type"])
+        for prefix in args.prefixes:
+            start = time.time()
+            count = 0
+            try:
+                for row in fetch_labels(prefix):
+                    writer.writerow(row)
+                    count += 1
+            except Exception as e:
+                # Terms from a missing ontology are still found via the ubergraph fallback
+                print(f"Warning: {prefix} incomplete after {count} labels: {e}", file=sys.stderr)
+            total += count
+            print(f"{prefix}: {count} labels ({time.time() - start:.1f}s)", file=sys.stderr)
+
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"Wrote {args.output}: {total} labels, {size_mb:.1f} MiB", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
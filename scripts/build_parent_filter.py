@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Build the ontology parent-class snapshot (config/ontology_parents.json).
+
+The snapshot is a Bloom filter over every ubergraph class that has at least
+one rdfs:subClassOf child. SPARQLServer uses it (via
+mcp_proto_okn.expansion_filter) to skip descendant queries for leaf terms
+without a network round trip.
+
+Only the ontology prefixes listed below (or passed with --prefixes) are
+covered; URIs from other ontologies are always expanded.
+
+Usage:
+    python scripts/build_parent_filter.py
+    python scripts/build_parent_filter.py --prefixes MONDO HP --error-rate 0.001
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Set
+
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mcp_proto_okn.expansion_filter import BloomFilter, SNAPSHOT_FILENAME  # noqa: E402
+
+ENDPOINT = "https://apps.okn.us/federation/sparql"
+UBERGRAPH = "https://purl.org/okn/frink/kg/ubergraph"
+
+# Ontologies whose terms are most often used in Proto-OKN queries
+DEFAULT_PREFIXES = [
+    "MONDO", "DOID", "HP", "GO", "UBERON", "CL", "CHEBI", "PR", "SO",
+    "NCBITaxon", "MP", "EFO", "OBI", "ENVO", "PATO", "FOODON", "MAXO",
+]
+
+PAGE_SIZE = 50000
+
+
+def fetch_parents(prefix: str, page_size: int = PAGE_SIZE) -> Set[str]:
+    """Return all classes with the given OBO prefix that have a direct subclass."""
+    client = SPARQLWrapper(ENDPOINT)
+    client.setReturnFormat(JSON)
+    client.setMethod("POST")
+    client.setTimeout(600)
+
+    namespace = f"http://purl.obolibrary.org/obo/{prefix}_"
+    parents: Set[str] = set()
+    offset = 0
+    while True:
+        client.setQuery(f"""
+            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+            SELECT DISTINCT ?parent
+            FROM <{UBERGRAPH}>
+            WHERE {{
+              ?child rdfs:subClassOf ?parent .
+              FILTER(isIRI(?child) && isIRI(?parent) && ?child != ?parent)
+              FILTER(STRSTARTS(STR(?parent), "{namespace}"))
+            }}
+            ORDER BY ?parent
+            LIMIT {page_size}
+            OFFSET {offset}
+        """)
+        bindings = client.query().convert()["results"]["bindings"]
+        parents.update(b["parent"]["value"] for b in bindings)
+        if len(bindings) < page_size:
+            return parents
+        offset += page_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefixes", nargs="+", default=DEFAULT_PREFIXES,
+                        help="OBO ontology prefixes to include")
+    parser.add_argument("--error-rate", type=float, default=0.01,
+                        help="Target false-positive rate of the Bloom filter (default 0.01)")
+    parser.add_argument("--output", default=os.path.join(ROOT, "config", SNAPSHOT_FILENAME),
+                        help="Output path (default: config/ontology_parents.json)")
+    args = parser.parse_args()
+
+    all_parents: Set[str] = set()
+    covered: List[str] = []
+    for prefix in args.prefixes:
+        start = time.time()
+        try:
+            parents = fetch_parents(prefix)
+        except Exception as e:
+            # An ontology missing from the snapshot is simply always expanded
+            print(f"Warning: skipping {prefix}: {e}", file=sys.stderr)
+            continue
+        all_parents.update(parents)
+        covered.append(prefix.upper())
+        print(f"{prefix}: {len(parents)} parent classes ({time.time() - start:.1f}s)", file=sys.stderr)
+
+    bloom = BloomFilter.for_capacity(len(all_parents), args.error_rate)
+    for uri in sorted(all_parents):
+        bloom.add(uri)
+
+    snapshot = {
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": UBERGRAPH,
+        "prefixes": covered,
+        "error_rate": args.error_rate,
+        "filter": bloom.to_dict(),
+    }
+    with open(args.output, "w") as f:
+        json.dump(snapshot, f)
+        f.write("\n")
+
+    size_kb = os.path.getsize(args.output) / 1024
+    print(f"Wrote {args.output}: {len(all_parents)} classes, {len(covered)} ontologies, {size_kb:.0f} KiB",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Build the per-graph identifier presence filters (config/identifier_presence.json).
+
+For every graph and identifier type listed in IDENTIFIER_BRIDGES
+(identifier_mapping.py), collects the identifier values the graph contains
+and stores them in a Bloom filter. The server uses the filters (via
+mcp_proto_okn.presence) for graphs_containing() and to drop graphs from
+route_query() that definitely do not contain an identifier named in the
+question. The file sits next to config/registry.json and, like it, only
+changes when the graphs are reloaded.
+
+Values are collected from the bridge's ``property`` (a full IRI) or
+``uri_pattern`` (an IRI prefix of identifier nodes). Chemical identifiers
+are also read from the per-graph link caches of build_chemical_crosswalk.py
+(config/chemical_xrefs/) when present. Types with neither are skipped, so
+the graph is simply not indexed for them.
+
+Usage:
+    python scripts/build_presence_filters.py
+    python scripts/build_presence_filters.py --graphs spoke-okn biobricks-tox21 --error-rate 0.001
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Set
+
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mcp_proto_okn.identifier_mapping import IDENTIFIER_BRIDGES  # noqa: E402
+from mcp_proto_okn.presence import PRESENCE_SNAPSHOT_FILENAME, PresenceIndex  # noqa: E402
+
+ENDPOINT = "https://apps.okn.us/federation/sparql"
+KG_BASE = "https://purl.org/okn/frink/kg/"
+XREF_CACHE_DIR = os.path.join(ROOT, "config", "chemical_xrefs")
+
+PAGE_SIZE = 50000
+
+DEFAULT_GRAPHS = sorted({graph for graphs in IDENTIFIER_BRIDGES.values() for graph in graphs})
+
+
+def fetch_values(client: SPARQLWrapper, kg: str, pattern: str) -> Iterator[str]:
+    """Yield the distinct ?v bound by a graph pattern, page by page."""
+    offset = 0
+    while True:
+        client.setQuery(f"""
+            SELECT DISTINCT ?v
+            FROM <{KG_BASE}{kg}>
+            WHERE {{ {pattern} }}
+            ORDER BY ?v
+            LIMIT {PAGE_SIZE}
+            OFFSET {offset}
+        """)
+        bindings = client.query().convert()["results"]["bindings"]
+        for b in bindings:
+            yield b["v"]["value"]
+        if len(bindings) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+
+
+def cached_chemical_values(kg: str) -> Dict[str, Set[str]]:
+    """Identifier values per type from build_chemical_crosswalk.py's link cache."""
+    path = os.path.join(XREF_CACHE_DIR, f"{kg}.tsv.gz")
+    values: Dict[str, Set[str]] = {}
+    if os.path.exists(path):
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                if len(row) == 3:
+                    values.setdefault(row[1], set()).add(row[2])
+    return values
+
+
+def collect(client: SPARQLWrapper, kg: str) -> Dict[str, Set[str]]:
+    values = cached_chemical_values(kg)
+    for id_type, graphs in IDENTIFIER_BRIDGES.items():
+        bridge = graphs.get(kg)
+        if not bridge:
+            continue
+        prop = bridge.get("property", "")
+        prefix = bridge.get("uri_pattern", "")
+        if prop.startswith("http"):
+            pattern = f"?s <{prop}> ?v"
+        elif prefix.startswith("http"):
+            pattern = (f"{{ ?v ?p ?o }} UNION {{ ?s ?p ?v }} "
+                       f'FILTER(isIRI(?v) && STRSTARTS(STR(?v), "{prefix}"))')
+        else:
+            continue
+        try:
+            values.setdefault(id_type, set()).update(fetch_values(client, kg, pattern))
+        except Exception as e:
+            # An unindexed type is never used to skip the graph
+            print(f"Warning: skipping {kg} {id_type}: {e}", file=sys.stderr)
+            values.pop(id_type, None)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graphs", nargs="+", default=DEFAULT_GRAPHS,
+                        help="Graphs to index (default: graphs in IDENTIFIER_BRIDGES)")
+    parser.add_argument("--error-rate", type=float, default=0.01,
+                        help="Target false-positive rate of each Bloom filter (default 0.01)")
+    parser.add_argument("--output", default=os.path.join(ROOT, "config", PRESENCE_SNAPSHOT_FILENAME),
+                        help="Output path (default: config/identifier_presence.json)")
+    args = parser.parse_args()
+
+    client = SPARQLWrapper(ENDPOINT)
+    client.setReturnFormat(JSON)
+    client.setMethod("POST")
+    client.setTimeout(600)
+
+    values = {}
+    for kg in args.graphs:
+        start = time.time()
+        values[kg] = collect(client, kg)
+        counts = ", ".join(f"{t}={len(v)}" for t, v in sorted(values[kg].items())) or "nothing indexed"
+        print(f"{kg}: {counts} ({time.time() - start:.1f}s)", file=sys.stderr)
+
+    index = PresenceIndex.build(values, args.error_rate)
+    index.built_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    snapshot = {**index.to_dict(), "error_rate": args.error_rate}
+    with open(args.output, "w") as f:
+        json.dump(snapshot, f)
+        f.write("\n")
+
+    size_kb = os.path.getsize(args.output) / 1024
+    print(f"Wrote {args.output}: {len(index.filters)} graphs, {size_kb:.0f} KiB", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
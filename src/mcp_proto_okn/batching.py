@@ -0,0 +1,83 @@
+"""
+Micro-batching of concurrent blocking calls.
+
+Agents often fire several independent lookups at once (one lookup_uri per
+term in a question). MicroBatcher collects calls that arrive within a short
+window and hands them to a batch handler in one go, so N concurrent lookups
+cost one upstream request instead of N.
+
+The first caller of a batch becomes its leader: it waits up to ``window``
+seconds (or until ``max_batch`` calls are queued), runs the handler on the
+caller's thread and distributes the results. Other callers simply block on
+their future. There is no background thread.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+class MicroBatcher:
+    """Merges concurrent ``submit`` calls into batched handler invocations."""
+
+    def __init__(
+        self,
+        handler: Callable[[List[Hashable]], Dict[Hashable, Any]],
+        window: float = 0.005,
+        max_batch: int = 50,
+    ):
+        """
+        Args:
+            handler: Called with a list of distinct keys; returns a dict mapping
+                each key to its result. Keys missing from the dict resolve to None.
+                An exception fails every call in the batch.
+            window: Seconds the batch leader waits for more calls.
+            max_batch: Maximum keys per handler invocation.
+        """
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[Hashable, Future]] = []
+        self._leader_active = False
+
+    def submit(self, key: Hashable) -> Any:
+        """Return the handler's result for ``key``, batched with concurrent calls."""
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((key, future))
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+            leader = not self._leader_active
+            if leader:
+                self._leader_active = True
+
+        if leader:
+            self._lead()
+        return future.result()
+
+    def _lead(self) -> None:
+        """Drain the queue batch by batch until it is empty."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= self.max_batch, timeout=self.window)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                more = bool(self._pending)
+                if not more:
+                    # The next submit() becomes the leader of a new batch
+                    self._leader_active = False
+            self._run(batch)
+            if not more:
+                return
+
+    def _run(self, batch: List[Tuple[Hashable, Future]]) -> None:
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        try:
+            results = self.handler(keys)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for key, future in batch:
+            future.set_result(results.get(key))
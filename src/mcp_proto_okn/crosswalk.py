@@ -0,0 +1,286 @@
+"""
+Local identifier crosswalks (genes: NCBI Gene <-> Ensembl <-> symbol;
+chemicals: CAS <-> ChEBI <-> PubChem <-> InChIKey <-> ChEMBL <-> DTXSID).
+
+Translating identifiers used to need a SPARQL round trip to a bridge graph
+per call (build_gene_bridge_query) or ad-hoc queries against each chemical
+graph. A Crosswalk holds the same mapping locally: a table with one column
+per identifier type, and a hash index per column, so a lookup in any
+direction is a dict access. A cell may hold several identifiers separated by
+``|`` (a chemical with two CAS numbers); the chemical crosswalk has one row
+per cluster of equivalent identifiers.
+
+Values are stored normalized (identifier_mapping.normalize_identifier), so
+IRIs, CURIEs and literals of an identifier all find the same rows.
+
+Snapshots are (optionally gzip-compressed) TSV files whose header row names
+the identifier types, written by the scripts/build_*_crosswalk.py scripts.
+Loaded snapshots are re-read when the file changes, so a scheduled rebuild
+(e.g. a nightly cron job) takes effect without restarting the server.
+"""
+
+import csv
+import gzip
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .expansion_filter import find_snapshot
+from .identifier_mapping import normalize_identifier
+
+GENE_SNAPSHOT_FILENAME = "gene_crosswalk.tsv.gz"
+GENE_ID_TYPES = ("NCBI_Gene", "Ensembl", "GeneSymbol")
+
+CHEMICAL_SNAPSHOT_FILENAME = "chemical_crosswalk.tsv.gz"
+CHEMICAL_ID_TYPES = ("CAS", "ChEBI", "PubChem", "InChIKey", "ChEMBL", "DTXSID")
+
+# Separates multiple identifiers of one type within a cell
+CELL_SEPARATOR = "|"
+
+# Self-describing forms of chemical identifiers, for classifying values
+# without a known type. PubChem CIDs are bare numbers, so only their IRI
+# and CURIE forms are recognized.
+CHEMICAL_ID_SIGNATURES = {
+    "CAS": re.compile(r"(?:^|cas[:/])\d{2,7}-\d{2}-\d$", re.IGNORECASE),
+    "ChEBI": re.compile(r"CHEBI[_:]\d+$", re.IGNORECASE),
+    "PubChem": re.compile(r"(?:pubchem\.ncbi\.nlm\.nih\.gov/compound/|pubchem\.compound[:/]|^CID:?)\d+$",
+                          re.IGNORECASE),
+    "InChIKey": re.compile(r"(?:^|[:/=])[A-Z]{14}-[A-Z]{10}-[A-Z]$"),
+    "ChEMBL": re.compile(r"CHEMBL\d+$", re.IGNORECASE),
+    "DTXSID": re.compile(r"DTXSID\d+$", re.IGNORECASE),
+}
+
+# Clusters with more identifiers than this come from over-broad links
+# (e.g. an owl:sameAs to a mixture) and are left out of the chemical crosswalk
+MAX_CLUSTER_SIZE = 50
+
+# Seconds between checks of a loaded snapshot's modification time
+RELOAD_CHECK_INTERVAL = 60.0
+
+# Convenience spellings accepted by resolve_id_type()
+ID_TYPE_ALIASES = {
+    "ncbi": "NCBI_Gene",
+    "ncbigene": "NCBI_Gene",
+    "ncbi_gene": "NCBI_Gene",
+    "entrez": "NCBI_Gene",
+    "ensembl": "Ensembl",
+    "symbol": "GeneSymbol",
+    "genesymbol": "GeneSymbol",
+    "gene_symbol": "GeneSymbol",
+    "cas_rn": "CAS",
+    "pubchem_cid": "PubChem",
+    "cid": "PubChem",
+    "dsstox": "DTXSID",
+}
+
+
+class Crosswalk:
+    """Identifier table with a hash index on every column."""
+
+    def __init__(self, id_types: Sequence[str], rows: Iterable[Sequence[str]]):
+        self.id_types: Tuple[str, ...] = tuple(id_types)
+        self._rows: List[Tuple[Tuple[str, ...], ...]] = []
+        self._index: Dict[str, Dict[str, List[int]]] = {t: {} for t in self.id_types}
+        seen = set()
+        for row in rows:
+            normalized = tuple(
+                tuple(dict.fromkeys(
+                    normalize_identifier(value, id_type)
+                    for value in cell.split(CELL_SEPARATOR) if value
+                ))
+                for id_type, cell in zip(self.id_types, row)
+            )
+            if normalized in seen or not any(normalized):
+                continue
+            seen.add(normalized)
+            row_id = len(self._rows)
+            self._rows.append(normalized)
+            for id_type, values in zip(self.id_types, normalized):
+                for value in values:
+                    self._index[id_type].setdefault(value, []).append(row_id)
+
+    @classmethod
+    def from_file(cls, path: str) -> "Crosswalk":
+        """Load a snapshot TSV (``.gz`` is decompressed transparently)."""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+            header = next(reader, None)
+            if not header:
+                raise ValueError(f"{path}: missing header row")
+            return cls(header, (row for row in reader if len(row) == len(header)))
+
+    def write(self, path: str) -> None:
+        """Write the table as a snapshot TSV (gzip-compressed if ``path`` ends in .gz)."""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t", quoting=csv.QUOTE_NONE, lineterminator="\n")
+            writer.writerow(self.id_types)
+            writer.writerows(
+                [CELL_SEPARATOR.join(values) for values in row] for row in self._rows
+            )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def supports(self, id_type: str) -> bool:
+        return id_type in self._index
+
+    def lookup(self, value: str, from_type: str, to_type: str) -> List[str]:
+        """Identifiers of ``to_type`` for one ``from_type`` value (normalized, deduplicated)."""
+        column = self.id_types.index(to_type)
+        key = normalize_identifier(value, from_type)
+        matches = []
+        for row_id in self._index[from_type].get(key, ()):
+            for target in self._rows[row_id][column]:
+                if target not in matches:
+                    matches.append(target)
+        return matches
+
+    def canonical(self, value: str, id_type: Optional[str] = None) -> Optional[str]:
+        """A representative identifier for the row ``value`` belongs to, e.g. "CAS:50-00-0".
+
+        Equivalent identifiers of any type map to the same representative, so
+        it can serve as a join key. ``id_type`` is detected from the value if
+        not given. None if the value is not in the crosswalk.
+        """
+        if id_type not in self._index:
+            id_type = detect_chemical_type(value)
+        if id_type not in self._index:
+            return None
+        row_ids = self._index[id_type].get(normalize_identifier(value, id_type))
+        if not row_ids:
+            return None
+        row = self._rows[min(row_ids)]
+        for column, values in zip(self.id_types, row):
+            if values:
+                return f"{column}:{values[0]}"
+        return None
+
+    def translate(self, ids: Iterable[str], from_type: str, to_type: str) -> Dict[str, object]:
+        """Translate many identifiers at once.
+
+        Returns a dict with ``translations`` (input id -> list of targets, only
+        for ids that mapped) and ``unmapped`` (input ids without a match).
+        """
+        for id_type in (from_type, to_type):
+            if not self.supports(id_type):
+                raise ValueError(
+                    f"Unknown identifier type '{id_type}'. Supported: {', '.join(self.id_types)}"
+                )
+        translations: Dict[str, List[str]] = {}
+        unmapped: List[str] = []
+        for value in dict.fromkeys(ids):
+            targets = self.lookup(value, from_type, to_type)
+            if targets:
+                translations[value] = targets
+            else:
+                unmapped.append(value)
+        return {"translations": translations, "unmapped": unmapped}
+
+
+def detect_chemical_type(value: str) -> Optional[str]:
+    """Guess the type of a self-describing chemical identifier (IRI, CURIE or literal)."""
+    value = value.strip()
+    for id_type, signature in CHEMICAL_ID_SIGNATURES.items():
+        if signature.search(value):
+            return id_type
+    return None
+
+
+def cluster_identifiers(
+    links: Iterable[Tuple[Tuple[str, str], Tuple[str, str]]],
+    id_types: Sequence[str] = CHEMICAL_ID_TYPES,
+    max_size: int = MAX_CLUSTER_SIZE,
+) -> Iterator[List[str]]:
+    """Group linked identifiers into crosswalk rows.
+
+    ``links`` are pairs of nodes, each node an ``(id_type, value)`` tuple.
+    Nodes whose type is not in ``id_types`` (typically the graph's own IRI
+    for a chemical) only connect identifiers. Identifiers connected directly
+    or through such nodes form one row, with ``|``-separated cells. Clusters
+    with fewer than two identifiers or more than ``max_size`` are skipped.
+    """
+    parent: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+    def node_key(node):
+        id_type, value = node
+        return (id_type, normalize_identifier(value, id_type)) if id_type in id_types else node
+
+    def find(node):
+        root = parent.setdefault(node, node)
+        while root != parent[root]:
+            root = parent[root]
+        while node != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for a, b in links:
+        root_a, root_b = find(node_key(a)), find(node_key(b))
+        if root_a != root_b:
+            parent[root_a] = root_b
+
+    clusters: Dict[Tuple[str, str], Dict[str, set]] = {}
+    for node in parent:
+        id_type, value = node
+        if id_type in id_types:
+            cells = clusters.setdefault(find(node), {})
+            cells.setdefault(id_type, set()).add(value)
+    for cells in clusters.values():
+        size = sum(len(values) for values in cells.values())
+        if 2 <= size <= max_size:
+            yield [CELL_SEPARATOR.join(sorted(cells.get(t, ()))) for t in id_types]
+
+
+def resolve_id_type(name: str, id_types: Sequence[str]) -> str:
+    """Map a user-supplied identifier type name onto one of ``id_types``."""
+    for id_type in id_types:
+        if name.casefold() == id_type.casefold():
+            return id_type
+    alias = ID_TYPE_ALIASES.get(name.casefold().replace("-", "_").replace(" ", "_"))
+    if alias in id_types:
+        return alias
+    raise ValueError(f"Unknown identifier type '{name}'. Supported: {', '.join(id_types)}")
+
+
+# path -> (mtime, last check, crosswalk)
+_loaded: Dict[str, Tuple[float, float, Optional[Crosswalk]]] = {}
+_load_lock = threading.Lock()
+
+
+def _load(path: str) -> Optional[Crosswalk]:
+    now = time.monotonic()
+    entry = _loaded.get(path)
+    if entry and now - entry[1] < RELOAD_CHECK_INTERVAL:
+        return entry[2]
+    with _load_lock:
+        entry = _loaded.get(path)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            _loaded[path] = (0.0, now, None)
+            return None
+        if entry and entry[0] == mtime and entry[2] is not None:
+            _loaded[path] = (mtime, now, entry[2])
+            return entry[2]
+        try:
+            crosswalk = Crosswalk.from_file(path)
+        except (OSError, ValueError, csv.Error):
+            # Keep serving the previous copy if a rebuild left a broken file
+            crosswalk = entry[2] if entry else None
+        _loaded[path] = (mtime, now, crosswalk)
+        return crosswalk
+
+
+def load_gene_crosswalk(path: Optional[str] = None) -> Optional[Crosswalk]:
+    """Return the gene crosswalk for ``path`` (or the default snapshot), or None if unavailable."""
+    path = path or find_snapshot(GENE_SNAPSHOT_FILENAME, "MCP_PROTO_OKN_GENE_CROSSWALK")
+    return _load(path) if path else None
+
+
+def load_chemical_crosswalk(path: Optional[str] = None) -> Optional[Crosswalk]:
+    """Return the chemical crosswalk for ``path`` (or the default snapshot), or None if unavailable."""
+    path = path or find_snapshot(CHEMICAL_SNAPSHOT_FILENAME, "MCP_PROTO_OKN_CHEMICAL_CROSSWALK")
+    return _load(path) if path else None
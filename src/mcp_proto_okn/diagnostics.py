@@ -0,0 +1,188 @@
+"""
+On-demand CPU and memory profiling for the HTTP transport.
+
+Disabled unless ``MCP_PROTO_OKN_ADMIN_TOKEN`` is set; the endpoints then
+require that token in an ``X-Admin-Token`` header (in addition to the API
+key, when one is configured):
+
+- ``GET /admin/profile/cpu?seconds=10&interval=0.01`` samples the stacks of
+  all threads for ``seconds`` (at most MAX_PROFILE_SECONDS) and returns them
+  in collapsed-stack format, one ``frame;frame;frame count`` line per stack,
+  which flamegraph.pl, inferno and speedscope read directly. Only one CPU
+  profile runs at a time.
+- ``GET /admin/profile/memory?seconds=30&top=25`` traces allocations with
+  tracemalloc for ``seconds`` (at most MAX_PROFILE_SECONDS) and returns the
+  ``top`` allocation sites at the end and their growth over the window.
+  Tracing stops when the window ends. Only one memory profile runs at a time.
+
+Nothing runs while idle: the sampler is a thread that exists only for the
+duration of a CPU profile, and tracemalloc is on only during a memory profile.
+"""
+
+import hmac
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+ADMIN_PREFIX = "/admin/profile"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+MAX_PROFILE_SECONDS = 120
+DEFAULT_INTERVAL = 0.01
+DEFAULT_TOP = 25
+# Stack depth recorded per tracemalloc allocation
+TRACEMALLOC_FRAMES = 10
+
+
+def admin_token() -> Optional[str]:
+    return os.environ.get("MCP_PROTO_OKN_ADMIN_TOKEN") or None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, interval: float = DEFAULT_INTERVAL) -> Counter:
+    """Sample every thread's stack each ``interval`` for ``seconds``.
+
+    Returns a Counter of collapsed stacks (``thread;outer;...;inner``) to the
+    number of samples that saw them. The calling thread is not sampled.
+    """
+    samples: Counter = Counter()
+    me = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while True:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            samples[";".join(reversed(stack))] += 1
+        if time.monotonic() >= deadline:
+            return samples
+        time.sleep(interval)
+
+
+def collapsed(samples: Counter) -> str:
+    """Render samples in the collapsed-stack format read by flamegraph tools."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+
+
+def _site(stat) -> Dict[str, Any]:
+    # tracemalloc orders frames oldest first; report the allocating line first
+    frames = [f"{f.filename}:{f.lineno}" for f in reversed(stat.traceback)]
+    return {"site": frames[0], "traceback": frames}
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+def trace_allocations(seconds: float, top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    """Trace allocations for ``seconds`` and report the ``top`` sites.
+
+    Returns the largest allocation sites at the end of the window and the
+    sites that grew most during it. tracemalloc is started for the window and
+    stopped afterwards, unless it was already tracing (e.g. started with
+    PYTHONTRACEMALLOC), in which case it is left running.
+    """
+    if top < 1:
+        raise ValueError(f"top must be at least 1 (got {top})")
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        baseline = _snapshot()
+        time.sleep(seconds)
+        snapshot = _snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started:
+            tracemalloc.stop()
+    stats: List = snapshot.statistics("traceback")[:top]
+    diff: List = [d for d in snapshot.compare_to(baseline, "traceback") if d.size_diff][:top]
+    return {
+        "seconds": seconds,
+        "traced_bytes": current,
+        "peak_traced_bytes": peak,
+        "top_sites": [{**_site(s), "bytes": s.size, "blocks": s.count} for s in stats],
+        "growth": [
+            {**_site(d), "bytes": d.size, "bytes_diff": d.size_diff, "blocks_diff": d.count_diff}
+            for d in diff
+        ],
+    }
+
+
+def add_admin_routes(app):
+    """Attach the profiling endpoints to a Starlette app if an admin token is configured."""
+    token = admin_token()
+    if token is None:
+        return app
+
+    import anyio
+    from starlette.responses import JSONResponse, PlainTextResponse
+    from starlette.routing import Route
+
+    cpu_lock = threading.Lock()
+    memory_lock = threading.Lock()
+
+    def _authorized(request) -> bool:
+        return hmac.compare_digest(request.headers.get(ADMIN_TOKEN_HEADER, ""), token)
+
+    def _number(request, name: str, default: float) -> float:
+        value = float(request.query_params.get(name, default))
+        # nan would pass the clamping below and never reach a deadline
+        if not math.isfinite(value):
+            raise ValueError(f"{name} must be finite")
+        return value
+
+    async def _cpu(request):
+        if not _authorized(request):
+            return JSONResponse({"error": "Invalid or missing admin token"}, status_code=403)
+        try:
+            seconds = min(max(_number(request, "seconds", 10), 0.0), MAX_PROFILE_SECONDS)
+            interval = max(_number(request, "interval", DEFAULT_INTERVAL), 0.001)
+        except ValueError:
+            return JSONResponse({"error": "seconds and interval must be numbers"}, status_code=400)
+        if not cpu_lock.acquire(blocking=False):
+            return JSONResponse({"error": "A CPU profile is already running"}, status_code=409)
+        try:
+            # In a worker thread, so the event loop keeps serving (and being sampled)
+            samples = await anyio.to_thread.run_sync(sample_stacks, seconds, interval)
+        finally:
+            cpu_lock.release()
+        return PlainTextResponse(collapsed(samples))
+
+    async def _memory(request):
+        if not _authorized(request):
+            return JSONResponse({"error": "Invalid or missing admin token"}, status_code=403)
+        try:
+            seconds = min(max(_number(request, "seconds", 10), 0.0), MAX_PROFILE_SECONDS)
+            top = int(request.query_params.get("top", DEFAULT_TOP))
+        except ValueError:
+            return JSONResponse({"error": "seconds must be a number and top an integer"}, status_code=400)
+        if top < 1:
+            return JSONResponse({"error": "top must be at least 1"}, status_code=400)
+        if not memory_lock.acquire(blocking=False):
+            return JSONResponse({"error": "A memory profile is already running"}, status_code=409)
+        try:
+            result = await anyio.to_thread.run_sync(trace_allocations, seconds, top)
+        finally:
+            memory_lock.release()
+        return JSONResponse(result)
+
+    app.router.routes.insert(0, Route(f"{ADMIN_PREFIX}/cpu", _cpu, methods=["GET"]))
+    app.router.routes.insert(0, Route(f"{ADMIN_PREFIX}/memory", _memory, methods=["GET"]))
+    return app
@@ -0,0 +1,230 @@
+"""
+Membership filter deciding which ontology URIs are worth expanding.
+
+SPARQLServer._detect_ontology_uris matches every OBO term in a query, plus
+schema IRIs such as owl:Class or chebi#has_functional_parent. Most leaf terms
+have no subclasses, so expanding them costs a ubergraph round trip that
+returns nothing.
+
+ExpansionFilter answers "could this URI have descendants?" without a network
+call, from three sources (checked in this order):
+
+1. A negative cache of URIs whose expansion recently came back empty.
+2. URIs observed to have descendants at runtime.
+3. An optional snapshot: a Bloom filter over every ubergraph class that has
+   at least one rdfs:subClassOf child, built by
+   ``scripts/build_parent_filter.py``. A Bloom filter has no false negatives,
+   so a URI it rejects is a leaf (as of the snapshot); a false positive only
+   costs the round trip we would have made anyway. The snapshot records
+   which ontology prefixes it covers, and URIs from other prefixes are
+   always expanded.
+
+Non-hierarchical IRIs (OWL vocabulary, OBO object properties) are never
+expanded.
+"""
+
+import base64
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds an empty expansion result is remembered
+DEFAULT_NEGATIVE_TTL = float(os.environ.get("MCP_PROTO_OKN_LEAF_CACHE_TTL", "86400"))
+
+# Maximum number of URIs kept in the negative cache / observed-parent set
+MAX_CACHED_URIS = 100_000
+
+SNAPSHOT_FILENAME = "ontology_parents.json"
+
+# IRIs that name vocabulary terms or properties rather than classes
+_NON_HIERARCHICAL = re.compile(
+    r"^(?:http://www\.w3\.org/2002/07/owl#"
+    r"|http://purl\.obolibrary\.org/obo/[A-Za-z]+#"
+    r"|http://purl\.obolibrary\.org/obo/uberon/core#"
+    r"|http://purl\.obolibrary\.org/obo/chebi/)"
+)
+
+_OBO_TERM = re.compile(r"^http://purl\.obolibrary\.org/obo/([A-Za-z]+)_\d+$")
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing with BLAKE2b)."""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None, count: int = 0):
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, num_hashes)
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        """Size a filter for ``capacity`` items at the given false-positive rate."""
+        capacity = max(1, capacity)
+        num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_dict(self) -> Dict:
+        """Serialize to a JSON-compatible dict (bits are zlib-compressed base64)."""
+        return {
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "count": self.count,
+            "bits": base64.b64encode(zlib.compress(bytes(self.bits), 9)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BloomFilter":
+        bits = bytearray(zlib.decompress(base64.b64decode(data["bits"])))
+        return cls(data["num_bits"], data["num_hashes"], bits=bits, count=data.get("count", 0))
+
+
+def ontology_prefix(uri: str) -> Optional[str]:
+    """Return the OBO ontology prefix of a term URI (``MONDO`` for MONDO_0005578)."""
+    match = _OBO_TERM.match(uri)
+    return match.group(1).upper() if match else None
+
+
+def find_snapshot(filename: str, env_var: str) -> Optional[str]:
+    """Locate a snapshot file: ``env_var`` if set, else the packaged copy, else config/."""
+    env_path = os.environ.get(env_var)
+    if env_path:
+        return env_path if os.path.exists(env_path) else None
+    pkg_dir = os.path.dirname(os.path.abspath(__file__))
+    candidates = [
+        os.path.join(pkg_dir, filename),
+        os.path.join(pkg_dir, "..", "..", "config", filename),
+        os.path.join(os.getcwd(), "config", filename),
+    ]
+    for candidate in candidates:
+        resolved = os.path.normpath(candidate)
+        if os.path.exists(resolved):
+            return resolved
+    return None
+
+
+@lru_cache(maxsize=4)
+def load_snapshot(path: str) -> Tuple[BloomFilter, frozenset]:
+    """Load a snapshot written by scripts/build_parent_filter.py."""
+    with open(path) as f:
+        data = json.load(f)
+    prefixes = frozenset(p.upper() for p in data.get("prefixes", []))
+    return BloomFilter.from_dict(data["filter"]), prefixes
+
+
+class ExpansionFilter:
+    """Decides whether an ontology URI needs a descendant query."""
+
+    def __init__(
+        self,
+        parents: Optional[BloomFilter] = None,
+        covered_prefixes: Iterable[str] = (),
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        max_size: int = MAX_CACHED_URIS,
+    ):
+        """
+        Args:
+            parents: Bloom filter over classes known to have subclasses.
+            covered_prefixes: Ontology prefixes (e.g. ``MONDO``) the filter was built for.
+            negative_ttl: Seconds an empty expansion is remembered.
+            max_size: Maximum entries in the negative cache and observed-parent set.
+        """
+        self.parents = parents
+        self.covered_prefixes = frozenset(p.upper() for p in covered_prefixes)
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._leaves: "OrderedDict[str, float]" = OrderedDict()  # uri -> expiry
+        self._observed: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, path: Optional[str] = None, **kwargs) -> "ExpansionFilter":
+        """Create a filter backed by the snapshot at ``path`` (or the default location).
+
+        Falls back to runtime learning only when no snapshot is available.
+        """
+        path = path or find_snapshot(SNAPSHOT_FILENAME, "MCP_PROTO_OKN_PARENT_FILTER")
+        if path:
+            try:
+                parents, prefixes = load_snapshot(path)
+                return cls(parents=parents, covered_prefixes=prefixes, **kwargs)
+            except (OSError, ValueError, KeyError):
+                pass
+        return cls(**kwargs)
+
+    @staticmethod
+    def is_hierarchical(uri: str) -> bool:
+        """True unless ``uri`` is an OWL vocabulary term or an OBO property IRI."""
+        return not _NON_HIERARCHICAL.match(uri)
+
+    def should_expand(self, uri: str) -> bool:
+        """Return False if ``uri`` is known (or can be shown) to have no descendants."""
+        if not self.is_hierarchical(uri):
+            return False
+        with self._lock:
+            expiry = self._leaves.get(uri)
+            if expiry is not None:
+                if expiry > time.monotonic():
+                    return False
+                del self._leaves[uri]
+            if uri in self._observed:
+                return True
+        if self.parents is not None and ontology_prefix(uri) in self.covered_prefixes:
+            return uri in self.parents
+        return True
+
+    def partition(self, uris: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Split ``uris`` into (to_expand, skipped)."""
+        to_expand, skipped = [], []
+        for uri in uris:
+            (to_expand if self.should_expand(uri) else skipped).append(uri)
+        return to_expand, skipped
+
+    def record(self, uri: str, has_descendants: bool) -> None:
+        """Remember the outcome of a successful expansion of ``uri``."""
+        with self._lock:
+            if has_descendants:
+                self._leaves.pop(uri, None)
+                self._observed[uri] = None
+                self._observed.move_to_end(uri)
+                while len(self._observed) > self.max_size:
+                    self._observed.popitem(last=False)
+            else:
+                self._observed.pop(uri, None)
+                self._leaves[uri] = time.monotonic() + self.negative_ttl
+                self._leaves.move_to_end(uri)
+                while len(self._leaves) > self.max_size:
+                    self._leaves.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Sizes of the snapshot and runtime caches."""
+        with self._lock:
+            return {
+                "snapshot_classes": self.parents.count if self.parents is not None else 0,
+                "snapshot_prefixes": len(self.covered_prefixes),
+                "cached_leaves": len(self._leaves),
+                "observed_parents": len(self._observed),
+            }
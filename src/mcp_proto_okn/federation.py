@@ -0,0 +1,143 @@
+"""
+Single-request execution of multi-graph queries on the federation endpoint.
+
+Every Proto-OKN graph is a named graph behind the same federation endpoint,
+so per-graph SELECT queries can be combined into one UNION query instead of
+N round trips:
+
+    PREFIX ...                      (merged prologues)
+    SELECT ?source_graph ?a ?b
+    FROM NAMED <https://purl.org/okn/frink/kg/spoke-okn>
+    FROM NAMED <https://purl.org/okn/frink/kg/dreamkg>
+    WHERE {
+      { GRAPH <.../spoke-okn> { SELECT ?a ... } BIND("spoke-okn" AS ?source_graph) }
+      UNION
+      { GRAPH <.../dreamkg> { SELECT ?a ?b ... } BIND("dreamkg" AS ?source_graph) }
+    }
+
+Each branch keeps its own ORDER BY/LIMIT as a subquery. Queries that cannot
+be embedded this way (non-SELECT forms, ``SELECT *``, explicit FROM/GRAPH
+clauses, conflicting prefixes) raise IncompatibleQueryError, and the caller
+falls back to one request per graph.
+"""
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+SOURCE_GRAPH_VAR = "source_graph"
+
+_PREFIX_DECL = re.compile(r'PREFIX\s+([\w.-]*):\s*<([^>]*)>', re.IGNORECASE)
+_SELECT = re.compile(r'SELECT\b\s*(?:(?:DISTINCT|REDUCED)\b\s*)?', re.IGNORECASE)
+# Keywords, not variables (?graph), prefixed names (ex:graph) or IRI segments
+_KEYWORD = r'(?<![\w?$:/#.-])'
+_PROJECTION_END = re.compile(_KEYWORD + r'(?:WHERE|FROM)\b|\{', re.IGNORECASE)
+_DATASET_OR_GRAPH = re.compile(_KEYWORD + r'(?:FROM|GRAPH|SERVICE)\b', re.IGNORECASE)
+_VARIABLE = re.compile(r'[?$](\w+)')
+
+
+class IncompatibleQueryError(ValueError):
+    """A query cannot be embedded in a federated UNION query."""
+
+
+def split_prologue(query: str) -> Tuple[Dict[str, str], str]:
+    """Split leading PREFIX declarations (and comments) from the query body."""
+    prefixes: Dict[str, str] = {}
+    rest = query
+    while True:
+        rest = rest.lstrip()
+        if rest.startswith("#"):
+            newline = rest.find("\n")
+            rest = "" if newline < 0 else rest[newline + 1:]
+            continue
+        match = _PREFIX_DECL.match(rest)
+        if match:
+            prefixes[match.group(1)] = match.group(2)
+            rest = rest[match.end():]
+            continue
+        if re.match(r'BASE\b', rest, re.IGNORECASE):
+            raise IncompatibleQueryError("BASE declarations are not supported")
+        return prefixes, rest
+
+
+def projected_variables(select_query: str) -> List[str]:
+    """Variables projected by a SELECT query body, in order.
+
+    Handles ``(expr AS ?v)`` projections; raises for ``SELECT *``.
+    """
+    match = _SELECT.match(select_query)
+    if not match:
+        raise IncompatibleQueryError("only SELECT queries can be federated")
+    end = _PROJECTION_END.search(select_query, match.end())
+    clause = select_query[match.end():end.start() if end else len(select_query)]
+    if clause.strip().startswith("*"):
+        raise IncompatibleQueryError("SELECT * has no fixed column list")
+
+    variables: List[str] = []
+    depth = 0
+    pos = 0
+    while pos < len(clause):
+        char = clause[pos]
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and char in "?$":
+            var = _VARIABLE.match(clause, pos)
+            if var:
+                variables.append(var.group(1))
+                pos = var.end()
+                continue
+        elif depth == 1 and clause[pos:pos + 2].upper() == "AS":
+            alias = re.match(r'AS\s+[?$](\w+)', clause[pos:], re.IGNORECASE)
+            if alias and (pos == 0 or not clause[pos - 1].isalnum()):
+                variables.append(alias.group(1))
+                pos += alias.end()
+                continue
+        pos += 1
+    if not variables:
+        raise IncompatibleQueryError("no projected variables found")
+    return variables
+
+
+def compile_union_query(branches: Sequence[Tuple[str, str, str]]) -> Tuple[str, List[str]]:
+    """Combine per-graph SELECT queries into one UNION query.
+
+    Args:
+        branches: (graph_name, graph_uri, query) per graph.
+
+    Returns:
+        (query, columns) where columns starts with ``source_graph``.
+
+    Raises:
+        IncompatibleQueryError: if any query cannot be combined.
+    """
+    prefixes: Dict[str, str] = {}
+    columns: List[str] = [SOURCE_GRAPH_VAR]
+    parts = []
+    for graph_name, graph_uri, query in branches:
+        branch_prefixes, body = split_prologue(query)
+        for name, iri in branch_prefixes.items():
+            if prefixes.setdefault(name, iri) != iri:
+                raise IncompatibleQueryError(f"prefix '{name}:' is bound to different IRIs")
+        variables = projected_variables(body)
+        if SOURCE_GRAPH_VAR in variables:
+            raise IncompatibleQueryError(f"?{SOURCE_GRAPH_VAR} is reserved")
+        if _DATASET_OR_GRAPH.search(body):
+            raise IncompatibleQueryError(f"{graph_name}: FROM/GRAPH/SERVICE clauses cannot be scoped")
+        for var in variables:
+            if var not in columns:
+                columns.append(var)
+        parts.append(
+            f"  {{\n    GRAPH <{graph_uri}> {{\n{body.strip()}\n    }}\n"
+            f"    BIND(\"{graph_name}\" AS ?{SOURCE_GRAPH_VAR})\n  }}"
+        )
+
+    prologue = "".join(f"PREFIX {name}: <{iri}>\n" for name, iri in prefixes.items())
+    dataset = "".join(f"FROM NAMED <{uri}>\n" for _, uri, _ in branches)
+    projection = " ".join(f"?{var}" for var in columns)
+    query = (
+        f"{prologue}SELECT {projection}\n{dataset}WHERE {{\n"
+        + "\n  UNION\n".join(parts)
+        + "\n}"
+    )
+    return query, columns
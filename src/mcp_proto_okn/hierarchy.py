@@ -0,0 +1,158 @@
+"""
+Interval labeling of ontology hierarchies and local post-filtering of results.
+
+Broad roots such as CL_0000000 ("cell") or GO_0008150 ("biological_process")
+expand to thousands of descendants. Shipping them back to the endpoint as
+VALUES lists means dozens of batches (a Cartesian product when several URIs
+are expanded). The post-filter strategy instead runs the query once with the
+ontology term replaced by a variable and keeps only rows whose binding is a
+descendant of the root.
+
+IntervalHierarchy makes that check cheap. Nodes are numbered in DFS
+post-order; every node is labeled with the post-order interval of its
+spanning-tree subtree, plus the intervals inherited over non-tree edges
+(subClassOf is a DAG). Intervals are merged, so a descendant test is a
+dictionary lookup and a binary search over a handful of intervals.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Interval = Tuple[int, int]
+
+
+def _merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Merge overlapping or adjacent integer intervals."""
+    merged: List[Interval] = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1] + 1:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+class IntervalHierarchy:
+    """Reachability labels for the subClassOf DAG below a set of roots."""
+
+    def __init__(self, edges: Iterable[Tuple[str, str]], roots: Iterable[str]):
+        """
+        Args:
+            edges: (child, parent) subClassOf pairs. Edges outside the subgraph
+                reachable from ``roots`` are ignored.
+            roots: Top-level classes of the hierarchy.
+        """
+        children: Dict[str, List[str]] = {}
+        for child, parent in edges:
+            if child != parent:
+                children.setdefault(parent, []).append(child)
+
+        self.roots = list(dict.fromkeys(roots))
+        self._post: Dict[str, int] = {}
+        self._intervals: Dict[str, List[Interval]] = {}
+
+        low: Dict[str, int] = {}
+        order: List[str] = []
+        on_stack = set()
+        counter = 0
+
+        # Iterative DFS; a node's post-order number is assigned once all of
+        # its tree children are finished, so post-order is a reverse
+        # topological order and children are labeled before their parents.
+        for root in self.roots:
+            if root in self._post:
+                continue
+            stack = [(root, iter(children.get(root, ())))]
+            on_stack.add(root)
+            low[root] = counter
+            while stack:
+                node, it = stack[-1]
+                child = next(it, None)
+                if child is None:
+                    stack.pop()
+                    on_stack.discard(node)
+                    self._post[node] = counter
+                    order.append(node)
+                    counter += 1
+                    continue
+                if child in self._post or child in on_stack:
+                    continue  # non-tree edge (or a cycle through equivalent classes)
+                low[child] = counter
+                on_stack.add(child)
+                stack.append((child, iter(children.get(child, ()))))
+
+        for node in order:
+            intervals = [(low[node], self._post[node])]
+            for child in children.get(node, ()):
+                intervals.extend(self._intervals.get(child, ()))
+            self._intervals[node] = _merge_intervals(intervals)
+
+    def __len__(self) -> int:
+        return len(self._post)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._post
+
+    def is_descendant(self, node: str, ancestor: str) -> bool:
+        """True if ``node`` is ``ancestor`` or one of its descendants."""
+        post = self._post.get(node)
+        intervals = self._intervals.get(ancestor)
+        if post is None or not intervals:
+            return False
+        i = bisect_right(intervals, (post, float("inf"))) - 1
+        return i >= 0 and intervals[i][0] <= post <= intervals[i][1]
+
+    def descendant_count(self, ancestor: str) -> int:
+        """Number of classes at or below ``ancestor`` (including itself)."""
+        return sum(hi - lo + 1 for lo, hi in self._intervals.get(ancestor, ()))
+
+
+@dataclass
+class PostFilter:
+    """Filters a compact query result down to rows inside the expanded hierarchies."""
+    # column name -> [(hierarchy, root)]; a row must satisfy every check
+    checks: Dict[str, List[Tuple[IntervalHierarchy, str]]] = field(default_factory=dict)
+    drop_columns: List[str] = field(default_factory=list)
+    distinct: bool = False
+    offset: int = 0
+    limit: Optional[int] = None
+
+    def apply(self, result: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """Return (filtered_result, rows_scanned)."""
+        columns = result.get("columns", [])
+        rows = result.get("data", [])
+        index = {name: i for i, name in enumerate(columns)}
+        checks = [
+            (index[col], pairs) for col, pairs in self.checks.items() if col in index
+        ]
+
+        kept = [
+            row for row in rows
+            if all(
+                h.is_descendant(row[i], root) for i, pairs in checks for h, root in pairs
+            )
+        ]
+
+        drop = {index[c] for c in self.drop_columns if c in index}
+        if drop:
+            columns = [c for i, c in enumerate(columns) if i not in drop]
+            kept = [[v for i, v in enumerate(row) if i not in drop] for row in kept]
+
+        if self.distinct:
+            seen = set()
+            unique = []
+            for row in kept:
+                key = tuple(row)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(row)
+            kept = unique
+
+        end = None if self.limit is None else self.offset + self.limit
+        kept = kept[self.offset:end]
+
+        filtered = dict(result)
+        filtered.update({"columns": columns, "data": kept, "count": len(kept)})
+        return filtered, len(rows)
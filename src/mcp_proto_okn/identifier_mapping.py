@@ -6,7 +6,8 @@ URI patterns, plus functions for finding common identifiers and suggesting
 join strategies between graphs.
 """
 
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 
 
 # Maps identifier types to the graphs that use them and how
@@ -171,6 +172,53 @@ IDENTIFIER_BRIDGES: Dict[str, Dict[str, Dict[str, str]]] = {
 GENE_BRIDGE_GRAPH = "gene-expression-atlas-okn"
 
 
+# How to pull the identifier itself out of a URI, CURIE or literal value, and
+# how to present it. "upper" uppercases the match; a format string is applied
+# to the match groups (e.g. OBO IRIs and CURIEs both become "MONDO:0005578").
+IDENTIFIER_PATTERNS: Dict[str, Tuple[Pattern[str], str]] = {
+    "NCBI_Gene": (re.compile(r"(\d+)$"), "{0}"),
+    "Ensembl": (re.compile(r"(ENS[A-Z]*[GTP]\d{11})", re.IGNORECASE), "upper"),
+    "GeneSymbol": (re.compile(r"([^/#:=]+)$"), "upper"),
+    "CAS": (re.compile(r"(\d{2,7}-\d{2}-\d)"), "{0}"),
+    "DTXSID": (re.compile(r"(DTXSID\d+)", re.IGNORECASE), "upper"),
+    "InChIKey": (re.compile(r"([A-Z]{14}-[A-Z]{10}-[A-Z])", re.IGNORECASE), "upper"),
+    "PubChem": (re.compile(r"(\d+)$"), "{0}"),
+    "ChEMBL": (re.compile(r"(CHEMBL\d+)", re.IGNORECASE), "upper"),
+    "MONDO": (re.compile(r"MONDO[_:](\d+)", re.IGNORECASE), "MONDO:{0}"),
+    "ChEBI": (re.compile(r"CHEBI[_:](\d+)", re.IGNORECASE), "CHEBI:{0}"),
+    "UBERON": (re.compile(r"UBERON[_:](\d+)", re.IGNORECASE), "UBERON:{0}"),
+    "MeSH": (re.compile(r"\b([DCMQ]\d{6,9})$", re.IGNORECASE), "upper"),
+    "FIPS": (re.compile(r"(\d+)$"), "{0}"),
+    "S2Cell": (re.compile(r"(\d+)$"), "{0}"),
+    "NAICS": (re.compile(r"(\d+)$"), "{0}"),
+}
+
+
+def normalize_identifier(value: str, id_type: Optional[str] = None) -> str:
+    """Normalize an identifier value so equal identifiers compare equal.
+
+    Handles the forms the graphs use for the same identifier: full IRIs
+    (``http://purl.obolibrary.org/obo/MONDO_0005578``), CURIEs
+    (``MONDO:0005578``), plain literals and differences in case. Without a
+    known ``id_type`` (or if its pattern does not match) the local name of an
+    IRI or CURIE is used, case-folded.
+    """
+    value = value.strip()
+    pattern = IDENTIFIER_PATTERNS.get(id_type) if id_type else None
+    if pattern:
+        regex, form = pattern
+        match = regex.search(value)
+        if match:
+            if form == "upper":
+                return match.group(1).upper()
+            return form.format(*match.groups())
+    # Generic: local name after the last '/', '#' or CURIE ':'
+    local = re.split(r"[/#]", value.rstrip("/#"))[-1]
+    if ":" in local and not local.startswith("http"):
+        local = local.split(":", 1)[1]
+    return local.casefold()
+
+
 def find_common_identifiers(graph_a: str, graph_b: str) -> List[str]:
     """Find identifier types shared between two graphs."""
     common = []
@@ -321,6 +369,32 @@ LIMIT 10
     return None
 
 
+# Bridge graph property and result variable for each gene identifier type
+GENE_BRIDGE_PROPERTIES: Dict[str, Tuple[str, str]] = {
+    "NCBI_Gene": ("glab:ncbi_gene_id", "?ncbi_gene_id"),
+    "Ensembl": ("glab:ensembl_id", "?ensembl_id"),
+    "GeneSymbol": ("biolink:symbol", "?symbol"),
+}
+
+
+def gene_bridge_types(source_graph: str, target_graph: str) -> Optional[Tuple[str, str]]:
+    """Return the (source, target) gene identifier types used to bridge two graphs.
+
+    None if either graph has no gene identifier the bridge graph stores.
+    """
+    source_id_types = [
+        id_type for id_type in ["NCBI_Gene", "Ensembl", "GeneSymbol"]
+        if source_graph in IDENTIFIER_BRIDGES.get(id_type, {})
+    ]
+    target_id_types = [
+        id_type for id_type in ["NCBI_Gene", "Ensembl", "GeneSymbol"]
+        if target_graph in IDENTIFIER_BRIDGES.get(id_type, {})
+    ]
+    if not source_id_types or not target_id_types:
+        return None
+    return source_id_types[0], target_id_types[0]
+
+
 def build_gene_bridge_query(
     source_graph: str,
     target_graph: str,
@@ -334,38 +408,17 @@ def build_gene_bridge_query(
     if not gene_ids:
         return None
 
-    # Determine what ID types source and target use
-    source_id_types = [
-        id_type for id_type in ["NCBI_Gene", "Ensembl", "GeneSymbol"]
-        if source_graph in IDENTIFIER_BRIDGES.get(id_type, {})
-    ]
-    target_id_types = [
-        id_type for id_type in ["NCBI_Gene", "Ensembl", "GeneSymbol"]
-        if target_graph in IDENTIFIER_BRIDGES.get(id_type, {})
-    ]
-
-    if not source_id_types or not target_id_types:
+    types = gene_bridge_types(source_graph, target_graph)
+    if types is None:
         return None
 
     # Build VALUES clause for input IDs
     values_str = " ".join(f'"{gid}"' for gid in gene_ids)
 
     # Build the bridge query through gene-expression-atlas-okn
-    source_type = source_id_types[0]
-    target_type = target_id_types[0]
-
-    # Map ID types to bridge graph properties
-    property_map = {
-        "NCBI_Gene": ("glab:ncbi_gene_id", "?ncbi_gene_id"),
-        "Ensembl": ("glab:ensembl_id", "?ensembl_id"),
-        "GeneSymbol": ("biolink:symbol", "?symbol"),
-    }
-
-    if source_type not in property_map or target_type not in property_map:
-        return None
-
-    src_prop, src_var = property_map[source_type]
-    tgt_prop, tgt_var = property_map[target_type]
+    source_type, target_type = types
+    src_prop, src_var = GENE_BRIDGE_PROPERTIES[source_type]
+    tgt_prop, tgt_var = GENE_BRIDGE_PROPERTIES[target_type]
 
     return f"""
 PREFIX glab: <https://spoke.ucsf.edu/genelab/>
@@ -0,0 +1,220 @@
+"""
+Precomputed join paths between graphs over identifier bridges.
+
+suggest_join_strategy() only finds identifier types two graphs share
+directly, plus one special case (the gene bridge through GENE_BRIDGE_GRAPH).
+JoinPlanner generalizes both: it builds a weighted graph whose nodes are
+(graph, identifier type) pairs from IDENTIFIER_BRIDGES and whose edges are
+
+- joins between two graphs on an identifier type they share,
+- translations inside one graph that holds two identifier types for the
+  same kind of entity (ENTITY_ID_TYPES: gene-expression-atlas-okn has NCBI
+  Gene and Ensembl IDs; biobricks-ice has CAS, DTXSID and InChIKey), and
+- translations through a local crosswalk (crosswalk.py), modelled as the
+  pseudo-graph LOCAL_CROSSWALK.
+
+Edge weights are a base cost per kind of hop, multiplied by a per-graph
+cost (e.g. measured mean query seconds, default 1) and divided by the
+coverage of the identifier in the graph (fraction in (0, 1], default 1).
+All-pairs shortest paths are computed once with Floyd-Warshall and the best
+plan for every pair of graphs is stored, so plan() is a dict lookup.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .crosswalk import CHEMICAL_ID_TYPES, GENE_ID_TYPES
+from .identifier_mapping import GENE_BRIDGE_GRAPH, IDENTIFIER_BRIDGES
+
+Node = Tuple[str, str]
+
+# Pseudo-graph for translations answered by a local crosswalk
+LOCAL_CROSSWALK = "local_crosswalk"
+
+# Base cost of each kind of hop
+JOIN_COST = 1.0
+BRIDGE_COST = 1.5
+CROSSWALK_COST = 0.25
+# Entering or leaving the local crosswalk; more than half a join, so a
+# direct join on a shared type wins over a detour through the crosswalk
+CROSSWALK_LINK_COST = 0.6
+
+# Identifier types naming the same kind of entity. A graph holding two types
+# of one group can translate between them; other type pairs in a graph (e.g.
+# a disease and a gene, or a county and a chemical) are not translations.
+ENTITY_ID_TYPES = (GENE_ID_TYPES, CHEMICAL_ID_TYPES)
+
+INF = float("inf")
+
+
+class JoinPlanner:
+    """Cheapest multi-hop join paths between any two graphs."""
+
+    def __init__(
+        self,
+        bridges: Mapping[str, Mapping[str, Any]] = IDENTIFIER_BRIDGES,
+        crosswalk_types: Iterable[Iterable[str]] = (),
+        graph_costs: Optional[Mapping[str, float]] = None,
+        coverage: Optional[Mapping[Node, float]] = None,
+    ):
+        """
+        Args:
+            bridges: id_type -> {graph: info}, as IDENTIFIER_BRIDGES.
+            crosswalk_types: Groups of identifier types a local crosswalk
+                translates between (e.g. crosswalk.GENE_ID_TYPES).
+            graph_costs: Per-graph cost multiplier (default 1).
+            coverage: Fraction of a graph's entities carrying an identifier
+                type, per (graph, id_type) (default 1).
+        """
+        graph_costs = graph_costs or {}
+        coverage = coverage or {}
+
+        def weight(base: float, graph: str, id_type: str) -> float:
+            return base * graph_costs.get(graph, 1.0) / max(coverage.get((graph, id_type), 1.0), 0.01)
+
+        edges: Dict[Tuple[Node, Node], float] = {}
+
+        def add_edge(a: Node, b: Node, cost: float) -> None:
+            for key in ((a, b), (b, a)):
+                edges[key] = min(edges.get(key, INF), cost)
+
+        by_graph: Dict[str, List[str]] = {}
+        for id_type, graphs in bridges.items():
+            names = sorted(graphs)
+            for graph in names:
+                by_graph.setdefault(graph, []).append(id_type)
+            for i, a in enumerate(names):
+                for b in names[i + 1:]:
+                    cost = (weight(JOIN_COST, a, id_type) + weight(JOIN_COST, b, id_type)) / 2
+                    add_edge((a, id_type), (b, id_type), cost)
+        same_entity = {(a, b) for group in ENTITY_ID_TYPES for a in group for b in group}
+        for graph, id_types in by_graph.items():
+            for i, a in enumerate(id_types):
+                for b in id_types[i + 1:]:
+                    if (a, b) not in same_entity:
+                        continue
+                    cost = (weight(BRIDGE_COST, graph, a) + weight(BRIDGE_COST, graph, b)) / 2
+                    add_edge((graph, a), (graph, b), cost)
+        for group in crosswalk_types:
+            group = [t for t in group if t in bridges]
+            for i, a in enumerate(group):
+                for graph in bridges[a]:
+                    add_edge((graph, a), (LOCAL_CROSSWALK, a), weight(CROSSWALK_LINK_COST, graph, a))
+                for b in group[i + 1:]:
+                    add_edge((LOCAL_CROSSWALK, a), (LOCAL_CROSSWALK, b), CROSSWALK_COST)
+
+        self.nodes: List[Node] = sorted({node for edge in edges for node in edge})
+        index = {node: i for i, node in enumerate(self.nodes)}
+        n = len(self.nodes)
+        dist = [[0.0 if i == j else INF for j in range(n)] for i in range(n)]
+        nxt: List[List[Optional[int]]] = [[i if i == j else None for j in range(n)] for i in range(n)]
+        for (a, b), cost in edges.items():
+            dist[index[a]][index[b]] = cost
+            nxt[index[a]][index[b]] = index[b]
+
+        # Floyd-Warshall
+        for k in range(n):
+            dist_k = dist[k]
+            for i in range(n):
+                dist_ik = dist[i][k]
+                if dist_ik == INF:
+                    continue
+                dist_i, nxt_i = dist[i], nxt[i]
+                for j in range(n):
+                    candidate = dist_ik + dist_k[j]
+                    if candidate < dist_i[j]:
+                        dist_i[j] = candidate
+                        nxt_i[j] = nxt_i[k]
+
+        # Best node pair for every pair of graphs
+        self._plans: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for a in by_graph:
+            for b in by_graph:
+                if a == b:
+                    continue
+                best = min(
+                    ((dist[index[(a, ta)]][index[(b, tb)]], index[(a, ta)], index[(b, tb)])
+                     for ta in by_graph[a] for tb in by_graph[b]),
+                    default=(INF, None, None),
+                )
+                if best[0] < INF:
+                    path = [self.nodes[best[1]]]
+                    i = best[1]
+                    while i != best[2]:
+                        i = nxt[i][best[2]]
+                        path.append(self.nodes[i])
+                    self._plans[(a, b)] = _render(path, best[0])
+
+    def plan(self, graph_a: str, graph_b: str) -> Optional[Dict[str, Any]]:
+        """The cheapest join plan from graph_a to graph_b, or None if they cannot be joined."""
+        return self._plans.get((graph_a, graph_b))
+
+
+def _render(path: List[Node], cost: float) -> Dict[str, Any]:
+    """Turn a node path into executable steps."""
+    steps: List[Dict[str, Any]] = []
+    i = 0
+    while i < len(path) - 1:
+        (graph, id_type), (next_graph, next_type) = path[i], path[i + 1]
+        if next_graph == LOCAL_CROSSWALK:
+            # Through the crosswalk and out to the next real graph
+            j = i + 1
+            while path[j][0] == LOCAL_CROSSWALK:
+                j += 1
+            target_graph, target_type = path[j]
+            steps.append(_join_step(graph, id_type, target_graph, target_type, via=LOCAL_CROSSWALK))
+            i = j
+        elif next_graph == graph:
+            steps.append({
+                "action": "translate",
+                "graph": graph,
+                "from_type": id_type,
+                "to_type": next_type,
+                "tool": "query",
+                "arguments": {"graph_name": graph},
+                "note": f"Select both the {id_type} and {next_type} identifiers from {graph}",
+            })
+            i += 1
+        else:
+            steps.append(_join_step(graph, id_type, next_graph, next_type))
+            i += 1
+
+    plan: Dict[str, Any] = {
+        "path": [{"graph": g, "id_type": t} for g, t in path],
+        "hops": len(steps),
+        "cost": round(cost, 3),
+        "steps": steps,
+    }
+    # join -> translate in the gene bridge graph -> join is one bind join
+    if (len(steps) == 3 and steps[1]["action"] == "translate" and steps[1]["graph"] == GENE_BRIDGE_GRAPH
+            and steps[1]["from_type"] in GENE_ID_TYPES and steps[1]["to_type"] in GENE_ID_TYPES):
+        plan["shortcut"] = {
+            "tool": "join_graph_results",
+            "arguments": {
+                "graph_a": path[0][0], "graph_b": path[-1][0],
+                "strategy": "bind", "via_gene_bridge": True,
+            },
+        }
+    return plan
+
+
+def _join_step(graph_a: str, type_a: str, graph_b: str, type_b: str,
+               via: Optional[str] = None) -> Dict[str, Any]:
+    arguments: Dict[str, Any] = {"graph_a": graph_a, "graph_b": graph_b}
+    if type_a == type_b:
+        arguments["id_type"] = type_a
+    elif type_a in GENE_ID_TYPES:
+        # Gene keys are translated by the bind join's gene bridge (local crosswalk first)
+        arguments.update(strategy="bind", via_gene_bridge=True)
+    # Chemical keys of different types are matched through the chemical crosswalk
+    step = {
+        "action": "join",
+        "graph_a": graph_a,
+        "graph_b": graph_b,
+        "id_type_a": type_a,
+        "id_type_b": type_b,
+        "tool": "join_graph_results",
+        "arguments": arguments,
+    }
+    if via:
+        step["via"] = via
+    return step
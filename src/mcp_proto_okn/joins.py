@@ -0,0 +1,248 @@
+"""
+In-memory hash join of per-graph query results, with spill to disk.
+
+Used by UnifiedSPARQLServer.join_graph_results to join two graphs' rows on a
+shared identifier without sending both full result sets to the client.
+BindJoin implements the ``strategy="bind"`` variant, which pushes the left
+side's keys into the right query instead of fetching the right side fully.
+
+The smaller input is the build side. When it has more than
+``spill_threshold`` rows, both inputs are hash-partitioned into temporary
+files and joined one partition at a time (a Grace hash join), so only one
+partition's hash table is held in memory.
+"""
+
+import os
+import pickle
+import re
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+
+from . import tracing
+
+Row = List[str]
+
+# Build-side rows held in memory before partitioning to disk
+SPILL_THRESHOLD = 200000
+SPILL_PARTITIONS = 16
+
+# Errors meaning the request was too large (HTTP 400/413/414, SPARQLWrapper's
+# QueryBadFormed/URITooLong): a smaller chunk may succeed
+SIZE_ERROR = re.compile(
+    r"\b(?:400|413|414)\b|QueryBadFormed|URITooLong|too (?:long|large)|longer than", re.IGNORECASE
+)
+# Errors meaning the endpoint is unreachable or not answering: retrying
+# (smaller) chunks would only repeat them
+UNAVAILABLE_ERROR = re.compile(
+    r"connection (?:refused|reset|aborted)|timed out|timeout|urlopen error|EndPointNotFound|"
+    r"name or service not known|\b(?:502|503|504)\b",
+    re.IGNORECASE,
+)
+
+
+def size_rejected(error: BaseException) -> bool:
+    """True if ``error`` says the request was too large for the endpoint."""
+    if isinstance(error, HTTPError):
+        return error.code in (400, 413, 414)
+    return bool(SIZE_ERROR.search(str(error)))
+
+
+def endpoint_unavailable(error: BaseException) -> bool:
+    """True if ``error`` is a connection failure or timeout (not a rejected request)."""
+    if isinstance(error, HTTPError):
+        return error.code in (502, 503, 504)
+    if isinstance(error, (ConnectionError, TimeoutError, URLError)):
+        return True
+    return bool(UNAVAILABLE_ERROR.search(str(error)))
+
+
+def _build(rows: Iterable[Tuple[str, Row]]) -> Dict[str, List[Row]]:
+    table: Dict[str, List[Row]] = {}
+    for key, row in rows:
+        table.setdefault(key, []).append(row)
+    return table
+
+
+def _probe(table: Dict[str, List[Row]], rows: Iterable[Tuple[str, Row]],
+           build_is_left: bool) -> Iterator[Tuple[str, Row, Row]]:
+    for key, row in rows:
+        for match in table.get(key, ()):
+            yield (key, match, row) if build_is_left else (key, row, match)
+
+
+def _keyed(rows: Iterable[Row], key_index: int,
+           key_fn: Callable[[str], str]) -> Iterator[Tuple[str, Row]]:
+    for row in rows:
+        value = row[key_index] if key_index < len(row) else ""
+        if value:
+            yield key_fn(value), row
+
+
+def _read_partition(path: str) -> Iterator[Tuple[str, Row]]:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class HashJoin:
+    """Inner equi-join of two row lists on normalized key columns."""
+
+    def __init__(
+        self,
+        key_fn: Callable[[str], str] = str,
+        spill_threshold: int = SPILL_THRESHOLD,
+        partitions: int = SPILL_PARTITIONS,
+    ):
+        """
+        Args:
+            key_fn: Maps a raw key value to its join key (e.g. normalize_identifier).
+            spill_threshold: Build-side size above which inputs are partitioned to disk.
+            partitions: Number of disk partitions when spilling.
+        """
+        self.key_fn = key_fn
+        self.spill_threshold = spill_threshold
+        self.partitions = partitions
+        self.spilled = False
+
+    def join(
+        self,
+        left: List[Row],
+        left_key: int,
+        right: List[Row],
+        right_key: int,
+        limit: Optional[int] = None,
+    ) -> Iterator[Tuple[str, Row, Row]]:
+        """Yield (join_key, left_row, right_row) for every matching pair.
+
+        Rows with an empty key never match. Stops after ``limit`` pairs.
+        """
+        build_is_left = len(left) <= len(right)
+        build, build_key, probe, probe_key = (
+            (left, left_key, right, right_key) if build_is_left
+            else (right, right_key, left, left_key)
+        )
+        self.spilled = len(build) > self.spill_threshold
+        pairs = (
+            self._join_spilled(build, build_key, probe, probe_key, build_is_left)
+            if self.spilled else
+            _probe(_build(_keyed(build, build_key, self.key_fn)),
+                   _keyed(probe, probe_key, self.key_fn), build_is_left)
+        )
+        for count, pair in enumerate(pairs):
+            if limit is not None and count >= limit:
+                pairs.close()
+                return
+            yield pair
+
+    def _join_spilled(self, build, build_key, probe, probe_key, build_is_left):
+        with tempfile.TemporaryDirectory(prefix="okn-join-") as tmp:
+            build_paths = self._partition(_keyed(build, build_key, self.key_fn), tmp, "build")
+            probe_paths = self._partition(_keyed(probe, probe_key, self.key_fn), tmp, "probe")
+            for build_path, probe_path in zip(build_paths, probe_paths):
+                table = _build(_read_partition(build_path))
+                if table:
+                    yield from _probe(table, _read_partition(probe_path), build_is_left)
+
+    def _partition(self, rows: Iterable[Tuple[str, Row]], directory: str, side: str) -> List[str]:
+        paths = [os.path.join(directory, f"{side}-{i}.pkl") for i in range(self.partitions)]
+        files = [open(path, "wb") for path in paths]
+        try:
+            for key, row in rows:
+                pickle.dump((key, row), files[hash(key) % self.partitions])
+        finally:
+            for f in files:
+                f.close()
+        return paths
+
+
+class BindJoin:
+    """Pushes distinct key values into a query in VALUES chunks.
+
+    ``fetch`` runs the (right-hand) query for one chunk of keys and returns
+    its rows. Chunks run concurrently; the chunk size adapts to observed
+    latency (doubling while chunks answer well within ``target_seconds``,
+    halving when they are slow). A chunk the endpoint rejects as too large
+    (size_rejected) is split and retried, at most ``max_retries`` times per
+    join; a chunk failing otherwise is given up as failed_keys. If the
+    endpoint is unreachable or times out (endpoint_unavailable), the join is
+    aborted by raising that error, instead of sending every chunk into it.
+    Results are yielded per chunk as they complete, so a consumer can stop
+    early.
+    """
+
+    INITIAL_CHUNK_SIZE = 50
+    MAX_CHUNK_SIZE = 500
+    CONCURRENCY = 4
+    TARGET_SECONDS = 5.0
+    MAX_RETRIES = 16
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str]], List[Row]],
+        chunk_size: Optional[int] = None,
+        max_chunk_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        target_seconds: Optional[float] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.fetch = fetch
+        self.chunk_size = chunk_size or self.INITIAL_CHUNK_SIZE
+        self.max_chunk_size = max_chunk_size or self.MAX_CHUNK_SIZE
+        self.concurrency = concurrency or self.CONCURRENCY
+        self.target_seconds = target_seconds or self.TARGET_SECONDS
+        self.max_retries = self.MAX_RETRIES if max_retries is None else max_retries
+        self.chunks = 0
+        self.retries = 0
+        self.failed_keys: List[str] = []
+        self.last_error: Optional[str] = None
+
+    def _timed_fetch(self, chunk: List[str]) -> Tuple[List[Row], float]:
+        start = time.monotonic()
+        rows = self.fetch(chunk)
+        return rows, time.monotonic() - start
+
+    def _adapt(self, size: int, elapsed: float) -> None:
+        if elapsed > self.target_seconds:
+            self.chunk_size = max(1, self.chunk_size // 2)
+        elif elapsed < self.target_seconds / 2 and size >= self.chunk_size:
+            self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+
+    def run(self, keys: Iterable[str]) -> Iterator[Tuple[List[str], List[Row]]]:
+        """Yield (chunk_keys, rows) for each chunk as it completes."""
+        queue = deque(dict.fromkeys(keys))
+        pending: Dict[Future, List[str]] = {}
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bind-join")
+        try:
+            while queue or pending:
+                while queue and len(pending) < self.concurrency:
+                    chunk = [queue.popleft() for _ in range(min(self.chunk_size, len(queue)))]
+                    pending[pool.submit(tracing.in_current_context(self._timed_fetch), chunk)] = chunk
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    try:
+                        rows, elapsed = future.result()
+                    except Exception as e:
+                        self.last_error = str(e)
+                        if endpoint_unavailable(e) and not size_rejected(e):
+                            raise
+                        if len(chunk) > 1 and size_rejected(e) and self.retries < self.max_retries:
+                            # Retry in smaller pieces
+                            self.retries += 1
+                            self.chunk_size = max(1, min(self.chunk_size, len(chunk) // 2))
+                            queue.extendleft(reversed(chunk))
+                        else:
+                            self.failed_keys.extend(chunk)
+                        continue
+                    self.chunks += 1
+                    self._adapt(len(chunk), elapsed)
+                    yield chunk, rows
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,171 @@
+"""
+In-process label/synonym index for ontology term lookup.
+
+SPARQLServer.lookup_uri used to scan every rdfs:label and
+oboInOwl:hasExactSynonym triple in ubergraph with a case-insensitive FILTER
+for each call. LabelIndex answers the same question from a local snapshot:
+
+- exact lookups go through a hash map keyed by the normalized label
+  (Unicode NFKC, case-folded, whitespace collapsed);
+- prefix search uses binary search over the sorted normalized keys;
+- fuzzy search uses a character-trigram inverted index (built on first
+  use) and ranks candidates by Dice similarity.
+
+The snapshot is a (optionally gzip-compressed) TSV file with the columns
+``uri``, ``label`` and ``match_type`` (``exact_label`` or ``exact_synonym``),
+written by ``scripts/build_label_index.py``.
+"""
+
+import csv
+import gzip
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .expansion_filter import find_snapshot
+
+SNAPSHOT_FILENAME = "ubergraph_labels.tsv.gz"
+
+# Minimum Dice similarity for a fuzzy match
+FUZZY_MIN_SCORE = 0.4
+
+# (uri, label, match_type)
+Entry = Tuple[str, str, str]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_label(text: str) -> str:
+    """Normalize a label for matching: NFKC, case-folded, single spaces, trimmed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class LabelIndex:
+    """Normalized-label hash map with prefix and trigram fuzzy search."""
+
+    def __init__(self, entries: Iterable[Entry]):
+        self._by_key: Dict[str, List[Entry]] = {}
+        for uri, label, match_type in entries:
+            key = normalize_label(label)
+            if key:
+                self._by_key.setdefault(key, []).append((uri, label, match_type))
+        # Exact labels before synonyms within each key
+        for matches in self._by_key.values():
+            matches.sort(key=lambda e: e[2] != "exact_label")
+        self._keys = sorted(self._by_key)
+        self._trigram_index: Optional[Dict[str, List[int]]] = None
+        self._trigram_counts: List[int] = []
+        self._trigram_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "LabelIndex":
+        """Load a snapshot TSV (``.gz`` is decompressed transparently)."""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE, escapechar="\\")
+            header = next(reader, None)
+            if header and header[0] != "uri":
+                # No header row: treat the first line as data
+                return cls([tuple(header)] + [tuple(row) for row in reader if len(row) == 3])
+            return cls(tuple(row) for row in reader if len(row) == 3)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _match(entry: Entry, score: float) -> Dict[str, object]:
+        uri, label, match_type = entry
+        return {"uri": uri, "label": label, "match_type": match_type, "score": round(score, 3)}
+
+    def lookup(self, label: str, max_results: int = 2000) -> List[Dict[str, object]]:
+        """Exact (normalized) label or synonym matches."""
+        entries = self._by_key.get(normalize_label(label), [])
+        return [
+            {"uri": uri, "label": text, "match_type": match_type}
+            for uri, text, match_type in entries[:max_results]
+        ]
+
+    def prefix_search(self, prefix: str, max_results: int = 20) -> List[Dict[str, object]]:
+        """Labels starting with ``prefix``, shortest (closest) first."""
+        query = normalize_label(prefix)
+        if not query:
+            return []
+        start = bisect_left(self._keys, query)
+        candidates = []
+        for key in self._keys[start:]:
+            if not key.startswith(query):
+                break
+            candidates.append(key)
+        candidates.sort(key=len)
+        matches: List[Dict[str, object]] = []
+        for key in candidates:
+            score = len(query) / len(key)
+            for entry in self._by_key[key]:
+                matches.append(self._match(entry, score))
+                if len(matches) >= max_results:
+                    return matches
+        return matches
+
+    def _get_trigram_index(self) -> Dict[str, List[int]]:
+        if self._trigram_index is None:
+            with self._trigram_lock:
+                if self._trigram_index is None:
+                    index: Dict[str, List[int]] = {}
+                    counts = []
+                    for i, key in enumerate(self._keys):
+                        grams = set(_trigrams(key))
+                        counts.append(len(grams))
+                        for gram in grams:
+                            index.setdefault(gram, []).append(i)
+                    self._trigram_counts = counts
+                    self._trigram_index = index
+        return self._trigram_index
+
+    def fuzzy_search(self, text: str, max_results: int = 20, min_score: float = FUZZY_MIN_SCORE) -> List[Dict[str, object]]:
+        """Approximate matches ranked by trigram Dice similarity."""
+        query = normalize_label(text)
+        if not query:
+            return []
+        grams = set(_trigrams(query))
+        index = self._get_trigram_index()
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(index.get(gram, ()))
+
+        scored = []
+        for key_id, common in shared.items():
+            score = 2 * common / (len(grams) + self._trigram_counts[key_id])
+            if score >= min_score:
+                scored.append((score, self._keys[key_id]))
+        scored.sort(key=lambda item: (-item[0], len(item[1])))
+
+        matches: List[Dict[str, object]] = []
+        for score, key in scored:
+            for entry in self._by_key[key]:
+                matches.append(self._match(entry, score))
+                if len(matches) >= max_results:
+                    return matches
+        return matches
+
+
+@lru_cache(maxsize=2)
+def _load(path: str) -> Optional[LabelIndex]:
+    try:
+        return LabelIndex.from_file(path)
+    except (OSError, ValueError, csv.Error):
+        return None
+
+
+def load_label_index(path: Optional[str] = None) -> Optional[LabelIndex]:
+    """Return the shared index for ``path`` (or the default snapshot), or None if unavailable."""
+    path = path or find_snapshot(SNAPSHOT_FILENAME, "MCP_PROTO_OKN_LABEL_INDEX")
+    return _load(path) if path else None
@@ -0,0 +1,300 @@
+"""
+Prometheus metrics for the HTTP transport.
+
+Counters, gauges and histograms are kept in-process and rendered in the
+Prometheus text exposition format on ``GET /metrics`` (see
+add_metrics_route). The endpoint bypasses API-key authentication, like the
+health probes, so the chart's scrape annotations work without credentials.
+Set ``MCP_PROTO_OKN_METRICS=0`` to disable it.
+
+Exported series (all prefixed ``mcp_proto_okn_``):
+
+- ``tool_duration_seconds{tool,outcome}``: MCP tool call latency; outcome is
+  "error" when the tool raised or returned an ``error`` key.
+- ``tool_calls_in_flight{tool}`` and ``http_requests_in_flight``: concurrency
+  gauges, usable as HPA custom metrics through prometheus-adapter.
+- ``upstream_request_duration_seconds{graph}``,
+  ``upstream_requests_total{graph,outcome}`` and
+  ``upstream_response_bytes_total{graph}``: SPARQL requests to the federation
+  endpoint, labelled with the graph that issued them.
+- ``expansion_batches{graph,mode}``: upstream queries per expanded query.
+- ``cache_requests_total{cache,result}``: hits and misses of the metadata,
+  hierarchy, label, leaf-filter and list_graphs caches; the hit ratio is
+  ``rate(...{result="hit"}) / rate(...)``.
+
+The implementation is dependency-free; recording a sample is a dict update
+under a lock.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+METRICS_PATH = "/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; upstream queries range from milliseconds to the 300 s client timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._samples(items))
+        return lines
+
+    def _samples(self, items) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track(self, **labels: Any) -> Iterator[None]:
+        """Count the enclosed block as in progress."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self, items) -> List[str]:
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def clear(self) -> None:
+        """Reset every metric (for tests)."""
+        for metric in self._metrics:
+            metric.clear()
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_DURATION = REGISTRY.histogram(
+    "mcp_proto_okn_tool_duration_seconds", "MCP tool call latency.", ("tool", "outcome"))
+TOOL_CALLS_IN_FLIGHT = REGISTRY.gauge(
+    "mcp_proto_okn_tool_calls_in_flight", "MCP tool calls currently running.", ("tool",))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "mcp_proto_okn_http_requests_in_flight", "HTTP requests currently being served.")
+UPSTREAM_DURATION = REGISTRY.histogram(
+    "mcp_proto_okn_upstream_request_duration_seconds", "SPARQL request latency against the federation endpoint.",
+    ("graph",))
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "mcp_proto_okn_upstream_requests_total", "SPARQL requests sent to the federation endpoint.",
+    ("graph", "outcome"))
+UPSTREAM_BYTES = REGISTRY.counter(
+    "mcp_proto_okn_upstream_response_bytes_total", "Bytes of SPARQL results received.", ("graph",))
+EXPANSION_BATCHES = REGISTRY.histogram(
+    "mcp_proto_okn_expansion_batches", "Upstream queries per query with ontology expansion.",
+    ("graph", "mode"), buckets=BATCH_BUCKETS)
+CACHE_REQUESTS = REGISTRY.counter(
+    "mcp_proto_okn_cache_requests_total", "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"))
+
+
+def record_upstream(graph: str, seconds: float, nbytes: int = 0, error: bool = False) -> None:
+    """Record one SPARQL request to the federation endpoint."""
+    UPSTREAM_DURATION.observe(seconds, graph=graph)
+    UPSTREAM_REQUESTS.inc(graph=graph, outcome="error" if error else "ok")
+    if nbytes:
+        UPSTREAM_BYTES.inc(nbytes, graph=graph)
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    """Record cache hits and misses."""
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result="miss")
+
+
+def _outcome(result: Any) -> str:
+    return "error" if isinstance(result, dict) and "error" in result else "ok"
+
+
+def timed_tool(name: str, fn):
+    """Wrap a tool function to record its latency, outcome and concurrency."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started, outcome = time.perf_counter(), "error"
+            with TOOL_CALLS_IN_FLIGHT.track(tool=name):
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = _outcome(result)
+                    return result
+                finally:
+                    TOOL_DURATION.observe(time.perf_counter() - started, tool=name, outcome=outcome)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started, outcome = time.perf_counter(), "error"
+            with TOOL_CALLS_IN_FLIGHT.track(tool=name):
+                try:
+                    result = fn(*args, **kwargs)
+                    outcome = _outcome(result)
+                    return result
+                finally:
+                    TOOL_DURATION.observe(time.perf_counter() - started, tool=name, outcome=outcome)
+    return wrapper
+
+
+def instrument_tools(mcp) -> None:
+    """Record metrics for every tool registered on a FastMCP server so far."""
+    for tool in mcp._tool_manager.list_tools():
+        tool.fn = timed_tool(tool.name, tool.fn)
+
+
+def metrics_enabled() -> bool:
+    return os.environ.get("MCP_PROTO_OKN_METRICS", "1").lower() not in ("0", "false", "no", "off")
+
+
+def add_metrics_route(app):
+    """Attach ``GET /metrics`` and the in-flight request gauge to a Starlette app."""
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+    async def _metrics(_request):
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    class InFlightMiddleware:
+        def __init__(self, app):
+            self.app = app
+
+        async def __call__(self, scope, receive, send):
+            if scope["type"] != "http" or scope.get("path") == METRICS_PATH:
+                return await self.app(scope, receive, send)
+            with HTTP_REQUESTS_IN_FLIGHT.track():
+                await self.app(scope, receive, send)
+
+    app.router.routes.insert(0, Route(METRICS_PATH, _metrics, methods=["GET"]))
+    app.add_middleware(InFlightMiddleware)
+    return app
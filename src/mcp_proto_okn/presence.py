@@ -0,0 +1,146 @@
+"""
+Per-graph identifier presence filters.
+
+route_query ranks graphs by keyword overlap, so a question about one CAS
+number or gene sends the agent to every graph that is about chemicals or
+genes, most of which do not contain that entity. A PresenceIndex holds one
+Bloom filter per graph and identifier type over the identifier values the
+graph contains (normalized with normalize_identifier), built offline by
+``scripts/build_presence_filters.py``.
+
+A Bloom filter has no false negatives: a graph whose filters reject an
+identifier definitely does not contain it (as of the snapshot) and can be
+skipped. A positive answer only means "possibly present". Graphs or
+identifier types without a filter are reported as not indexed and never
+skipped.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .crosswalk import detect_chemical_type
+from .expansion_filter import BloomFilter, find_snapshot
+from .identifier_mapping import normalize_identifier
+
+PRESENCE_SNAPSHOT_FILENAME = "identifier_presence.json"
+
+# Self-describing forms of non-chemical identifiers (chemical ones are in
+# crosswalk.CHEMICAL_ID_SIGNATURES). Bare numbers and gene symbols are too
+# ambiguous to classify.
+IDENTIFIER_SIGNATURES = {
+    "NCBI_Gene": re.compile(r"(?:NCBIGene:|ncbi\.nlm\.nih\.gov/gene/|entrez:)\d+$", re.IGNORECASE),
+    "Ensembl": re.compile(r"ENS[A-Z]*[GTP]\d{11}(?:\.\d+)?$", re.IGNORECASE),
+    "MONDO": re.compile(r"MONDO[_:]\d+$", re.IGNORECASE),
+    "UBERON": re.compile(r"UBERON[_:]\d+$", re.IGNORECASE),
+    "MeSH": re.compile(r"(?:MESH:|id\.nlm\.nih\.gov/mesh/)[DC]\d{6,9}$", re.IGNORECASE),
+}
+
+# Characters that end an identifier token in free text
+_TOKEN = re.compile(r"[^\s,;()\[\]{}\"'<>]+")
+
+
+def detect_identifier_type(value: str) -> Optional[str]:
+    """Guess the identifier type of a self-describing identifier, or None."""
+    value = value.strip()
+    for id_type, signature in IDENTIFIER_SIGNATURES.items():
+        if signature.search(value):
+            return id_type
+    return detect_chemical_type(value)
+
+
+def find_identifiers(text: str) -> List[Tuple[str, str]]:
+    """Return (identifier, id_type) for each recognizable identifier in free text."""
+    found = []
+    for token in _TOKEN.findall(text):
+        token = token.rstrip(".?!:")
+        id_type = detect_identifier_type(token)
+        if id_type and (token, id_type) not in found:
+            found.append((token, id_type))
+    return found
+
+
+def presence_key(value: str, id_type: str) -> str:
+    """The string stored in a presence filter for one identifier."""
+    return f"{id_type}:{normalize_identifier(value, id_type)}"
+
+
+class PresenceIndex:
+    """Bloom filters of identifier values, per graph and identifier type."""
+
+    def __init__(self, filters: Dict[str, Dict[str, BloomFilter]], built_at: Optional[str] = None):
+        self.filters = filters
+        self.built_at = built_at
+
+    @classmethod
+    def build(cls, values: Dict[str, Dict[str, Iterable[str]]], error_rate: float = 0.01) -> "PresenceIndex":
+        """Build from {graph: {id_type: identifier values}}."""
+        filters: Dict[str, Dict[str, BloomFilter]] = {}
+        for graph_name, by_type in values.items():
+            for id_type, graph_values in by_type.items():
+                keys = {presence_key(value, id_type) for value in graph_values if value}
+                bloom = BloomFilter.for_capacity(len(keys), error_rate)
+                for key in sorted(keys):
+                    bloom.add(key)
+                filters.setdefault(graph_name, {})[id_type] = bloom
+        return cls(filters)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PresenceIndex":
+        filters = {
+            graph_name: {id_type: BloomFilter.from_dict(f) for id_type, f in by_type.items()}
+            for graph_name, by_type in data.get("graphs", {}).items()
+        }
+        return cls(filters, built_at=data.get("built_at"))
+
+    def to_dict(self) -> Dict:
+        return {
+            "built_at": self.built_at,
+            "graphs": {
+                graph_name: {id_type: f.to_dict() for id_type, f in sorted(by_type.items())}
+                for graph_name, by_type in sorted(self.filters.items())
+            },
+        }
+
+    def may_contain(self, graph_name: str, identifier: str, id_type: Optional[str] = None) -> Optional[bool]:
+        """False if ``graph_name`` definitely lacks the identifier, True if it may have it.
+
+        None if the graph has no filter that could answer. Without ``id_type``
+        (and if it cannot be detected) every filter of the graph is tried.
+        """
+        by_type = self.filters.get(graph_name)
+        if not by_type:
+            return None
+        id_type = id_type or detect_identifier_type(identifier)
+        if id_type:
+            bloom = by_type.get(id_type)
+            return None if bloom is None else presence_key(identifier, id_type) in bloom
+        return any(presence_key(identifier, t) in bloom for t, bloom in by_type.items())
+
+    def graphs_containing(self, identifier: str, id_type: Optional[str] = None,
+                          graphs: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """Partition ``graphs`` (default: all indexed) by whether they may contain the identifier."""
+        result: Dict[str, List[str]] = {"possible": [], "absent": [], "not_indexed": []}
+        for graph_name in (graphs if graphs is not None else sorted(self.filters)):
+            present = self.may_contain(graph_name, identifier, id_type)
+            key = "not_indexed" if present is None else "possible" if present else "absent"
+            result[key].append(graph_name)
+        return result
+
+
+@lru_cache(maxsize=4)
+def _load(path: str) -> PresenceIndex:
+    with open(path) as f:
+        return PresenceIndex.from_dict(json.load(f))
+
+
+def load_presence_index(path: Optional[str] = None) -> Optional[PresenceIndex]:
+    """Return the presence index for ``path`` (or the default snapshot), or None if unavailable."""
+    path = path or find_snapshot(PRESENCE_SNAPSHOT_FILENAME, "MCP_PROTO_OKN_PRESENCE_FILTERS")
+    if not path:
+        return None
+    try:
+        return _load(path)
+    except (OSError, ValueError, KeyError):
+        return None
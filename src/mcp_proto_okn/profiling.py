@@ -0,0 +1,142 @@
+"""
+Per-query timing breakdown for ``query(..., profile=True)``.
+
+SPARQLServer.execute() opens a QueryProfile for the duration of a profiled
+query and stores it in a context variable. The code paths that do the work
+(query analysis, descendant and hierarchy fetches, each upstream request,
+the batch merge) record into the current profile if there is one; worker
+threads inherit it through tracing.in_current_context. Unprofiled queries
+only pay for a context-variable lookup.
+
+The resulting ``timing`` block shows where a query spent its time, e.g. that
+descendant fetches dominate (lower ``max_depth`` or disable expansion) or
+that it needed dozens of VALUES batches (try ``expansion_mode="postfilter"``).
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_current: ContextVar[Optional["QueryProfile"]] = ContextVar("query_profile", default=None)
+# The last upstream request made in this context, for attributing it to a batch
+_last_request: ContextVar[Optional[Dict[str, Any]]] = ContextVar("last_request", default=None)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class QueryProfile:
+    """Timings collected while one query executes."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self.descendant_fetches: List[Dict[str, Any]] = []
+        self.hierarchy_fetches: List[Dict[str, Any]] = []
+        self.batches: List[Dict[str, Any]] = []
+        self.rows_before_dedupe: Optional[int] = None
+        self.rows_after_dedupe: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block; repeated stages accumulate."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def record_request(self, network_s: float, parse_s: float, nbytes: int, rows: Optional[int]) -> None:
+        request = {"network_ms": _ms(network_s), "parse_ms": _ms(parse_s), "bytes": nbytes, "rows": rows}
+        with self._lock:
+            self.requests.append(request)
+        _last_request.set(request)
+
+    def record_descendant_fetch(self, uris: List[str], seconds: float, descendants: int) -> None:
+        with self._lock:
+            self.descendant_fetches.append({"uris": list(uris), "ms": _ms(seconds), "descendants": descendants})
+
+    def record_hierarchy_fetch(self, uri: str, seconds: float, edges: Optional[int]) -> None:
+        with self._lock:
+            self.hierarchy_fetches.append({"uri": uri, "ms": _ms(seconds), "edges": edges})
+
+    def record_batch(self, index: int, seconds: float, error: Optional[str] = None) -> None:
+        """Record a query batch, with the timings of the request it just made."""
+        request = _last_request.get() if error is None else None
+        batch: Dict[str, Any] = {"batch": index, "ms": _ms(seconds)}
+        if request:
+            batch.update(request)
+        if error is not None:
+            batch["error"] = error
+        with self._lock:
+            self.batches.append(batch)
+        _last_request.set(None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = (self.finished or time.perf_counter()) - self.started
+        fetch_ms = sum(f["ms"] for f in self.descendant_fetches)
+        hierarchy_ms = sum(f["ms"] for f in self.hierarchy_fetches)
+        batch_ms = sum(b["ms"] for b in self.batches)
+        timing: Dict[str, Any] = {
+            "total_ms": _ms(total),
+            "analysis_ms": _ms(self.stages.get("analysis", 0.0)),
+            "descendant_fetch_ms": round(fetch_ms, 3),
+            "descendant_fetches": self.descendant_fetches,
+            "query_ms": round(batch_ms, 3),
+            "batches": self.batches,
+            "merge_ms": _ms(self.stages.get("merge", 0.0)),
+            "upstream_requests": len(self.requests),
+            "bytes_received": sum(r["bytes"] for r in self.requests),
+        }
+        if self.hierarchy_fetches:
+            timing["hierarchy_fetch_ms"] = round(hierarchy_ms, 3)
+            timing["hierarchy_fetches"] = self.hierarchy_fetches
+        if self.rows_before_dedupe is not None:
+            timing["rows_before_dedupe"] = self.rows_before_dedupe
+            timing["rows_after_dedupe"] = self.rows_after_dedupe
+        # Fetches run concurrently, so their sum can exceed the wall-clock time
+        if total > 0:
+            timing["expansion_share"] = round(min(1.0, (fetch_ms + hierarchy_ms) / 1000 / total), 3)
+        return timing
+
+
+def current() -> Optional[QueryProfile]:
+    """The profile of the query running in this context, or None."""
+    return _current.get()
+
+
+@contextmanager
+def profiled() -> Iterator[QueryProfile]:
+    """Collect a QueryProfile for the enclosed block."""
+    profile = QueryProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        profile.finished = time.perf_counter()
+        _current.reset(token)
+
+
+def with_profile(fn: Callable) -> Callable:
+    """Decorator: a call with ``profile=True`` gets its QueryProfile added to the result as ``timing``.
+
+    Nested calls (e.g. a fallback re-execution) record into the outer profile.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not kwargs.get("profile") or current() is not None:
+            return fn(*args, **kwargs)
+        with profiled() as profile:
+            result = fn(*args, **kwargs)
+        if isinstance(result, dict):
+            result["timing"] = profile.to_dict()
+        return result
+    return wrapper
@@ -0,0 +1,171 @@
+"""
+Slow-query log: every upstream SPARQL request with aggregate statistics.
+
+SPARQLServer._run_query records each request (graph, query fingerprint,
+latency, rows, bytes, outcome) in QUERY_LOG, a ring buffer of the most
+recent ``MCP_PROTO_OKN_QUERY_LOG_SIZE`` requests (default 10000). The
+fingerprint is QueryAnalyzer.fingerprint(): literals, VALUES data and LIMIT
+numbers are normalized out, so LLM-written queries of the same shape share
+it. The ``query_stats`` tool reports, from the buffer, per-graph totals and
+the fingerprints with the most total time, the worst p95 latency or the
+highest error rate.
+
+Set ``MCP_PROTO_OKN_QUERY_LOG`` to a file path to also append each request,
+with its full query text, as one line of JSON; with
+``MCP_PROTO_OKN_SLOW_QUERY_MS`` only requests at least that slow (and
+failures) are written.
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional
+
+DEFAULT_SIZE = 10000
+# Characters of each query kept in the buffer, for a fingerprint's example
+EXAMPLE_LENGTH = 2000
+ORDERINGS = ("total_time", "p95", "error_rate", "count")
+
+
+class QueryRecord(NamedTuple):
+    timestamp: float
+    graph: str
+    fingerprint: str
+    query: str
+    seconds: float
+    rows: Optional[int]
+    nbytes: int
+    error: Optional[str]
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _summarize(records: List[QueryRecord]) -> Dict[str, Any]:
+    durations = sorted(r.seconds for r in records)
+    errors = sum(1 for r in records if r.error is not None)
+    total = sum(durations)
+    return {
+        "count": len(records),
+        "total_ms": _ms(total),
+        "mean_ms": _ms(total / len(records)),
+        "p95_ms": _ms(_percentile(durations, 0.95)),
+        "max_ms": _ms(durations[-1]),
+        "error_rate": round(errors / len(records), 4),
+        "bytes_received": sum(r.nbytes for r in records),
+    }
+
+
+class QueryLog:
+    """Bounded log of upstream requests, optionally mirrored to a JSONL file."""
+
+    def __init__(self, size: int = DEFAULT_SIZE, path: Optional[str] = None, slow_ms: float = 0):
+        self.size = size
+        self.path = path
+        self.slow_ms = slow_ms
+        self._records: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def from_env(cls) -> "QueryLog":
+        return cls(
+            size=int(os.environ.get("MCP_PROTO_OKN_QUERY_LOG_SIZE", DEFAULT_SIZE)),
+            path=os.environ.get("MCP_PROTO_OKN_QUERY_LOG") or None,
+            slow_ms=float(os.environ.get("MCP_PROTO_OKN_SLOW_QUERY_MS", 0)),
+        )
+
+    def record(self, graph: str, fingerprint: str, query: str, seconds: float, rows: Optional[int] = None,
+               nbytes: int = 0, error: Optional[str] = None) -> QueryRecord:
+        """Log one request to the federation endpoint."""
+        record = QueryRecord(
+            timestamp=time.time(), graph=graph, fingerprint=fingerprint, query=query[:EXAMPLE_LENGTH],
+            seconds=seconds, rows=rows, nbytes=nbytes, error=error,
+        )
+        with self._lock:
+            self._records.append(record)
+            if self.path and (error is not None or seconds * 1000 >= self.slow_ms):
+                self._write(record, query)
+        return record
+
+    def _write(self, record: QueryRecord, query: str) -> None:
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps({
+                "timestamp": record.timestamp, "graph": record.graph, "fingerprint": record.fingerprint,
+                "ms": _ms(record.seconds), "rows": record.rows, "bytes": record.nbytes,
+                "outcome": "error" if record.error is not None else "ok", "error": record.error,
+                "query": query,
+            }) + "\n")
+            self._file.flush()
+        except OSError as e:
+            print(f"Query log disabled: cannot write {self.path}: {e}", file=sys.stderr)
+            self.path = None
+
+    def records(self) -> List[QueryRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def stats(self, graph: Optional[str] = None, top: int = 10, order_by: str = "total_time") -> Dict[str, Any]:
+        """Per-graph totals and the ``top`` fingerprints ranked by ``order_by``.
+
+        Raises ValueError for an unknown ``order_by`` (see ORDERINGS).
+        """
+        from .server import QueryAnalyzer
+
+        if order_by not in ORDERINGS:
+            raise ValueError(f"Unknown order_by '{order_by}'. Use one of: {', '.join(ORDERINGS)}")
+        records = [r for r in self.records() if graph is None or r.graph == graph]
+
+        by_graph: Dict[str, List[QueryRecord]] = {}
+        by_fingerprint: Dict[tuple, List[QueryRecord]] = {}
+        for r in records:
+            by_graph.setdefault(r.graph, []).append(r)
+            by_fingerprint.setdefault((r.graph, r.fingerprint), []).append(r)
+
+        graphs = [{"graph": name, **_summarize(rs)} for name, rs in by_graph.items()]
+        graphs.sort(key=lambda g: g["total_ms"], reverse=True)
+
+        fingerprints = []
+        for (name, fingerprint), rs in by_fingerprint.items():
+            summary = _summarize(rs)
+            rows = [r.rows for r in rs if r.rows is not None]
+            summary["mean_rows"] = round(sum(rows) / len(rows), 1) if rows else None
+            fingerprints.append({
+                "fingerprint": fingerprint, "graph": name, **summary,
+                "last_error": next((r.error for r in reversed(rs) if r.error is not None), None),
+                "example": rs[-1].query,
+            })
+        key = {"total_time": "total_ms", "p95": "p95_ms", "error_rate": "error_rate", "count": "count"}[order_by]
+        fingerprints.sort(key=lambda f: (f[key], f["total_ms"]), reverse=True)
+        fingerprints = fingerprints[:max(0, top)]
+        for f in fingerprints:
+            f["example"] = QueryAnalyzer.normalize_query(f["example"])
+
+        return {
+            "queries_logged": len(records),
+            "since": records[0].timestamp if records else None,
+            "buffer_size": self.size,
+            "order_by": order_by,
+            "graphs": graphs,
+            "top_fingerprints": fingerprints,
+        }
+
+
+QUERY_LOG = QueryLog.from_env()
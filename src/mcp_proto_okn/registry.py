@@ -4,10 +4,59 @@ Graph Registry for Proto-OKN Knowledge Graphs.
 Loads and queries a catalog of knowledge graphs from registry.json.
 """
 
+import heapq
 import json
+import math
 import os
+import re
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from . import metrics
+
+# BM25 parameters: term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Relative weight of a term occurrence in each searchable field
+FIELD_WEIGHTS = {
+    "name": 1.0,
+    "description": 1.0,
+    "domain_tags": 2.0,
+    "classes": 2.0,
+    "predicates": 1.0,
+    "examples": 1.0,
+    "namespaces": 1.0,
+}
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in is it of on or that the "
+    "there to was what when where which who why with".split()
+)
+
+# Longest first; a suffix is only removed if at least three letters remain
+_SUFFIXES = ("ational", "ations", "ation", "ments", "ment", "ings", "ing", "ated", "ed")
+
+
+@lru_cache(maxsize=65536)
+def _stem(token: str) -> str:
+    """Light suffix-stripping stemmer (plurals and common verb/noun endings)."""
+    if token.endswith("ies") and len(token) > 4:
+        token = token[:-3] + "y"
+    elif token.endswith("s") and not token.endswith(("ss", "us", "is")) and len(token) > 3:
+        token = token[:-1]
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text (including camelCase and snake_case identifiers) into stemmed terms."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [_stem(t) for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in _STOPWORDS]
 
 
 @dataclass
@@ -38,6 +87,30 @@ class GraphInfo:
         }
 
 
+# Searchable fields of a GraphInfo
+_FIELDS: Dict[str, Callable[["GraphInfo"], List[str]]] = {
+    "name": lambda g: [g.name, g.display_name],
+    "description": lambda g: [g.description_summary],
+    "domain_tags": lambda g: g.domain_tags,
+    "classes": lambda g: g.entity_types.get("classes", []),
+    "predicates": lambda g: g.entity_types.get("predicates", []),
+    "examples": lambda g: g.example_queries,
+    "namespaces": lambda g: g.identifier_namespaces,
+}
+
+
+# Facets list_graphs can filter on, matched case-insensitively
+FACETS: Dict[str, Callable[["GraphInfo"], List[str]]] = {
+    "domain": lambda g: g.domain_tags,
+    "entity_type": lambda g: g.entity_types.get("classes", []),
+    "namespace": lambda g: g.identifier_namespaces,
+    "predicate": lambda g: g.entity_types.get("predicates", []),
+}
+
+# Distinct filter/page combinations whose responses are kept
+SELECT_CACHE_SIZE = 256
+
+
 class GraphRegistry:
     """Registry of Proto-OKN knowledge graphs."""
 
@@ -84,9 +157,66 @@ class GraphRegistry:
             for alias in graph.aliases:
                 self._aliases[alias] = graph.name
 
+        self._build_index()
+        self._build_facets()
+
+    def _build_facets(self) -> None:
+        """Index graphs by each facet value (casefolded) for list_graphs filtering."""
+        self._facets: Dict[str, Dict[str, FrozenSet[int]]] = {}
+        for facet, getter in FACETS.items():
+            index: Dict[str, set] = {}
+            for doc, graph in enumerate(self._graphs.values()):
+                for value in getter(graph):
+                    index.setdefault(value.casefold(), set()).add(doc)
+            self._facets[facet] = {value: frozenset(docs) for value, docs in index.items()}
+        self._select_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+
+    def select(self, offset: int = 0, limit: Optional[int] = None, **filters: Optional[str]) -> Dict[str, Any]:
+        """Graphs matching all given facet filters (see FACETS), one page at a time.
+
+        ``filters`` maps facet names to values, e.g. ``domain="biology",
+        entity_type="Gene"``; None values are ignored. Returns a dict with
+        graph_count (all matches), graphs (the page) and next_offset (None on
+        the last page). Responses are cached and shared between callers, so
+        treat them as read-only. ``limit`` must be at least 1: an empty page
+        would not advance a client paging by next_offset.
+        """
+        unknown = set(filters) - set(FACETS)
+        if unknown:
+            raise ValueError(f"Unknown facet(s) {', '.join(sorted(unknown))}. Supported: {', '.join(FACETS)}")
+        if limit is not None and limit < 1:
+            raise ValueError(f"limit must be at least 1 (got {limit})")
+        active = tuple(sorted((f, v.casefold()) for f, v in filters.items() if v))
+        offset = max(0, offset)
+        key = (active, offset, limit)
+        cached = self._select_cache.get(key)
+        metrics.record_cache("list_graphs", hits=int(cached is not None), misses=int(cached is None))
+        if cached is not None:
+            self._select_cache.move_to_end(key)
+            return cached
+
+        docs = range(len(self._graph_dicts))
+        if active:
+            matches = frozenset.intersection(*(self._facets[f].get(v, frozenset()) for f, v in active))
+            docs = sorted(matches)
+        end = len(docs) if limit is None else min(len(docs), offset + limit)
+        response = {
+            "graph_count": len(docs),
+            "graphs": [self._graph_dicts[doc] for doc in docs[offset:end]],
+            "next_offset": end if end < len(docs) else None,
+        }
+        self._select_cache[key] = response
+        if len(self._select_cache) > SELECT_CACHE_SIZE:
+            self._select_cache.popitem(last=False)
+        return response
+
+    def facet_values(self, facet: str) -> Dict[str, int]:
+        """Number of graphs per value of a facet (values casefolded)."""
+        return {value: len(docs) for value, docs in sorted(self._facets[facet].items())}
+
     def list_all(self) -> List[Dict[str, Any]]:
         """Return metadata dicts for all graphs."""
-        return [g.to_dict() for g in self._graphs.values()]
+        return self.select()["graphs"]
 
     def get(self, name: str) -> Optional[GraphInfo]:
         """Get a graph by name or alias. Returns None if not found."""
@@ -102,77 +232,77 @@ class GraphRegistry:
 
     def filter_by_domain(self, domain: str) -> List[Dict[str, Any]]:
         """Return graphs matching a domain tag (case-insensitive)."""
-        domain_lower = domain.lower()
-        return [
-            g.to_dict() for g in self._graphs.values()
-            if any(d.lower() == domain_lower for d in g.domain_tags)
-        ]
+        return self.select(domain=domain)["graphs"]
 
     def filter_by_entity_type(self, entity_type: str) -> List[Dict[str, Any]]:
         """Return graphs containing an entity class (case-insensitive)."""
-        et_lower = entity_type.lower()
-        return [
-            g.to_dict() for g in self._graphs.values()
-            if any(c.lower() == et_lower for c in g.entity_types.get("classes", []))
+        return self.select(entity_type=entity_type)["graphs"]
+
+    def _build_index(self) -> None:
+        """Build the BM25F inverted index over all graphs' searchable fields."""
+        graphs = list(self._graphs.values())
+        field_tokens = [
+            {f: _tokenize(" ".join(getter(g))) for f, getter in _FIELDS.items()}
+            for g in graphs
         ]
+        avg_len = {
+            f: max(1.0, sum(len(tokens[f]) for tokens in field_tokens) / max(1, len(graphs)))
+            for f in _FIELDS
+        }
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc, tokens in enumerate(field_tokens):
+            # Field-weighted, length-normalized term frequency per term
+            weighted: Dict[str, float] = {}
+            for f, field_terms in tokens.items():
+                norm = 1 - BM25_B + BM25_B * len(field_terms) / avg_len[f]
+                for term in field_terms:
+                    weighted[term] = weighted.get(term, 0.0) + FIELD_WEIGHTS[f] / norm
+            for term, tf in weighted.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        n = len(graphs)
+        # term -> {doc: BM25 contribution of the term to the doc's score}
+        self._index: Dict[str, Dict[int, float]] = {}
+        for term, docs in postings.items():
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            self._index[term] = {doc: idf * tf * (BM25_K1 + 1) / (tf + BM25_K1) for doc, tf in docs}
+        # Graph dicts and name order, computed once rather than per search
+        self._graph_dicts = [g.to_dict() for g in graphs]
+        self._name_order = sorted(range(n), key=lambda doc: graphs[doc].name)
+        self._name_rank = [0] * n
+        for rank, doc in enumerate(self._name_order):
+            self._name_rank[doc] = rank
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search all graphs by BM25 relevance. Returns all graphs sorted by relevance.
+
+        Query and graph metadata are tokenized and stemmed, so "drugs" matches
+        "drug" and "treats" matches TREATS_CtD. Graphs without a matching
+        term follow in name order with a score of 0. ``limit`` caps the number
+        of graphs returned.
+        """
+        postings = sorted(
+            (self._index[term] for term in set(_tokenize(query)) if term in self._index),
+            key=len, reverse=True,
+        )
+        # Copy the longest posting list, then add the others to it
+        scores: Dict[int, float] = dict(postings[0]) if postings else {}
+        for posting in postings[1:]:
+            get = scores.get
+            for doc, contribution in posting.items():
+                scores[doc] = get(doc, 0.0) + contribution
 
-    def search(self, query: str) -> List[Dict[str, Any]]:
-        """Search all graphs by keyword matching. Returns all graphs sorted by relevance."""
-        query_lower = query.lower()
-        terms = query_lower.split()
-
-        scored = []
-        for graph in self._graphs.values():
-            score = 0
-
-            # Check description
-            desc_lower = graph.description_summary.lower()
-            for term in terms:
-                if term in desc_lower:
-                    score += 1
-
-            # Check domain tags
-            for tag in graph.domain_tags:
-                for term in terms:
-                    if term in tag.lower():
-                        score += 2
-
-            # Check entity classes
-            for cls in graph.entity_types.get("classes", []):
-                for term in terms:
-                    if term in cls.lower():
-                        score += 2
-
-            # Check predicates
-            for pred in graph.entity_types.get("predicates", []):
-                for term in terms:
-                    if term in pred.lower():
-                        score += 1
-
-            # Check example queries
-            for ex in graph.example_queries:
-                for term in terms:
-                    if term in ex.lower():
-                        score += 1
-
-            # Check identifier namespaces
-            for ns in graph.identifier_namespaces:
-                for term in terms:
-                    if term in ns.lower():
-                        score += 1
-
-            # Check graph name
-            for term in terms:
-                if term in graph.name.lower():
-                    score += 1
-
-            scored.append((score, graph))
-
-        # Sort by score descending, then by name for stability
-        scored.sort(key=lambda x: (-x[0], x[1].name))
+        name_rank = self._name_rank
+        if limit is not None and limit < len(scores):
+            ranked = heapq.nlargest(limit, scores, key=lambda doc: (scores[doc], -name_rank[doc]))
+        else:
+            ranked = sorted(scores, key=lambda doc: (-scores[doc], name_rank[doc]))
+            ranked += [doc for doc in self._name_order if doc not in scores]
+            if limit is not None:
+                ranked = ranked[:limit]
         return [
-            {**g.to_dict(), "relevance_score": s}
-            for s, g in scored
+            {**self._graph_dicts[doc], "relevance_score": round(scores.get(doc, 0.0), 4)}
+            for doc in ranked
         ]
 
     @property
@@ -0,0 +1,213 @@
+"""
+Stale-while-revalidate cache for remote metadata documents.
+
+SPARQLServer builds its description and schema from small text documents
+hosted on GitHub (FRINK registry markdown, metadata/descriptions/<kg>.txt and
+metadata/entities/<kg>_entities.csv). Fetching them on every tool call adds
+up to three blocking round trips with a 30 s timeout each and counts against
+upstream rate limits.
+
+RemoteTextCache keeps the last known copy of each document in memory and
+serves it immediately. Once an entry is older than ``max_age`` it is
+revalidated in the background with a conditional GET (If-None-Match /
+If-Modified-Since); a 304 only refreshes the timestamp, a 200 swaps in the
+new content. Entries are immutable and replaced in a single dict assignment,
+so readers never observe a half-updated document. A 404 is cached as
+``None`` as well, so a missing description file is not re-requested on every
+call. Transient failures (network errors, 5xx) with no earlier copy to fall
+back on are only remembered for ``failure_ttl`` seconds before the next
+request retries them.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from . import metrics
+
+# Default revalidation interval for cached documents (seconds)
+DEFAULT_MAX_AGE = float(os.environ.get("MCP_PROTO_OKN_METADATA_MAX_AGE", "3600"))
+# Seconds before a fetch that failed transiently (and had no copy to keep) is retried
+DEFAULT_FAILURE_TTL = 60.0
+
+
+@dataclass(frozen=True)
+class CachedDocument:
+    """One cached remote document and its validators."""
+    text: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    checked_at: float = 0.0  # time.monotonic() of the last (re)validation attempt
+    failed: bool = False  # text is None because of a transient failure, not a 404
+
+
+def _header(response: Any, name: str) -> Optional[str]:
+    """Return a response header as a string, or None if absent."""
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+    value = headers.get(name)
+    return value if isinstance(value, str) else None
+
+
+class RemoteTextCache:
+    """In-memory stale-while-revalidate cache of remote UTF-8 text documents."""
+
+    def __init__(
+        self,
+        max_age: float = DEFAULT_MAX_AGE,
+        timeout: float = 30.0,
+        opener: Optional[Callable[..., Any]] = None,
+        failure_ttl: float = DEFAULT_FAILURE_TTL,
+    ):
+        """
+        Args:
+            max_age: Seconds after which an entry is revalidated in the background.
+            timeout: Timeout for each upstream request in seconds.
+            failure_ttl: Seconds after which a transient failure with no cached
+                copy is retried (on the next get(), blocking like a cold fetch).
+            opener: Callable with the signature of ``urllib.request.urlopen``
+                (``opener(request, timeout=...)``). Defaults to urlopen.
+        """
+        self.max_age = max_age
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self._opener = opener or urlopen
+        self._entries: Dict[str, CachedDocument] = {}
+        self._lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._pending: Dict[str, threading.Thread] = {}
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---------------------- Public API ---------------------- #
+    def get(self, url: str) -> Optional[str]:
+        """Return the cached document for ``url``, fetching it on first use.
+
+        Only the very first request for a URL blocks. Afterwards the cached
+        copy is returned immediately and, if stale, revalidated in a
+        background thread.
+        """
+        entry = self._entries.get(url)
+        if entry is None or self._retry_due(entry):
+            metrics.record_cache("metadata", misses=1)
+            # Coalesce concurrent cold fetches of the same URL
+            with self._url_lock(url):
+                entry = self._entries.get(url)
+                if entry is None or self._retry_due(entry):
+                    entry = self.refresh(url)
+            return entry.text
+
+        metrics.record_cache("metadata", hits=1)
+        if time.monotonic() - entry.checked_at >= self.max_age:
+            self._revalidate_async(url)
+        return entry.text
+
+    def refresh(self, url: str) -> CachedDocument:
+        """Synchronously (re)validate ``url`` and return the resulting entry."""
+        previous = self._entries.get(url)
+        headers = {}
+        if previous is not None and previous.text is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        now = time.monotonic()
+        try:
+            request = Request(url, headers=headers)
+            with self._opener(request, timeout=self.timeout) as resp:
+                text = resp.read().decode("utf-8", errors="replace").strip()
+                entry = CachedDocument(
+                    text=text,
+                    etag=_header(resp, "ETag"),
+                    last_modified=_header(resp, "Last-Modified"),
+                    checked_at=now,
+                )
+        except HTTPError as e:
+            if e.code == 304 and previous is not None:
+                entry = CachedDocument(
+                    text=previous.text,
+                    etag=previous.etag,
+                    last_modified=previous.last_modified,
+                    checked_at=now,
+                )
+            elif e.code >= 500:
+                # Upstream trouble: keep serving the last good copy
+                entry = self._failed(previous, now)
+            else:
+                entry = CachedDocument(text=None, checked_at=now)
+        except Exception:
+            # Network error: keep the last good copy (or retry after failure_ttl)
+            entry = self._failed(previous, now)
+
+        self._entries[url] = entry
+        return entry
+
+    def prefetch(self, *urls: str) -> None:
+        """Fetch documents that are not cached yet in the background."""
+        for url in urls:
+            if url and url not in self._entries:
+                self._revalidate_async(url)
+
+    def start(self, interval: Optional[float] = None) -> None:
+        """Start a daemon thread that revalidates all entries every ``interval`` seconds."""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        interval = interval or self.max_age
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(interval):
+                for url in list(self._entries):
+                    with self._url_lock(url):
+                        self.refresh(url)
+
+        self._refresher = threading.Thread(
+            target=_loop, name="metadata-refresher", daemon=True
+        )
+        self._refresher.start()
+
+    def stop(self) -> None:
+        """Stop the periodic refresher started with start()."""
+        self._stop.set()
+
+    # ---------------------- Internal helpers ---------------------- #
+    def _retry_due(self, entry: CachedDocument) -> bool:
+        return entry.failed and time.monotonic() - entry.checked_at >= self.failure_ttl
+
+    @staticmethod
+    def _failed(previous: Optional[CachedDocument], now: float) -> CachedDocument:
+        """Entry after a transient failure: the last good copy if there is one."""
+        if previous is not None and previous.text is not None:
+            return CachedDocument(previous.text, previous.etag, previous.last_modified, now)
+        if previous is not None and not previous.failed:
+            # A known-missing document stays missing
+            return CachedDocument(text=None, checked_at=now)
+        return CachedDocument(text=None, checked_at=now, failed=True)
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _revalidate_async(self, url: str) -> None:
+        """Revalidate ``url`` in a background thread (at most one in flight per URL)."""
+        with self._lock:
+            if url in self._pending:
+                return
+
+            def _run():
+                try:
+                    with self._url_lock(url):
+                        self.refresh(url)
+                finally:
+                    with self._lock:
+                        self._pending.pop(url, None)
+
+            thread = threading.Thread(target=_run, name="metadata-revalidate", daemon=True)
+            self._pending[url] = thread
+        thread.start()
@@ -21,28 +21,67 @@ Environment variables (HTTP transport):
   MCP_PROTO_OKN_HOST       - Bind address (default "0.0.0.0")
   MCP_PROTO_OKN_PORT       - Bind port (default 8000)
   MCP_PROTO_OKN_API_KEY    - Optional Bearer-token authentication
+  MCP_PROTO_OKN_METRICS    - "0" disables the Prometheus /metrics endpoint
+  MCP_PROTO_OKN_TRACING    - OpenTelemetry exporter: "otlp", "file" or "console" (see tracing.py)
 """
 
 import os
 import sys
 import json
 import argparse
+import hashlib
+import math
 import textwrap
 import re
-from typing import Dict, Any, Optional, Union, List, Tuple
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional, Union, List, Tuple
 from io import StringIO
 import csv
 from urllib.parse import urlparse
 from urllib.request import urlopen
-from urllib.error import URLError, HTTPError
 import certifi
 
-from SPARQLWrapper import SPARQLWrapper, JSON
+from SPARQLWrapper import GET, JSON, POST, SPARQLWrapper
 from SPARQLWrapper.SPARQLExceptions import EndPointNotFound
 
+import anyio
 from mcp.server.fastmcp import FastMCP
 
 from . import __version__
+from .remote_cache import RemoteTextCache
+from .expansion_filter import ExpansionFilter
+from .hierarchy import IntervalHierarchy, PostFilter
+from .label_index import LabelIndex, load_label_index
+from .batching import MicroBatcher
+from . import diagnostics, metrics, profiling, querylog, tracing
+
+# Cached in place of an optional snapshot that is not installed, so the
+# filesystem is probed once rather than on every call
+_NOT_INSTALLED = object()
+
+# time.monotonic() by which upstream requests made in this context must finish
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(deadline: float) -> Iterator[None]:
+    """Bound the upstream requests of the enclosed block by ``deadline``.
+
+    Each request's client timeout is cut to the time remaining (worker threads
+    started through tracing.in_current_context inherit the deadline), and a
+    request due after the deadline fails with TimeoutError without being sent.
+    """
+    token = _request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
 
 class QueryAnalyzer:
     """Analyzes SPARQL queries for common issues with LIMIT and ORDER BY."""
@@ -185,6 +224,37 @@ class QueryAnalyzer:
         cleaned = re.sub(pattern, '', query, flags=re.IGNORECASE)
         return cleaned, removed
 
+    # IRIs (kept), string literals, comments and numeric literals, in one pass
+    _SHAPE_TOKENS = re.compile(
+        r'(<[^<>\s"{}|^`\\]*>)'
+        r'|("""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')'
+        r'|(#[^\n]*)'
+        r'|((?<![\w:.\-])[+-]?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w:]))'
+    )
+    _VALUES_BLOCK = re.compile(r'\bVALUES\s*(\?\w+|\([^)]*\))\s*\{[^{}]*\}', re.IGNORECASE)
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Reduce a query to its shape.
+
+        String and numeric literals (including LIMIT/OFFSET values) become
+        ``?``, VALUES data becomes ``{ ? }``, comments are dropped and
+        whitespace is collapsed. IRIs are kept.
+        """
+        def replace(match):
+            if match.group(1):
+                return match.group(1)
+            return "" if match.group(3) else "?"
+
+        shape = QueryAnalyzer._SHAPE_TOKENS.sub(replace, query)
+        shape = QueryAnalyzer._VALUES_BLOCK.sub(lambda m: f"VALUES {m.group(1)} {{ ? }}", shape)
+        return " ".join(shape.split())
+
+    @staticmethod
+    def fingerprint(query: str) -> str:
+        """Short hash of normalize_query(query); queries of the same shape share it."""
+        return hashlib.sha1(QueryAnalyzer.normalize_query(query).encode("utf-8")).hexdigest()[:16]
+
     def analyze_query(self, query: str) -> Dict[str, Any]:
         """
         Analyze a SPARQL query for potential issues.
@@ -232,6 +302,25 @@ class QueryAnalyzer:
         return analysis
 
 
+class _MeteredResponse:
+    """File-like wrapper around an HTTP response that counts the bytes read."""
+
+    def __init__(self, response):
+        self._response = response
+        self.bytes_read = 0
+        self.read_seconds = 0.0
+
+    def read(self, *args):
+        started = time.perf_counter()
+        data = self._response.read(*args)
+        self.read_seconds += time.perf_counter() - started
+        self.bytes_read += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
 class SPARQLServer:
     """SPARQL endpoint wrapper with Proto-OKN/registry awareness."""
     
@@ -239,10 +328,80 @@ class SPARQLServer:
     # Large VALUES clauses can cause 403 errors or timeouts
     MAX_VALUES_PER_BATCH = 20
 
-    def __init__(self, endpoint_url: str, description: Optional[str] = None):
+    # Maximum number of ontology roots expanded in a single ubergraph request.
+    # Larger root sets are split into chunks that are fetched concurrently.
+    MAX_ROOTS_PER_EXPANSION = 10
+    EXPANSION_CONCURRENCY = 4
+
+    # Queries longer than this are sent as POST; GET URLs this long are
+    # rejected by some proxies (414)
+    MAX_GET_QUERY_LENGTH = 4000
+
+    # Post-filter expansion: when VALUES batching would need more than
+    # POSTFILTER_BATCH_THRESHOLD queries, run the query once with the ontology
+    # term replaced by a variable and filter rows locally (see hierarchy.py).
+    POSTFILTER_BATCH_THRESHOLD = 10
+    POSTFILTER_ROW_LIMIT = 100000
+    HIERARCHY_MAX_EDGES = 500000
+    HIERARCHY_CACHE_SIZE = 32
+
+    # graph_join expansion joins against ubergraph inside the KG query. In auto
+    # mode each query shape measures both strategies and keeps the faster one,
+    # re-trying the slower one every EXPANSION_EXPLORE_INTERVAL queries.
+    EXPANSION_MIN_SAMPLES = 3
+    EXPANSION_LATENCY_ALPHA = 0.3
+    EXPANSION_EXPLORE_INTERVAL = 20
+    EXPANSION_STATS_SIZE = 512
+
+    EXPANSION_MODES = ("auto", "values", "postfilter", "graph_join")
+
+    UBERGRAPH_URI = "https://purl.org/okn/frink/kg/ubergraph"
+    RDFS_SUBCLASSOF = "http://www.w3.org/2000/01/rdf-schema#subClassOf"
+
+    # Label lookups: concurrent lookup_uri calls arriving within
+    # LOOKUP_BATCH_WINDOW seconds share one upstream query of up to
+    # LOOKUP_BATCH_SIZE labels.
+    LOOKUP_BATCH_WINDOW = 0.005
+    LOOKUP_BATCH_SIZE = 50
+
+    # Every graph is queried through the federation endpoint (scoped with
+    # FROM). MCP_PROTO_OKN_FEDERATED_ENDPOINT points it elsewhere, e.g. at the
+    # local stand-in endpoint in tests/local_endpoint.py.
+    FEDERATED_ENDPOINT = os.environ.get("MCP_PROTO_OKN_FEDERATED_ENDPOINT", "https://apps.okn.us/federation/sparql")
+    # Client timeout per upstream request, in whole seconds
+    SPARQL_TIMEOUT = int(os.environ.get("MCP_PROTO_OKN_SPARQL_TIMEOUT", "300"))
+
+    def __init__(self, endpoint_url: str, description: Optional[str] = None,
+                 metadata_cache: Optional[RemoteTextCache] = None,
+                 expansion_filter: Optional[ExpansionFilter] = None,
+                 label_index: Optional[LabelIndex] = None):
         self.endpoint_url = endpoint_url
         self.description = description  # None means: try to infer
         self.github_base_url = "https://raw.githubusercontent.com/sbl-sdsc/mcp-proto-okn/main/metadata/entities"
+
+        # Remote metadata documents (registry page, description, entity CSV) are
+        # served from a stale-while-revalidate cache; see remote_cache.py.
+        # The opener resolves urlopen at call time so it can be patched in tests.
+        self._metadata_cache = metadata_cache or RemoteTextCache(
+            opener=lambda request, timeout: urlopen(request, timeout=timeout)
+        )
+        self._entity_metadata_parsed: Optional[Tuple[str, Dict[str, Dict[str, str]]]] = None
+
+        # Skips descendant queries for leaf terms and non-class IRIs; see expansion_filter.py
+        self._expansion_filter = expansion_filter or ExpansionFilter.from_snapshot()
+        # Local label/synonym index for lookup_uri; loaded lazily from the
+        # snapshot when not given (see label_index.py)
+        self._label_index: Any = label_index
+        self._lookup_batcher = MicroBatcher(
+            self._lookup_batch_handler, window=self.LOOKUP_BATCH_WINDOW, max_batch=self.LOOKUP_BATCH_SIZE
+        )
+        # (root, max_depth) -> IntervalHierarchy, for post-filter expansion
+        self._hierarchy_cache: "OrderedDict[Tuple[str, int], IntervalHierarchy]" = OrderedDict()
+        self._hierarchy_lock = threading.Lock()
+        # Per query fingerprint (LRU): moving-average latency (seconds) and sample
+        # count per expansion mode of auto-mode runs, and auto decisions made
+        self._expansion_stats: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._latency_lock = threading.Lock()
         
         # Track schema state
         self._schema_fetched = False
@@ -259,16 +418,100 @@ class SPARQLServer:
         os.environ.setdefault("SSL_CERT_FILE", certifi.where())
         os.environ.setdefault("REQUESTS_CA_BUNDLE", certifi.where())
         
-        # Initialize SPARQLWrapper
-        federated_endpoint = "https://apps.okn.us/federation/sparql"
-        self.sparql = SPARQLWrapper(federated_endpoint)
-        self.sparql.setReturnFormat(JSON)
-
-        self.sparql.setMethod("GET")
-        self.sparql.addCustomHttpHeader("Accept", "application/sparql-results+json")
-        self.sparql.setTimeout(300)
+        # Initialize SPARQLWrapper. SPARQLWrapper keeps the query as mutable
+        # state, so every thread gets its own client (see _client()); the
+        # constructing thread uses self.sparql.
+        self._local = threading.local()
+        self.sparql = self._new_sparql_client()
+        self._local.client = self.sparql
 
     # ---------------------- Internal helpers ---------------------- #
+    def _new_sparql_client(self) -> SPARQLWrapper:
+        """Create a SPARQLWrapper configured for the federated endpoint."""
+        client = SPARQLWrapper(self.FEDERATED_ENDPOINT)
+        client.setReturnFormat(JSON)
+
+        client.setMethod("GET")
+        client.addCustomHttpHeader("Accept", "application/sparql-results+json")
+        client.setTimeout(self.SPARQL_TIMEOUT)
+        return client
+
+    def _client(self) -> SPARQLWrapper:
+        """Return the SPARQLWrapper owned by the calling thread."""
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._new_sparql_client()
+            self._local.client = client
+        return client
+
+    def _run_query(self, query: str) -> Dict[str, Any]:
+        """Send a query to the federated endpoint and return the raw JSON result.
+
+        Thread-safe: concurrent callers each use their own client.
+        Latency, outcome and response size are recorded in metrics.py and the
+        query log (querylog.py) and, when tracing is on, in a ``sparql.request``
+        span.
+        """
+        client = self._client()
+        client.setQuery(query)
+        client.setMethod(POST if len(query) > self.MAX_GET_QUERY_LENGTH else GET)
+        timeout = self.SPARQL_TIMEOUT
+        deadline = _request_deadline.get()
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Request deadline passed before the query was sent")
+            # SPARQLWrapper takes whole seconds
+            timeout = min(timeout, math.ceil(remaining))
+        client.setTimeout(timeout)
+        fingerprint = QueryAnalyzer.fingerprint(query)
+        with tracing.span("sparql.request", sparql_graph=self.kg_name, sparql_fingerprint=fingerprint,
+                          sparql_query_length=len(query)) as current:
+            started = time.perf_counter()
+            try:
+                response = client.query()
+                responded = time.perf_counter()
+                response.response = metered = _MeteredResponse(response.response)
+                result = response.convert()
+            except Exception as e:
+                seconds = time.perf_counter() - started
+                metrics.record_upstream(self.kg_name, seconds, error=True)
+                querylog.QUERY_LOG.record(self.kg_name, fingerprint, query, seconds, error=str(e) or type(e).__name__)
+                raise
+            finished = time.perf_counter()
+            rows = len(result.get("results", {}).get("bindings", [])) if isinstance(result, dict) else None
+            metrics.record_upstream(self.kg_name, finished - started, metered.bytes_read)
+            querylog.QUERY_LOG.record(self.kg_name, fingerprint, query, finished - started, rows, metered.bytes_read)
+            profile = profiling.current()
+            if profile is not None or tracing.enabled():
+                network_s = responded - started + metered.read_seconds
+                parse_s = finished - responded - metered.read_seconds
+                if profile is not None:
+                    profile.record_request(network_s, parse_s, metered.bytes_read, rows)
+                tracing.set_attributes(current, sparql_response_bytes=metered.bytes_read, sparql_rows=rows,
+                                       sparql_network_s=network_s, sparql_parse_s=parse_s)
+        return result
+
+    @staticmethod
+    def _sparql_string(value: str) -> str:
+        """Quote ``value`` as a SPARQL string literal."""
+        escaped = (
+            value.replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+        )
+        return f'"{escaped}"'
+
+    def _get_label_index(self) -> Optional[LabelIndex]:
+        """Return the label index (loading the shared snapshot on first use), or None."""
+        if self._label_index is None:
+            self._label_index = load_label_index() or _NOT_INSTALLED
+        return None if self._label_index is _NOT_INSTALLED else self._label_index
+
+    @property
+    def graph_uri(self) -> str:
+        """Named graph of this KG on the federation endpoint."""
+        return f"https://purl.org/okn/frink/kg/{self.kg_name}"
+
     def _insert_from_clause(self, query_string, kg_name):
         """
         Inserts a FROM line after the SELECT clause and before WHERE.
@@ -343,16 +586,30 @@ class SPARQLServer:
 
     def _fetch_registry_content(self) -> Optional[str]:
         """Fetch registry page content in markdown format or None on failure."""
-        try:
-            if not self.registry_url:
-                return None
-
-            with urlopen(self.registry_url, timeout=30) as resp:
-                raw = resp.read()
-                text = raw.decode("utf-8", errors="replace")
-                return text.strip()
-        except Exception:
+        if not self.registry_url:
             return None
+        return self._metadata_cache.get(self.registry_url)
+
+    def _entity_metadata_url(self) -> str:
+        """URL of the entity inventory CSV for this KG."""
+        return f"{self.github_base_url}/{self.kg_name}_entities.csv"
+
+    def _additional_description_url(self) -> str:
+        """URL of the additional description text for this KG."""
+        return (
+            "https://raw.githubusercontent.com/sbl-sdsc/mcp-proto-okn/"
+            f"main/metadata/descriptions/{self.kg_name}.txt"
+        )
+
+    def prefetch_metadata(self) -> None:
+        """Warm the metadata cache in the background so the first tool call does not block."""
+        if not self.registry_url:
+            return
+        self._metadata_cache.prefetch(
+            self.registry_url,
+            self._additional_description_url(),
+            self._entity_metadata_url(),
+        )
 
     def _get_entity_metadata(self) -> Dict[str, Dict[str, str]]:
         """
@@ -362,13 +619,16 @@ class SPARQLServer:
         if not self.registry_url:
             return {}
     
-        filename = f"{self.kg_name}_entities.csv"
-        url = f"{self.github_base_url}/{filename}"
-        
+        content = self._metadata_cache.get(self._entity_metadata_url())
+        if not content:
+            return {}
+
+        # Re-parse only when the cache swapped in a new document
+        parsed = self._entity_metadata_parsed
+        if parsed is not None and parsed[0] is content:
+            return parsed[1]
+
         try:
-            with urlopen(url, timeout=30) as response:
-                content = response.read().decode('utf-8')
-                
             # Parse CSV
             reader = csv.DictReader(StringIO(content))
             metadata = {}
@@ -403,6 +663,7 @@ class SPARQLServer:
                             'target_class': target_class
                         }
             
+            self._entity_metadata_parsed = (content, metadata)
             return metadata
             
         except Exception as e:
@@ -454,71 +715,189 @@ class SPARQLServer:
         
         return list(set(detected_uris))  # Remove duplicates
     
-    def _fetch_descendants_for_uri(self, uri: str, max_results: int = 2000, max_depth: int = 5) -> List[str]:
-        """
-        Fetch descendant URIs for a given ontology URI using the ubergraph,
-        with depth limiting to avoid runaway traversals.
-        
-        Uses a bounded property path (up to max_depth hops) instead of unbounded
-        rdfs:subClassOf* to prevent timeouts on large ontologies.
-        
-        Args:
-            uri: The ontology URI to expand
-            max_results: Maximum number of descendants to retrieve
-            max_depth: Maximum number of subClassOf hops to traverse (default: 5)
-            
-        Returns:
-            List of descendant URIs (including the original URI)
+    @staticmethod
+    def _descendant_depth_patterns(root: str, max_depth: int, mid_prefix: str = "?_mid", descendant: str = "?descendant") -> List[str]:
+        """Build one UNION branch per path length (1..max_depth) from ``descendant`` up to ``root``.
+
+        ``root`` is either a variable (``?root``) or a bracketed URI (``<...>``).
+        This avoids unbounded rdfs:subClassOf* which can timeout on large ontologies.
+        Each branch adds one more hop: ?d subClassOf ?mid1 . ?mid1 subClassOf root etc.
         """
-        # Build a depth-limited query using UNION of explicit path lengths.
-        # This avoids unbounded rdfs:subClassOf* which can timeout on large ontologies.
-        # Each UNION branch adds one more hop: ?d subClassOf ?mid1 . ?mid1 subClassOf <uri> etc.
         depth_patterns = []
         for depth in range(1, max_depth + 1):
             if depth == 1:
-                depth_patterns.append(f"{{ ?descendant rdfs:subClassOf <{uri}> }}")
+                depth_patterns.append(f"{{ {descendant} rdfs:subClassOf {root} }}")
             else:
-                # Chain: ?descendant -> ?m1 -> ?m2 -> ... -> <uri>
+                # Chain: ?descendant -> ?m1 -> ?m2 -> ... -> root
                 chain_parts = []
-                prev_var = "?descendant"
+                prev_var = descendant
                 for i in range(1, depth):
-                    next_var = f"?_mid{i}"
+                    next_var = f"{mid_prefix}{i}"
                     chain_parts.append(f"{prev_var} rdfs:subClassOf {next_var} .")
                     prev_var = next_var
-                chain_parts.append(f"{prev_var} rdfs:subClassOf <{uri}> .")
+                chain_parts.append(f"{prev_var} rdfs:subClassOf {root} .")
                 depth_patterns.append("{ " + " ".join(chain_parts) + " }")
-        
-        union_block = "\n    UNION\n    ".join(depth_patterns)
-        
-        query = f"""
+        return depth_patterns
+
+    def _build_descendants_query(self, uris: List[str], max_results: int, max_depth: int) -> str:
+        """Build a single ubergraph query expanding all ``uris`` at once.
+
+        Each root gets its own subquery with its own ``LIMIT max_results``, so a
+        broad root cannot crowd the other roots out of the response; within a
+        root the closest descendants (fewest subClassOf hops) are kept first.
+        Rows are ``(?root, ?descendant)`` pairs, so a descendant under several
+        roots (e.g. when one root is nested in another) is returned per root.
+        """
+        subqueries = []
+        for uri in uris:
+            branches = [
+                f"{{ {pattern} BIND({depth} AS ?_depth) }}"
+                for depth, pattern in enumerate(self._descendant_depth_patterns(f"<{uri}>", max_depth), 1)
+            ]
+            union_block = "\n              UNION\n              ".join(branches)
+            subqueries.append(f"""{{
+            {{
+              SELECT ?descendant (MIN(?_depth) AS ?depth) WHERE {{
+              {union_block}
+              }}
+              GROUP BY ?descendant
+              ORDER BY ?depth ?descendant
+              LIMIT {max_results}
+            }}
+            BIND(<{uri}> AS ?root)
+          }}""")
+
+        return f"""
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         
-        SELECT DISTINCT ?descendant
+        SELECT ?root ?descendant
         FROM <https://purl.org/okn/frink/kg/ubergraph>
         WHERE {{
-          {{
-            {union_block}
-          }}
+          {" UNION ".join(subqueries)}
         }}
-        LIMIT {max_results}
         """
+
+    def _fetch_descendants_chunk(self, uris: List[str], max_results: int, max_depth: int) -> Dict[str, List[str]]:
+        """Fetch descendants for one chunk of roots in a single request."""
+        descendants: Dict[str, List[str]] = {uri: [uri] for uri in uris}
+        started = time.perf_counter()
+        with tracing.span("expansion.fetch_descendants", expansion_roots=" ".join(uris),
+                          expansion_max_depth=max_depth, expansion_max_results=max_results) as current:
+            try:
+                # Execute directly against the federated endpoint to avoid recursion
+                raw_result = self._run_query(self._build_descendants_query(uris, max_results, max_depth))
+            except Exception as e:
+                # If expansion fails, just return the original URIs
+                tracing.set_attributes(current, expansion_error=str(e))
+                return descendants
+            if not isinstance(raw_result, dict) or "bindings" not in raw_result.get("results", {}):
+                # Not a SELECT result: treat like a failed request
+                tracing.set_attributes(current, expansion_error="malformed response")
+                return descendants
+            tracing.set_attributes(current, expansion_rows=len(raw_result["results"]["bindings"]))
+
+        rows: Dict[str, int] = dict.fromkeys(uris, 0)
+        for binding in raw_result.get("results", {}).get("bindings", []):
+            desc = binding.get("descendant", {}).get("value", "")
+            root = binding.get("root", {}).get("value", "")
+            desc_list = descendants.get(root)
+            if not desc or desc_list is None:
+                continue
+            rows[root] += 1
+            if desc != root and len(desc_list) < max_results:
+                desc_list.append(desc)
+
+        profile = profiling.current()
+        if profile is not None:
+            profile.record_descendant_fetch(
+                uris, time.perf_counter() - started, sum(len(d) - 1 for d in descendants.values())
+            )
+
+        # Remember leaves (and confirmed parents) so later queries skip the round
+        # trip; a root whose subquery hit its LIMIT is not trusted as a leaf
+        for uri, desc_list in descendants.items():
+            if len(desc_list) > 1:
+                self._expansion_filter.record(uri, True)
+            elif rows[uri] < max_results:
+                self._expansion_filter.record(uri, False)
+        return descendants
+
+    def _fetch_descendants_for_uris(self, uris: List[str], max_results: int = 2000, max_depth: int = 5) -> Dict[str, List[str]]:
+        """
+        Fetch descendant URIs for several ontology URIs using the ubergraph.
+
+        Roots are expanded together in one request per MAX_ROOTS_PER_EXPANSION
+        roots; when more than one request is needed they run concurrently.
+
+        Args:
+            uris: The ontology URIs to expand (duplicates are ignored)
+            max_results: Maximum number of descendants to retrieve per URI
+            max_depth: Maximum number of subClassOf hops to traverse (default: 5)
+
+        Returns:
+            Dict mapping each URI to its descendant list (the URI itself first)
+        """
+        roots = list(dict.fromkeys(uris))
+        if not roots:
+            return {}
+
+        chunks = [
+            roots[i:i + self.MAX_ROOTS_PER_EXPANSION]
+            for i in range(0, len(roots), self.MAX_ROOTS_PER_EXPANSION)
+        ]
+        if len(chunks) == 1:
+            results = [self._fetch_descendants_chunk(chunks[0], max_results, max_depth)]
+        else:
+            workers = min(self.EXPANSION_CONCURRENCY, len(chunks))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    tracing.in_current_context(
+                        lambda chunk: self._fetch_descendants_chunk(chunk, max_results, max_depth)
+                    ),
+                    chunks,
+                ))
+
+        merged: Dict[str, List[str]] = {}
+        for result in results:
+            merged.update(result)
+        return {root: merged[root] for root in roots}
+
+    def _fetch_descendants_for_uri(self, uri: str, max_results: int = 2000, max_depth: int = 5) -> List[str]:
+        """
+        Fetch descendant URIs for a given ontology URI using the ubergraph,
+        with depth limiting to avoid runaway traversals.
         
-        try:
-            # Execute directly against the federated endpoint to avoid recursion
-            self.sparql.setQuery(query)
-            raw_result = self.sparql.query().convert()
-            
-            # Use the existing _extract_values method
-            desc_uris = self._extract_values(raw_result, 'descendant')
-            # Filter out the original URI and include it at the start
-            descendants = [uri] + [d for d in desc_uris if d and d != uri]
+        Uses a bounded property path (up to max_depth hops) instead of unbounded
+        rdfs:subClassOf* to prevent timeouts on large ontologies.
+        
+        Args:
+            uri: The ontology URI to expand
+            max_results: Maximum number of descendants to retrieve
+            max_depth: Maximum number of subClassOf hops to traverse (default: 5)
             
-            return descendants[:max_results]
-        except Exception as e:
-            # If expansion fails, just return the original URI
-            return [uri]
+        Returns:
+            List of descendant URIs (including the original URI)
+        """
+        return self._fetch_descendants_for_uris([uri], max_results, max_depth)[uri]
     
-    def _expand_query_with_descendants(self, query_string: str, ontology_uris: List[str], max_descendants: int = 100, max_depth: int = 5, bind_variables: Optional[List[str]] = None) -> Tuple[Union[str, List[str]], Dict[str, List[str]]]:
+    @staticmethod
+    def _find_nested_roots(uri_to_descendants: Dict[str, List[str]]) -> Dict[str, str]:
+        """Map each root that is a descendant of another root to that ancestor root.
+
+        Nesting is only known once the roots have been fetched, and the rows are
+        flat ``(?root, ?descendant)`` pairs without subClassOf edges, so a nested
+        root's own subtree cannot be carved out of its ancestor's list; every
+        root therefore keeps its own subquery and this is reported, not reused.
+        """
+        nested = {}
+        for ancestor, descendants in uri_to_descendants.items():
+            members = set(descendants[1:])
+            for root in uri_to_descendants:
+                if root != ancestor and root in members and root not in nested:
+                    nested[root] = ancestor
+        return nested
+
+    def _expand_query_with_descendants(self, query_string: str, ontology_uris: List[str], max_descendants: int = 100, max_depth: int = 5, bind_variables: Optional[List[str]] = None, uri_to_descendants: Optional[Dict[str, List[str]]] = None) -> Tuple[Union[str, List[str]], Dict[str, List[str]]]:
         """
         Rewrite a SPARQL query to include descendants of detected ontology URIs.
         
@@ -541,6 +920,8 @@ class SPARQLServer:
                            concepts, pass bind_variables=['disease'] or ['?disease'].
                            This is useful for GROUP BY queries where you want to count/aggregate
                            per descendant rather than just filter datasets.
+            uri_to_descendants: Descendants already fetched with _fetch_descendants_for_uris;
+                           fetched here when None.
             
         Returns:
             Tuple of (expanded_query_or_queries, uri_to_descendants_mapping)
@@ -556,13 +937,15 @@ class SPARQLServer:
         if bind_variables:
             bind_vars = [v if v.startswith('?') else f'?{v}' for v in bind_variables]
         
-        uri_to_descendants = {}
         var_to_descendants = {}  # Map variable names to their descendant lists
         
-        # Fetch all descendants first
+        # Fetch all descendants first, batched into as few ubergraph requests as possible
+        if uri_to_descendants is None:
+            uri_to_descendants = self._fetch_descendants_for_uris(
+                ontology_uris, max_results=max_descendants, max_depth=max_depth
+            )
         for uri in ontology_uris:
-            descendants = self._fetch_descendants_for_uri(uri, max_results=max_descendants, max_depth=max_depth)
-            uri_to_descendants[uri] = descendants
+            descendants = uri_to_descendants[uri]
             
             if len(descendants) <= 1:
                 # No descendants found (or just the original URI), skip expansion
@@ -729,6 +1112,256 @@ class SPARQLServer:
 
         return batched_queries, uri_to_descendants
     
+    @staticmethod
+    def _estimate_expansion_batches(uri_to_descendants: Dict[str, List[str]], max_values: int) -> int:
+        """Number of queries VALUES batching needs for the given expansion."""
+        sizes = [len(d) for d in uri_to_descendants.values() if len(d) > 1]
+        if not sizes or sum(sizes) <= max_values:
+            return 1
+        per_var_batch_size = max(1, max_values // len(sizes))
+        batches = 1
+        for size in sizes:
+            batches *= -(-size // per_var_batch_size)
+        return batches
+
+    @staticmethod
+    def _postfilter_ineligible_reason(query_string: str) -> Optional[str]:
+        """Return why a query cannot be post-filtered, or None if it can.
+
+        Post-filtering drops rows after the fact, so it is only correct for plain
+        SELECT queries: aggregates, GROUP BY and subqueries would be computed
+        over the unfiltered rows.
+        """
+        if len(re.findall(r'\bSELECT\b', query_string, re.IGNORECASE)) != 1:
+            return "only single (non-nested) SELECT queries are supported"
+        if re.search(r'\bGROUP\s+BY\b|\bHAVING\b', query_string, re.IGNORECASE):
+            return "GROUP BY/HAVING queries are aggregated server-side"
+        if re.search(r'\b(?:COUNT|SUM|AVG|MIN|MAX|GROUP_CONCAT|SAMPLE)\s*\(', query_string, re.IGNORECASE):
+            return "aggregate functions are computed server-side"
+        return None
+
+    def _build_hierarchy_query(self, uri: str, max_depth: int) -> str:
+        """Build a ubergraph query returning the subClassOf edges below ``uri``."""
+        union_block = "\n    UNION\n    ".join(self._descendant_depth_patterns(f"<{uri}>", max_depth))
+        return f"""
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        
+        SELECT DISTINCT ?descendant ?parent
+        FROM <https://purl.org/okn/frink/kg/ubergraph>
+        WHERE {{
+          {{
+            {union_block}
+          }}
+          ?descendant rdfs:subClassOf ?parent .
+          FILTER(isIRI(?parent))
+        }}
+        LIMIT {self.HIERARCHY_MAX_EDGES}
+        """
+
+    def _fetch_hierarchy(self, uri: str, max_depth: int) -> Optional[IntervalHierarchy]:
+        """Fetch and label the hierarchy below ``uri`` (None if the request fails)."""
+        started = time.perf_counter()
+        profile = profiling.current()
+        try:
+            raw_result = self._run_query(self._build_hierarchy_query(uri, max_depth))
+        except Exception:
+            if profile is not None:
+                profile.record_hierarchy_fetch(uri, time.perf_counter() - started, None)
+            return None
+        edges = [
+            (b["descendant"]["value"], b["parent"]["value"])
+            for b in raw_result.get("results", {}).get("bindings", [])
+            if "descendant" in b and "parent" in b
+        ]
+        if profile is not None:
+            profile.record_hierarchy_fetch(uri, time.perf_counter() - started, len(edges))
+        return IntervalHierarchy(edges, [uri])
+
+    def _get_hierarchies(self, uris: List[str], max_depth: int) -> Dict[str, IntervalHierarchy]:
+        """Return interval-labeled hierarchies for ``uris``, fetching missing ones concurrently."""
+        hierarchies: Dict[str, IntervalHierarchy] = {}
+        with self._hierarchy_lock:
+            for uri in uris:
+                cached = self._hierarchy_cache.get((uri, max_depth))
+                if cached is not None:
+                    self._hierarchy_cache.move_to_end((uri, max_depth))
+                    hierarchies[uri] = cached
+        missing = [uri for uri in dict.fromkeys(uris) if uri not in hierarchies]
+        metrics.record_cache("hierarchy", hits=len(hierarchies), misses=len(missing))
+        if not missing:
+            return hierarchies
+
+        workers = min(self.EXPANSION_CONCURRENCY, len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched = list(pool.map(
+                tracing.in_current_context(lambda uri: self._fetch_hierarchy(uri, max_depth)), missing
+            ))
+
+        with self._hierarchy_lock:
+            for uri, hierarchy in zip(missing, fetched):
+                if hierarchy is None:
+                    continue
+                hierarchies[uri] = hierarchy
+                self._hierarchy_cache[(uri, max_depth)] = hierarchy
+                while len(self._hierarchy_cache) > self.HIERARCHY_CACHE_SIZE:
+                    self._hierarchy_cache.popitem(last=False)
+        return hierarchies
+
+    def _build_postfilter_query(self, query_string: str, ontology_uris: List[str], hierarchies: Dict[str, IntervalHierarchy], bind_variables: Optional[List[str]] = None) -> Tuple[str, PostFilter]:
+        """
+        Rewrite a query for post-filter expansion.
+
+        Each ontology URI is replaced by a variable (the first bind variable, or
+        ?expanded_uri_<id> as in VALUES mode), which is added to the projection
+        if needed. LIMIT/OFFSET are applied locally after filtering, and the
+        rewritten query is capped at POSTFILTER_ROW_LIMIT rows.
+
+        Returns:
+            Tuple of (rewritten_query, post_filter)
+        """
+        bind_vars = [v if v.startswith('?') else f'?{v}' for v in (bind_variables or [])]
+        post_filter = PostFilter()
+        rewritten = query_string
+
+        for uri in ontology_uris:
+            if bind_vars:
+                var_name = bind_vars[0]
+            else:
+                uri_id = uri.split('_')[-1] if '_' in uri else uri.split('/')[-1]
+                var_name = f"?expanded_uri_{uri_id}"
+            rewritten = rewritten.replace(f"<{uri}>", var_name)
+            post_filter.checks.setdefault(var_name[1:], []).append((hierarchies[uri], uri))
+
+        # Make sure every filtered variable is projected
+        select_match = re.search(r'\bSELECT\s+((?:DISTINCT|REDUCED)\s+)?', rewritten, re.IGNORECASE)
+        post_filter.distinct = bool(select_match and select_match.group(1)
+                                    and select_match.group(1).strip().upper() == "DISTINCT")
+        if select_match and not re.match(r'\s*\*', rewritten[select_match.end():]):
+            projected = set(QueryAnalyzer.extract_select_variables(rewritten))
+            added = [var for var in post_filter.checks if var not in projected]
+            if added:
+                insert_pos = select_match.end()
+                rewritten = (
+                    rewritten[:insert_pos] + " ".join(f"?{v}" for v in added) + " " +
+                    rewritten[insert_pos:]
+                )
+                post_filter.drop_columns = added
+
+        # LIMIT/OFFSET must apply to the filtered rows, not the unfiltered scan
+        limit = re.search(r'\bLIMIT\s+(\d+)', rewritten, re.IGNORECASE)
+        offset = re.search(r'\bOFFSET\s+(\d+)', rewritten, re.IGNORECASE)
+        post_filter.limit = int(limit.group(1)) if limit else None
+        post_filter.offset = int(offset.group(1)) if offset else 0
+        rewritten = re.sub(r'\b(?:LIMIT|OFFSET)\s+\d+', '', rewritten, flags=re.IGNORECASE).rstrip()
+        rewritten += f"\nLIMIT {self.POSTFILTER_ROW_LIMIT}"
+
+        return rewritten, post_filter
+
+    def _build_graph_join_query(self, query_string: str, ontology_uris: List[str], max_descendants: int, max_depth: int, bind_variables: Optional[List[str]] = None) -> str:
+        """
+        Rewrite a query to expand ontology URIs inside the same request.
+
+        Each URI is replaced by a variable (the first bind variable, or
+        ?expanded_uri_<id> as in VALUES mode) bound to the URI itself or to one
+        of its ``max_descendants - 1`` nearest descendants from a subquery over
+        the ubergraph named graph, using the same bounded subClassOf chains and
+        ordering as the client-side pre-fetch (_build_descendants_query). No descendant round trip or batching is
+        needed, because the KG graphs and ubergraph share the federation endpoint.
+        """
+        bind_vars = [v if v.startswith('?') else f'?{v}' for v in (bind_variables or [])]
+        rewritten = query_string
+        subqueries = {}
+
+        for uri in ontology_uris:
+            uri_id = uri.split('_')[-1] if '_' in uri else uri.split('/')[-1]
+            var_name = bind_vars[0] if bind_vars else f"?expanded_uri_{uri_id}"
+            rewritten = rewritten.replace(f"<{uri}>", var_name)
+
+            suffix = re.sub(r'[^A-Za-z0-9]', '', uri_id)
+            mid_prefix = f"?_mid{suffix}_"
+            depth_var = f"?_depth{suffix}"
+            # Full IRI: the user's query need not declare the rdfs: prefix
+            branches = [
+                f"{{ {p.replace('rdfs:subClassOf', f'<{self.RDFS_SUBCLASSOF}>')} BIND({depth} AS ?_depth) }}"
+                for depth, p in enumerate(
+                    self._descendant_depth_patterns(f"<{uri}>", max_depth, mid_prefix, var_name), 1
+                )
+            ]
+            union_block = "\n        UNION\n        ".join(branches)
+            # Nearest descendants first, as in _build_descendants_query; the
+            # root is outside the LIMITed subquery, so the cap never drops it
+            subquery = (
+                f"{{ {{ VALUES {var_name} {{ <{uri}> }} }}\n  UNION\n"
+                f"  {{ SELECT {var_name} WHERE {{\n"
+                f"    {{ SELECT {var_name} (MIN(?_depth) AS {depth_var}) WHERE {{\n"
+                f"      GRAPH <{self.UBERGRAPH_URI}> {{\n        {union_block}\n      }}\n"
+                f"      FILTER({var_name} != <{uri}>)\n"
+                f"    }} GROUP BY {var_name} ORDER BY {depth_var} {var_name} LIMIT {max(0, max_descendants - 1)} }}\n"
+                f"  }} }} }}"
+            )
+            # With bind_expansion_to, several URIs share one variable; the
+            # constraints are then intersected, as in VALUES mode.
+            subqueries.setdefault(var_name, []).append(subquery)
+
+        where_match = re.search(r'WHERE\s*\{', rewritten, re.IGNORECASE)
+        if where_match:
+            blocks = "\n  ".join(sq for group in subqueries.values() for sq in group)
+            insert_pos = where_match.end()
+            rewritten = rewritten[:insert_pos] + f"\n  {blocks}\n" + rewritten[insert_pos:]
+
+            # FROM <kg> (added at execution) would otherwise leave no named graphs
+            if self.kg_name != '':
+                rewritten = re.sub(
+                    r'(?i)\bWHERE\s*\{',
+                    f"FROM NAMED <{self.UBERGRAPH_URI}>\nWHERE {{",
+                    rewritten,
+                    count=1
+                )
+        return rewritten
+
+    def _choose_expansion_strategy(self, fingerprint: str = "") -> str:
+        """Pick "graph_join" or client-side expansion ("values") for a query shape.
+
+        Latency is measured per query fingerprint and per mode that ran, from
+        auto-mode runs only. Client-side expansion ("values" or "postfilter",
+        the established path) is tried EXPANSION_MIN_SAMPLES times first, then
+        graph_join; afterwards the lower moving-average latency wins, except
+        that every EXPANSION_EXPLORE_INTERVAL-th decision runs the slower
+        strategy, so one bad sample cannot lock the choice in.
+        """
+        with self._latency_lock:
+            stats = self._expansion_stats.get(fingerprint)
+            if stats is None:
+                return "values"
+            self._expansion_stats.move_to_end(fingerprint)
+            samples, latency = stats["samples"], stats["latency"]
+            client = max(("values", "postfilter"), key=lambda mode: samples.get(mode, 0))
+            if samples.get(client, 0) < self.EXPANSION_MIN_SAMPLES:
+                return "values"
+            if samples.get("graph_join", 0) < self.EXPANSION_MIN_SAMPLES:
+                return "graph_join"
+            stats["decisions"] += 1
+            faster = "graph_join" if latency["graph_join"] <= latency[client] else "values"
+            if stats["decisions"] % self.EXPANSION_EXPLORE_INTERVAL == 0:
+                return "values" if faster == "graph_join" else "graph_join"
+            return faster
+
+    def _record_expansion_latency(self, mode: str, seconds: float, fingerprint: str = "") -> None:
+        """Update the exponentially weighted latency average of a mode for a query shape."""
+        with self._latency_lock:
+            stats = self._expansion_stats.get(fingerprint)
+            if stats is None:
+                stats = self._expansion_stats[fingerprint] = {"latency": {}, "samples": {}, "decisions": 0}
+                if len(self._expansion_stats) > self.EXPANSION_STATS_SIZE:
+                    self._expansion_stats.popitem(last=False)
+            else:
+                self._expansion_stats.move_to_end(fingerprint)
+            previous = stats["latency"].get(mode)
+            stats["latency"][mode] = seconds if previous is None else (
+                self.EXPANSION_LATENCY_ALPHA * seconds + (1 - self.EXPANSION_LATENCY_ALPHA) * previous
+            )
+            stats["samples"][mode] = stats["samples"].get(mode, 0) + 1
+
     def _merge_batch_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Merge results from multiple batched queries into a single result.
@@ -782,7 +1415,9 @@ class SPARQLServer:
         """
         return self.execute(query_string, analyze=analyze, auto_expand_descendants=auto_expand)
     
-    def execute(self, query_string: str, analyze: bool = True, auto_expand_descendants: bool = True, max_descendants: int = 2000, max_depth: int = 5, bind_expansion_to: Optional[List[str]] = None) -> Dict[str, Any]:
+    @profiling.with_profile
+    @tracing.traced("sparql.execute")
+    def execute(self, query_string: str, analyze: bool = True, auto_expand_descendants: bool = True, max_descendants: int = 2000, max_depth: int = 5, bind_expansion_to: Optional[List[str]] = None, expansion_mode: str = "auto", profile: bool = False) -> Dict[str, Any]:
         """Execute SPARQL query and return results in compact format.
         
         Args:
@@ -830,6 +1465,24 @@ class SPARQLServer:
                 GROUP BY ?disease
                 ```
                 This returns ONLY arthritis-related diseases (parent + descendants) with their counts.
+            expansion_mode: How expanded ontology concepts are applied (default: "auto").
+                - "values": inject descendants as VALUES clauses, batching when there are
+                  more than MAX_VALUES_PER_BATCH of them.
+                - "postfilter": run the query once with the ontology term replaced by a
+                  variable and keep only rows whose value lies in the hierarchy below the
+                  term. Only valid for plain SELECT queries (no aggregates or GROUP BY);
+                  LIMIT/OFFSET are applied after filtering.
+                - "graph_join": join against the ubergraph named graph inside the same
+                  request (bounded subClassOf chains in a GRAPH block); no pre-fetch and
+                  no batching.
+                - "auto": chooses between "graph_join" and client-side expansion based on
+                  the latency measured for each on this graph. Client-side expansion uses
+                  "values", switching to "postfilter" when batching would need more than
+                  POSTFILTER_BATCH_THRESHOLD queries and the query is eligible.
+            profile: If True, add a 'timing' field breaking down where the time went
+                (analysis, descendant fetches, each batch's network and parse time,
+                merge, bytes received, rows before/after dedupe); see profiling.py.
+                Pass it as a keyword argument.
 
         
         Returns:
@@ -868,34 +1521,129 @@ class SPARQLServer:
         original_query = query_string
         queries_to_execute = [query_string]  # Default: single query
         is_batched = False
+        postfilter = None
+        strategy = None
+        fingerprint = None  # set for auto-mode expansion, whose latency is measured
+        started = time.monotonic()
+        query_profile = profiling.current()
+
+        if expansion_mode not in self.EXPANSION_MODES:
+            return {
+                'error': f"Unknown expansion_mode '{expansion_mode}'. Use one of: {', '.join(self.EXPANSION_MODES)}",
+                'query': query_string
+            }
         
+        tracing.annotate(sparql_graph=self.kg_name, expansion_mode=expansion_mode)
         if auto_expand_descendants:
-            ontology_uris = self._detect_ontology_uris(query_string)
-            if ontology_uris:
-                # Pre-fetch descendants from ubergraph with depth limiting,
-                # then inject them as VALUES clauses into the user's query
-                expanded_result, uri_to_descendants = self._expand_query_with_descendants(
-                    query_string, ontology_uris, max_descendants, max_depth, bind_expansion_to
-                )
-                
-                # Check if result is a single query or multiple batched queries
-                if isinstance(expanded_result, list):
-                    queries_to_execute = expanded_result
-                    is_batched = True
-                else:
-                    queries_to_execute = [expanded_result]
-                
+            with tracing.span("expansion.detect"):
+                detected_uris = self._detect_ontology_uris(query_string)
+                # Leaf terms and non-class IRIs cannot have descendants; skip them locally
+                ontology_uris, skipped_uris = self._expansion_filter.partition(detected_uris)
+            metrics.record_cache("leaf_filter", hits=len(skipped_uris), misses=len(ontology_uris))
+            if skipped_uris:
                 expansion_info = {
-                    "expanded": True,
-                    "original_uris": ontology_uris,
-                    "expanded_uris": {
-                        uri: len(descendants) for uri, descendants in uri_to_descendants.items()
-                    },
-                    "total_concepts": sum(len(descendants) for descendants in uri_to_descendants.values()),
-                    "batched": is_batched,
-                    "num_batches": len(queries_to_execute) if is_batched else 1,
-                    "max_values_per_batch": self.MAX_VALUES_PER_BATCH
+                    "expanded": False,
+                    "original_uris": detected_uris,
+                    "skipped_uris": skipped_uris,
                 }
+            if ontology_uris:
+                strategy = expansion_mode
+                if expansion_mode == "auto":
+                    fingerprint = QueryAnalyzer.fingerprint(query_string)
+                    if self._choose_expansion_strategy(fingerprint) == "graph_join":
+                        strategy = "graph_join"
+
+                if strategy == "graph_join":
+                    # Expand inside the KG query itself; no pre-fetch, no batching
+                    queries_to_execute = [self._build_graph_join_query(
+                        query_string, ontology_uris, max_descendants, max_depth, bind_expansion_to
+                    )]
+                    # Descendants are resolved inside the request, so not counted here
+                    expansion_info = {
+                        "expanded": True,
+                        "mode": "graph_join",
+                        "original_uris": detected_uris,
+                        "expanded_uris": {uri: None for uri in ontology_uris},
+                        "total_concepts": None,
+                        "batched": False,
+                        "num_batches": 1,
+                    }
+                else:
+                    ineligible = self._postfilter_ineligible_reason(query_string)
+                    if strategy == "postfilter" and ineligible:
+                        return {
+                            'error': f"expansion_mode='postfilter' cannot be used for this query: {ineligible}",
+                            'query': query_string
+                        }
+
+                    uri_to_descendants = None
+                    estimated_batches = None
+                    if strategy != "postfilter":
+                        # Pre-fetch descendants from ubergraph with depth limiting; the
+                        # counts tell how many VALUES batches the query would need
+                        uri_to_descendants = self._fetch_descendants_for_uris(
+                            ontology_uris, max_results=max_descendants, max_depth=max_depth
+                        )
+                        estimated_batches = self._estimate_expansion_batches(
+                            uri_to_descendants, self.MAX_VALUES_PER_BATCH
+                        )
+
+                    # Broad roots would need many VALUES batches; filter locally instead
+                    if strategy == "postfilter" or (
+                        strategy == "auto" and not ineligible
+                        and estimated_batches > self.POSTFILTER_BATCH_THRESHOLD
+                    ):
+                        hierarchies = self._get_hierarchies(ontology_uris, max_depth)
+                        if len(hierarchies) == len(set(ontology_uris)):
+                            rewritten, postfilter = self._build_postfilter_query(
+                                query_string, ontology_uris, hierarchies, bind_expansion_to
+                            )
+                            queries_to_execute = [rewritten]
+                            expanded_counts = {uri: hierarchies[uri].descendant_count(uri) for uri in ontology_uris}
+                            expansion_info = {
+                                "expanded": True,
+                                "mode": "postfilter",
+                                "original_uris": detected_uris,
+                                "expanded_uris": expanded_counts,
+                                "total_concepts": sum(expanded_counts.values()),
+                                "batched": False,
+                                "num_batches": 1,
+                            }
+                            if estimated_batches is not None:
+                                expansion_info["estimated_batches"] = estimated_batches
+
+                    if postfilter is None:
+                        # Inject the descendants as VALUES clauses into the user's query
+                        # (also the fallback when the hierarchy is unavailable)
+                        expanded_result, uri_to_descendants = self._expand_query_with_descendants(
+                            query_string, ontology_uris, max_descendants, max_depth, bind_expansion_to,
+                            uri_to_descendants=uri_to_descendants,
+                        )
+                        # Check if result is a single query or multiple batched queries
+                        if isinstance(expanded_result, list):
+                            queries_to_execute = expanded_result
+                            is_batched = True
+                        else:
+                            queries_to_execute = [expanded_result]
+                    
+                        expansion_info = {
+                            "expanded": True,
+                            "mode": "values",
+                            "original_uris": detected_uris,
+                            "expanded_uris": {
+                                uri: len(descendants) for uri, descendants in uri_to_descendants.items()
+                            },
+                            "total_concepts": sum(len(descendants) for descendants in uri_to_descendants.values()),
+                            "batched": is_batched,
+                            "num_batches": len(queries_to_execute) if is_batched else 1,
+                            "max_values_per_batch": self.MAX_VALUES_PER_BATCH
+                        }
+                        # Reported only: each root was still expanded by its own subquery
+                        nested_roots = self._find_nested_roots(uri_to_descendants)
+                        if nested_roots:
+                            expansion_info["nested_roots"] = nested_roots
+                if skipped_uris:
+                    expansion_info["skipped_uris"] = skipped_uris
         
         # Remove empty FILTER(...IN()) clauses that would match nothing
         cleaned_queries = []
@@ -927,21 +1675,31 @@ class SPARQLServer:
         
         # Analyze first query (or single query if not batched)
         if analyze:
-            analysis = self.analyzer.analyze_query(queries_to_execute[0])
+            # The post-filter and graph_join rewrites add their own LIMITs;
+            # analyze what the user wrote
+            rewritten = postfilter is not None or strategy == "graph_join"
+            with tracing.span("query.analyze"), (query_profile.stage("analysis") if query_profile else nullcontext()):
+                analysis = self.analyzer.analyze_query(
+                    original_query if rewritten else queries_to_execute[0]
+                )
         
         # Execute query/queries
         batch_results = []
         batch_errors = []
+        tracing.annotate(sparql_batches=len(queries_to_execute),
+                         expansion_strategy=expansion_info.get("mode") if expansion_info else None)
         for batch_idx, query_str in enumerate(queries_to_execute):
             # Get kg_name for FROM clause insertion for federated endpoint
             if self.kg_name != '':
                 query_str = self._insert_from_clause(query_str, self.kg_name)
             
-            self.sparql.setQuery(query_str)
-            
+            batch_started = time.perf_counter()
             try:
-                raw_result = self.sparql.query().convert()
+                with tracing.span("sparql.batch", batch_index=batch_idx, batch_count=len(queries_to_execute)):
+                    raw_result = self._run_query(query_str)
             except Exception as e:
+                if query_profile is not None:
+                    query_profile.record_batch(batch_idx, time.perf_counter() - batch_started, error=str(e))
                 if is_batched:
                     # For batched execution, record the error and continue with
                     # remaining batches so partial results are not lost.
@@ -951,6 +1709,18 @@ class SPARQLServer:
                         'query': query_str
                     })
                     continue
+                elif strategy == "graph_join" and expansion_mode == "auto":
+                    # In-request expansion failed (e.g. timed out): count it against
+                    # graph_join and retry with client-side expansion
+                    self._record_expansion_latency("graph_join", 2 * (time.monotonic() - started), fingerprint)
+                    result = self.execute(
+                        original_query, analyze=analyze, auto_expand_descendants=auto_expand_descendants,
+                        max_descendants=max_descendants, max_depth=max_depth,
+                        bind_expansion_to=bind_expansion_to, expansion_mode="values"
+                    )
+                    if 'ontology_expansion' in result:
+                        result['ontology_expansion']['fallback_from'] = "graph_join"
+                    return result
                 else:
                     # Single-query failure: return the error immediately (original behaviour).
                     error_msg = f"Query execution failed: {str(e)}"
@@ -965,6 +1735,8 @@ class SPARQLServer:
             # Convert to compact format (columns + data arrays)
             formatted_result = self._compact_result(raw_result)
             batch_results.append(formatted_result)
+            if query_profile is not None:
+                query_profile.record_batch(batch_idx, time.perf_counter() - batch_started)
         
         # If every batch failed, surface the first error
         if is_batched and not batch_results:
@@ -979,12 +1751,24 @@ class SPARQLServer:
         
         # Merge results if batched
         if is_batched:
-            formatted_result = self._merge_batch_results(batch_results)
+            rows_in = sum(r.get('count', 0) for r in batch_results)
+            with tracing.span("sparql.merge_batches", merge_batches=len(batch_results), merge_rows_in=rows_in) as current, \
+                    (query_profile.stage("merge") if query_profile else nullcontext()):
+                formatted_result = self._merge_batch_results(batch_results)
+            tracing.set_attributes(current, merge_rows_out=formatted_result.get('count'))
+            if query_profile is not None:
+                query_profile.rows_before_dedupe = rows_in
+                query_profile.rows_after_dedupe = formatted_result.get('count')
             # Surface any per-batch errors as a non-fatal warning in the result
             if batch_errors:
                 formatted_result['batch_errors'] = batch_errors
         else:
             formatted_result = batch_results[0]
+
+        if postfilter is not None:
+            formatted_result, rows_scanned = postfilter.apply(formatted_result)
+            expansion_info["rows_scanned"] = rows_scanned
+            expansion_info["truncated"] = rows_scanned >= self.POSTFILTER_ROW_LIMIT
         
         # Add analysis warnings to result if applicable
         if analyze and analysis and analysis.get('warning'):
@@ -1004,6 +1788,12 @@ class SPARQLServer:
         # Add ontology expansion info if URIs were expanded
         if expansion_info:
             formatted_result['ontology_expansion'] = expansion_info
+            if expansion_info.get("expanded"):
+                metrics.EXPANSION_BATCHES.observe(
+                    expansion_info["num_batches"], graph=self.kg_name, mode=expansion_info["mode"]
+                )
+                if fingerprint is not None:
+                    self._record_expansion_latency(expansion_info["mode"], time.monotonic() - started, fingerprint)
         
         return formatted_result
 
@@ -1405,84 +2195,210 @@ LIMIT 10"""
         if not self.kg_name:
             return None
             
-        # Construct URL to the description file
-        description_url = (
-            "https://raw.githubusercontent.com/sbl-sdsc/mcp-proto-okn/"
-            f"main/metadata/descriptions/{self.kg_name}.txt"
-        )
-        
-        try:
-            with urlopen(description_url, timeout=30) as resp:
-                raw = resp.read()
-                text = raw.decode("utf-8", errors="replace")
-                return text.strip()
-        except (URLError, HTTPError):
-            # File doesn't exist or network error
-            return None
-        except Exception:
-            # Any other error
-            return None
+        # Missing files and network errors are cached as None
+        return self._metadata_cache.get(self._additional_description_url())
+
+    LOOKUP_MATCH_MODES = ("exact", "prefix", "fuzzy")
 
-    def lookup_uri(self, label: str, max_results: int = 2000) -> Dict[str, Any]:
+    def lookup_uri(self, label: str, max_results: int = 2000, match: str = "exact") -> Dict[str, Any]:
         """Look up ontology term URIs by label in Ubergraph.
 
-        Queries Ubergraph for exact label matches (rdfs:label) and exact
-        synonyms (oboInOwl:hasExactSynonym). Case-insensitive.
+        Matches exact labels (rdfs:label) and exact synonyms
+        (oboInOwl:hasExactSynonym), case-insensitively. When a local label index
+        is available (see label_index.py) it is consulted first, and Ubergraph
+        is only queried on a miss; a miss that Ubergraph cannot resolve either
+        returns ranked approximate ``suggestions`` from the index.
 
         Args:
             label: The term to search for (e.g., "muscle organ", "rheumatoid arthritis")
             max_results: Maximum number of matching URIs to return (default: 2000)
+            match: "exact" (default), "prefix" or "fuzzy". Prefix and fuzzy
+                matching are ranked by score and need the local label index.
 
         Returns:
-            Dictionary with query_label, match_count, and matches list.
+            Dictionary with query_label, match_count, matches list and source
+            ("local_index" or "ubergraph").
         """
-        query = f"""
+        if match not in self.LOOKUP_MATCH_MODES:
+            return {
+                'query_label': label,
+                'match_count': 0,
+                'matches': [],
+                'error': f"Unknown match mode '{match}'. Use one of: {', '.join(self.LOOKUP_MATCH_MODES)}"
+            }
+
+        index = self._get_label_index()
+        if match != "exact":
+            if index is None:
+                return {
+                    'query_label': label,
+                    'match_count': 0,
+                    'matches': [],
+                    'error': (
+                        f"match='{match}' needs the local label index, which is not installed "
+                        "(build it with scripts/build_label_index.py)."
+                    )
+                }
+            search = index.prefix_search if match == "prefix" else index.fuzzy_search
+            matches = search(label, max_results)
+            return {
+                'query_label': label,
+                'match_count': len(matches),
+                'matches': matches,
+                'source': 'local_index'
+            }
+
+        if index is not None:
+            matches = index.lookup(label, max_results)
+            metrics.record_cache("label_index", hits=int(bool(matches)), misses=int(not matches))
+            if matches:
+                return {
+                    'query_label': label,
+                    'match_count': len(matches),
+                    'matches': matches,
+                    'source': 'local_index'
+                }
+
+        try:
+            # Concurrent lookups are merged into one upstream request (see batching.py)
+            matches = self._lookup_batcher.submit((label, max_results)) or []
+        except Exception as e:
+            return {
+                'query_label': label,
+                'match_count': 0,
+                'matches': [],
+                'error': f"Lookup failed: {str(e)}"
+            }
+
+        result = {
+            'query_label': label,
+            'match_count': len(matches),
+            'matches': matches,
+            'source': 'ubergraph'
+        }
+        if not matches and index is not None:
+            suggestions = index.fuzzy_search(label, max_results=5)
+            if suggestions:
+                result['suggestions'] = suggestions
+        return result
+
+    def lookup_uris(self, labels: List[str], max_results: int = 2000) -> Dict[str, Any]:
+        """Look up several labels at once.
+
+        Labels found in the local label index are answered in-process; all
+        remaining labels are resolved with one Ubergraph request per
+        LOOKUP_BATCH_SIZE labels.
+
+        Args:
+            labels: Terms to search for (case-insensitive)
+            max_results: Maximum number of matching URIs per label (default: 2000)
+
+        Returns:
+            Dictionary with label_count and results, a list with one
+            lookup_uri-style entry per distinct label (in input order).
+        """
+        distinct = list(dict.fromkeys(labels))
+        index = self._get_label_index()
+        results: Dict[str, Dict[str, Any]] = {}
+        misses = []
+        for label in distinct:
+            matches = index.lookup(label, max_results) if index is not None else []
+            if matches:
+                results[label] = {
+                    'query_label': label,
+                    'match_count': len(matches),
+                    'matches': matches,
+                    'source': 'local_index'
+                }
+            else:
+                misses.append(label)
+        if index is not None:
+            metrics.record_cache("label_index", hits=len(distinct) - len(misses), misses=len(misses))
+
+        if misses:
+            try:
+                upstream = self._lookup_labels_upstream(misses, max_results)
+                error = None
+            except Exception as e:
+                upstream, error = {}, f"Lookup failed: {str(e)}"
+            for label in misses:
+                matches = upstream.get(label, [])
+                entry = {
+                    'query_label': label,
+                    'match_count': len(matches),
+                    'matches': matches,
+                    'source': 'ubergraph'
+                }
+                if error:
+                    entry['error'] = error
+                elif not matches and index is not None:
+                    suggestions = index.fuzzy_search(label, max_results=5)
+                    if suggestions:
+                        entry['suggestions'] = suggestions
+                results[label] = entry
+
+        return {
+            'label_count': len(distinct),
+            'results': [results[label] for label in distinct]
+        }
+
+    @staticmethod
+    def _upstream_label_key(label: str) -> str:
+        """Lower-cased, whitespace-collapsed label as compared by the LCASE filter."""
+        return " ".join(label.split()).lower()
+
+    def _lookup_labels_upstream(self, labels: List[str], max_results: int) -> Dict[str, List[Dict[str, str]]]:
+        """Resolve labels against Ubergraph with one VALUES query per chunk of labels."""
+        keys: Dict[str, List[str]] = {}
+        for label in labels:
+            keys.setdefault(self._upstream_label_key(label), []).append(label)
+        key_list = list(keys)
+
+        matches_by_key: Dict[str, List[Dict[str, str]]] = {key: [] for key in key_list}
+        for i in range(0, len(key_list), self.LOOKUP_BATCH_SIZE):
+            chunk = key_list[i:i + self.LOOKUP_BATCH_SIZE]
+            key_values = " ".join(self._sparql_string(key) for key in chunk)
+            query = f"""
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         PREFIX oboInOwl: <http://www.geneontology.org/formats/oboInOwl#>
 
-        SELECT DISTINCT ?uri ?matchedLabel ?matchType
+        SELECT DISTINCT ?key ?uri ?matchedLabel ?matchType
         FROM <https://purl.org/okn/frink/kg/ubergraph>
         WHERE {{
+          VALUES ?key {{ {key_values} }}
           {{
             ?uri rdfs:label ?matchedLabel .
-            FILTER(LCASE(STR(?matchedLabel)) = LCASE("{label}"))
             BIND("exact_label" AS ?matchType)
           }}
           UNION
           {{
             ?uri oboInOwl:hasExactSynonym ?matchedLabel .
-            FILTER(LCASE(STR(?matchedLabel)) = LCASE("{label}"))
             BIND("exact_synonym" AS ?matchType)
           }}
+          FILTER(LCASE(STR(?matchedLabel)) = ?key)
         }}
-        LIMIT {max_results}
+        LIMIT {max_results * len(chunk)}
         """
-
-        try:
-            self.sparql.setQuery(query)
-            raw_result = self.sparql.query().convert()
-
-            matches = []
-            if 'results' in raw_result:
-                for binding in raw_result['results'].get('bindings', []):
-                    matches.append({
+            raw_result = self._run_query(query)
+            for binding in raw_result.get('results', {}).get('bindings', []):
+                key = binding.get('key', {}).get('value', '')
+                bucket = matches_by_key.get(key)
+                if bucket is not None and len(bucket) < max_results:
+                    bucket.append({
                         'uri': binding.get('uri', {}).get('value', ''),
                         'label': binding.get('matchedLabel', {}).get('value', ''),
                         'match_type': binding.get('matchType', {}).get('value', '')
                     })
 
-            return {
-                'query_label': label,
-                'match_count': len(matches),
-                'matches': matches
-            }
-        except Exception as e:
-            return {
-                'query_label': label,
-                'match_count': 0,
-                'matches': [],
-                'error': f"Lookup failed: {str(e)}"
-            }
+        return {
+            label: list(matches_by_key[key]) for key, group in keys.items() for label in group
+        }
+
+    def _lookup_batch_handler(self, requests: List[Tuple[str, int]]) -> Dict[Tuple[str, int], List[Dict[str, str]]]:
+        """MicroBatcher handler: resolve (label, max_results) requests together."""
+        limit = max(max_results for _, max_results in requests)
+        found = self._lookup_labels_upstream([label for label, _ in requests], limit)
+        return {(label, n): found.get(label, [])[:n] for label, n in requests}
 
     def get_descendants_detailed(
         self,
@@ -1591,8 +2507,7 @@ LIMIT 10"""
 
         # Get the label of the input URI
         try:
-            self.sparql.setQuery(label_query)
-            label_result = self.sparql.query().convert()
+            label_result = self._run_query(label_query)
             uri_label = None
             if 'results' in label_result:
                 bindings = label_result['results'].get('bindings', [])
@@ -1603,8 +2518,7 @@ LIMIT 10"""
 
         # Get descendants
         try:
-            self.sparql.setQuery(query)
-            raw_result = self.sparql.query().convert()
+            raw_result = self._run_query(query)
 
             descendants = []
             if 'results' in raw_result:
@@ -1671,6 +2585,7 @@ def parse_args():
 
 
 _HEALTH_PATHS = {"/health", "/healthz", "/livez", "/readyz"}
+_UNAUTHENTICATED_PATHS = _HEALTH_PATHS | {metrics.METRICS_PATH}
 
 
 def _add_health_routes(app):
@@ -1691,7 +2606,8 @@ def _wrap_with_api_key_auth(app):
 
     Only active when the ``MCP_PROTO_OKN_API_KEY`` environment variable is set.
     CORS preflight (OPTIONS) requests are passed through without auth.
-    Health endpoints are also bypassed so probes work without credentials.
+    Health and metrics endpoints are also bypassed so probes and scrapers
+    work without credentials.
     """
     api_key = os.environ.get("MCP_PROTO_OKN_API_KEY")
     if not api_key:
@@ -1702,7 +2618,7 @@ def _wrap_with_api_key_auth(app):
 
     class APIKeyMiddleware(BaseHTTPMiddleware):
         async def dispatch(self, request, call_next):
-            if request.method == "OPTIONS" or request.url.path in _HEALTH_PATHS:
+            if request.method == "OPTIONS" or request.url.path in _UNAUTHENTICATED_PATHS:
                 return await call_next(request)
             auth_header = request.headers.get("Authorization", "")
             if auth_header != f"Bearer {api_key}":
@@ -1724,6 +2640,7 @@ def main():
         endpoint_url=args.endpoint,
         description=args.description,
     )
+    sparql_server.prefetch_metadata()
 
     # Create MCP server
     mcp = FastMCP("SPARQL Query Server")
@@ -1840,6 +2757,15 @@ Args:
         Result: Only rheumatoid arthritis (2006 datasets), osteoarthritis (424 datasets), etc.
         
         The ?disease variable now ONLY matches the parent concept and its descendants.
+    expansion_mode: "auto" (default), "values" or "postfilter". "values" injects descendants as VALUES clauses
+        (batched for large expansions). "postfilter" runs the query once with the ontology term replaced by a
+        variable and keeps only rows inside the term's hierarchy; it suits very broad terms (e.g. CL_0000000, GO_0008150)
+        but only works for plain SELECT queries without GROUP BY or aggregates. "auto" switches to "postfilter" when
+        VALUES batching would need many queries. "graph_join" expands inside the same request by joining against the
+        ubergraph named graph. "auto" picks between graph_join and client-side expansion from measured latency.
+    profile: If True, add a 'timing' field with where the time went: query analysis, each descendant fetch,
+        each batch's network and parse time, merge time, bytes received and rows before/after dedupe.
+        Use it to tell slow expansion from a slow query.
 
 Returns:
     The query results in compact format (columns + data arrays). If analyze=True and issues are detected, includes a 'query_analysis' field with warnings and suggestions.
@@ -1853,7 +2779,9 @@ Returns:
         auto_expand_descendants: bool = True,
         max_descendants: int = 2000,
         max_depth: int = 5,
-        bind_expansion_to: Optional[List[str]] = None
+        bind_expansion_to: Optional[List[str]] = None,
+        expansion_mode: str = "auto",
+        profile: bool = False
     ) -> Dict[str, Any]:
         return sparql_server.execute(
             query_string, 
@@ -1861,7 +2789,9 @@ Returns:
             auto_expand_descendants=auto_expand_descendants,
             max_descendants=max_descendants,
             max_depth=max_depth,
-            bind_expansion_to=bind_expansion_to
+            bind_expansion_to=bind_expansion_to,
+            expansion_mode=expansion_mode,
+            profile=profile
         )
 
     schema_doc = f"""
@@ -2018,9 +2948,10 @@ Returns:
         return '\n'.join(cleaned_lines)
 
     @mcp.tool()
-    def lookup_uri(
+    async def lookup_uri(
         label: str,
-        max_results: int = 2000
+        max_results: int = 2000,
+        match: str = "exact"
     ) -> Dict[str, Any]:
         """
         Look up the URI for an ontology term by its label (name) in Ubergraph.
@@ -2040,13 +2971,17 @@ Returns:
             label: The term to search for (e.g., "muscle organ", "rheumatoid arthritis",
                    "heart", "glucose"). Case-insensitive.
             max_results: Maximum number of matching URIs to return (default: 2000)
+            match: "exact" (default), "prefix" (labels starting with the term) or
+                   "fuzzy" (approximate, ranked by similarity; tolerates typos).
+                   Prefix and fuzzy matching use the local label index.
 
         Returns:
             Dictionary containing:
             - query_label: The search term used
             - match_count: Number of matches found
             - matches: List of matches, each with uri, label, and match_type
-                       (exact_label or exact_synonym)
+                       (exact_label or exact_synonym); prefix/fuzzy matches add a score
+            - suggestions: Ranked approximate matches when an exact lookup finds nothing
 
         Examples:
             # Find the URI for "muscle organ"
@@ -2060,7 +2995,32 @@ Returns:
             # Then use the URI with get_descendants
             get_descendants("http://purl.obolibrary.org/obo/UBERON_0001630")
         """
-        return sparql_server.lookup_uri(label, max_results)
+        # Run in a worker thread so concurrent lookups can be micro-batched
+        return await anyio.to_thread.run_sync(sparql_server.lookup_uri, label, max_results, match)
+
+    @mcp.tool()
+    def lookup_uris(
+        labels: List[str],
+        max_results: int = 2000
+    ) -> Dict[str, Any]:
+        """
+        Look up ontology URIs for several labels (names) in Ubergraph in one call.
+
+        USE THIS TOOL INSTEAD OF repeated lookup_uri calls when a question mentions
+        several terms (e.g. ["asthma", "lung", "eosinophil"]): all labels are resolved
+        with a single Ubergraph request.
+
+        Args:
+            labels: Terms to search for (case-insensitive)
+            max_results: Maximum number of matching URIs per label (default: 2000)
+
+        Returns:
+            Dictionary containing:
+            - label_count: Number of distinct labels looked up
+            - results: One entry per label with query_label, match_count, matches
+                       (uri, label, match_type) and source
+        """
+        return sparql_server.lookup_uris(labels, max_results)
 
     @mcp.tool()
     def get_descendants(
@@ -2111,6 +3071,32 @@ Returns:
         """
         return sparql_server.get_descendants_detailed(uri, max_results, max_depth, include_distance)
 
+    @mcp.tool()
+    def query_stats(top: int = 10, order_by: str = "total_time") -> Dict[str, Any]:
+        """
+        Report which query shapes are using the most endpoint time.
+
+        Every SPARQL request this server sends (including descendant fetches and
+        label lookups) is logged with a fingerprint of its shape: literals, VALUES
+        lists and LIMIT numbers are normalized out. The report covers the most
+        recent requests (MCP_PROTO_OKN_QUERY_LOG_SIZE, default 10000).
+
+        Args:
+            top: Number of fingerprints to return (default: 10)
+            order_by: "total_time" (default), "p95", "error_rate" or "count"
+
+        Returns:
+            Dictionary containing:
+            - queries_logged: Requests in the log
+            - graphs: Per-graph count, total/mean/p95/max latency in ms, error rate, bytes received
+            - top_fingerprints: The same figures per fingerprint, with mean rows, the last
+              error and a normalized example query
+        """
+        try:
+            return querylog.QUERY_LOG.stats(top=top, order_by=order_by)
+        except ValueError as e:
+            return {'error': str(e)}
+
     # Add prompt to create chat transcripts
     @mcp.tool()
     def create_chat_transcript() -> str:
@@ -2213,6 +3199,10 @@ RENDERING REQUIREMENTS:
 - Using a separate EdgeProperties namespace instead of intermediary classes
 """
 
+    # Optional OpenTelemetry spans per tool call (MCP_PROTO_OKN_TRACING)
+    if tracing.configure():
+        tracing.instrument_tools(mcp)
+
     # Resolve transport settings: CLI args > env vars > defaults
     transport = (args.transport if args.transport is not None
                  else os.environ.get("MCP_PROTO_OKN_TRANSPORT", "stdio")).lower()
@@ -2228,7 +3218,14 @@ RENDERING REQUIREMENTS:
         mcp.settings.port = port
         app = mcp.streamable_http_app()
         app = _add_health_routes(app)
+        if metrics.metrics_enabled():
+            metrics.instrument_tools(mcp)
+            app = metrics.add_metrics_route(app)
+        # CPU/memory profiling endpoints, only with MCP_PROTO_OKN_ADMIN_TOKEN
+        app = diagnostics.add_admin_routes(app)
         app = _wrap_with_api_key_auth(app)
+        # Long-running server: keep cached metadata fresh without waiting for a request
+        sparql_server._metadata_cache.start()
         import uvicorn
         print(f"mcp-proto-okn ({sparql_server.kg_name}) listening on http://{host}:{port}", file=sys.stderr)
         uvicorn.run(app, host=host, port=port, log_level="info")
@@ -0,0 +1,228 @@
+"""
+Optional OpenTelemetry tracing.
+
+Tracing is off unless ``MCP_PROTO_OKN_TRACING`` names an exporter:
+
+- ``otlp``: send spans to a collector over OTLP/HTTP (configured with the
+  standard ``OTEL_EXPORTER_OTLP_*`` variables; needs
+  opentelemetry-exporter-otlp-proto-http),
+- ``file``: append one JSON object per span to ``MCP_PROTO_OKN_TRACE_FILE``
+  (default ``traces.jsonl``) for offline analysis,
+- ``console``: print spans to stderr.
+
+All of them need opentelemetry-sdk (``pip install mcp-proto-okn[tracing]``);
+without it a warning is printed and tracing stays off.
+
+A query produces a tree of spans: ``tool <name>`` for the MCP call,
+``sparql.execute`` for a graph query, and below it ``query.analyze``,
+``expansion.fetch_descendants`` per descendant request, ``sparql.batch`` per
+VALUES batch, ``sparql.request`` per upstream HTTP request (graph, query
+fingerprint, bytes, rows, network and parse seconds) and
+``sparql.merge_batches``. When tracing is off, span() returns a shared no-op
+context manager, so the instrumentation costs one function call.
+"""
+
+import atexit
+import contextvars
+import functools
+import inspect
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from . import __version__
+
+SERVICE_NAME = "mcp-proto-okn"
+DEFAULT_TRACE_FILE = "traces.jsonl"
+
+_tracer = None
+
+
+class _NoopSpan:
+    """Stands in for a span (and its context manager) when tracing is off."""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: dict) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def _names(attributes: dict) -> dict:
+    return {key.replace("_", ".", 1): value for key, value in attributes.items()}
+
+
+def _clean(attributes: dict) -> dict:
+    """Drop None values and stringify values OpenTelemetry cannot store."""
+    return {
+        key: value if isinstance(value, (str, bool, int, float)) else str(value)
+        for key, value in attributes.items() if value is not None
+    }
+
+
+@contextmanager
+def _start_span(name: str, attributes: dict):
+    with _tracer.start_as_current_span(name, attributes=_clean(attributes)) as span:
+        yield span
+
+
+def span(name: str, **attributes: Any):
+    """Context manager for a child span of the current span (a no-op when tracing is off).
+
+    The first ``_`` of a keyword separates the attribute namespace
+    (``sparql_response_bytes`` becomes ``sparql.response_bytes``).
+    """
+    if _tracer is None:
+        return _NOOP_SPAN
+    return _start_span(name, _names(attributes))
+
+
+def set_attributes(current, **attributes: Any) -> None:
+    """Set attributes on a span yielded by span() (ignores None values)."""
+    if _tracer is not None:
+        current.set_attributes(_clean(_names(attributes)))
+
+
+def annotate(**attributes: Any) -> None:
+    """Set attributes on the current span (see span() for keyword names)."""
+    if _tracer is not None:
+        from opentelemetry import trace
+        trace.get_current_span().set_attributes(_clean(_names(attributes)))
+
+
+def traced(name: str) -> Callable:
+    """Decorator running the function in a span named ``name``."""
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def in_current_context(fn: Callable) -> Callable:
+    """Bind ``fn`` to the caller's context, so spans it starts in a worker thread
+    nest under the caller's current span (and a profiled query's timings are
+    recorded in its profile, see profiling.py)."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        # Each call gets its own copy: a Context cannot be entered by two threads at once
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def traced_tool(name: str, fn: Callable) -> Callable:
+    """Wrap a tool function in a ``tool <name>`` span."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(f"tool {name}", mcp_tool=name) as current:
+                result = await fn(*args, **kwargs)
+                if isinstance(result, dict) and "error" in result:
+                    set_attributes(current, mcp_error=result["error"])
+                return result
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(f"tool {name}", mcp_tool=name) as current:
+                result = fn(*args, **kwargs)
+                if isinstance(result, dict) and "error" in result:
+                    set_attributes(current, mcp_error=result["error"])
+                return result
+    return wrapper
+
+
+def instrument_tools(mcp) -> None:
+    """Trace every tool registered on a FastMCP server so far (if tracing is on)."""
+    if _tracer is None:
+        return
+    for tool in mcp._tool_manager.list_tools():
+        tool.fn = traced_tool(tool.name, tool.fn)
+
+
+def _json_lines_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        """Appends each finished span as one line of JSON."""
+
+        def __init__(self):
+            self._lock = threading.Lock()
+            self._file = open(path, "a", encoding="utf-8")
+
+        def export(self, spans):
+            with self._lock:
+                for s in spans:
+                    self._file.write(s.to_json(indent=None) + "\n")
+                self._file.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            with self._lock:
+                self._file.close()
+
+    return JsonLinesSpanExporter()
+
+
+def configure(exporter: Optional[str] = None, path: Optional[str] = None) -> bool:
+    """Set up tracing with the given exporter (default: ``MCP_PROTO_OKN_TRACING``).
+
+    Returns True if tracing is on afterwards.
+    """
+    exporter = (exporter if exporter is not None else os.environ.get("MCP_PROTO_OKN_TRACING", "")).lower()
+    if exporter in ("", "0", "off", "none", "false"):
+        return enabled()
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+
+        if exporter == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            processor = BatchSpanProcessor(OTLPSpanExporter())
+        elif exporter == "file":
+            path = path or os.environ.get("MCP_PROTO_OKN_TRACE_FILE", DEFAULT_TRACE_FILE)
+            processor = BatchSpanProcessor(_json_lines_exporter(path))
+        elif exporter == "console":
+            processor = SimpleSpanProcessor(ConsoleSpanExporter(out=sys.stderr))
+        else:
+            print(f"Unknown MCP_PROTO_OKN_TRACING exporter {exporter!r}; use otlp, file or console",
+                  file=sys.stderr)
+            return False
+    except ImportError as e:
+        print(f"Tracing disabled: {e}. Install mcp-proto-okn[tracing].", file=sys.stderr)
+        return False
+
+    provider = TracerProvider(resource=Resource.create({
+        "service.name": SERVICE_NAME, "service.version": __version__,
+    }))
+    provider.add_span_processor(processor)
+    atexit.register(provider.shutdown)
+    set_tracer_provider(provider)
+    return True
+
+
+def set_tracer_provider(provider) -> None:
+    """Trace with ``provider`` (an OpenTelemetry TracerProvider), or turn tracing off with None."""
+    global _tracer
+    _tracer = provider.get_tracer("mcp_proto_okn", __version__) if provider is not None else None
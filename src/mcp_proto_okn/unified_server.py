@@ -14,35 +14,261 @@ Environment variables (HTTP transport):
   MCP_PROTO_OKN_HOST       - Bind address (default "0.0.0.0")
   MCP_PROTO_OKN_PORT       - Bind port (default 8000)
   MCP_PROTO_OKN_API_KEY    - Optional Bearer-token authentication
+  MCP_PROTO_OKN_METRICS    - "0" disables the Prometheus /metrics endpoint
+  MCP_PROTO_OKN_TRACING    - OpenTelemetry exporter: "otlp", "file" or "console" (see tracing.py)
+  MCP_PROTO_OKN_QUERY_LOG  - Optional JSONL file for the slow-query log (see querylog.py)
+  MCP_PROTO_OKN_ADMIN_TOKEN - Enables the /admin/profile endpoints (see diagnostics.py)
+  MCP_PROTO_OKN_FEDERATED_ENDPOINT - SPARQL endpoint for graph queries (default: FRINK federation)
+  MCP_PROTO_OKN_SPARQL_TIMEOUT - Client timeout per upstream request in seconds (default 300)
 """
 
 import argparse
 import os
+import re
+import statistics
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+import anyio
 from mcp.server.fastmcp import FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
 
-from mcp_proto_okn import __version__
+from mcp_proto_okn import __version__, diagnostics, metrics, querylog, tracing
 
 from mcp_proto_okn.identifier_mapping import (
+    GENE_BRIDGE_GRAPH,
+    GENE_BRIDGE_PROPERTIES,
     find_common_identifiers,
+    gene_bridge_types,
+    normalize_identifier,
     suggest_join_strategy,
     build_gene_lookup_query,
     build_gene_bridge_query,
 )
+from mcp_proto_okn.crosswalk import (
+    CHEMICAL_ID_TYPES,
+    GENE_ID_TYPES,
+    Crosswalk,
+    load_chemical_crosswalk,
+    load_gene_crosswalk,
+    resolve_id_type,
+)
+from mcp_proto_okn.expansion_filter import ExpansionFilter
+from mcp_proto_okn.federation import SOURCE_GRAPH_VAR, IncompatibleQueryError, compile_union_query
+from mcp_proto_okn.join_planner import JoinPlanner
+from mcp_proto_okn.joins import BindJoin, HashJoin
+from mcp_proto_okn.presence import PresenceIndex, find_identifiers, load_presence_index
 from mcp_proto_okn.registry import GraphRegistry
-from mcp_proto_okn.server import SPARQLServer
+from mcp_proto_okn.remote_cache import RemoteTextCache
+from mcp_proto_okn.server import SPARQLServer, request_deadline
 
 
 class UnifiedSPARQLServer:
     """Manages multiple SPARQLServer instances across all Proto-OKN graphs."""
 
+    # multi_graph_query fan-out: graphs queried at once and default deadlines (seconds)
+    MULTI_GRAPH_CONCURRENCY = 8
+    MULTI_GRAPH_TIMEOUT = 120.0
+    PER_GRAPH_TIMEOUT = 60.0
+    # Maximum joined rows returned by join_graph_results
+    JOIN_MAX_ROWS = 10000
+    # Join planner: seconds before it is rebuilt with fresh per-graph latency,
+    # and logged upstream requests a graph needs before its latency is used
+    JOIN_PLANNER_REFRESH = 300.0
+    JOIN_COST_MIN_SAMPLES = 5
+
     def __init__(self, registry_path: Optional[str] = None):
         self.registry = GraphRegistry(registry_path)
         self._servers: Dict[str, SPARQLServer] = {}
+        # One metadata cache (and refresher thread) shared by all graphs
+        self._metadata_cache = RemoteTextCache()
+        # Ubergraph is shared too, so leaves learned on one graph apply to all
+        self._expansion_filter = ExpansionFilter.from_snapshot()
+        # Gene ID crosswalk; loaded (and hot-reloaded) from the snapshot when None
+        self._gene_crosswalk: Optional[Crosswalk] = None
+        # Chemical ID crosswalk, likewise
+        self._chemical_crosswalk: Optional[Crosswalk] = None
+        # Identifier presence filters; loaded from the snapshot when None
+        self._presence_index: Optional[PresenceIndex] = None
+        # All-pairs join paths, the crosswalks they were built with and when
+        self._join_planner: Optional[JoinPlanner] = None
+        self._join_planner_crosswalks: tuple = ()
+        self._join_planner_built = 0.0
+
+    def _get_lookup_server(self) -> SPARQLServer:
+        """Return a server for graph-independent Ubergraph lookups.
+
+        Uses any cached server, or creates one for spoke-okn (arbitrary choice;
+        lookups query ubergraph, not the KG endpoint).
+        """
+        if self._servers:
+            return next(iter(self._servers.values()))
+        return self._get_server("spoke-okn")
+
+    def _get_gene_crosswalk(self) -> Optional[Crosswalk]:
+        """Return the gene ID crosswalk, or None if no snapshot is installed."""
+        return self._gene_crosswalk or load_gene_crosswalk()
+
+    def _get_chemical_crosswalk(self) -> Optional[Crosswalk]:
+        """Return the chemical ID crosswalk, or None if no snapshot is installed."""
+        return self._chemical_crosswalk or load_chemical_crosswalk()
+
+    def _get_presence_index(self) -> Optional[PresenceIndex]:
+        """Return the identifier presence filters, or None if no snapshot is installed."""
+        return self._presence_index or load_presence_index()
+
+    def graphs_containing(self, identifier: str, id_type: Optional[str] = None) -> Dict[str, Any]:
+        """Split the registered graphs by whether they may contain ``identifier``.
+
+        ``absent`` graphs definitely do not contain it (per the presence
+        filters); ``possible`` graphs may; ``not_indexed`` graphs have no
+        filter for this kind of identifier and must be queried to find out.
+        """
+        index = self._get_presence_index()
+        if index is None:
+            raise ValueError(
+                "Identifier presence filters not available; build them with "
+                "scripts/build_presence_filters.py"
+            )
+        detected = find_identifiers(identifier)
+        id_type = id_type or (detected[0][1] if detected else None)
+        return {
+            "identifier": identifier,
+            "id_type": id_type,
+            **index.graphs_containing(identifier, id_type, graphs=self.registry.graph_names),
+            "filters_built_at": index.built_at,
+        }
+
+    def _graph_costs(self) -> Dict[str, float]:
+        """Mean upstream latency per graph from the query log, relative to the median graph.
+
+        Only successful requests count, and only graphs with at least
+        JOIN_COST_MIN_SAMPLES of them; other graphs keep the planner's default
+        cost of 1.
+        """
+        seconds: Dict[str, List[float]] = {}
+        for record in querylog.QUERY_LOG.records():
+            if record.error is None:
+                seconds.setdefault(record.graph, []).append(record.seconds)
+        means = {
+            graph: sum(values) / len(values)
+            for graph, values in seconds.items() if len(values) >= self.JOIN_COST_MIN_SAMPLES
+        }
+        typical = statistics.median(means.values()) if means else 0.0
+        if typical <= 0:
+            return {}
+        return {graph: mean / typical for graph, mean in means.items()}
+
+    def _get_join_planner(self) -> JoinPlanner:
+        """Return the join planner, rebuilding it when its inputs are stale.
+
+        Installed crosswalks become translation edges, and measured per-graph
+        latency (_graph_costs) weights the edges. The planner is rebuilt when a
+        crosswalk snapshot is installed or reloaded, and every
+        JOIN_PLANNER_REFRESH seconds to pick up new latency. Coverage is left
+        at its default: the presence filters count identifiers per graph, not
+        the entities lacking one, so they cannot measure it.
+        """
+        crosswalks = (self._get_gene_crosswalk(), self._get_chemical_crosswalk())
+        now = time.monotonic()
+        if (self._join_planner is None
+                or any(a is not b for a, b in zip(crosswalks, self._join_planner_crosswalks))
+                or now - self._join_planner_built >= self.JOIN_PLANNER_REFRESH):
+            crosswalk_types = [
+                id_types for id_types, crosswalk in zip((GENE_ID_TYPES, CHEMICAL_ID_TYPES), crosswalks)
+                if crosswalk is not None
+            ]
+            self._join_planner = JoinPlanner(crosswalk_types=crosswalk_types, graph_costs=self._graph_costs())
+            self._join_planner_crosswalks = crosswalks
+            self._join_planner_built = now
+        return self._join_planner
+
+    def join_strategy(self, graph_a: str, graph_b: str) -> Dict[str, Any]:
+        """Shared identifiers of two graphs plus the cheapest (possibly multi-hop) join plan."""
+        canonical_a = self._validate_graph_name(graph_a)
+        canonical_b = self._validate_graph_name(graph_b)
+        strategy = suggest_join_strategy(canonical_a, canonical_b)
+        plan = self._get_join_planner().plan(canonical_a, canonical_b)
+        if plan is not None:
+            strategy["plan"] = plan
+            if not strategy["can_join"]:
+                route = " -> ".join(f"{node['graph']} ({node['id_type']})" for node in plan["path"])
+                strategy["can_join"] = True
+                strategy["strategy"] = (
+                    f"No directly shared identifiers; {plan['hops']}-step join path: {route}."
+                )
+        strategy["graph_a"] = canonical_a
+        strategy["graph_b"] = canonical_b
+        return strategy
+
+    def route(self, question: str, identifiers: Optional[List[str]] = None,
+              limit: Optional[int] = None) -> Dict[str, Any]:
+        """Rank graphs for a question, dropping graphs that lack the identifiers it names.
+
+        All graphs are ranked unless ``limit`` asks for only the best ones.
+        Identifiers are taken from ``identifiers`` and recognized in the
+        question text (find_identifiers). A graph is skipped only if the
+        presence filters rule out every one of them.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError(f"limit must be at least 1 (got {limit})")
+        candidates = self.registry.search(question, limit=limit)
+        named = [(value, None) for value in identifiers or []] + find_identifiers(question)
+        index = self._get_presence_index() if named else None
+        skipped = []
+        if index is not None:
+            kept = []
+            for candidate in candidates:
+                answers = [index.may_contain(candidate["name"], value, id_type) for value, id_type in named]
+                if all(answer is False for answer in answers):
+                    skipped.append(candidate["name"])
+                    continue
+                candidate["identifier_presence"] = "possible" if any(answers) else "not_indexed"
+                kept.append(candidate)
+            candidates = kept
+        return {
+            "question": question,
+            "identifiers": [value for value, _ in named],
+            "candidate_count": len(candidates),
+            "candidates": candidates,
+            "skipped_graphs": skipped,
+        }
+
+    def translate_gene_ids(self, ids: List[str], from_type: str, to_type: str) -> Dict[str, Any]:
+        """Translate gene identifiers locally with the gene crosswalk (no upstream query)."""
+        crosswalk = self._get_gene_crosswalk()
+        if crosswalk is None:
+            raise ValueError(
+                "Gene crosswalk not available; build it with scripts/build_gene_crosswalk.py"
+            )
+        return self._translate_ids(crosswalk, GENE_ID_TYPES, ids, from_type, to_type)
+
+    def translate_chemical_ids(self, ids: List[str], from_type: str, to_type: str) -> Dict[str, Any]:
+        """Translate chemical identifiers locally with the chemical crosswalk (no upstream query)."""
+        crosswalk = self._get_chemical_crosswalk()
+        if crosswalk is None:
+            raise ValueError(
+                "Chemical crosswalk not available; build it with scripts/build_chemical_crosswalk.py"
+            )
+        return self._translate_ids(crosswalk, CHEMICAL_ID_TYPES, ids, from_type, to_type)
+
+    @staticmethod
+    def _translate_ids(crosswalk: Crosswalk, id_types, ids: List[str],
+                       from_type: str, to_type: str) -> Dict[str, Any]:
+        from_type = resolve_id_type(from_type, id_types)
+        to_type = resolve_id_type(to_type, id_types)
+        result = crosswalk.translate(ids, from_type, to_type)
+        return {
+            "from_type": from_type,
+            "to_type": to_type,
+            "input_count": len(ids),
+            "mapped_count": len(result["translations"]),
+            **result,
+            "source": "local_crosswalk",
+        }
 
     def _get_server(self, graph_name: str) -> SPARQLServer:
         """Lazy-create and cache a SPARQLServer for the given graph."""
@@ -50,10 +276,492 @@ class UnifiedSPARQLServer:
         if canonical not in self._servers:
             graph_info = self.registry.get(canonical)
             self._servers[canonical] = SPARQLServer(
-                endpoint_url=graph_info.endpoint_url
+                endpoint_url=graph_info.endpoint_url,
+                metadata_cache=self._metadata_cache,
+                expansion_filter=self._expansion_filter,
             )
         return self._servers[canonical]
 
+    def multi_graph_query(
+        self,
+        queries: Dict[str, str],
+        timeout: Optional[float] = None,
+        per_graph_timeout: Optional[float] = None,
+        federated: bool = False,
+    ) -> Dict[str, Any]:
+        """Run one query per graph and merge the results.
+
+        By default each graph is queried concurrently. Each graph gets
+        ``per_graph_timeout`` seconds and the whole call is bounded by
+        ``timeout``. Graphs that have not answered by then are reported with
+        status "timeout" and the rows that did arrive are returned
+        (``partial`` is True). A late query's upstream requests are cut off at
+        its deadline (see server.request_deadline), so its worker thread
+        finishes shortly after; its result is discarded.
+
+        With ``federated=True`` compatible queries are combined into a single
+        UNION request (see federation.py); if they cannot be combined or the
+        combined request fails, the graphs are queried individually.
+        """
+        timeout = self.MULTI_GRAPH_TIMEOUT if timeout is None else timeout
+        per_graph_timeout = self.PER_GRAPH_TIMEOUT if per_graph_timeout is None else per_graph_timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        results: Dict[str, Dict[str, Any]] = {}
+        per_graph: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+
+        # Resolve servers up front: _get_server is not thread-safe, and unknown
+        # graph names should fail without occupying a worker
+        servers = {}
+        for graph_name in queries:
+            try:
+                servers[graph_name] = self._get_server(graph_name)
+            except ValueError as e:
+                errors[graph_name] = str(e)
+                per_graph[graph_name] = {"count": 0, "status": "error", "error": str(e), "elapsed_ms": 0}
+
+        execution = "per_graph"
+        fallback_reason = None
+        if federated and len(servers) > 1:
+            try:
+                answered = self._run_federated(servers, queries, deadline, results, per_graph)
+            except Exception as e:
+                # Includes an upstream TimeoutError (e.g. a socket timeout)
+                # before the deadline: the graphs are retried individually
+                fallback_reason = str(e) or type(e).__name__
+            else:
+                execution = "federated"
+                if not answered:
+                    now = time.monotonic()
+                    for graph_name in servers:
+                        errors[graph_name] = "No response within deadline"
+                        per_graph[graph_name] = {
+                            "count": 0, "status": "timeout", "elapsed_ms": round((now - start) * 1000),
+                        }
+        if execution == "per_graph":
+            self._run_per_graph(servers, queries, start, deadline, per_graph_timeout,
+                                results, per_graph, errors)
+
+        # Merge in request order so the output does not depend on timing
+        all_rows = []
+        all_columns = None
+        for graph_name in queries:
+            result = results.get(graph_name)
+            if result is None:
+                continue
+            if all_columns is None:
+                all_columns = ["source_graph"] + result.get("columns", [])
+            for row in result.get("data", []):
+                all_rows.append([graph_name] + row)
+
+        output = {
+            "columns": all_columns or ["source_graph"],
+            "data": all_rows,
+            "count": len(all_rows),
+            "per_graph": {name: per_graph[name] for name in queries if name in per_graph},
+            "errors": errors if errors else None,
+            "partial": any(p["status"] == "timeout" for p in per_graph.values()),
+            "execution": execution,
+            "elapsed_ms": round((time.monotonic() - start) * 1000),
+        }
+        if fallback_reason:
+            output["federation_fallback"] = fallback_reason
+        return output
+
+    def _run_per_graph(self, servers, queries, start, deadline, per_graph_timeout,
+                       results, per_graph, errors) -> None:
+        """Query each graph in its own worker thread, honouring the deadlines."""
+        def run(server: SPARQLServer, query_string: str, graph_deadline: float):
+            began = time.monotonic()
+            with request_deadline(graph_deadline):
+                result = server.execute(query_string)
+            return result, time.monotonic() - began
+
+        pool = ThreadPoolExecutor(
+            max_workers=max(1, min(len(servers), self.MULTI_GRAPH_CONCURRENCY)),
+            thread_name_prefix="multi-graph",
+        )
+        try:
+            pending = {}
+            for graph_name, server in servers.items():
+                graph_deadline = min(deadline, time.monotonic() + per_graph_timeout)
+                future = pool.submit(tracing.in_current_context(run), server, queries[graph_name], graph_deadline)
+                pending[future] = (graph_name, graph_deadline)
+
+            while pending:
+                next_deadline = min(d for _, d in pending.values())
+                done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    graph_name, _ = pending.pop(future)
+                    try:
+                        result, elapsed = future.result()
+                    except Exception as e:
+                        elapsed = time.monotonic() - start
+                        errors[graph_name] = f"Query failed: {str(e)}"
+                        per_graph[graph_name] = {
+                            "count": 0, "status": "error", "error": str(e),
+                            "elapsed_ms": round(elapsed * 1000),
+                        }
+                        continue
+                    if result.get("error"):
+                        # execute() reports upstream failures in the result
+                        errors[graph_name] = result["error"]
+                        per_graph[graph_name] = {
+                            "count": 0, "status": "error", "error": result["error"],
+                            "elapsed_ms": round(elapsed * 1000),
+                        }
+                        continue
+                    results[graph_name] = result
+                    per_graph[graph_name] = {
+                        "count": result.get("count", 0),
+                        "status": "success",
+                        "elapsed_ms": round(elapsed * 1000),
+                    }
+
+                now = time.monotonic()
+                for future, (graph_name, graph_deadline) in list(pending.items()):
+                    if now >= graph_deadline:
+                        del pending[future]
+                        future.cancel()
+                        limit = "deadline" if graph_deadline >= deadline else "per-graph timeout"
+                        errors[graph_name] = f"No response within {limit}"
+                        per_graph[graph_name] = {
+                            "count": 0, "status": "timeout",
+                            "elapsed_ms": round((now - start) * 1000),
+                        }
+        finally:
+            # Do not block on stragglers: their requests time out at their
+            # deadline and their results are no longer wanted
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run_federated(self, servers, queries, deadline, results, per_graph) -> bool:
+        """Answer all graphs with one UNION request on the federation endpoint.
+
+        Returns False if the deadline passed first. Raises IncompatibleQueryError
+        if the queries cannot be combined, or the endpoint's error.
+        """
+        branches = []
+        for graph_name, server in servers.items():
+            query_string = queries[graph_name]
+            # Ontology expansion rewrites the query per graph; leave those to execute()
+            to_expand, _ = server._expansion_filter.partition(server._detect_ontology_uris(query_string))
+            if to_expand:
+                raise IncompatibleQueryError(f"{graph_name}: query needs ontology expansion")
+            branches.append((graph_name, server.graph_uri, query_string))
+        combined, columns = compile_union_query(branches)
+
+        # All graphs share the federation endpoint, so any server can send it
+        server = next(iter(servers.values()))
+        began = time.monotonic()
+        def run(query_string: str) -> Dict[str, Any]:
+            with request_deadline(deadline):
+                return server._run_query(query_string)
+
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="multi-graph")
+        try:
+            future = pool.submit(tracing.in_current_context(run), combined)
+            # Not future.result(timeout=...): on Python 3.11+ its TimeoutError is
+            # the builtin one, indistinguishable from an upstream socket timeout
+            done, _ = wait([future], timeout=max(0.0, deadline - time.monotonic()))
+        finally:
+            pool.shutdown(wait=False)
+        if not done or (future.exception() is not None and time.monotonic() >= deadline):
+            return False
+        raw = future.result()
+        elapsed_ms = round((time.monotonic() - began) * 1000)
+
+        rows: Dict[str, List[List[str]]] = {name: [] for name in servers}
+        for binding in raw.get("results", {}).get("bindings", []):
+            graph_name = binding.get(SOURCE_GRAPH_VAR, {}).get("value")
+            if graph_name in rows:
+                rows[graph_name].append([binding.get(c, {}).get("value", "") for c in columns[1:]])
+        for graph_name in servers:
+            results[graph_name] = {
+                "columns": columns[1:],
+                "data": rows[graph_name],
+                "count": len(rows[graph_name]),
+            }
+            per_graph[graph_name] = {
+                "count": len(rows[graph_name]), "status": "success", "elapsed_ms": elapsed_ms,
+            }
+        return True
+
+    def join_graph_results(
+        self,
+        graph_a: str,
+        query_a: str,
+        key_a: str,
+        graph_b: str,
+        query_b: str,
+        key_b: str,
+        id_type: Optional[str] = None,
+        max_rows: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Run one query per graph and hash-join the results on mapped identifiers.
+
+        Key values are normalized with normalize_identifier() so that IRIs,
+        CURIEs and literals of the same identifier match. ``id_type`` defaults
+        to the single identifier type the graphs share (see IDENTIFIER_BRIDGES);
+        otherwise the generic local-name normalization is used.
+
+        If the chemical crosswalk is installed and the keys are chemical
+        identifiers (``id_type`` is a chemical type or is detected from the
+        values), keys are mapped to their crosswalk cluster, so e.g. a CAS
+        number in graph_a matches the ChEBI ID of the same substance in graph_b.
+        """
+        canonical_a = self._validate_graph_name(graph_a)
+        canonical_b = self._validate_graph_name(graph_b)
+        key_a, key_b = key_a.lstrip("?$"), key_b.lstrip("?$")
+        if id_type is None:
+            common = find_common_identifiers(canonical_a, canonical_b)
+            id_type = common[0] if len(common) == 1 else None
+        max_rows = self.JOIN_MAX_ROWS if max_rows is None else max_rows
+
+        server_a = self._get_server(canonical_a)
+        server_b = self._get_server(canonical_b)
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="join") as pool:
+            future_a = pool.submit(tracing.in_current_context(server_a.execute), query_a)
+            future_b = pool.submit(tracing.in_current_context(server_b.execute), query_b)
+            result_a, result_b = future_a.result(), future_b.result()
+
+        # A failed query has no columns; report its error rather than a missing key
+        for graph_name, result in ((canonical_a, result_a), (canonical_b, result_b)):
+            if result.get("error"):
+                return {"error": f"Query failed on {graph_name}: {result['error']}"}
+
+        columns_a = result_a.get("columns", [])
+        columns_b = result_b.get("columns", [])
+        for graph_name, key, columns in ((canonical_a, key_a, columns_a), (canonical_b, key_b, columns_b)):
+            if key not in columns:
+                raise ValueError(
+                    f"Join key '{key}' is not a column of the {graph_name} result "
+                    f"(columns: {', '.join(columns) or 'none'})"
+                )
+
+        chemicals = self._get_chemical_crosswalk() if id_type in (None, *CHEMICAL_ID_TYPES) else None
+        if chemicals is not None:
+            def key_fn(value):
+                return (chemicals.canonical(value, id_type) or chemicals.canonical(value)
+                        or normalize_identifier(value, id_type))
+        else:
+            def key_fn(value):
+                return normalize_identifier(value, id_type)
+        join = HashJoin(key_fn=key_fn)
+        data = [
+            [key] + row_a + row_b
+            for key, row_a, row_b in join.join(
+                result_a.get("data", []), columns_a.index(key_a),
+                result_b.get("data", []), columns_b.index(key_b),
+                limit=max_rows + 1,
+            )
+        ]
+        truncated = len(data) > max_rows
+        data = data[:max_rows]
+
+        return {
+            "columns": ["join_key"]
+                       + [f"{canonical_a}.{c}" for c in columns_a]
+                       + [f"{canonical_b}.{c}" for c in columns_b],
+            "data": data,
+            "count": len(data),
+            "join": {
+                "strategy": "hash",
+                "id_type": id_type,
+                "left_rows": result_a.get("count", 0),
+                "right_rows": result_b.get("count", 0),
+                "matched_keys": len({row[0] for row in data}),
+                "spilled_to_disk": join.spilled,
+                "chemical_crosswalk": chemicals is not None,
+                "truncated": truncated,
+            },
+        }
+
+    def bind_join_graph_results(
+        self,
+        graph_a: str,
+        query_a: str,
+        key_a: str,
+        graph_b: str,
+        query_b: str,
+        key_b: str,
+        id_type: Optional[str] = None,
+        max_rows: Optional[int] = None,
+        via_gene_bridge: bool = False,
+        key_format: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Join by pushing graph_a's keys into graph_b's query (bind join).
+
+        Runs ``query_a``, deduplicates its (normalized) ``key_a`` values and
+        runs ``query_b`` once per chunk with ``VALUES ?key_b { ... }`` injected
+        into its WHERE clause (see joins.BindJoin). Only right-hand rows for
+        those keys are fetched, which is much cheaper than join_graph_results'
+        full fetch when the left side is selective.
+
+        With ``via_gene_bridge`` the keys are first translated, e.g. NCBI Gene
+        IDs to Ensembl IDs, with the local gene crosswalk if installed or else
+        through the gene bridge graph (build_gene_bridge_query). Keys are sent as IRIs or string literals as returned by
+        graph_a, or rendered with ``key_format`` (e.g. ``"<https://identifiers.org/cas:{}>"``)
+        applied to the normalized key. Joined rows are collected as chunks
+        complete and the remaining chunks are cancelled once ``max_rows`` is
+        reached.
+        """
+        canonical_a = self._validate_graph_name(graph_a)
+        canonical_b = self._validate_graph_name(graph_b)
+        key_a, key_b = key_a.lstrip("?$"), key_b.lstrip("?$")
+        if not re.search(rf"[?$]{re.escape(key_b)}\b", query_b):
+            raise ValueError(f"Join key ?{key_b} does not occur in the {canonical_b} query")
+        if not re.search(r"(?i)\bWHERE\s*\{", query_b):
+            raise ValueError(f"The {canonical_b} query needs an explicit WHERE clause for key injection")
+        max_rows = self.JOIN_MAX_ROWS if max_rows is None else max_rows
+
+        if via_gene_bridge:
+            types = gene_bridge_types(canonical_a, canonical_b)
+            if types is None:
+                raise ValueError(f"No gene identifier bridge between {canonical_a} and {canonical_b}")
+            left_type, right_type = types
+        else:
+            if id_type is None:
+                common = find_common_identifiers(canonical_a, canonical_b)
+                id_type = common[0] if len(common) == 1 else None
+            left_type = right_type = id_type
+
+        result_a = self._get_server(canonical_a).execute(query_a)
+        if result_a.get("error"):
+            return {"error": f"Query failed on {canonical_a}: {result_a['error']}"}
+        columns_a = result_a.get("columns", [])
+        if key_a not in columns_a:
+            raise ValueError(
+                f"Join key '{key_a}' is not a column of the {canonical_a} result "
+                f"(columns: {', '.join(columns_a) or 'none'})"
+            )
+        key_index_a = columns_a.index(key_a)
+        left: Dict[str, List[List[str]]] = {}
+        raw_keys: Dict[str, str] = {}
+        for row in result_a.get("data", []):
+            value = row[key_index_a] if key_index_a < len(row) else ""
+            if value:
+                key = normalize_identifier(value, left_type)
+                left.setdefault(key, []).append(row)
+                raw_keys.setdefault(key, value)
+
+        # Normalized right key -> normalized left keys it joins with
+        right_to_left: Dict[str, set] = {}
+        bridge_stats = None
+        crosswalk = self._get_gene_crosswalk() if via_gene_bridge else None
+        if crosswalk is not None and crosswalk.supports(left_type) and crosswalk.supports(right_type):
+            # Translate locally instead of querying the bridge graph
+            for source in left:
+                for target in crosswalk.lookup(source, left_type, right_type):
+                    right_to_left.setdefault(target, set()).add(source)
+                    raw_keys.setdefault(target, target)
+            bridge_stats = {
+                "graph": "local_crosswalk",
+                "source_id_type": left_type,
+                "target_id_type": right_type,
+                "mapped_keys": len({k for keys in right_to_left.values() for k in keys}),
+                "failed_keys": 0,
+            }
+        elif via_gene_bridge:
+            bridge_server = self._get_server(GENE_BRIDGE_GRAPH)
+            source_column = GENE_BRIDGE_PROPERTIES[left_type][1].lstrip("?")
+            target_column = GENE_BRIDGE_PROPERTIES[right_type][1].lstrip("?")
+
+            def fetch_bridge(keys: List[str]) -> List[List[str]]:
+                query = build_gene_bridge_query(canonical_a, canonical_b, keys)
+                result = bridge_server.execute(query, analyze=False, auto_expand_descendants=False)
+                if result.get("error"):
+                    # Raised, so BindJoin splits and retries the chunk
+                    raise RuntimeError(result["error"])
+                columns = result.get("columns", [])
+                si, ti = columns.index(source_column), columns.index(target_column)
+                return [[row[si], row[ti]] for row in result.get("data", [])]
+
+            bridge = BindJoin(fetch_bridge)
+            for _, rows in bridge.run(left):
+                for source, target in rows:
+                    target_key = normalize_identifier(target, right_type)
+                    right_to_left.setdefault(target_key, set()).add(normalize_identifier(source, left_type))
+                    raw_keys.setdefault(target_key, target)
+            bridge_stats = {
+                "graph": GENE_BRIDGE_GRAPH,
+                "source_id_type": left_type,
+                "target_id_type": right_type,
+                "mapped_keys": len({k for keys in right_to_left.values() for k in keys}),
+                "failed_keys": len(bridge.failed_keys),
+            }
+        else:
+            right_to_left = {key: {key} for key in left}
+
+        def term(key: str) -> str:
+            if key_format:
+                return key_format.format(key)
+            raw = raw_keys[key]
+            if re.match(r"(?i)(?:https?|urn|ftp):", raw):
+                return f"<{raw}>"
+            return SPARQLServer._sparql_string(raw)
+
+        server_b = self._get_server(canonical_b)
+        columns_b: List[str] = []
+
+        def fetch_right(keys: List[str]) -> List[List[str]]:
+            values = f"\n  VALUES ?{key_b} {{ {' '.join(term(k) for k in keys)} }}"
+            query = re.sub(r"(?i)\bWHERE\s*\{", lambda m: m.group(0) + values, query_b, count=1)
+            result = server_b.execute(query, analyze=False, auto_expand_descendants=False)
+            if result.get("error"):
+                # Raised, so BindJoin splits and retries the chunk (e.g. on 414 URI Too Long)
+                raise RuntimeError(result["error"])
+            columns_b[:] = result.get("columns", [])
+            return result.get("data", [])
+
+        bind = BindJoin(fetch_right)
+        data: List[List[str]] = []
+        truncated = False
+        chunks = bind.run(right_to_left)
+        for _, rows in chunks:
+            if key_b not in columns_b:
+                chunks.close()
+                raise ValueError(f"Join key '{key_b}' is not a column of the {canonical_b} result")
+            key_index_b = columns_b.index(key_b)
+            for row in rows:
+                right_key = normalize_identifier(row[key_index_b], right_type) if key_index_b < len(row) else ""
+                for left_key in sorted(right_to_left.get(right_key, ())):
+                    for left_row in left.get(left_key, ()):
+                        data.append([left_key] + left_row + row)
+            if len(data) > max_rows:
+                truncated = True
+                chunks.close()
+                break
+        data = data[:max_rows]
+
+        join_stats = {
+            "strategy": "bind",
+            "id_type": right_type,
+            "left_rows": result_a.get("count", 0),
+            "distinct_keys": len(left),
+            "pushed_keys": len(right_to_left),
+            "chunks": bind.chunks,
+            "chunk_size": bind.chunk_size,
+            "retries": bind.retries,
+            "failed_keys": len(bind.failed_keys),
+            "matched_keys": len({row[0] for row in data}),
+            "truncated": truncated,
+        }
+        if bind.failed_keys:
+            join_stats["last_error"] = bind.last_error
+        if bridge_stats:
+            join_stats["gene_bridge"] = bridge_stats
+        return {
+            "columns": ["join_key"]
+                       + [f"{canonical_a}.{c}" for c in columns_a]
+                       + [f"{canonical_b}.{c}" for c in columns_b],
+            "data": data,
+            "count": len(data),
+            "join": join_stats,
+        }
+
     def _validate_graph_name(self, name: str) -> str:
         """Validate and resolve a graph name. Raises ValueError if not found."""
         canonical = self.registry.resolve_name(name)
@@ -93,6 +801,7 @@ def parse_args():
 
 
 _HEALTH_PATHS = {"/health", "/healthz", "/livez", "/readyz"}
+_UNAUTHENTICATED_PATHS = _HEALTH_PATHS | {metrics.METRICS_PATH}
 
 
 def _add_health_routes(app):
@@ -119,7 +828,7 @@ def _wrap_with_api_key_auth(app):
 
     class APIKeyMiddleware(BaseHTTPMiddleware):
         async def dispatch(self, request, call_next):
-            if request.method == "OPTIONS" or request.url.path in _HEALTH_PATHS:
+            if request.method == "OPTIONS" or request.url.path in _UNAUTHENTICATED_PATHS:
                 return await call_next(request)
             auth_header = request.headers.get("Authorization", "")
             if auth_header != f"Bearer {api_key}":
@@ -138,6 +847,8 @@ def main():
 
     # Initialize unified server
     unified = UnifiedSPARQLServer(registry_path=args.registry)
+    # Precompute the join plans now rather than on the first get_join_strategy call
+    unified._get_join_planner()
 
     # Determine transport early so we can configure security settings
     transport = (args.transport if args.transport is not None
@@ -158,15 +869,19 @@ def main():
         instructions="""You have access to 27 Proto-OKN knowledge graphs through a single unified server.
 
 WORKFLOW FOR CROSS-GRAPH ANALYSIS:
-1. Use list_graphs() or route_query() to discover relevant graphs
+1. Use list_graphs() or route_query() to discover relevant graphs (graphs_containing(identifier)
+   tells which graphs can hold a specific CAS number, gene or disease ID)
 2. Use get_schema(graph) to understand each graph's structure before writing SPARQL
 3. Use query(graph, sparql) to query individual graphs with graph-specific SPARQL
 4. Use get_join_strategy(graph_a, graph_b) to understand how to merge results
 5. Use multi_graph_query({graph1: sparql1, graph2: sparql2}) to run queries across graphs
+6. Use join_graph_results(...) to join two graphs' results on a shared identifier server-side
 
 IMPORTANT: Each graph has its own schema. Always call get_schema() before writing SPARQL for a graph.
 IMPORTANT: For gene queries across graphs, different graphs use different gene identifiers
-(Ensembl, NCBI Gene ID, gene symbol). Use get_join_strategy() to understand conversions.""",
+(Ensembl, NCBI Gene ID, gene symbol). Use get_join_strategy() to understand conversions
+and translate_gene_ids() to convert IDs between them. Likewise, chemical graphs use CAS,
+ChEBI, PubChem, InChIKey, ChEMBL or DTXSID identifiers; use translate_chemical_ids().""",
     )
 
     # ── Tool 1: list_graphs ──────────────────────────────────────────────
@@ -175,61 +890,99 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
     def list_graphs(
         domain: Optional[str] = None,
         entity_type: Optional[str] = None,
+        namespace: Optional[str] = None,
+        predicate: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         List all available Proto-OKN knowledge graphs with their metadata.
 
         Call this first to understand what data is available. Returns graph names,
         descriptions, domain tags, entity types, and identifier namespaces.
+        Filters are combined (a graph must match all of them) and case-insensitive.
 
         Args:
             domain: Optional filter by domain tag (e.g., "biology", "health",
                     "toxicology", "environment", "geospatial")
             entity_type: Optional filter by entity class name (e.g., "Gene",
                         "Disease", "ChemicalEntity")
+            namespace: Optional filter by identifier namespace (e.g., "Ensembl", "CAS")
+            predicate: Optional filter by predicate name (e.g., "TREATS_CtD")
+            offset: Index of the first graph to return (default 0)
+            limit: Maximum number of graphs to return, at least 1 (default: all)
 
         Returns:
-            Dictionary with graph_count and graphs list.
+            Dictionary with graph_count (all matches), graphs (this page) and
+            next_offset (None on the last page).
         """
-        if domain:
-            graphs = unified.registry.filter_by_domain(domain)
-        elif entity_type:
-            graphs = unified.registry.filter_by_entity_type(entity_type)
-        else:
-            graphs = unified.registry.list_all()
-
-        return {
-            "graph_count": len(graphs),
-            "graphs": graphs,
-        }
+        try:
+            return unified.registry.select(
+                offset=offset, limit=limit,
+                domain=domain, entity_type=entity_type, namespace=namespace, predicate=predicate,
+            )
+        except ValueError as e:
+            return {"error": str(e)}
 
     # ── Tool 2: route_query ──────────────────────────────────────────────
 
     @mcp.tool()
-    def route_query(question: str) -> Dict[str, Any]:
+    def route_query(
+        question: str,
+        identifiers: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
         Route a natural language question to the most relevant knowledge graphs.
 
         Takes a natural language question and performs keyword matching against
         all graph metadata (descriptions, domain tags, entity types, example queries).
-        Returns ALL graphs sorted by relevance score.
+        Returns ALL graphs sorted by relevance score (or the ``limit`` best), except
+        graphs that definitely do not contain a specific identifier named in the
+        question (e.g. a CAS number, CHEBI:16842, MONDO:0005578, ENSG00000012048).
 
         Args:
             question: Natural language question (e.g., "What drugs treat diabetes?",
                      "Where are PFAS contamination sites?")
+            identifiers: Optional identifiers the question is about, in addition to
+                those recognized in the question text
+            limit: Optional maximum number of graphs to return (default: all)
 
         Returns:
-            Dictionary with question, candidate_count, and candidates list
-            sorted by relevance_score (highest first).
+            Dictionary with question, identifiers, candidate_count, candidates list
+            sorted by relevance_score (highest first), and skipped_graphs.
         """
-        results = unified.registry.search(question)
-        return {
-            "question": question,
-            "candidate_count": len(results),
-            "candidates": results,
-        }
+        try:
+            return unified.route(question, identifiers, limit)
+        except ValueError as e:
+            return {"error": str(e)}
+
+    # ── Tool 3: graphs_containing ────────────────────────────────────────
+
+    @mcp.tool()
+    def graphs_containing(identifier: str, id_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Find which graphs may contain a specific identifier, without querying them.
+
+        Checks compact per-graph membership filters. Graphs listed as absent
+        definitely do not contain the identifier and need not be queried; graphs
+        listed as possible probably do (filters have rare false positives).
+
+        Args:
+            identifier: Identifier as IRI, CURIE or plain value (e.g. "50-00-0",
+                "CHEBI:16842", "http://purl.obolibrary.org/obo/MONDO_0005578")
+            id_type: Identifier type (e.g. "CAS", "NCBI_Gene"); detected from the
+                identifier's form when omitted
 
-    # ── Tool 3: get_schema ───────────────────────────────────────────────
+        Returns:
+            Dictionary with possible, absent and not_indexed graph lists.
+        """
+        try:
+            return unified.graphs_containing(identifier, id_type)
+        except ValueError as e:
+            return {"error": str(e)}
+
+    # ── Tool 4: get_schema ───────────────────────────────────────────────
 
     @mcp.tool()
     def get_schema(
@@ -256,7 +1009,7 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         except ValueError as e:
             return {"error": str(e)}
 
-    # ── Tool 4: get_description ──────────────────────────────────────────
+    # ── Tool 5: get_description ──────────────────────────────────────────
 
     @mcp.tool()
     def get_description(graph_name: str) -> Dict[str, Any]:
@@ -288,7 +1041,7 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         except ValueError as e:
             return {"error": str(e)}
 
-    # ── Tool 5: query ────────────────────────────────────────────────────
+    # ── Tool 6: query ────────────────────────────────────────────────────
 
     @mcp.tool()
     def query(
@@ -299,6 +1052,8 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         max_descendants: int = 2000,
         max_depth: int = 5,
         bind_expansion_to: Optional[List[str]] = None,
+        expansion_mode: str = "auto",
+        profile: bool = False,
     ) -> Dict[str, Any]:
         """
         Execute a SPARQL query against a specific knowledge graph.
@@ -319,6 +1074,13 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
             max_descendants: Maximum descendants per URI expansion (default: 2000)
             max_depth: Maximum depth for ontology expansion (default: 5)
             bind_expansion_to: Optional list of variable names to bind expanded URIs to
+            expansion_mode: "auto" (default), "values" (VALUES clauses), "postfilter"
+                (run once with the term as a variable and filter rows by hierarchy;
+                plain SELECT queries only) or "graph_join" (join against ubergraph
+                in the same request). "auto" picks per graph from measured latency.
+            profile: If True, add a 'timing' field breaking the run down into query
+                analysis, descendant fetches, per-batch network and parse time, merge,
+                bytes received and rows before/after dedupe (default: False)
 
         Returns:
             Dictionary with columns, data, count, and optional analysis/expansion info.
@@ -332,6 +1094,8 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
                 max_descendants=max_descendants,
                 max_depth=max_depth,
                 bind_expansion_to=bind_expansion_to,
+                expansion_mode=expansion_mode,
+                profile=profile,
             )
             return {"graph_name": graph_name, **result}
         except ValueError as e:
@@ -339,17 +1103,22 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         except Exception as e:
             return {"error": f"Query failed on {graph_name}: {str(e)}"}
 
-    # ── Tool 6: multi_graph_query ────────────────────────────────────────
+    # ── Tool 7: multi_graph_query ────────────────────────────────────────
 
     @mcp.tool()
-    def multi_graph_query(
+    async def multi_graph_query(
         queries: Dict[str, str],
+        timeout: float = 120.0,
+        per_graph_timeout: float = 60.0,
+        federated: bool = False,
     ) -> Dict[str, Any]:
         """
         Execute different SPARQL queries against multiple knowledge graphs in one call.
 
         Each graph gets its own tailored SPARQL query designed for that graph's
         specific schema. Results are returned with a source_graph column prepended.
+        Graphs are queried concurrently; graphs that do not answer in time are
+        reported as "timeout" and the results that did arrive are returned.
 
         WORKFLOW:
         1. Call get_schema() for each graph first to understand its schema
@@ -360,49 +1129,23 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         Args:
             queries: Dictionary mapping graph names to SPARQL query strings.
                      Example: {"spoke-okn": "SELECT ...", "biobricks-ice": "SELECT ..."}
+            timeout: Overall deadline in seconds for the whole call (default: 120)
+            per_graph_timeout: Deadline in seconds for each graph (default: 60)
+            federated: If True, combine the queries into a single UNION request
+                on the federation endpoint (one round trip instead of one per
+                graph). Falls back to per-graph execution if the queries cannot
+                be combined (e.g. SELECT *, ontology expansion) or the combined
+                request fails.
 
         Returns:
-            Dictionary with combined results, per-graph counts, and any errors.
+            Dictionary with combined results, per-graph counts/status/elapsed_ms,
+            any errors, and partial=True if some graph timed out.
         """
-        all_rows = []
-        all_columns = None
-        per_graph = {}
-        errors = {}
-
-        for graph_name, query_string in queries.items():
-            try:
-                server = unified._get_server(graph_name)
-                result = server.execute(query_string)
-
-                columns = result.get("columns", [])
-                data = result.get("data", [])
-                count = result.get("count", 0)
-
-                # Prepend source_graph column
-                if all_columns is None:
-                    all_columns = ["source_graph"] + columns
-
-                for row in data:
-                    all_rows.append([graph_name] + row)
-
-                per_graph[graph_name] = {"count": count, "status": "success"}
-
-            except ValueError as e:
-                errors[graph_name] = str(e)
-                per_graph[graph_name] = {"count": 0, "status": "error", "error": str(e)}
-            except Exception as e:
-                errors[graph_name] = f"Query failed: {str(e)}"
-                per_graph[graph_name] = {"count": 0, "status": "error", "error": str(e)}
-
-        return {
-            "columns": all_columns or ["source_graph"],
-            "data": all_rows,
-            "count": len(all_rows),
-            "per_graph": per_graph,
-            "errors": errors if errors else None,
-        }
+        return await anyio.to_thread.run_sync(
+            unified.multi_graph_query, queries, timeout, per_graph_timeout, federated
+        )
 
-    # ── Tool 7: get_join_strategy ────────────────────────────────────────
+    # ── Tool 8: get_join_strategy ────────────────────────────────────────
 
     @mcp.tool()
     def get_join_strategy(graph_a: str, graph_b: str) -> Dict[str, Any]:
@@ -413,30 +1156,168 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         results. Especially important for gene identifiers, which vary across graphs
         (Ensembl in spoke-okn, NCBI Gene in spoke-genelab, both in gene-expression-atlas-okn).
 
+        Also returns the cheapest join plan, which may go through bridge graphs
+        or local identifier crosswalks when the graphs share no identifier. Each
+        plan step names the tool call (usually join_graph_results) and its
+        arguments; run the steps in order.
+
         Args:
             graph_a: First graph name
             graph_b: Second graph name
 
         Returns:
             Dictionary with can_join, common_identifiers, strategy description,
-            and optionally bridge graph info for gene identifier conversion.
+            optionally bridge graph info for gene identifier conversion, and plan
+            (path, hops, cost, steps and, for gene bridges, a one-call shortcut).
+        """
+        try:
+            return unified.join_strategy(graph_a, graph_b)
+        except ValueError as e:
+            return {"error": str(e)}
+
+    # ── Tool 9: join_graph_results ───────────────────────────────────────
+
+    @mcp.tool()
+    async def join_graph_results(
+        graph_a: str,
+        query_a: str,
+        key_a: str,
+        graph_b: str,
+        query_b: str,
+        key_b: str,
+        id_type: Optional[str] = None,
+        max_rows: int = 10000,
+        strategy: str = "hash",
+        via_gene_bridge: bool = False,
+        key_format: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Join the results of two per-graph queries on a shared identifier, server-side.
+
+        Use instead of fetching both result sets and matching them by hand.
+        Join key values are normalized before matching, so IRIs, CURIEs and
+        literals of the same identifier (e.g. "http://purl.obolibrary.org/obo/MONDO_0005578"
+        and "MONDO:0005578", or "ENSG00000012048.15" and "ensg00000012048") match.
+
+        WORKFLOW:
+        1. Call get_join_strategy(graph_a, graph_b) to find the shared identifier type
+        2. Write a query per graph that returns that identifier as a column
+        3. Call this tool with the two queries and the key column names
+
+        Args:
+            graph_a: First graph name
+            query_a: SPARQL SELECT query for graph_a
+            key_a: Column (variable name) of query_a holding the join key
+            graph_b: Second graph name
+            query_b: SPARQL SELECT query for graph_b
+            key_b: Column (variable name) of query_b holding the join key
+            id_type: Identifier type from get_join_strategy (e.g. "CAS", "Ensembl",
+                "NCBI_Gene"). Defaults to the single type both graphs share.
+                Chemical identifiers of different types (e.g. CAS and ChEBI) are
+                matched through the chemical crosswalk when it is installed.
+            max_rows: Maximum joined rows to return (default: 10000)
+            strategy: "hash" (default) runs both queries in full and joins them.
+                "bind" runs query_a first and pushes its distinct keys into
+                query_b as VALUES ?key_b chunks, so only matching rows of graph_b
+                are fetched. Prefer "bind" when query_a returns few keys.
+            via_gene_bridge: With strategy="bind", translate gene IDs through
+                gene-expression-atlas-okn first (e.g. NCBI Gene -> Ensembl)
+            key_format: With strategy="bind", how to write each normalized key in
+                the VALUES clause, e.g. "<https://identifiers.org/cas:{}>" or '"{}"'.
+                Default: the key exactly as graph_a returned it.
+
+        Returns:
+            Dictionary with columns (join_key, then "<graph>.<column>" for each
+            side), data, count, and join statistics.
+        """
+        try:
+            if strategy == "bind":
+                return await anyio.to_thread.run_sync(
+                    unified.bind_join_graph_results,
+                    graph_a, query_a, key_a, graph_b, query_b, key_b, id_type, max_rows,
+                    via_gene_bridge, key_format,
+                )
+            if strategy != "hash":
+                return {"error": f"Unknown join strategy '{strategy}'. Use 'hash' or 'bind'."}
+            return await anyio.to_thread.run_sync(
+                unified.join_graph_results,
+                graph_a, query_a, key_a, graph_b, query_b, key_b, id_type, max_rows,
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+        except Exception as e:
+            return {"error": f"Join failed: {str(e)}"}
+
+    # ── Tool 10: translate_gene_ids ───────────────────────────────────────
+
+    @mcp.tool()
+    def translate_gene_ids(
+        ids: List[str],
+        from_type: str,
+        to_type: str,
+    ) -> Dict[str, Any]:
+        """
+        Translate gene identifiers between NCBI Gene, Ensembl and gene symbol.
+
+        Uses a local crosswalk built from gene-expression-atlas-okn, so thousands
+        of IDs can be translated per call without querying any graph. Use it to
+        convert IDs between graphs that use different gene identifiers
+        (Ensembl in spoke-okn, NCBI Gene in spoke-genelab).
+
+        Args:
+            ids: Identifiers to translate; IRIs, CURIEs (e.g. "NCBIGene:672") and
+                plain values are accepted
+            from_type: "NCBI_Gene", "Ensembl" or "GeneSymbol" (also "ncbi", "symbol")
+            to_type: Target identifier type
+
+        Returns:
+            Dictionary with translations (input id -> list of target ids),
+            unmapped ids and counts.
         """
         try:
-            canonical_a = unified._validate_graph_name(graph_a)
-            canonical_b = unified._validate_graph_name(graph_b)
-            strategy = suggest_join_strategy(canonical_a, canonical_b)
-            strategy["graph_a"] = canonical_a
-            strategy["graph_b"] = canonical_b
-            return strategy
+            return unified.translate_gene_ids(ids, from_type, to_type)
         except ValueError as e:
             return {"error": str(e)}
 
-    # ── Tool 8: lookup_uri ───────────────────────────────────────────────
+    # ── Tool 11: translate_chemical_ids ──────────────────────────────────
 
     @mcp.tool()
-    def lookup_uri(
+    def translate_chemical_ids(
+        ids: List[str],
+        from_type: str,
+        to_type: str,
+    ) -> Dict[str, Any]:
+        """
+        Translate chemical identifiers between CAS, ChEBI, PubChem, InChIKey, ChEMBL and DTXSID.
+
+        Uses a local crosswalk harvested from the chemical graphs (spoke-okn,
+        biobricks-*, sawgraph), so thousands of IDs can be translated per call
+        without querying any graph. Use it to connect graphs that identify
+        chemicals differently, e.g. CAS numbers in biobricks-tox21 and ChEBI
+        IDs in spoke-okn.
+
+        Args:
+            ids: Identifiers to translate; IRIs, CURIEs (e.g. "CHEBI:16842",
+                "cas:50-00-0") and plain values are accepted
+            from_type: "CAS", "ChEBI", "PubChem", "InChIKey", "ChEMBL" or "DTXSID"
+            to_type: Target identifier type
+
+        Returns:
+            Dictionary with translations (input id -> list of target ids),
+            unmapped ids and counts.
+        """
+        try:
+            return unified.translate_chemical_ids(ids, from_type, to_type)
+        except ValueError as e:
+            return {"error": str(e)}
+
+    # ── Tool 12: lookup_uri ───────────────────────────────────────────────
+
+    @mcp.tool()
+    async def lookup_uri(
         label: str,
         max_results: int = 2000,
+        match: str = "exact",
     ) -> Dict[str, Any]:
         """
         Look up the URI for an ontology term by its label (name) in Ubergraph.
@@ -448,19 +1329,40 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         Args:
             label: The term to search for (case-insensitive)
             max_results: Maximum number of matching URIs to return (default: 2000)
+            match: "exact" (default), "prefix" or "fuzzy" (ranked approximate
+                matches, tolerates typos). Prefix/fuzzy use the local label index.
 
         Returns:
             Dictionary with query_label, match_count, and matches list.
         """
-        # Use any cached server, or create one for spoke-okn (arbitrary choice;
-        # lookup_uri queries ubergraph, not the KG endpoint)
-        if unified._servers:
-            server = next(iter(unified._servers.values()))
-        else:
-            server = unified._get_server("spoke-okn")
-        return server.lookup_uri(label, max_results)
+        # Run in a worker thread so concurrent lookups can be micro-batched
+        server = unified._get_lookup_server()
+        return await anyio.to_thread.run_sync(server.lookup_uri, label, max_results, match)
+
+    # ── Tool 13: lookup_uris ──────────────────────────────────────────────
 
-    # ── Tool 9: get_descendants ──────────────────────────────────────────
+    @mcp.tool()
+    def lookup_uris(
+        labels: List[str],
+        max_results: int = 2000,
+    ) -> Dict[str, Any]:
+        """
+        Look up ontology URIs for several labels in one call.
+
+        Prefer this over repeated lookup_uri calls when a question mentions
+        several terms (e.g. ["asthma", "lung", "eosinophil"]): all labels are
+        resolved with a single Ubergraph request.
+
+        Args:
+            labels: Terms to search for (case-insensitive)
+            max_results: Maximum number of matching URIs per label (default: 2000)
+
+        Returns:
+            Dictionary with label_count and results (one lookup_uri-style entry per label).
+        """
+        return unified._get_lookup_server().lookup_uris(labels, max_results)
+
+    # ── Tool 14: get_descendants ──────────────────────────────────────────
 
     @mcp.tool()
     def get_descendants(
@@ -487,13 +1389,10 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         Returns:
             Dictionary with uri, label, max_depth, descendant_count, descendants.
         """
-        if unified._servers:
-            server = next(iter(unified._servers.values()))
-        else:
-            server = unified._get_server("spoke-okn")
+        server = unified._get_lookup_server()
         return server.get_descendants_detailed(uri, max_results, max_depth, include_distance)
 
-    # ── Tool 10: get_query_template ────────────────────────────────────
+    # ── Tool 15: get_query_template ────────────────────────────────────
 
     @mcp.tool()
     def get_query_template(
@@ -523,7 +1422,7 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
         except ValueError as e:
             return {"error": str(e)}
 
-    # ── Tool 11: clean_mermaid_diagram ───────────────────────────────
+    # ── Tool 16: clean_mermaid_diagram ───────────────────────────────
 
     @mcp.tool()
     def clean_mermaid_diagram(mermaid_content: str) -> str:
@@ -604,7 +1503,7 @@ IMPORTANT: For gene queries across graphs, different graphs use different gene i
 
         return '\n'.join(cleaned_lines)
 
-    # ── Tool 12: create_chat_transcript ──────────────────────────────
+    # ── Tool 17: create_chat_transcript ──────────────────────────────
 
     @mcp.tool()
     def create_chat_transcript(graph_name: Optional[str] = None) -> str:
@@ -650,7 +1549,7 @@ IMPORTANT:
 - Use the present_files tool to share the transcript file with the user.
 """
 
-    # ── Tool 13: visualize_schema ────────────────────────────────────
+    # ── Tool 18: visualize_schema ────────────────────────────────────
 
     @mcp.tool()
     def visualize_schema(graph_name: str) -> str:
@@ -731,6 +1630,44 @@ RENDERING REQUIREMENTS:
 - ALWAYS use present_files to share the .mermaid file after creating it
 """
 
+    # ── Tool 19: query_stats ─────────────────────────────────────────
+
+    @mcp.tool()
+    def query_stats(
+        graph_name: Optional[str] = None,
+        top: int = 10,
+        order_by: str = "total_time",
+    ) -> Dict[str, Any]:
+        """
+        Report which graphs and query shapes are using the most endpoint time.
+
+        Every SPARQL request sent to the federation endpoint is logged with a
+        fingerprint of its shape (literals, VALUES lists and LIMIT numbers
+        normalized out), so repeated LLM-written queries group together. Covers
+        the most recent requests (MCP_PROTO_OKN_QUERY_LOG_SIZE, default 10000).
+
+        Args:
+            graph_name: Only report requests for this graph (default: all graphs)
+            top: Number of fingerprints to return (default: 10)
+            order_by: Rank fingerprints by "total_time" (default), "p95",
+                "error_rate" or "count"
+
+        Returns:
+            Dictionary with queries_logged, per-graph totals (count, total/mean/p95/max
+            latency in ms, error rate, bytes) sorted by total time, and top_fingerprints
+            with the same figures, mean rows, last error and a normalized example query.
+        """
+        try:
+            if graph_name is not None:
+                graph_name = unified._validate_graph_name(graph_name)
+            return querylog.QUERY_LOG.stats(graph=graph_name, top=top, order_by=order_by)
+        except ValueError as e:
+            return {"error": str(e)}
+
+    # Optional OpenTelemetry spans per tool call (MCP_PROTO_OKN_TRACING)
+    if tracing.configure():
+        tracing.instrument_tools(mcp)
+
     # ── Transport ────────────────────────────────────────────────────────
 
     # `transport` was already resolved at the top of main()
@@ -746,7 +1683,13 @@ RENDERING REQUIREMENTS:
         mcp.settings.port = port
         app = mcp.streamable_http_app()
         app = _add_health_routes(app)
+        if metrics.metrics_enabled():
+            metrics.instrument_tools(mcp)
+            app = metrics.add_metrics_route(app)
+        # CPU/memory profiling endpoints, only with MCP_PROTO_OKN_ADMIN_TOKEN
+        app = diagnostics.add_admin_routes(app)
         app = _wrap_with_api_key_auth(app)
+        unified._metadata_cache.start()
         import uvicorn
         print(f"mcp-proto-okn-unified listening on http://{host}:{port}", file=sys.stderr)
         uvicorn.run(app, host=host, port=port, log_level="info")
@@ -0,0 +1,269 @@
+"""
+Local stand-in for the FRINK federation SPARQL endpoint.
+
+LocalSPARQLEndpoint serves SPARQL over HTTP on 127.0.0.1 from the Turtle
+files in tests/fixtures/endpoint/: each ``<name>.ttl`` becomes the named
+graph ``https://purl.org/okn/frink/kg/<name>``. Like the federation endpoint,
+``FROM <graph>`` selects the default graph and ``FROM NAMED <graph>`` the
+graphs visible to ``GRAPH`` patterns; a query without a dataset clause sees
+every graph.
+
+Faults are injected per endpoint so that batching, timeouts and concurrency
+of SPARQLServer can be measured without apps.okn.us:
+
+- ``latency``: seconds to wait before answering (a number, or a callable
+  taking the query text),
+- ``max_url_length``: GET requests with longer URLs get 414 URI Too Long,
+- ``fail_next(count, status)``: the next ``count`` requests get ``status``,
+- ``fail_matching(pattern, status)``: requests whose query matches the regex
+  get ``status``.
+
+Every request is recorded in ``requests`` (query, graphs, status, URL length,
+timings), and ``max_concurrency`` is the most requests seen in flight at once.
+
+Usage:
+
+    with LocalSPARQLEndpoint(latency=0.05) as endpoint:
+        monkeypatch.setattr(SPARQLServer, "FEDERATED_ENDPOINT", endpoint.url)
+        ...
+
+or, for manual runs, ``python tests/local_endpoint.py --port 8890`` and
+``MCP_PROTO_OKN_FEDERATED_ENDPOINT=http://127.0.0.1:8890/sparql``.
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import warnings
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from rdflib import Dataset, Graph, URIRef
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "endpoint")
+GRAPH_PREFIX = "https://purl.org/okn/frink/kg/"
+RESULTS_JSON = "application/sparql-results+json"
+
+_DATASET_CLAUSE = re.compile(r"\bFROM\s+(NAMED\s+)?<([^>]*)>", re.IGNORECASE)
+
+
+@dataclass
+class RequestRecord:
+    """One request received by the endpoint."""
+    method: str
+    query: str
+    default_graphs: Tuple[str, ...]
+    named_graphs: Tuple[str, ...]
+    url_length: int
+    started: float
+    seconds: float = 0.0
+    status: int = 200
+    rows: Optional[int] = None
+
+
+class LocalSPARQLEndpoint:
+    """A threaded SPARQL HTTP server over fixture graphs with fault injection."""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, port: int = 0,
+                 latency: Union[float, Callable[[str], float]] = 0.0,
+                 max_url_length: Optional[int] = None):
+        self.latency = latency
+        self.max_url_length = max_url_length
+        self.graphs: Dict[str, Graph] = {}
+        for name in sorted(os.listdir(fixtures_dir)):
+            if name.endswith(".ttl"):
+                self.graphs[GRAPH_PREFIX + name[:-4]] = Graph().parse(os.path.join(fixtures_dir, name))
+
+        self.requests: List[RequestRecord] = []
+        self.max_concurrency = 0
+        self._in_flight = 0
+        self._failures: List[int] = []
+        self._failure_patterns: List[Tuple[re.Pattern, int]] = []
+        self._datasets: Dict[Tuple[FrozenSet[str], FrozenSet[str]], Dataset] = {}
+        self._lock = threading.Lock()
+        # rdflib's in-memory store is not safe for concurrent readers
+        self._query_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/sparql"
+
+    # ---------------------- Lifecycle ---------------------- #
+    def start(self) -> "LocalSPARQLEndpoint":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-sparql", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalSPARQLEndpoint":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # ---------------------- Fault injection ---------------------- #
+    def fail_next(self, count: int = 1, status: int = 500) -> None:
+        """Answer the next ``count`` requests with HTTP ``status``."""
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def fail_matching(self, pattern: str, status: int = 500) -> None:
+        """Answer every request whose query matches ``pattern`` with HTTP ``status``."""
+        with self._lock:
+            self._failure_patterns.append((re.compile(pattern), status))
+
+    def wait_idle(self, timeout: float = 10.0) -> None:
+        """Wait until no request is being served (e.g. after a client timed out)."""
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def reset(self) -> None:
+        """Forget recorded requests and pending failures (latency and limits are kept)."""
+        with self._lock:
+            self.requests.clear()
+            self._failures.clear()
+            self._failure_patterns.clear()
+            self.max_concurrency = 0
+
+    # ---------------------- Query evaluation ---------------------- #
+    def _dataset(self, default: FrozenSet[str], named: FrozenSet[str]) -> Dataset:
+        """The dataset a query with these FROM / FROM NAMED graphs runs against."""
+        key = (default, named)
+        dataset = self._datasets.get(key)
+        if dataset is None:
+            if not default and not named:
+                default = named = frozenset(self.graphs)
+            dataset = Dataset()
+            default_graph = dataset.default_graph if hasattr(dataset, "default_graph") else dataset.default_context
+            for uri in default:
+                default_graph += self.graphs.get(uri, Graph())
+            for uri in named:
+                if uri in self.graphs:
+                    named_graph = dataset.graph(URIRef(uri))
+                    named_graph += self.graphs[uri]
+            self._datasets[key] = dataset
+        return dataset
+
+    def evaluate(self, query: str) -> Tuple[bytes, Optional[int]]:
+        """Run ``query`` with its dataset clauses applied; return (JSON body, row count)."""
+        default = frozenset(uri for named, uri in _DATASET_CLAUSE.findall(query) if not named)
+        named = frozenset(uri for is_named, uri in _DATASET_CLAUSE.findall(query) if is_named)
+        with self._query_lock, warnings.catch_warnings():
+            # rdflib deprecates APIs that its own SPARQL engine still calls
+            warnings.simplefilter("ignore", DeprecationWarning)
+            result = self._dataset(default, named).query(_DATASET_CLAUSE.sub("", query))
+            body = result.serialize(format="json")
+        rows = len(json.loads(body).get("results", {}).get("bindings", []))
+        return body, rows
+
+    def _planned_status(self, record: RequestRecord) -> Optional[int]:
+        if self.max_url_length is not None and record.method == "GET" and record.url_length > self.max_url_length:
+            return 414
+        with self._lock:
+            if self._failures:
+                return self._failures.pop(0)
+            for pattern, status in self._failure_patterns:
+                if pattern.search(record.query):
+                    return status
+        return None
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        parsed = urlparse(handler.path)
+        params = parse_qs(parsed.query)
+        if method == "POST":
+            length = int(handler.headers.get("Content-Length", 0))
+            body = handler.rfile.read(length).decode("utf-8")
+            if handler.headers.get("Content-Type", "").startswith("application/sparql-query"):
+                params["query"] = [body]
+            else:
+                params.update(parse_qs(body))
+        query = params.get("query", [""])[0]
+        clauses = _DATASET_CLAUSE.findall(query)
+        record = RequestRecord(
+            method=method, query=query,
+            default_graphs=tuple(uri for named, uri in clauses if not named),
+            named_graphs=tuple(uri for named, uri in clauses if named),
+            url_length=len(handler.path), started=time.perf_counter(),
+        )
+        with self._lock:
+            self.requests.append(record)
+            self._in_flight += 1
+            self.max_concurrency = max(self.max_concurrency, self._in_flight)
+        try:
+            delay = self.latency(query) if callable(self.latency) else self.latency
+            if delay:
+                time.sleep(delay)
+            status = self._planned_status(record)
+            if status is None and parsed.path != "/sparql":
+                status = 404
+            if status is None and not query:
+                status = 400
+            if status is None:
+                try:
+                    payload, record.rows = self.evaluate(query)
+                    status = 200
+                except Exception as e:
+                    status, payload = 400, f"Query parse error: {e}".encode("utf-8")
+            else:
+                payload = f"Injected HTTP {status}".encode("utf-8")
+            record.status = status
+            handler.send_response(status)
+            handler.send_header("Content-Type", RESULTS_JSON if status == 200 else "text/plain")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. its timeout fired during injected latency)
+            pass
+        finally:
+            record.seconds = time.perf_counter() - record.started
+            with self._lock:
+                self._in_flight -= 1
+
+    def _handler(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                endpoint._handle(self, "GET")
+
+            def do_POST(self):
+                endpoint._handle(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fixture graphs as a local SPARQL endpoint.")
+    parser.add_argument("--port", type=int, default=8890)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--max-url-length", type=int, help="Answer longer GET URLs with 414")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of <graph>.ttl files")
+    args = parser.parse_args()
+    endpoint = LocalSPARQLEndpoint(args.fixtures, port=args.port, latency=args.latency,
+                                   max_url_length=args.max_url_length)
+    print(f"Serving {', '.join(endpoint.graphs)} at {endpoint.url}")
+    try:
+        endpoint._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
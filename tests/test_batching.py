@@ -0,0 +1,123 @@
+"""Tests for micro-batching and batched label lookup (no network required)."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mcp_proto_okn.batching import MicroBatcher
+from mcp_proto_okn.label_index import LabelIndex
+from mcp_proto_okn.server import SPARQLServer
+
+OBO = "http://purl.obolibrary.org/obo/"
+
+UBERGRAPH_LABELS = {
+    "heart": (f"{OBO}UBERON_0000948", "heart"),
+    "asthma": (f"{OBO}MONDO_0004979", "asthma"),
+    "lung": (f"{OBO}UBERON_0002048", "lung"),
+}
+
+
+class FakeUbergraph:
+    """Answers the VALUES ?key label query from UBERGRAPH_LABELS."""
+
+    def __init__(self):
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def __call__(self, query):
+        with self.lock:
+            self.queries.append(query)
+        values = query.split("VALUES ?key {", 1)[1].split("}", 1)[0]
+        keys = [k for k in values.split('"') if k.strip()]
+        bindings = []
+        for key in keys:
+            if key in UBERGRAPH_LABELS:
+                uri, label = UBERGRAPH_LABELS[key]
+                bindings.append({
+                    "key": {"value": key}, "uri": {"value": uri},
+                    "matchedLabel": {"value": label}, "matchType": {"value": "exact_label"},
+                })
+        return {"head": {"vars": ["key", "uri", "matchedLabel", "matchType"]},
+                "results": {"bindings": bindings}}
+
+
+def test_concurrent_submits_share_one_handler_call():
+    calls = []
+
+    def handler(keys):
+        calls.append(list(keys))
+        return {k: k.upper() for k in keys}
+
+    batcher = MicroBatcher(handler, window=0.2, max_batch=50)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(batcher.submit, ["a", "b", "c", "a", "d"]))
+
+    assert results == ["A", "B", "C", "A", "D"]
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["a", "b", "c", "d"]
+
+
+def test_batches_split_at_max_batch():
+    calls = []
+
+    def handler(keys):
+        calls.append(len(keys))
+        return {k: k for k in keys}
+
+    batcher = MicroBatcher(handler, window=0.2, max_batch=2)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(batcher.submit, range(5)))
+
+    assert results == list(range(5))
+    assert sum(calls) == 5
+    assert max(calls) <= 2
+
+
+def test_handler_error_reaches_every_caller():
+    def handler(keys):
+        raise RuntimeError("upstream down")
+
+    batcher = MicroBatcher(handler, window=0.05)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(batcher.submit, k) for k in "xyz"]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="upstream down"):
+            future.result()
+
+
+def _server(index_entries=()):
+    server = SPARQLServer(endpoint_url="http://localhost/sparql", label_index=LabelIndex(index_entries))
+    server._run_query = FakeUbergraph()
+    return server
+
+
+def test_lookup_uris_single_upstream_request():
+    """Index hits are answered locally; all misses share one ubergraph query."""
+    server = _server([(f"{OBO}CL_0000000", "cell", "exact_label")])
+    result = server.lookup_uris(["Cell", "Heart", "asthma", "nonexistent term", "heart"])
+
+    assert result["label_count"] == 5  # "Heart" and "heart" are distinct inputs
+    by_label = {r["query_label"]: r for r in result["results"]}
+    assert by_label["Cell"]["source"] == "local_index"
+    assert by_label["Heart"]["matches"][0]["uri"] == f"{OBO}UBERON_0000948"
+    assert by_label["heart"]["matches"][0]["uri"] == f"{OBO}UBERON_0000948"
+    assert by_label["nonexistent term"]["match_count"] == 0
+    assert len(server._run_query.queries) == 1
+
+
+def test_lookup_uris_chunks_large_label_sets():
+    server = _server()
+    server.LOOKUP_BATCH_SIZE = 2
+    server.lookup_uris(["heart", "lung", "asthma", "liver", "kidney"])
+    assert len(server._run_query.queries) == 3
+
+
+def test_concurrent_lookup_uri_calls_are_merged():
+    server = _server()
+    server._lookup_batcher.window = 0.2
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(server.lookup_uri, ["heart", "lung", "asthma"]))
+
+    assert [r["matches"][0]["label"] for r in results] == ["heart", "lung", "asthma"]
+    assert len(server._run_query.queries) == 1
@@ -0,0 +1,136 @@
+"""Tests for the local identifier crosswalk (no network required)."""
+
+import os
+import time
+
+import pytest
+
+from mcp_proto_okn import crosswalk as crosswalk_module
+from mcp_proto_okn.crosswalk import (
+    CHEMICAL_ID_TYPES,
+    GENE_ID_TYPES,
+    Crosswalk,
+    cluster_identifiers,
+    detect_chemical_type,
+    load_gene_crosswalk,
+    resolve_id_type,
+)
+from mcp_proto_okn.unified_server import UnifiedSPARQLServer
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "test_registry.json")
+
+GENES = [
+    ("672", "ENSG00000012048", "BRCA1"),
+    ("675", "ENSG00000139618", "BRCA2"),
+    ("12189", "ENSMUSG00000017146", "Brca1"),  # mouse
+    ("7157", "", "TP53"),
+]
+
+
+def test_translate_in_every_direction():
+    xwalk = Crosswalk(GENE_ID_TYPES, GENES)
+    assert xwalk.lookup("NCBIGene:672", "NCBI_Gene", "Ensembl") == ["ENSG00000012048"]
+    assert xwalk.lookup("ensg00000139618.17", "Ensembl", "GeneSymbol") == ["BRCA2"]
+    # Symbols match case-insensitively, so human and mouse BRCA1 both map
+    assert sorted(xwalk.lookup("brca1", "GeneSymbol", "NCBI_Gene")) == ["12189", "672"]
+
+    result = xwalk.translate(["672", "7157", "999999"], "NCBI_Gene", "Ensembl")
+    assert result["translations"] == {"672": ["ENSG00000012048"]}
+    assert result["unmapped"] == ["7157", "999999"]
+
+
+def test_snapshot_roundtrip_and_reload(tmp_path, monkeypatch):
+    path = str(tmp_path / "genes.tsv.gz")
+    Crosswalk(GENE_ID_TYPES, GENES[:1]).write(path)
+    monkeypatch.setattr(crosswalk_module, "RELOAD_CHECK_INTERVAL", 0.0)
+    assert len(load_gene_crosswalk(path)) == 1
+
+    # A rebuilt snapshot is picked up without restarting
+    Crosswalk(GENE_ID_TYPES, GENES).write(path)
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    assert len(load_gene_crosswalk(path)) == len(GENES)
+
+
+def test_resolve_id_type():
+    assert resolve_id_type("ncbi", GENE_ID_TYPES) == "NCBI_Gene"
+    assert resolve_id_type("ensembl", GENE_ID_TYPES) == "Ensembl"
+    with pytest.raises(ValueError, match="Supported"):
+        resolve_id_type("uniprot", GENE_ID_TYPES)
+
+
+def test_translate_gene_ids_without_upstream_queries():
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    unified._gene_crosswalk = Crosswalk(GENE_ID_TYPES, GENES)
+    ids = [str(i) for i in range(5000)] + ["672", "675"]
+    result = unified.translate_gene_ids(ids, "ncbi", "symbol")
+    assert result["mapped_count"] == 2
+    assert result["translations"]["675"] == ["BRCA2"]
+    assert result["source"] == "local_crosswalk"
+    assert unified._servers == {}
+
+
+class FakeGraph:
+    def __init__(self, columns, data):
+        self.result = {"columns": columns, "data": data, "count": len(data)}
+
+    def execute(self, query_string, **kwargs):
+        return self.result
+
+
+CHEMICAL_LINKS = [
+    # formaldehyde: graph IRI linked to its identifiers, plus an IRI that is itself a CAS number
+    (("", "http://ex.org/chem/1"), ("CAS", "https://identifiers.org/cas:50-00-0")),
+    (("", "http://ex.org/chem/1"), ("ChEBI", "http://purl.obolibrary.org/obo/CHEBI_16842")),
+    (("CAS", "50-00-0"), ("PubChem", "712")),
+    (("", "http://ex.org/chem/1"), ("InChIKey", "WSFSSNUMVMOOMR-UHFFFAOYSA-N")),
+    # ethanol; the same CAS number linked twice in different forms
+    (("DTXSID", "DTXSID9020584"), ("CAS", "64-17-5")),
+    (("DTXSID", "DTXSID9020584"), ("CAS", "cas:64-17-5")),
+    (("ChEMBL", "CHEMBL545"), ("DTXSID", "dtxsid9020584")),
+    # a lone identifier is not a cluster
+    (("", "http://ex.org/chem/3"), ("CAS", "7732-18-5")),
+]
+
+
+def test_cluster_chemical_identifiers():
+    rows = sorted(cluster_identifiers(CHEMICAL_LINKS))
+    assert rows == [
+        ["50-00-0", "CHEBI:16842", "712", "WSFSSNUMVMOOMR-UHFFFAOYSA-N", "", ""],
+        ["64-17-5", "", "", "", "CHEMBL545", "DTXSID9020584"],
+    ]
+    assert len(list(cluster_identifiers(CHEMICAL_LINKS, max_size=3))) == 1
+
+
+def test_chemical_crosswalk_multi_valued_cells(tmp_path):
+    xwalk = Crosswalk(CHEMICAL_ID_TYPES, [["50-00-0|1336-21-6", "CHEBI:16842", "712", "", "", ""]])
+    assert xwalk.lookup("CHEBI_16842", "ChEBI", "CAS") == ["50-00-0", "1336-21-6"]
+    assert xwalk.lookup("https://identifiers.org/cas:1336-21-6", "CAS", "PubChem") == ["712"]
+
+    path = str(tmp_path / "chemicals.tsv")
+    xwalk.write(path)
+    assert Crosswalk.from_file(path).lookup("712", "PubChem", "CAS") == ["50-00-0", "1336-21-6"]
+
+    # Any identifier of the substance gives the same representative key
+    assert xwalk.canonical("http://purl.obolibrary.org/obo/CHEBI_16842") == "CAS:50-00-0"
+    assert xwalk.canonical("1336-21-6", "CAS") == "CAS:50-00-0"
+    assert xwalk.canonical("CHEBI:1") is None
+    assert detect_chemical_type("https://pubchem.ncbi.nlm.nih.gov/compound/712") == "PubChem"
+    assert detect_chemical_type("712") is None
+
+
+def test_translate_chemical_ids_and_cross_type_join():
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    unified._chemical_crosswalk = Crosswalk(
+        CHEMICAL_ID_TYPES, [["50-00-0", "CHEBI:16842", "712", "WSFSSNUMVMOOMR-UHFFFAOYSA-N", "", ""]],
+    )
+    result = unified.translate_chemical_ids(["cas:50-00-0", "64-17-5"], "cas_rn", "chebi")
+    assert result["translations"] == {"cas:50-00-0": ["CHEBI:16842"]}
+    assert result["unmapped"] == ["64-17-5"]
+
+    unified._servers["biobricks-tox21"] = FakeGraph(["chem"], [["https://identifiers.org/cas:50-00-0"]])
+    unified._servers["spoke-okn"] = FakeGraph(["chebi"], [["http://purl.obolibrary.org/obo/CHEBI_16842"]])
+    joined = unified.join_graph_results("biobricks-tox21", "SELECT ...", "chem", "spoke-okn", "SELECT ...", "chebi")
+    assert joined["data"] == [[
+        "CAS:50-00-0", "https://identifiers.org/cas:50-00-0", "http://purl.obolibrary.org/obo/CHEBI_16842",
+    ]]
+    assert joined["join"]["chemical_crosswalk"] is True
@@ -0,0 +1,96 @@
+"""Tests for the admin CPU and memory profiling endpoints (no network required)."""
+
+import threading
+import time
+import tracemalloc
+
+import pytest
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+from mcp_proto_okn import diagnostics
+from mcp_proto_okn.server import _wrap_with_api_key_auth
+
+HEADERS = {diagnostics.ADMIN_TOKEN_HEADER: "admin-secret"}
+
+
+def _busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_collapses_thread_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        samples = diagnostics.sample_stacks(0.1, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+    busy = [stack for stack in samples if stack.startswith("busy;")]
+    assert busy and any("_busy_loop (test_diagnostics.py:" in stack for stack in busy)
+    line = diagnostics.collapsed(samples).splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_routes_absent_without_token(monkeypatch):
+    monkeypatch.delenv("MCP_PROTO_OKN_ADMIN_TOKEN", raising=False)
+    client = TestClient(diagnostics.add_admin_routes(Starlette()))
+    assert client.get("/admin/profile/cpu", headers=HEADERS).status_code == 404
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("MCP_PROTO_OKN_ADMIN_TOKEN", "admin-secret")
+    yield TestClient(diagnostics.add_admin_routes(Starlette()))
+    tracemalloc.stop()
+
+
+def test_cpu_profile(client):
+    assert client.get("/admin/profile/cpu?seconds=0.05").status_code == 403
+    response = client.get("/admin/profile/cpu?seconds=0.05&interval=0.01", headers=HEADERS)
+    assert response.status_code == 200
+    assert response.text.strip()
+    assert client.get("/admin/profile/cpu?seconds=soon", headers=HEADERS).status_code == 400
+
+
+@pytest.mark.parametrize("kind", ["cpu", "memory"])
+@pytest.mark.parametrize("value", ["nan", "inf", "-inf"])
+def test_profiles_reject_non_finite_numbers(client, kind, value):
+    assert client.get(f"/admin/profile/{kind}?seconds={value}", headers=HEADERS).status_code == 400
+    # The rejected request held no lock
+    assert client.get(f"/admin/profile/{kind}?seconds=0", headers=HEADERS).status_code == 200
+
+
+def test_memory_profile_traces_one_window(client):
+    retained = []
+
+    def allocate():
+        time.sleep(0.05)
+        retained.extend(bytearray(1024) for _ in range(200))
+
+    worker = threading.Thread(target=allocate)
+    worker.start()
+    report = client.get("/admin/profile/memory?seconds=0.3&top=5", headers=HEADERS).json()
+    worker.join()
+    assert report["traced_bytes"] > 0
+    assert len(report["top_sites"]) <= 5
+    assert any("test_diagnostics.py" in site["site"] and site["bytes_diff"] >= 200 * 1024
+               for site in report["growth"])
+    # Tracing ends with the window
+    assert not tracemalloc.is_tracing()
+
+    assert client.get("/admin/profile/memory?seconds=0&top=0", headers=HEADERS).status_code == 400
+    with pytest.raises(ValueError):
+        diagnostics.trace_allocations(0, top=-1)
+
+
+def test_admin_routes_also_need_api_key(client, monkeypatch):
+    monkeypatch.setenv("MCP_PROTO_OKN_API_KEY", "api-secret")
+    app = _wrap_with_api_key_auth(diagnostics.add_admin_routes(Starlette()))
+    secured = TestClient(app)
+    assert secured.get("/admin/profile/memory?seconds=0", headers=HEADERS).status_code == 401
+    response = secured.get("/admin/profile/memory?seconds=0",
+                           headers={**HEADERS, "Authorization": "Bearer api-secret"})
+    assert response.status_code == 200
@@ -0,0 +1,116 @@
+"""Tests for the leaf / non-class expansion filter (no network required)."""
+
+import json
+
+from mcp_proto_okn.expansion_filter import BloomFilter, ExpansionFilter
+from mcp_proto_okn.server import SPARQLServer
+
+OBO = "http://purl.obolibrary.org/obo/"
+EMPTY_RESULT = {"head": {"vars": ["x"]}, "results": {"bindings": []}}
+
+
+def test_bloom_filter_membership_and_roundtrip():
+    """Added items are always found, and the filter survives serialization."""
+    bloom = BloomFilter.for_capacity(1000, 0.01)
+    items = [f"{OBO}MONDO_{i:07d}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+    restored = BloomFilter.from_dict(json.loads(json.dumps(bloom.to_dict())))
+    assert all(item in restored for item in items)
+    false_positives = sum(f"{OBO}HP_{i:07d}" in restored for i in range(1000))
+    assert false_positives < 50
+
+
+def test_non_hierarchical_iris_are_skipped():
+    """OWL vocabulary and OBO property IRIs never trigger expansion."""
+    flt = ExpansionFilter()
+    assert not flt.should_expand("http://www.w3.org/2002/07/owl#Class")
+    assert not flt.should_expand(f"{OBO}chebi#has_functional_parent")
+    assert not flt.should_expand(f"{OBO}uberon/core#part_of")
+    assert flt.should_expand(f"{OBO}MONDO_0005578")
+
+
+def test_snapshot_rejects_leaves_only_for_covered_prefixes():
+    """The snapshot is trusted for the ontologies it was built from."""
+    bloom = BloomFilter.for_capacity(10)
+    bloom.add(f"{OBO}MONDO_0005578")
+    flt = ExpansionFilter(parents=bloom, covered_prefixes=["MONDO"])
+
+    assert flt.should_expand(f"{OBO}MONDO_0005578")
+    assert not flt.should_expand(f"{OBO}MONDO_0008383")  # leaf in the snapshot
+    assert flt.should_expand(f"{OBO}HP_0000001")         # prefix not covered
+
+
+def test_snapshot_file(tmp_path):
+    """from_snapshot loads the file written by scripts/build_parent_filter.py."""
+    bloom = BloomFilter.for_capacity(10)
+    bloom.add(f"{OBO}UBERON_0000001")
+    path = tmp_path / "ontology_parents.json"
+    path.write_text(json.dumps({"prefixes": ["UBERON"], "filter": bloom.to_dict()}))
+
+    flt = ExpansionFilter.from_snapshot(str(path))
+    assert flt.should_expand(f"{OBO}UBERON_0000001")
+    assert not flt.should_expand(f"{OBO}UBERON_0000002")
+    assert flt.stats()["snapshot_prefixes"] == 1
+
+
+def test_negative_cache_and_observed_parents():
+    """Empty expansions are remembered until the TTL expires; parents override the snapshot."""
+    uri = f"{OBO}MONDO_0008383"
+    flt = ExpansionFilter(negative_ttl=3600)
+    flt.record(uri, has_descendants=False)
+    assert not flt.should_expand(uri)
+
+    expired = ExpansionFilter(negative_ttl=-1)
+    expired.record(uri, has_descendants=False)
+    assert expired.should_expand(uri)
+
+    stale = ExpansionFilter(parents=BloomFilter.for_capacity(10), covered_prefixes=["MONDO"])
+    assert not stale.should_expand(uri)
+    stale.record(uri, has_descendants=True)
+    assert stale.should_expand(uri)
+
+
+def test_execute_skips_leaf_expansion_on_repeat():
+    """A leaf term costs one ubergraph request the first time and none afterwards."""
+    server = SPARQLServer(endpoint_url="http://localhost/sparql")
+    queries = []
+
+    def fake_run(query):
+        queries.append(query)
+        return EMPTY_RESULT
+
+    server._run_query = fake_run
+    sparql = f"SELECT ?x WHERE {{ ?x <http://ex.org/p> <{OBO}MONDO_0008383> }}"
+
+    server.execute(sparql, analyze=False)
+    assert len(queries) == 2  # descendant lookup + the query itself
+
+    result = server.execute(sparql, analyze=False)
+    assert len(queries) == 3
+    assert result["ontology_expansion"]["skipped_uris"] == [f"{OBO}MONDO_0008383"]
+    assert result["ontology_expansion"]["expanded"] is False
+
+
+def test_execute_does_not_expand_owl_vocabulary():
+    """owl:Class in a query is passed through without any expansion request."""
+    server = SPARQLServer(endpoint_url="http://localhost/sparql")
+    queries = []
+    server._run_query = lambda q: queries.append(q) or EMPTY_RESULT
+
+    server.execute("SELECT ?c WHERE { ?c a <http://www.w3.org/2002/07/owl#Class> }", analyze=False)
+    assert len(queries) == 1
+
+
+def test_failed_expansion_is_not_negatively_cached():
+    """Upstream errors must not mark a URI as a leaf."""
+    server = SPARQLServer(endpoint_url="http://localhost/sparql")
+
+    def failing(query):
+        raise RuntimeError("timeout")
+
+    server._run_query = failing
+    server._fetch_descendants_for_uris([f"{OBO}MONDO_0005578"])
+    assert server._expansion_filter.should_expand(f"{OBO}MONDO_0005578")
@@ -0,0 +1,157 @@
+"""Tests for single-request federated multi-graph queries (no network required)."""
+
+import os
+import time
+
+import pytest
+
+from mcp_proto_okn.federation import (
+    IncompatibleQueryError,
+    compile_union_query,
+    projected_variables,
+    split_prologue,
+)
+from mcp_proto_okn.unified_server import UnifiedSPARQLServer
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "test_registry.json")
+KG = "https://purl.org/okn/frink/kg/"
+
+
+def test_projected_variables():
+    assert projected_variables("SELECT ?a ?b WHERE { }") == ["a", "b"]
+    assert projected_variables("SELECT DISTINCT ?g (COUNT(?x) AS ?n) { }") == ["g", "n"]
+    assert projected_variables("select ?class (str(?l) as ?label) where { }") == ["class", "label"]
+    with pytest.raises(IncompatibleQueryError):
+        projected_variables("SELECT * WHERE { }")
+    with pytest.raises(IncompatibleQueryError):
+        projected_variables("ASK { ?s ?p ?o }")
+
+
+def test_split_prologue_collects_prefixes():
+    prefixes, body = split_prologue("# genes\nPREFIX ex: <http://ex.org/>\nPREFIX : <http://d/>\nSELECT ?s WHERE {}")
+    assert prefixes == {"ex": "http://ex.org/", "": "http://d/"}
+    assert body.startswith("SELECT ?s")
+
+
+def test_incompatible_queries_are_rejected():
+    ok = ("a", KG + "a", "PREFIX ex: <http://ex.org/> SELECT ?s WHERE { ?s ex:p ?graph }")
+    with pytest.raises(IncompatibleQueryError, match="prefix"):
+        compile_union_query([ok, ("b", KG + "b", "PREFIX ex: <http://other/> SELECT ?s WHERE { }")])
+    with pytest.raises(IncompatibleQueryError, match="FROM/GRAPH"):
+        compile_union_query([ok, ("b", KG + "b", "SELECT ?s WHERE { GRAPH ?g { ?s ?p ?o } }")])
+    # ?graph is a variable, not the GRAPH keyword
+    compile_union_query([ok])
+
+
+def test_union_query_semantics(monkeypatch):
+    """Each branch only sees its own named graph (checked with rdflib)."""
+    rdflib = pytest.importorskip("rdflib")
+    from rdflib.plugins import sparql as rdflib_sparql
+    monkeypatch.setattr(rdflib_sparql, "SPARQL_LOAD_GRAPHS", False)
+
+    U = rdflib.URIRef
+    ds = rdflib.Dataset(default_union=False)
+    p = U("http://ex.org/p")
+    for name, subjects in {"a": ["s1", "s2"], "b": ["s3"]}.items():
+        graph = ds.graph(U(KG + name))
+        for s in subjects:
+            graph.add((U(f"http://ex.org/{s}"), p, rdflib.Literal(s)))
+
+    query, columns = compile_union_query([
+        ("a", KG + "a", "PREFIX ex: <http://ex.org/>\nSELECT ?s WHERE { ?s ex:p ?o } ORDER BY ?s LIMIT 1"),
+        ("b", KG + "b", "PREFIX ex: <http://ex.org/>\nSELECT ?s (STR(?o) AS ?name) WHERE { ?s ex:p ?o }"),
+    ])
+    assert columns == ["source_graph", "s", "name"]
+    rows = sorted((str(r.source_graph), str(r.s)) for r in ds.query(query))
+    assert rows == [("a", "http://ex.org/s1"), ("b", "http://ex.org/s3")]
+
+
+class FederationEndpoint:
+    """Records queries and answers with canned bindings."""
+
+    def __init__(self, bindings, fail=False):
+        self.queries = []
+        self.bindings = bindings
+        self.fail = fail
+
+    def __call__(self, query):
+        self.queries.append(query)
+        if self.fail:
+            raise RuntimeError("query too complex")
+        return {"head": {"vars": []}, "results": {"bindings": self.bindings}}
+
+
+def _unified(endpoint):
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    for name in ("spoke-okn", "dreamkg"):
+        unified._get_server(name)._run_query = endpoint
+    return unified
+
+
+def test_multi_graph_query_federated_single_request():
+    endpoint = FederationEndpoint([
+        {"source_graph": {"value": "dreamkg"}, "s": {"value": "d1"}},
+        {"source_graph": {"value": "spoke-okn"}, "s": {"value": "k1"}},
+        {"source_graph": {"value": "spoke-okn"}, "s": {"value": "k2"}},
+    ])
+    unified = _unified(endpoint)
+    result = unified.multi_graph_query(
+        {"spoke-okn": "SELECT ?s WHERE { ?s ?p ?o }", "dreamkg": "SELECT ?s WHERE { ?s a ?t }"},
+        federated=True,
+    )
+    assert len(endpoint.queries) == 1
+    assert f"FROM NAMED <{KG}dreamkg>" in endpoint.queries[0]
+    assert result["execution"] == "federated"
+    assert result["data"] == [["spoke-okn", "k1"], ["spoke-okn", "k2"], ["dreamkg", "d1"]]
+    assert result["per_graph"]["spoke-okn"]["count"] == 2
+
+
+def test_multi_graph_query_federated_falls_back_per_graph():
+    endpoint = FederationEndpoint([], fail=True)
+    unified = _unified(endpoint)
+    result = unified.multi_graph_query(
+        {"spoke-okn": "SELECT ?s WHERE { ?s ?p ?o }", "dreamkg": "SELECT ?s WHERE { ?s a ?t }"},
+        federated=True,
+    )
+    assert result["execution"] == "per_graph"
+    assert "too complex" in result["federation_fallback"]
+    # One combined attempt, then one request per graph
+    assert len(endpoint.queries) == 3
+
+
+def test_multi_graph_query_federated_upstream_timeout_falls_back_per_graph():
+    """A socket timeout from the endpoint is an upstream error, not the call's deadline."""
+    queries = []
+
+    def endpoint(query):
+        queries.append(query)
+        if "FROM NAMED" in query:
+            raise TimeoutError("timed out")
+        return {"head": {"vars": []}, "results": {"bindings": []}}
+
+    unified = _unified(endpoint)
+    result = unified.multi_graph_query(
+        {"spoke-okn": "SELECT ?s WHERE { ?s ?p ?o }", "dreamkg": "SELECT ?s WHERE { ?s a ?t }"},
+        federated=True,
+    )
+    assert result["execution"] == "per_graph"
+    assert result["federation_fallback"] == "timed out"
+    assert result["partial"] is False
+    assert len(queries) == 3
+
+
+def test_multi_graph_query_federated_deadline():
+    def endpoint(query):
+        time.sleep(1.0)
+        return {"head": {"vars": []}, "results": {"bindings": []}}
+
+    unified = _unified(endpoint)
+    started = time.monotonic()
+    result = unified.multi_graph_query(
+        {"spoke-okn": "SELECT ?s WHERE { ?s ?p ?o }", "dreamkg": "SELECT ?s WHERE { ?s a ?t }"},
+        timeout=0.2, federated=True,
+    )
+    assert time.monotonic() - started < 0.8
+    assert result["execution"] == "federated"
+    assert result["per_graph"]["spoke-okn"]["status"] == "timeout"
+    assert result["partial"] is True
@@ -0,0 +1,161 @@
+"""Tests for interval-labeled hierarchies and post-filter expansion (no network required)."""
+
+import random
+
+from mcp_proto_okn.hierarchy import IntervalHierarchy, PostFilter
+from mcp_proto_okn.server import SPARQLServer
+
+OBO = "http://purl.obolibrary.org/obo/"
+ROOT = f"{OBO}CL_0000000"
+
+
+def _brute_force_descendants(edges, node):
+    children = {}
+    for child, parent in edges:
+        children.setdefault(parent, set()).add(child)
+    seen, stack = {node}, [node]
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return seen
+
+
+def test_interval_labels_match_reachability_on_dag():
+    """Descendant checks agree with graph traversal on a random DAG with multiple parents."""
+    rng = random.Random(7)
+    nodes = [f"n{i}" for i in range(200)]
+    edges = []
+    for i in range(1, len(nodes)):
+        for parent in rng.sample(range(i), k=min(i, rng.randint(1, 3))):
+            edges.append((nodes[i], nodes[parent]))
+
+    hierarchy = IntervalHierarchy(edges, [nodes[0]])
+    assert len(hierarchy) == len(nodes)
+    for ancestor in rng.sample(nodes, 25):
+        expected = _brute_force_descendants(edges, ancestor)
+        assert hierarchy.descendant_count(ancestor) == len(expected)
+        for node in nodes:
+            assert hierarchy.is_descendant(node, ancestor) == (node in expected)
+
+
+def test_nodes_outside_hierarchy_and_cycles():
+    """Unknown nodes are never descendants; subClassOf cycles do not break labeling."""
+    edges = [("b", "a"), ("c", "b"), ("b", "c"), ("x", "y")]
+    hierarchy = IntervalHierarchy(edges, ["a"])
+    assert hierarchy.is_descendant("c", "a")
+    assert hierarchy.is_descendant("a", "a")
+    assert not hierarchy.is_descendant("x", "a")
+    assert not hierarchy.is_descendant("a", "b")
+
+
+def test_post_filter_drops_columns_dedupes_and_limits():
+    """Rows are filtered, helper columns removed, DISTINCT and LIMIT/OFFSET applied locally."""
+    hierarchy = IntervalHierarchy([("b", "a"), ("c", "a")], ["a"])
+    result = {
+        "columns": ["t", "x"],
+        "data": [["a", "1"], ["z", "2"], ["b", "1"], ["c", "3"], ["c", "4"]],
+        "count": 5,
+    }
+    pf = PostFilter(checks={"t": [(hierarchy, "a")]}, drop_columns=["t"], distinct=True, offset=0, limit=2)
+    filtered, scanned = pf.apply(result)
+    assert scanned == 5
+    assert filtered["columns"] == ["x"]
+    assert filtered["data"] == [["1"], ["3"]]
+    assert filtered["count"] == 2
+
+
+class FakeEndpoint:
+    """Serves descendant, hierarchy-edge and data queries for a broad root."""
+
+    def __init__(self, num_children=300):
+        self.children = [f"{OBO}CL_{i:07d}" for i in range(1, num_children + 1)]
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        if "SELECT ?root ?descendant" in query:
+            bindings = [{"root": {"value": ROOT}, "descendant": {"value": c}} for c in self.children]
+            return {"head": {"vars": ["root", "descendant"]}, "results": {"bindings": bindings}}
+        if "SELECT DISTINCT ?descendant ?parent" in query:
+            bindings = [{"descendant": {"value": c}, "parent": {"value": ROOT}} for c in self.children]
+            return {"head": {"vars": ["descendant", "parent"]}, "results": {"bindings": bindings}}
+        # Data query: one matching and one non-matching cell type per sample
+        var = "expanded_uri_0000000"
+        bindings = []
+        for i in range(5):
+            bindings.append({"s": {"value": f"s{i}"}, var: {"value": self.children[i]}})
+            bindings.append({"s": {"value": f"o{i}"}, var: {"value": f"{OBO}UBERON_0000001"}})
+        return {"head": {"vars": [var, "s"]}, "results": {"bindings": bindings}}
+
+
+def _server(endpoint):
+    server = SPARQLServer(endpoint_url="http://localhost/sparql")
+    server._run_query = endpoint
+    return server
+
+
+def test_auto_mode_switches_to_postfilter_for_broad_roots():
+    """Expansions needing many VALUES batches run once and are filtered locally."""
+    endpoint = FakeEndpoint()
+    server = _server(endpoint)
+    result = server.execute(
+        f"SELECT ?s WHERE {{ ?s <http://ex.org/cellType> <{ROOT}> }} LIMIT 3", analyze=False
+    )
+
+    info = result["ontology_expansion"]
+    assert info["mode"] == "postfilter"
+    assert info["estimated_batches"] > server.POSTFILTER_BATCH_THRESHOLD
+    assert info["expanded_uris"][ROOT] == 301
+    assert result["columns"] == ["s"]
+    assert result["data"] == [["s0"], ["s1"], ["s2"]]
+
+    data_query = endpoint.queries[-1]
+    assert "VALUES" not in data_query
+    assert f"LIMIT {server.POSTFILTER_ROW_LIMIT}" in data_query
+    assert "LIMIT 3" not in data_query
+
+
+def test_auto_mode_decides_before_building_values_batches(monkeypatch):
+    """The batch count is estimated from descendant counts; no VALUES queries are built."""
+    endpoint = FakeEndpoint()
+    server = _server(endpoint)
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("VALUES batches built for a post-filtered query")
+
+    monkeypatch.setattr(server, "_expand_query_with_descendants", unexpected)
+    result = server.execute(f"SELECT ?s WHERE {{ ?s <http://ex.org/cellType> <{ROOT}> }}", analyze=False)
+    assert result["ontology_expansion"]["mode"] == "postfilter"
+    assert result["ontology_expansion"]["estimated_batches"] == 16
+
+
+def test_aggregate_queries_stay_in_values_mode():
+    """GROUP BY queries are not eligible for post-filtering."""
+    endpoint = FakeEndpoint()
+    server = _server(endpoint)
+    result = server.execute(
+        f"SELECT ?t (COUNT(?s) AS ?n) WHERE {{ ?s <http://ex.org/cellType> <{ROOT}> }} GROUP BY ?t",
+        analyze=False,
+    )
+    assert result["ontology_expansion"]["mode"] == "values"
+    assert result["ontology_expansion"]["batched"] is True
+
+    error = server.execute(
+        f"SELECT (COUNT(?s) AS ?n) WHERE {{ ?s <http://ex.org/cellType> <{ROOT}> }}",
+        analyze=False, expansion_mode="postfilter",
+    )
+    assert "error" in error
+
+
+def test_hierarchy_is_cached_between_queries():
+    """Explicit postfilter mode skips the descendant pre-fetch and reuses the hierarchy."""
+    endpoint = FakeEndpoint()
+    server = _server(endpoint)
+    query = f"SELECT ?s WHERE {{ ?s <http://ex.org/cellType> <{ROOT}> }}"
+    server.execute(query, analyze=False, expansion_mode="postfilter")
+    server.execute(query, analyze=False, expansion_mode="postfilter")
+
+    assert not any("SELECT ?root ?descendant" in q for q in endpoint.queries)
+    assert sum("?descendant ?parent" in q for q in endpoint.queries) == 1
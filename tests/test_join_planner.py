@@ -0,0 +1,96 @@
+"""Tests for the precomputed join-path planner (no network required)."""
+
+import os
+
+from mcp_proto_okn import querylog
+from mcp_proto_okn.crosswalk import CHEMICAL_ID_TYPES, GENE_ID_TYPES, Crosswalk
+from mcp_proto_okn.join_planner import ENTITY_ID_TYPES, LOCAL_CROSSWALK, JoinPlanner
+from mcp_proto_okn.unified_server import UnifiedSPARQLServer
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "test_registry.json")
+
+
+def _route(plan):
+    return [(node["graph"], node["id_type"]) for node in plan["path"]]
+
+
+def test_direct_join_on_shared_identifier():
+    plan = JoinPlanner().plan("biobricks-tox21", "biobricks-ice")
+    assert _route(plan) == [("biobricks-tox21", "CAS"), ("biobricks-ice", "CAS")]
+    assert plan["steps"][0]["arguments"] == {
+        "graph_a": "biobricks-tox21", "graph_b": "biobricks-ice", "id_type": "CAS",
+    }
+
+
+def test_multi_hop_through_bridge_graph():
+    plan = JoinPlanner().plan("spoke-genelab", "spoke-okn")
+    assert [g for g, _ in _route(plan)] == [
+        "spoke-genelab", "gene-expression-atlas-okn", "gene-expression-atlas-okn", "spoke-okn",
+    ]
+    assert [step["action"] for step in plan["steps"]] == ["join", "translate", "join"]
+    assert plan["shortcut"]["arguments"]["via_gene_bridge"] is True
+    assert JoinPlanner().plan("dreamkg", "scales") is None
+
+
+def test_plans_never_translate_between_entity_kinds():
+    """A graph holding a county code and a chemical ID cannot translate one into the other."""
+    kind = {t: i for i, group in enumerate(ENTITY_ID_TYPES) for t in group}
+    for planner in (JoinPlanner(), JoinPlanner(crosswalk_types=[GENE_ID_TYPES, CHEMICAL_ID_TYPES])):
+        assert planner.plan("sawgraph", "spatialkg") is None
+        assert planner.plan("biohealth", "spoke-genelab") is None
+        assert planner.plan("fiokg", "biobricks-tox21") is None
+        for plan in planner._plans.values():
+            types = {node["id_type"] for node in plan["path"]}
+            assert len(types) == 1 or len({kind.get(t, t) for t in types}) == 1, plan["path"]
+
+
+def test_crosswalk_and_costs_change_the_plan():
+    planner = JoinPlanner(crosswalk_types=[GENE_ID_TYPES, CHEMICAL_ID_TYPES])
+    plan = planner.plan("sawgraph", "spoke-okn")
+    assert LOCAL_CROSSWALK in [g for g, _ in _route(plan)]
+    assert plan["hops"] == 1
+    assert plan["steps"][0]["via"] == LOCAL_CROSSWALK
+
+    # A shared identifier still beats a crosswalk detour
+    assert planner.plan("biobricks-tox21", "biobricks-ice")["hops"] == 1
+    assert "via" not in planner.plan("biobricks-tox21", "biobricks-ice")["steps"][0]
+
+    # Low coverage of CAS in biobricks-aopwiki makes the InChIKey route cheaper
+    cheap = JoinPlanner().plan("biobricks-aopwiki", "biobricks-ice")
+    assert _route(cheap)[0][1] == "CAS"
+    costly = JoinPlanner(coverage={("biobricks-aopwiki", "CAS"): 0.1}).plan("biobricks-aopwiki", "biobricks-ice")
+    assert _route(costly)[0][1] != "CAS"
+
+
+def test_get_join_strategy_includes_plan(monkeypatch):
+    monkeypatch.setattr("mcp_proto_okn.unified_server.load_gene_crosswalk", lambda: None)
+    monkeypatch.setattr("mcp_proto_okn.unified_server.load_chemical_crosswalk", lambda: None)
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    result = unified.join_strategy("biobricks-tox21", "spoke-okn")
+    assert result["can_join"] is True
+    assert result["plan"]["hops"] >= 1
+    assert result["graph_a"] == "biobricks-tox21"
+
+
+def test_planner_uses_measured_latency_and_follows_crosswalks(monkeypatch):
+    monkeypatch.setattr("mcp_proto_okn.unified_server.load_gene_crosswalk", lambda: None)
+    monkeypatch.setattr("mcp_proto_okn.unified_server.load_chemical_crosswalk", lambda: None)
+    log = querylog.QueryLog(size=100)
+    monkeypatch.setattr(querylog, "QUERY_LOG", log)
+    for graph, seconds in (("biobricks-tox21", 4.0), ("biobricks-ice", 1.0), ("spoke-okn", 2.0)):
+        for _ in range(UnifiedSPARQLServer.JOIN_COST_MIN_SAMPLES):
+            log.record(graph, "f", "SELECT ...", seconds)
+    log.record("dreamkg", "f", "SELECT ...", 100.0)
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    assert unified._graph_costs() == {"biobricks-tox21": 2.0, "biobricks-ice": 0.5, "spoke-okn": 1.0}
+
+    planner = unified._get_join_planner()
+    default = JoinPlanner().plan("biobricks-tox21", "biobricks-ice")["cost"]
+    assert planner.plan("biobricks-tox21", "biobricks-ice")["cost"] == 1.25 * default
+    assert unified._get_join_planner() is planner
+
+    # A newly installed crosswalk rebuilds the plans with translation edges
+    unified._gene_crosswalk = Crosswalk(GENE_ID_TYPES, [("672", "ENSG00000012048", "BRCA1")])
+    rebuilt = unified._get_join_planner()
+    assert rebuilt is not planner
+    assert LOCAL_CROSSWALK in [g for g, _ in _route(rebuilt.plan("spoke-genelab", "spoke-okn"))]
@@ -0,0 +1,253 @@
+"""Tests for server-side hash and bind joins across graphs (no network required)."""
+
+import os
+from urllib.error import HTTPError
+
+import pytest
+
+from mcp_proto_okn.crosswalk import GENE_ID_TYPES, Crosswalk
+from mcp_proto_okn.identifier_mapping import normalize_identifier
+from mcp_proto_okn.joins import BindJoin, HashJoin
+from mcp_proto_okn.unified_server import UnifiedSPARQLServer
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "test_registry.json")
+
+LEFT = [[f"k{i % 50}", f"left{i}"] for i in range(200)]
+RIGHT = [[f"right{i}", f"K{i % 70}"] for i in range(140)]
+
+
+def _pairs(join, **kwargs):
+    return sorted(
+        (key, tuple(a), tuple(b))
+        for key, a, b in join.join(LEFT, 0, RIGHT, 1, **kwargs)
+    )
+
+
+def test_hash_join_matches_normalized_keys():
+    join = HashJoin(key_fn=str.casefold)
+    pairs = _pairs(join)
+    # 50 shared keys, 4 left rows and 2 right rows each
+    assert len(pairs) == 50 * 4 * 2
+    assert all(a[0].casefold() == b[1].casefold() == key for key, a, b in pairs)
+    assert join.spilled is False
+
+
+def test_spilled_join_gives_same_result():
+    in_memory = _pairs(HashJoin(key_fn=str.casefold))
+    spilling = HashJoin(key_fn=str.casefold, spill_threshold=10, partitions=4)
+    assert _pairs(spilling) == in_memory
+    assert spilling.spilled is True
+
+
+def test_join_limit_and_empty_keys():
+    join = HashJoin()
+    assert len(list(join.join([["a"], [""]], 0, [["a"], [""]], 0))) == 1
+    assert len(list(HashJoin(key_fn=str.casefold).join(LEFT, 0, RIGHT, 1, limit=5))) == 5
+
+
+class FakeGraph:
+    def __init__(self, columns, data):
+        self.result = {"columns": columns, "data": data, "count": len(data)}
+        self.queries = []
+
+    def execute(self, query_string, **kwargs):
+        self.queries.append(query_string)
+        return self.result
+
+
+def test_join_graph_results_on_mapped_identifiers():
+    """CAS numbers as identifiers.org IRIs join against plain literals."""
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    unified._servers["biobricks-tox21"] = FakeGraph(
+        ["chem", "assay"],
+        [["https://identifiers.org/cas:50-00-0", "a1"], ["https://identifiers.org/cas:64-17-5", "a2"]],
+    )
+    unified._servers["spoke-okn"] = FakeGraph(
+        ["cas", "name"], [["50-00-0", "formaldehyde"], ["7732-18-5", "water"]],
+    )
+    result = unified.join_graph_results(
+        "biobricks-tox21", "SELECT ...", "?chem", "spoke", "SELECT ...", "cas", id_type="CAS",
+    )
+    assert result["columns"] == [
+        "join_key", "biobricks-tox21.chem", "biobricks-tox21.assay", "spoke-okn.cas", "spoke-okn.name",
+    ]
+    assert result["data"] == [
+        ["50-00-0", "https://identifiers.org/cas:50-00-0", "a1", "50-00-0", "formaldehyde"],
+    ]
+    assert result["join"]["matched_keys"] == 1
+
+    with pytest.raises(ValueError, match="not a column"):
+        unified.join_graph_results("biobricks-tox21", "SELECT ...", "x", "spoke", "SELECT ...", "cas")
+
+
+def test_join_graph_results_reports_upstream_errors():
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    unified._servers["biobricks-tox21"] = FakeGraph(["chem"], [["50-00-0"]])
+    unified._servers["spoke-okn"] = FakeGraph([], [])
+    unified._servers["spoke-okn"].result = {"error": "Query execution failed: 502 Bad Gateway"}
+    result = unified.join_graph_results("biobricks-tox21", "SELECT ...", "chem", "spoke", "SELECT ...", "cas")
+    assert result == {"error": "Query failed on spoke-okn: Query execution failed: 502 Bad Gateway"}
+
+
+@pytest.mark.parametrize("value,id_type,expected", [
+    ("http://purl.obolibrary.org/obo/MONDO_0005578", "MONDO", "MONDO:0005578"),
+    ("mondo:0005578", "MONDO", "MONDO:0005578"),
+    ("ENSG00000012048.15", "Ensembl", "ENSG00000012048"),
+    ("https://identifiers.org/ensembl:ensg00000012048", "Ensembl", "ENSG00000012048"),
+    ("http://www.ncbi.nlm.nih.gov/gene/672", "NCBI_Gene", "672"),
+    ("Brca1", "GeneSymbol", "BRCA1"),
+    ("http://example.org/chem/Foo", None, "foo"),
+    ("ex:Foo", None, "foo"),
+])
+def test_normalize_identifier(value, id_type, expected):
+    assert normalize_identifier(value, id_type) == expected
+
+
+def test_bind_join_splits_failing_chunks_and_adapts():
+    seen = []
+
+    def fetch(keys):
+        seen.append(len(keys))
+        if len(keys) > 8:
+            raise RuntimeError("HTTP Error 414: URI Too Long")
+        return [[k] for k in keys]
+
+    bind = BindJoin(fetch, chunk_size=32, concurrency=2)
+    keys = [f"k{i}" for i in range(40)] + ["k0"]
+    rows = [row for _, chunk_rows in bind.run(keys) for row in chunk_rows]
+    assert sorted(r[0] for r in rows) == sorted(set(keys))
+    assert bind.retries > 0 and not bind.failed_keys
+    assert max(seen[-3:]) <= 16
+
+
+def test_bind_join_aborts_when_endpoint_is_unavailable():
+    calls = []
+
+    def fetch(keys):
+        calls.append(keys)
+        raise RuntimeError("Query execution failed: <urlopen error [Errno 111] Connection refused>")
+
+    bind = BindJoin(fetch, chunk_size=50, concurrency=2)
+    with pytest.raises(RuntimeError, match="Connection refused"):
+        list(bind.run(f"k{i}" for i in range(500)))
+    assert len(calls) <= 2 and bind.retries == 0
+
+
+def test_bind_join_splits_only_size_rejections_and_caps_retries():
+    calls = []
+
+    def fetch(keys):
+        calls.append(keys)
+        raise RuntimeError("Query execution failed: EndPointInternalError: HTTP status code 500")
+
+    bind = BindJoin(fetch, chunk_size=50, concurrency=1)
+    assert list(bind.run(f"k{i}" for i in range(100))) == []
+    assert len(calls) == 2 and len(bind.failed_keys) == 100
+
+    def reject(keys):
+        raise RuntimeError("HTTP Error 413: Payload Too Large")
+
+    too_long = BindJoin(reject, chunk_size=50, concurrency=1, max_retries=3)
+    assert list(too_long.run(f"k{i}" for i in range(100))) == []
+    assert too_long.retries == 3 and len(too_long.failed_keys) == 100
+
+
+class TemplateGraph:
+    """Answers a VALUES-injected query from a key -> rows table."""
+
+    def __init__(self, columns, key_var, table):
+        self.columns = columns
+        self.key_var = key_var
+        self.table = table
+        self.queries = []
+
+    def execute(self, query_string, **kwargs):
+        self.queries.append(query_string)
+        values = query_string.split(f"VALUES ?{self.key_var} {{", 1)[1].split("}", 1)[0]
+        keys = [v for v in values.replace("<", '"').replace(">", '"').split('"') if v.strip()]
+        data = [row for key in keys for row in self.table.get(key, [])]
+        return {"columns": self.columns, "data": data, "count": len(data)}
+
+
+def test_bind_join_pushes_left_keys():
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    unified._servers["biobricks-tox21"] = FakeGraph(
+        ["chem"], [["https://identifiers.org/cas:50-00-0"], ["https://identifiers.org/cas:64-17-5"]],
+    )
+    right = TemplateGraph(["cas", "name"], "cas", {
+        "50-00-0": [["50-00-0", "formaldehyde"]], "64-17-5": [["64-17-5", "ethanol"]],
+    })
+    unified._servers["spoke-okn"] = right
+    result = unified.bind_join_graph_results(
+        "biobricks-tox21", "SELECT ?chem WHERE { ?chem a ?t }", "chem",
+        "spoke-okn", "SELECT ?cas ?name WHERE { ?c <http://ex.org/cas> ?cas ; <http://ex.org/name> ?name }", "cas",
+        id_type="CAS", key_format='"{}"',
+    )
+    assert len(right.queries) == 1
+    assert 'VALUES ?cas { "50-00-0" "64-17-5" }' in right.queries[0]
+    assert sorted(row[-1] for row in result["data"]) == ["ethanol", "formaldehyde"]
+    assert result["join"]["strategy"] == "bind"
+
+
+def test_bind_join_splits_chunks_rejected_by_the_endpoint():
+    """execute() returns upstream errors; the bind join still splits and retries them."""
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    keys = [f"{i}-00-0" for i in range(6)]
+    unified._servers["biobricks-tox21"] = FakeGraph(["chem"], [[k] for k in keys])
+    server = unified._get_server("spoke-okn")
+
+    def run_query(query):
+        values = query.split("VALUES ?cas {", 1)[1].split("}", 1)[0].split()
+        if len(values) > 2:
+            raise HTTPError(server.FEDERATED_ENDPOINT, 414, "URI Too Long", {}, None)
+        return {"head": {"vars": ["cas"]},
+                "results": {"bindings": [{"cas": {"value": v.strip('"')}} for v in values]}}
+
+    server._run_query = run_query
+    result = unified.bind_join_graph_results(
+        "biobricks-tox21", "SELECT ?chem WHERE { ?chem a ?t }", "chem",
+        "spoke-okn", "SELECT ?cas WHERE { ?c <http://ex.org/cas> ?cas }", "cas", id_type="CAS",
+    )
+    assert sorted(row[0] for row in result["data"]) == keys
+    assert result["join"]["retries"] > 0
+    assert result["join"]["failed_keys"] == 0
+
+
+def test_bind_join_through_gene_bridge(monkeypatch):
+    monkeypatch.setattr("mcp_proto_okn.unified_server.load_gene_crosswalk", lambda: None)
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    # Graphs outside the test registry; their servers are pre-populated
+    unified.registry.resolve_name = lambda name: name
+    unified._servers["spoke-genelab"] = FakeGraph(["gene", "symbol"], [["http://ex.org/Gene/672", "BRCA1"]])
+    unified._servers["gene-expression-atlas-okn"] = TemplateGraph(
+        ["gene", "ncbi_gene_id", "ensembl_id", "name"], "ncbi_gene_id",
+        {"672": [["g", "672", "ENSG00000012048", "BRCA1 DNA repair"]]},
+    )
+    right = TemplateGraph(["ensembl", "disease"], "ensembl",
+                          {"ENSG00000012048": [["ENSG00000012048", "breast cancer"]]})
+    unified._servers["spoke-okn"] = right
+    result = unified.bind_join_graph_results(
+        "spoke-genelab", "SELECT ?gene ?symbol WHERE { }", "gene",
+        "spoke-okn", "SELECT ?ensembl ?disease WHERE { ?g <http://ex.org/ensembl> ?ensembl }", "ensembl",
+        via_gene_bridge=True,
+    )
+    assert result["data"] == [["672", "http://ex.org/Gene/672", "BRCA1", "ENSG00000012048", "breast cancer"]]
+    assert result["join"]["gene_bridge"]["mapped_keys"] == 1
+
+
+def test_bind_join_gene_bridge_uses_local_crosswalk():
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    unified.registry.resolve_name = lambda name: name
+    unified._gene_crosswalk = Crosswalk(GENE_ID_TYPES, [("672", "ENSG00000012048", "BRCA1")])
+    unified._servers["spoke-genelab"] = FakeGraph(["gene"], [["http://ex.org/Gene/672"]])
+    unified._servers["spoke-okn"] = TemplateGraph(
+        ["ensembl", "disease"], "ensembl", {"ENSG00000012048": [["ENSG00000012048", "breast cancer"]]},
+    )
+    result = unified.bind_join_graph_results(
+        "spoke-genelab", "SELECT ?gene WHERE { }", "gene",
+        "spoke-okn", "SELECT ?ensembl ?disease WHERE { ?g <http://ex.org/ensembl> ?ensembl }", "ensembl",
+        via_gene_bridge=True,
+    )
+    assert result["join"]["gene_bridge"]["graph"] == "local_crosswalk"
+    assert "gene-expression-atlas-okn" not in unified._servers
+    assert result["count"] == 1
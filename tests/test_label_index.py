@@ -0,0 +1,104 @@
+"""Tests for the local label index and lookup_uri fallbacks (no network required)."""
+
+import csv
+import gzip
+
+from mcp_proto_okn.label_index import LabelIndex, normalize_label
+from mcp_proto_okn.server import SPARQLServer
+
+OBO = "http://purl.obolibrary.org/obo/"
+
+ENTRIES = [
+    (f"{OBO}MONDO_0008383", "rheumatoid arthritis", "exact_label"),
+    (f"{OBO}MONDO_0005578", "arthritis", "exact_label"),
+    (f"{OBO}MONDO_0005578", "arthropathy", "exact_synonym"),
+    (f"{OBO}HP_0001370", "Rheumatoid arthritis", "exact_label"),
+    (f"{OBO}UBERON_0001630", "muscle organ", "exact_label"),
+    (f"{OBO}UBERON_0000948", "heart", "exact_label"),
+    (f"{OBO}CHEBI_0000001", "5' \"cap\" structure", "exact_label"),
+]
+
+
+def test_normalize_label():
+    assert normalize_label("  Rheumatoid\tARTHRITIS ") == "rheumatoid arthritis"
+    assert normalize_label("ﬁbrosis") == "fibrosis"  # NFKC ligature
+
+
+def test_exact_lookup_is_case_insensitive_and_merges_ontologies():
+    index = LabelIndex(ENTRIES)
+    matches = index.lookup("RHEUMATOID  arthritis")
+    assert {m["uri"] for m in matches} == {f"{OBO}MONDO_0008383", f"{OBO}HP_0001370"}
+    assert index.lookup("arthropathy")[0]["match_type"] == "exact_synonym"
+    assert index.lookup("no such term") == []
+
+
+def test_prefix_search_ranks_closest_first():
+    index = LabelIndex(ENTRIES)
+    matches = index.prefix_search("arthr")
+    assert [m["label"] for m in matches] == ["arthritis", "arthropathy"]
+    assert matches[0]["score"] > 0
+
+
+def test_fuzzy_search_tolerates_typos():
+    index = LabelIndex(ENTRIES)
+    matches = index.fuzzy_search("rheumatiod arthritis")
+    assert matches
+    assert matches[0]["uri"] in {f"{OBO}MONDO_0008383", f"{OBO}HP_0001370"}
+    assert all(m["score"] >= 0.4 for m in matches)
+
+
+def test_snapshot_file_roundtrip(tmp_path):
+    """from_file reads the gzip TSV written by scripts/build_label_index.py."""
+    path = tmp_path / "labels.tsv.gz"
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", quoting=csv.QUOTE_NONE, escapechar="\\", lineterminator="\n")
+        writer.writerow(["uri", "label", "match_type"])
+        writer.writerows(ENTRIES)
+    index = LabelIndex.from_file(str(path))
+    assert len(index) == len({normalize_label(e[1]) for e in ENTRIES})
+    assert index.lookup('5\' "cap" structure')[0]["uri"] == f"{OBO}CHEBI_0000001"
+
+
+class Recorder:
+    def __init__(self, bindings=()):
+        self.queries = []
+        self.bindings = list(bindings)
+
+    def __call__(self, query):
+        self.queries.append(query)
+        return {"head": {"vars": []}, "results": {"bindings": self.bindings}}
+
+
+def test_lookup_uri_served_locally():
+    server = SPARQLServer(endpoint_url="http://localhost/sparql", label_index=LabelIndex(ENTRIES))
+    server._run_query = Recorder()
+    result = server.lookup_uri("Heart")
+    assert result["source"] == "local_index"
+    assert result["matches"][0]["uri"] == f"{OBO}UBERON_0000948"
+    assert server._run_query.queries == []
+
+
+def test_lookup_uri_miss_falls_back_with_suggestions():
+    server = SPARQLServer(endpoint_url="http://localhost/sparql", label_index=LabelIndex(ENTRIES))
+    server._run_query = Recorder()
+    result = server.lookup_uri("muscle organs")
+    assert result["source"] == "ubergraph"
+    assert len(server._run_query.queries) == 1
+    assert result["suggestions"][0]["uri"] == f"{OBO}UBERON_0001630"
+
+
+def test_lookup_uri_escapes_quotes_upstream():
+    server = SPARQLServer(endpoint_url="http://localhost/sparql", label_index=LabelIndex([]))
+    server._run_query = Recorder()
+    server.lookup_uri('5\' "cap" \\ structure')
+    assert 'VALUES ?key { "5\' \\"cap\\" \\\\ structure" }' in server._run_query.queries[0]
+
+
+def test_prefix_match_requires_index(monkeypatch):
+    probes = []
+    monkeypatch.setattr("mcp_proto_okn.server.load_label_index", lambda: probes.append(1))
+    server = SPARQLServer(endpoint_url="http://localhost/sparql")
+    result = server.lookup_uri("arthr", match="prefix")
+    assert "error" in result
+    assert "error" in server.lookup_uri("arthr", match="fuzzy")
+    assert len(probes) == 1
@@ -0,0 +1,193 @@
+"""End-to-end tests of SPARQLServer against the local stand-in endpoint (no network required)."""
+
+import time
+from urllib.error import HTTPError
+
+import pytest
+
+from mcp_proto_okn.expansion_filter import ExpansionFilter
+from mcp_proto_okn.remote_cache import RemoteTextCache
+from mcp_proto_okn.server import SPARQLServer, request_deadline
+
+from local_endpoint import LocalSPARQLEndpoint
+
+OBO = "http://purl.obolibrary.org/obo/"
+ARTHRITIS = f"{OBO}MONDO_0005578"
+TREATS = "<https://purl.org/okn/frink/kg/spoke-okn/schema/TREATS_CtD>"
+TREATS_ARTHRITIS = f"SELECT DISTINCT ?compound WHERE {{ ?compound {TREATS} <{ARTHRITIS}> }} ORDER BY ?compound"
+ALL_TREATING = {f"https://purl.org/okn/frink/kg/spoke-okn/compound/{c}"
+                for c in ("methotrexate", "adalimumab", "celecoxib", "hyaluronan", "ibuprofen")}
+
+
+@pytest.fixture(scope="module")
+def endpoint():
+    with LocalSPARQLEndpoint() as endpoint:
+        yield endpoint
+
+
+@pytest.fixture
+def make_server(endpoint, monkeypatch):
+    """Build SPARQLServers for a graph that talk to the local endpoint only."""
+    monkeypatch.setattr(SPARQLServer, "FEDERATED_ENDPOINT", endpoint.url)
+    endpoint.wait_idle()
+    endpoint.reset()
+    endpoint.latency = 0.0
+    endpoint.max_url_length = None
+
+    def offline(request, timeout):
+        raise HTTPError(request.full_url, 404, "Not Found", {}, None)
+
+    def make(graph: str = "spoke-okn") -> SPARQLServer:
+        return SPARQLServer(f"https://apps.okn.us/{graph}/sparql",
+                            metadata_cache=RemoteTextCache(opener=offline),
+                            expansion_filter=ExpansionFilter())
+    return make
+
+
+def _compounds(result):
+    return {row[0] for row in result["data"]}
+
+
+def test_from_clause_scopes_to_graph(make_server):
+    """The same query sees only the triples of the graph it is sent for."""
+    query = f"SELECT DISTINCT ?compound WHERE {{ ?compound {TREATS} ?disease }}"
+    okn = make_server("spoke-okn").execute(query, auto_expand_descendants=False)
+    genelab = make_server("spoke-genelab").execute(query, auto_expand_descendants=False)
+    assert _compounds(okn) == ALL_TREATING
+    assert _compounds(genelab) == {"https://purl.org/okn/frink/kg/spoke-genelab/compound/placebo"}
+
+
+@pytest.mark.parametrize("mode", ["values", "postfilter", "graph_join"])
+def test_expansion_modes_agree(make_server, mode):
+    server = make_server()
+    assert _compounds(server.execute(TREATS_ARTHRITIS, auto_expand_descendants=False)) == {
+        "https://purl.org/okn/frink/kg/spoke-okn/compound/ibuprofen"}
+    result = server.execute(TREATS_ARTHRITIS, expansion_mode=mode)
+    assert "error" not in result
+    assert _compounds(result) == ALL_TREATING
+
+
+def test_graph_join_limit_keeps_root_term(make_server):
+    """The descendant cap applies below the root, as in client-side expansion."""
+    result = make_server().execute(TREATS_ARTHRITIS, expansion_mode="graph_join", max_descendants=1)
+    assert _compounds(result) == {"https://purl.org/okn/frink/kg/spoke-okn/compound/ibuprofen"}
+    assert result["ontology_expansion"]["expanded_uris"] == {ARTHRITIS: None}
+    assert result["ontology_expansion"]["total_concepts"] is None
+
+
+@pytest.mark.parametrize("max_descendants", [2, 3])
+def test_capped_expansion_keeps_nearest_descendants_in_every_mode(make_server, max_descendants):
+    """graph_join keeps the same nearest descendants as the client-side pre-fetch."""
+    values = make_server().execute(TREATS_ARTHRITIS, expansion_mode="values", max_descendants=max_descendants)
+    graph_join = make_server().execute(TREATS_ARTHRITIS, expansion_mode="graph_join",
+                                       max_descendants=max_descendants)
+    assert _compounds(graph_join) == _compounds(values)
+    assert _compounds(values) < ALL_TREATING
+
+
+def test_graph_join_analyzes_the_users_query(make_server):
+    """The rewrite's internal LIMIT is not reported as the user's."""
+    result = make_server().execute(TREATS_ARTHRITIS, expansion_mode="graph_join")
+    assert "query_analysis" not in result
+    unordered = f"SELECT ?compound WHERE {{ ?compound {TREATS} <{ARTHRITIS}> }} LIMIT 5"
+    analysis = make_server().execute(unordered, expansion_mode="graph_join")["query_analysis"]
+    assert "LIMIT 5 without ORDER BY" in analysis["warning"]
+
+
+def test_values_batching_requests(make_server, endpoint):
+    """Eight expanded terms in batches of three: one descendant request, three query batches."""
+    server = make_server()
+    server.MAX_VALUES_PER_BATCH = 3
+    result = server.execute(TREATS_ARTHRITIS, expansion_mode="values")
+    assert _compounds(result) == ALL_TREATING
+    assert result["ontology_expansion"]["total_concepts"] == 8
+    ubergraph = [r for r in endpoint.requests if "https://purl.org/okn/frink/kg/ubergraph" in r.default_graphs]
+    batches = [r for r in endpoint.requests if "https://purl.org/okn/frink/kg/spoke-okn" in r.default_graphs]
+    assert len(ubergraph) == 1
+    assert len(batches) == 3 and all(r.status == 200 for r in batches)
+
+
+def test_failed_descendant_fetch_falls_back_to_original_term(make_server, endpoint):
+    endpoint.fail_matching(r"FROM <https://purl.org/okn/frink/kg/ubergraph>", status=503)
+    result = make_server().execute(TREATS_ARTHRITIS, expansion_mode="values")
+    assert _compounds(result) == {"https://purl.org/okn/frink/kg/spoke-okn/compound/ibuprofen"}
+    assert endpoint.requests[0].status == 503
+
+
+def test_each_root_gets_its_own_descendant_limit(make_server):
+    """A broad root does not crowd out the others; nearest descendants come first."""
+    server = make_server()
+    rheumatoid, psoriatic = f"{OBO}MONDO_0008383", f"{OBO}MONDO_0005146"
+    result = server._fetch_descendants_for_uris([ARTHRITIS, rheumatoid, psoriatic], max_results=3, max_depth=2)
+
+    assert result[ARTHRITIS] == [ARTHRITIS, psoriatic, f"{OBO}MONDO_0005178"]
+    assert result[rheumatoid] == [rheumatoid, f"{OBO}MONDO_0005579", f"{OBO}MONDO_0011429"]
+    assert result[psoriatic] == [psoriatic]
+    assert not server._expansion_filter.should_expand(psoriatic)
+    assert server._expansion_filter.should_expand(ARTHRITIS)
+
+
+def test_url_length_limit_and_batching(make_server, endpoint):
+    """A GET URL limit rejects one large VALUES query; smaller batches stay under it."""
+    server = make_server()
+    server.MAX_VALUES_PER_BATCH = 100
+    server.execute(TREATS_ARTHRITIS, expansion_mode="values", max_depth=2)
+    unbatched = endpoint.requests[-1]
+    # Longer queries (the descendant query) are sent by POST, which has no URL limit
+    server.MAX_GET_QUERY_LENGTH = len(unbatched.query)
+    endpoint.reset()
+    server.MAX_VALUES_PER_BATCH = 3
+    server.execute(TREATS_ARTHRITIS, expansion_mode="values", max_depth=2)
+    assert [r.method for r in endpoint.requests] == ["POST", "GET", "GET", "GET"]
+    limit = max(r.url_length for r in endpoint.requests if r.method == "GET")
+    assert unbatched.url_length > limit
+
+    endpoint.reset()
+    endpoint.max_url_length = limit
+    result = server.execute(TREATS_ARTHRITIS, expansion_mode="values", max_depth=2)
+    assert _compounds(result) == ALL_TREATING
+
+    server.MAX_VALUES_PER_BATCH = 100
+    result = server.execute(TREATS_ARTHRITIS, expansion_mode="values", max_depth=2)
+    assert endpoint.requests[-1].status == 414
+    assert not result.get("data")
+
+
+def test_client_timeout(make_server, endpoint, monkeypatch):
+    monkeypatch.setattr(SPARQLServer, "SPARQL_TIMEOUT", 1)
+    endpoint.latency = 2.0
+    server = make_server()
+    started = time.perf_counter()
+    with pytest.raises(Exception):
+        server._run_query("SELECT * WHERE { ?s ?p ?o } LIMIT 1")
+    assert time.perf_counter() - started < 1.9
+
+
+def test_request_deadline_cuts_client_timeout(make_server, endpoint):
+    """A caller's deadline bounds the request, so an abandoned worker does not linger."""
+    endpoint.latency = 3.0
+    server = make_server()
+    started = time.monotonic()
+    with request_deadline(started + 1.0), pytest.raises(Exception):
+        server._run_query("SELECT * WHERE { ?s ?p ?o } LIMIT 1")
+    assert time.monotonic() - started < 2.5
+
+    endpoint.wait_idle()
+    endpoint.reset()
+    with request_deadline(time.monotonic()), pytest.raises(TimeoutError):
+        server._run_query("SELECT * WHERE { ?s ?p ?o } LIMIT 1")
+    assert not endpoint.requests
+
+
+def test_descendant_fetches_run_concurrently(make_server, endpoint):
+    """Root chunks are fetched in parallel: wall time is about one request, not four."""
+    endpoint.latency = 0.3
+    server = make_server()
+    server.MAX_ROOTS_PER_EXPANSION = 1
+    roots = [ARTHRITIS, f"{OBO}MONDO_0008383", f"{OBO}MONDO_0005178", f"{OBO}UBERON_0000062"]
+    started = time.perf_counter()
+    descendants = server._fetch_descendants_for_uris(roots)
+    elapsed = time.perf_counter() - started
+    assert len(descendants[ARTHRITIS]) == 8 and len(descendants[f"{OBO}UBERON_0000062"]) == 4
+    assert endpoint.max_concurrency == server.EXPANSION_CONCURRENCY
+    assert elapsed < 4 * 0.3
@@ -0,0 +1,146 @@
+"""Unit tests for the Prometheus metrics (no network required)."""
+
+import asyncio
+import io
+import json
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from starlette.testclient import TestClient
+
+from mcp_proto_okn import metrics, server as server_module
+from mcp_proto_okn.metrics import MetricsRegistry
+from mcp_proto_okn.server import SPARQLServer
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.REGISTRY.clear()
+    yield
+    metrics.REGISTRY.clear()
+
+
+def test_render_text_format():
+    """Counters, gauges and cumulative histogram buckets in exposition format."""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("graph",))
+    in_flight = registry.gauge("in_flight", "In flight.")
+    latency = registry.histogram("latency_seconds", "Latency.", ("graph",), buckets=(0.1, 1.0))
+    requests.inc(graph='spoke "okn"')
+    requests.inc(2, graph='spoke "okn"')
+    in_flight.inc()
+    latency.observe(0.05, graph="a")
+    latency.observe(0.5, graph="a")
+    latency.observe(5, graph="a")
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{graph="spoke \\"okn\\""} 3' in text
+    assert "in_flight 1" in text
+    assert 'latency_seconds_bucket{graph="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{graph="a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{graph="a",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{graph="a"} 5.55' in text
+    assert 'latency_seconds_count{graph="a"} 3' in text
+
+
+def test_labels_must_match():
+    with pytest.raises(ValueError):
+        metrics.UPSTREAM_REQUESTS.inc(graph="spoke-okn")
+
+
+def test_timed_tool_records_outcome_and_concurrency():
+    """Sync and async tools are timed; error dicts and exceptions count as errors."""
+    def ok():
+        assert metrics.TOOL_CALLS_IN_FLIGHT.value(tool="ok") == 1
+        return {"count": 1}
+
+    async def failing():
+        return {"error": "Unknown graph"}
+
+    def raising():
+        raise RuntimeError("boom")
+
+    metrics.timed_tool("ok", ok)()
+    asyncio.run(metrics.timed_tool("failing", failing)())
+    with pytest.raises(RuntimeError):
+        metrics.timed_tool("raising", raising)()
+
+    assert metrics.TOOL_DURATION.count(tool="ok", outcome="ok") == 1
+    assert metrics.TOOL_DURATION.count(tool="failing", outcome="error") == 1
+    assert metrics.TOOL_DURATION.count(tool="raising", outcome="error") == 1
+    assert metrics.TOOL_CALLS_IN_FLIGHT.value(tool="ok") == 0
+
+
+def test_metrics_endpoint_bypasses_auth(monkeypatch):
+    """/metrics is served without the API key; other paths still need it."""
+    monkeypatch.setenv("MCP_PROTO_OKN_API_KEY", "secret")
+    mcp = FastMCP("test")
+
+    @mcp.tool()
+    def echo(text: str) -> str:
+        return text
+
+    metrics.instrument_tools(mcp)
+    asyncio.run(mcp.call_tool("echo", {"text": "hi"}))
+
+    app = server_module._wrap_with_api_key_auth(metrics.add_metrics_route(mcp.streamable_http_app()))
+    client = TestClient(app)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'mcp_proto_okn_tool_duration_seconds_count{tool="echo",outcome="ok"} 1' in response.text
+    assert client.get("/mcp").status_code == 401
+
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.response = io.BytesIO(body)
+
+    def convert(self):
+        return json.loads(self.response.read())
+
+
+class FakeClient:
+    def __init__(self, body=None, error=None):
+        self.body, self.error = body, error
+
+    def setQuery(self, query):
+        pass
+
+    def setMethod(self, method):
+        pass
+
+
+    def setTimeout(self, timeout):
+
+        pass
+
+    def query(self):
+        if self.error:
+            raise self.error
+        return FakeResponse(self.body)
+
+
+def test_run_query_records_upstream_metrics():
+    """Upstream requests are counted per graph with bytes received and errors."""
+    server = SPARQLServer("https://apps.okn.us/spoke-okn/sparql")
+    body = b'{"head": {"vars": []}, "results": {"bindings": []}}'
+    server._local.client = FakeClient(body)
+    assert server._run_query("SELECT * WHERE { ?s ?p ?o }") == {"head": {"vars": []}, "results": {"bindings": []}}
+
+    server._local.client = FakeClient(error=OSError("timed out"))
+    with pytest.raises(OSError):
+        server._run_query("SELECT * WHERE { ?s ?p ?o }")
+
+    graph = server.kg_name
+    assert metrics.UPSTREAM_REQUESTS.value(graph=graph, outcome="ok") == 1
+    assert metrics.UPSTREAM_REQUESTS.value(graph=graph, outcome="error") == 1
+    assert metrics.UPSTREAM_BYTES.value(graph=graph) == len(body)
+    assert metrics.UPSTREAM_DURATION.count(graph=graph) == 2
+
+
+def test_cache_counters():
+    metrics.record_cache("hierarchy", hits=2, misses=1)
+    assert metrics.CACHE_REQUESTS.value(cache="hierarchy", result="hit") == 2
+    assert metrics.CACHE_REQUESTS.value(cache="hierarchy", result="miss") == 1
@@ -0,0 +1,252 @@
+"""Tests for ontology descendant expansion (mocked ubergraph, no network)."""
+
+import re
+import threading
+
+import pytest
+
+from mcp_proto_okn.server import QueryAnalyzer, SPARQLServer
+
+OBO = "http://purl.obolibrary.org/obo/"
+
+# Small fake hierarchy: root -> descendants (within max_depth)
+HIERARCHY = {
+    f"{OBO}MONDO_0000001": [f"{OBO}MONDO_0000002", f"{OBO}MONDO_0000003", f"{OBO}MONDO_0000004"],
+    f"{OBO}MONDO_0000002": [f"{OBO}MONDO_0000004"],
+    f"{OBO}UBERON_0000001": [f"{OBO}UBERON_0000002"],
+    f"{OBO}UBERON_0000009": [],
+}
+
+
+class FakeUbergraph:
+    """Answers the multi-root descendant query from HIERARCHY, honouring each root's LIMIT."""
+
+    def __init__(self):
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def __call__(self, query):
+        with self.lock:
+            self.queries.append(query)
+        roots = re.findall(r"BIND\(<([^>]+)> AS \?root\)", query)
+        limit = re.search(r"LIMIT (\d+)", query)
+        bindings = [
+            {"root": {"value": root}, "descendant": {"value": desc}}
+            for root in roots for desc in HIERARCHY.get(root, [])[:int(limit.group(1)) if limit else None]
+        ]
+        return {"head": {"vars": ["root", "descendant"]}, "results": {"bindings": bindings}}
+
+
+@pytest.fixture
+def server():
+    srv = SPARQLServer(endpoint_url="http://localhost/sparql")
+    srv._run_query = FakeUbergraph()
+    return srv
+
+
+def test_multiple_roots_single_request(server):
+    """All roots are expanded in one upstream request, results tagged by root."""
+    roots = [f"{OBO}MONDO_0000001", f"{OBO}UBERON_0000001", f"{OBO}UBERON_0000009"]
+    result = server._fetch_descendants_for_uris(roots)
+
+    assert len(server._run_query.queries) == 1
+    assert result[f"{OBO}MONDO_0000001"][0] == f"{OBO}MONDO_0000001"
+    assert set(result[f"{OBO}MONDO_0000001"][1:]) == set(HIERARCHY[f"{OBO}MONDO_0000001"])
+    assert result[f"{OBO}UBERON_0000001"] == [f"{OBO}UBERON_0000001", f"{OBO}UBERON_0000002"]
+    assert result[f"{OBO}UBERON_0000009"] == [f"{OBO}UBERON_0000009"]
+
+
+def test_roots_split_into_concurrent_chunks(server):
+    """Root sets larger than MAX_ROOTS_PER_EXPANSION are split across requests."""
+    server.MAX_ROOTS_PER_EXPANSION = 2
+    roots = [f"{OBO}MONDO_0000001", f"{OBO}MONDO_0000002", f"{OBO}UBERON_0000001",
+             f"{OBO}UBERON_0000009", f"{OBO}MONDO_0000004"]
+    result = server._fetch_descendants_for_uris(roots)
+
+    assert len(server._run_query.queries) == 3
+    assert list(result) == roots
+    assert result[f"{OBO}MONDO_0000002"] == [f"{OBO}MONDO_0000002", f"{OBO}MONDO_0000004"]
+
+
+def test_duplicate_roots_fetched_once(server):
+    """Duplicate roots are collapsed before querying."""
+    uri = f"{OBO}UBERON_0000001"
+    result = server._fetch_descendants_for_uris([uri, uri])
+    assert list(result) == [uri]
+    assert server._run_query.queries[0].count(f"BIND(<{uri}> AS ?root)") == 1
+
+
+def test_max_results_per_root(server):
+    """Each root's list (including the root) is capped at max_results."""
+    result = server._fetch_descendants_for_uris([f"{OBO}MONDO_0000001"], max_results=2)
+    assert len(result[f"{OBO}MONDO_0000001"]) == 2
+
+
+def test_nested_roots_detected(server):
+    """A root that is a descendant of another root is reported as nested."""
+    result = server._fetch_descendants_for_uris([f"{OBO}MONDO_0000001", f"{OBO}MONDO_0000002"])
+    nested = SPARQLServer._find_nested_roots(result)
+    assert nested == {f"{OBO}MONDO_0000002": f"{OBO}MONDO_0000001"}
+
+
+def test_fetch_failure_returns_root_only(server):
+    """If the ubergraph request fails, each root expands to itself."""
+    def failing(query):
+        raise RuntimeError("boom")
+
+    server._run_query = failing
+    result = server._fetch_descendants_for_uris([f"{OBO}MONDO_0000001"])
+    assert result == {f"{OBO}MONDO_0000001": [f"{OBO}MONDO_0000001"]}
+
+
+def test_failed_fetch_does_not_record_leaves(server):
+    """Roots of a failed request are not remembered as leaves."""
+    def failing(query):
+        raise RuntimeError("boom")
+
+    server._run_query = failing
+    server._fetch_descendants_for_uris([f"{OBO}UBERON_0000009"])
+    assert server._expansion_filter.should_expand(f"{OBO}UBERON_0000009")
+
+    server._run_query = lambda query: {"head": {}, "error": "upstream"}
+    result = server._fetch_descendants_for_uris([f"{OBO}UBERON_0000009"])
+    assert result == {f"{OBO}UBERON_0000009": [f"{OBO}UBERON_0000009"]}
+    assert server._expansion_filter.should_expand(f"{OBO}UBERON_0000009")
+
+
+def test_single_uri_wrapper(server):
+    """_fetch_descendants_for_uri keeps its original contract."""
+    desc = server._fetch_descendants_for_uri(f"{OBO}UBERON_0000001")
+    assert desc == [f"{OBO}UBERON_0000001", f"{OBO}UBERON_0000002"]
+
+
+def test_expand_query_uses_one_fetch(server):
+    """Expanding a query with two ontology URIs costs a single ubergraph request."""
+    query = (
+        "SELECT ?d WHERE { ?d <http://ex.org/p> <" + OBO + "MONDO_0000001> . "
+        "?d <http://ex.org/q> <" + OBO + "UBERON_0000001> . }"
+    )
+    expanded, uri_to_desc = server._expand_query_with_descendants(
+        query, [f"{OBO}MONDO_0000001", f"{OBO}UBERON_0000001"]
+    )
+    assert len(server._run_query.queries) == 1
+    assert isinstance(expanded, str)
+    assert "VALUES ?expanded_uri_0000001" in expanded
+    assert len(uri_to_desc) == 2
+
+
+# ---------------------- graph_join expansion ---------------------- #
+
+def _graph_join_server():
+    srv = SPARQLServer(endpoint_url="https://apps.okn.us/spoke-okn/sparql")
+    srv.queries = []
+
+    def fake_run(query):
+        srv.queries.append(query)
+        return {"head": {"vars": ["d"]}, "results": {"bindings": []}}
+
+    srv._run_query = fake_run
+    return srv
+
+
+def test_graph_join_single_request():
+    """graph_join expands inside the KG query: one request, ubergraph as a named graph."""
+    srv = _graph_join_server()
+    query = f"SELECT ?d WHERE {{ ?d <http://ex.org/p> <{OBO}MONDO_0000001> }}"
+    result = srv.execute(query, analyze=False, expansion_mode="graph_join")
+
+    assert result["ontology_expansion"]["mode"] == "graph_join"
+    assert len(srv.queries) == 1
+    sent = srv.queries[0]
+    assert "FROM NAMED <https://purl.org/okn/frink/kg/ubergraph>" in sent
+    assert "FROM <https://purl.org/okn/frink/kg/spoke-okn>" in sent
+    assert "GRAPH <https://purl.org/okn/frink/kg/ubergraph>" in sent
+    assert "?d <http://ex.org/p> ?expanded_uri_0000001" in sent
+
+
+def test_graph_join_query_semantics(monkeypatch):
+    """The rewritten query matches the root and its descendants (checked with rdflib)."""
+    rdflib = pytest.importorskip("rdflib")
+    from rdflib.plugins import sparql as rdflib_sparql
+    monkeypatch.setattr(rdflib_sparql, "SPARQL_LOAD_GRAPHS", False)
+
+    srv = SPARQLServer(endpoint_url="https://apps.okn.us/spoke-okn/sparql")
+    query = f"SELECT ?s WHERE {{ ?s <http://ex.org/p> <{OBO}MONDO_0000001> }}"
+    rewritten = srv._insert_from_clause(
+        srv._build_graph_join_query(query, [f"{OBO}MONDO_0000001"], 100, 5), srv.kg_name
+    )
+
+    U = rdflib.URIRef
+    ds = rdflib.Dataset(default_union=False)
+    ubergraph = ds.graph(U("https://purl.org/okn/frink/kg/ubergraph"))
+    kg = ds.graph(U("https://purl.org/okn/frink/kg/spoke-okn"))
+    sub = U("http://www.w3.org/2000/01/rdf-schema#subClassOf")
+    for root, children in HIERARCHY.items():
+        for child in children:
+            ubergraph.add((U(child), sub, U(root)))
+    for i in (1, 2, 4, 9):
+        kg.add((U(f"http://ex.org/s{i}"), U("http://ex.org/p"), U(f"{OBO}MONDO_000000{i}")))
+
+    rows = sorted(str(row[0]) for row in ds.query(rewritten))
+    assert rows == ["http://ex.org/s1", "http://ex.org/s2", "http://ex.org/s4"]
+
+
+def test_auto_mode_prefers_faster_strategy():
+    """After sampling both strategies, auto keeps the one with lower latency."""
+    srv = SPARQLServer(endpoint_url="http://localhost/sparql")
+    assert srv._choose_expansion_strategy() == "values"
+    for _ in range(srv.EXPANSION_MIN_SAMPLES):
+        srv._record_expansion_latency("values", 2.0)
+    assert srv._choose_expansion_strategy() == "graph_join"
+    for _ in range(srv.EXPANSION_MIN_SAMPLES):
+        srv._record_expansion_latency("graph_join", 0.5)
+    assert srv._choose_expansion_strategy() == "graph_join"
+    for _ in range(10):
+        srv._record_expansion_latency("graph_join", 5.0)
+    assert srv._choose_expansion_strategy() == "values"
+
+
+def test_auto_graph_join_failure_falls_back_to_values(server):
+    """A failing in-request expansion is retried with client-side expansion."""
+    fake = server._run_query
+
+    def run(query):
+        if "GRAPH <https://purl.org/okn/frink/kg/ubergraph>" in query:
+            raise RuntimeError("timeout")
+        return fake(query)
+
+    server._run_query = run
+    query = f"SELECT ?d WHERE {{ ?d <http://ex.org/p> <{OBO}UBERON_0000001> }}"
+    fingerprint = QueryAnalyzer.fingerprint(query)
+    for _ in range(server.EXPANSION_MIN_SAMPLES):
+        server._record_expansion_latency("values", 10.0, fingerprint)
+
+    result = server.execute(query, analyze=False)
+    assert result["ontology_expansion"]["mode"] == "values"
+    assert result["ontology_expansion"]["fallback_from"] == "graph_join"
+    assert server._expansion_stats[fingerprint]["samples"] == {"values": 3, "graph_join": 1}
+
+
+def test_auto_mode_measures_only_auto_runs_per_query_shape(server):
+    """Explicit modes are not measured; latency is kept per query fingerprint and mode."""
+    query = f"SELECT ?d WHERE {{ ?d <http://ex.org/p> <{OBO}UBERON_0000001> }}"
+    other = f"SELECT ?d ?x WHERE {{ ?d <http://ex.org/q> <{OBO}UBERON_0000001> . ?d ?p ?x }}"
+    server.execute(query, analyze=False, expansion_mode="values")
+    server.execute(query, analyze=False, expansion_mode="postfilter")
+    assert not server._expansion_stats
+
+    server.execute(query, analyze=False)
+    server.execute(other, analyze=False)
+    assert server._expansion_stats[QueryAnalyzer.fingerprint(query)]["samples"] == {"values": 1}
+    assert server._expansion_stats[QueryAnalyzer.fingerprint(other)]["samples"] == {"values": 1}
+
+
+def test_auto_mode_periodically_retries_slower_strategy():
+    srv = SPARQLServer(endpoint_url="http://localhost/sparql")
+    for _ in range(srv.EXPANSION_MIN_SAMPLES):
+        srv._record_expansion_latency("postfilter", 2.0, "q")
+        srv._record_expansion_latency("graph_join", 0.5, "q")
+    choices = [srv._choose_expansion_strategy("q") for _ in range(2 * srv.EXPANSION_EXPLORE_INTERVAL)]
+    assert choices.count("values") == 2
+    assert choices[srv.EXPANSION_EXPLORE_INTERVAL - 1] == "values"
+    assert srv._choose_expansion_strategy("other") == "values"
@@ -0,0 +1,62 @@
+"""Tests for per-graph identifier presence filters (no network required)."""
+
+import json
+import os
+
+from mcp_proto_okn.presence import PresenceIndex, find_identifiers, load_presence_index
+from mcp_proto_okn.unified_server import UnifiedSPARQLServer
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "test_registry.json")
+
+VALUES = {
+    "biobricks-tox21": {"CAS": ["https://identifiers.org/cas:50-00-0", "64-17-5"]},
+    "spoke-okn": {
+        "Ensembl": ["ENSG00000012048"],
+        "MONDO": ["http://purl.obolibrary.org/obo/MONDO_0005578"],
+        "CAS": [f"{i}-00-0" for i in range(100, 400)],
+    },
+}
+
+
+def test_find_identifiers():
+    found = find_identifiers("Which assays tested CAS 50-00-0, CHEBI:16842 or ENSG00000012048.15?")
+    assert found == [("50-00-0", "CAS"), ("CHEBI:16842", "ChEBI"), ("ENSG00000012048.15", "Ensembl")]
+    assert find_identifiers("What drugs treat diabetes in 2024?") == []
+
+
+def test_filters_have_no_false_negatives(tmp_path):
+    index = PresenceIndex.build(VALUES)
+    path = tmp_path / "presence.json"
+    path.write_text(json.dumps(index.to_dict()))
+    index = load_presence_index(str(path))
+
+    assert index.may_contain("biobricks-tox21", "cas:50-00-0") is True
+    for i in range(100, 400):
+        assert index.may_contain("spoke-okn", f"{i}-00-0", "CAS") is True
+    assert index.may_contain("biobricks-tox21", "7732-18-5") is False
+    # No Ensembl filter for tox21, no filters at all for dreamkg
+    assert index.may_contain("biobricks-tox21", "ENSG00000012048") is None
+    assert index.may_contain("dreamkg", "50-00-0") is None
+
+    result = index.graphs_containing("MONDO:0005578", graphs=["spoke-okn", "biobricks-tox21", "dreamkg"])
+    assert result == {"possible": ["spoke-okn"], "absent": [], "not_indexed": ["biobricks-tox21", "dreamkg"]}
+
+
+def test_route_query_skips_graphs_without_identifier():
+    unified = UnifiedSPARQLServer(registry_path=FIXTURE_PATH)
+    unified._presence_index = PresenceIndex.build(VALUES)
+
+    routed = unified.route("Which assays tested formaldehyde, CAS 50-00-0?")
+    assert routed["identifiers"] == ["50-00-0"]
+    assert routed["skipped_graphs"] == ["spoke-okn"]
+    names = [c["name"] for c in routed["candidates"]]
+    assert "biobricks-tox21" in names and "dreamkg" in names
+
+    # Without identifiers, routing is unchanged
+    plain = unified.route("drugs treat disease")
+    assert plain["skipped_graphs"] == []
+    assert plain["candidate_count"] == len(unified.registry.graph_names)
+
+    contains = unified.graphs_containing("http://purl.obolibrary.org/obo/MONDO_0005578")
+    assert contains["id_type"] == "MONDO"
+    assert contains["possible"] == ["spoke-okn"]
@@ -0,0 +1,101 @@
+"""Tests for per-query timing breakdowns (no network required)."""
+
+import io
+import json
+
+import pytest
+
+from mcp_proto_okn import profiling
+from mcp_proto_okn.server import SPARQLServer
+
+OBO = "http://purl.obolibrary.org/obo/"
+DISEASE = f"{OBO}MONDO_0005578"
+
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.response = io.BytesIO(body)
+
+    def convert(self):
+        return json.loads(self.response.read())
+
+
+class FakeClient:
+    """Answers descendant queries with one child per root, anything else with the same two rows."""
+
+    def setQuery(self, query):
+        self.query_string = query
+
+    def setMethod(self, method):
+        pass
+
+
+    def setTimeout(self, timeout):
+
+        pass
+
+    def query(self):
+        if "SELECT ?root ?descendant" in self.query_string:
+            roots = {r.split(">")[0] for r in self.query_string.split("<") if r.startswith(OBO + "MONDO")}
+            bindings = [{"root": {"value": root}, "descendant": {"value": f"{root}9"}} for root in sorted(roots)]
+            result = {"head": {"vars": ["root", "descendant"]}, "results": {"bindings": bindings}}
+        else:
+            bindings = [{"s": {"value": "x"}}, {"s": {"value": "y"}}]
+            result = {"head": {"vars": ["s"]}, "results": {"bindings": bindings}}
+        return FakeResponse(json.dumps(result).encode())
+
+
+@pytest.fixture
+def server():
+    srv = SPARQLServer(endpoint_url="https://apps.okn.us/spoke-okn/sparql")
+    srv._new_sparql_client = FakeClient
+    srv._local.client = FakeClient()
+    return srv
+
+
+def test_no_timing_by_default(server):
+    result = server.execute("SELECT ?s WHERE { ?s ?p ?o } LIMIT 5", auto_expand_descendants=False)
+    assert "timing" not in result
+    assert profiling.current() is None
+
+
+def test_unexpanded_query_timing(server):
+    result = server.execute("SELECT ?s WHERE { ?s ?p ?o } LIMIT 5", auto_expand_descendants=False, profile=True)
+    timing = result["timing"]
+    assert timing["upstream_requests"] == 1
+    assert timing["bytes_received"] > 0
+    assert timing["descendant_fetches"] == []
+    [batch] = timing["batches"]
+    assert batch["batch"] == 0 and batch["rows"] == 2
+    assert batch["network_ms"] >= 0 and batch["parse_ms"] >= 0
+    assert timing["total_ms"] >= timing["analysis_ms"]
+    assert "rows_before_dedupe" not in timing
+
+
+def test_batched_expansion_timing(server):
+    """Each VALUES batch, the descendant fetch and the deduplicating merge are reported."""
+    server.MAX_VALUES_PER_BATCH = 1
+    query = f"SELECT ?s WHERE {{ ?s <http://example.org/hasDisease> <{DISEASE}> }}"
+    result = server.execute(query, expansion_mode="values", profile=True)
+    timing = result["timing"]
+
+    [fetch] = timing["descendant_fetches"]
+    assert fetch["uris"] == [DISEASE] and fetch["descendants"] == 1
+    assert [b["batch"] for b in timing["batches"]] == [0, 1]
+    assert all(b["bytes"] > 0 for b in timing["batches"])
+    assert timing["upstream_requests"] == 3
+    assert timing["rows_before_dedupe"] == 4
+    assert timing["rows_after_dedupe"] == result["count"] == 2
+    assert 0 <= timing["expansion_share"] <= 1
+
+
+def test_failed_batch_is_recorded(server):
+    class FailingClient(FakeClient):
+        def query(self):
+            raise OSError("timed out")
+
+    server._local.client = FailingClient()
+    result = server.execute("SELECT ?s WHERE { ?s ?p ?o }", auto_expand_descendants=False, profile=True)
+    [batch] = result["timing"]["batches"]
+    assert "timed out" in batch["error"]
+    assert result["timing"]["upstream_requests"] == 0
@@ -0,0 +1,109 @@
+"""Tests for the slow-query log and query_stats (no network required)."""
+
+import io
+import json
+
+import pytest
+
+from mcp_proto_okn import querylog
+from mcp_proto_okn.querylog import QueryLog
+from mcp_proto_okn.server import QueryAnalyzer, SPARQLServer
+
+
+def _record(log, graph, query, seconds, error=None):
+    log.record(graph, QueryAnalyzer.fingerprint(query), query, seconds, rows=1, nbytes=100, error=error)
+
+
+def test_ring_buffer_is_bounded():
+    log = QueryLog(size=3)
+    for i in range(5):
+        _record(log, "spoke-okn", f"SELECT ?s WHERE {{ ?s ?p {i} }}", 0.1)
+    assert len(log.records()) == 3
+    assert log.stats()["queries_logged"] == 3
+
+
+def test_stats_group_by_shape_and_graph():
+    """Queries differing only in literals share a fingerprint; rankings follow order_by."""
+    log = QueryLog()
+    for name, seconds in [("aspirin", 0.1), ("ibuprofen", 0.3), ("caffeine", 0.2)]:
+        _record(log, "spoke-okn", f'SELECT ?s WHERE {{ ?s ex:name "{name}" }} LIMIT 10', seconds)
+    _record(log, "spoke-okn", "SELECT ?s WHERE { ?s ex:label ?l }", 0.05, error="timed out")
+    _record(log, "biobricks-aopwiki", "SELECT ?s WHERE { ?s ?p ?o }", 1.0)
+
+    stats = log.stats()
+    assert [g["graph"] for g in stats["graphs"]] == ["biobricks-aopwiki", "spoke-okn"]
+    spoke = stats["graphs"][1]
+    assert spoke["count"] == 4 and spoke["error_rate"] == 0.25
+    assert spoke["total_ms"] == pytest.approx(650)
+
+    by_name = next(f for f in stats["top_fingerprints"] if f["graph"] == "spoke-okn" and f["count"] == 3)
+    assert by_name["p95_ms"] == pytest.approx(300) and by_name["mean_ms"] == pytest.approx(200)
+    assert '"' not in by_name["example"]
+
+    by_errors = log.stats(order_by="error_rate", top=1)["top_fingerprints"]
+    assert by_errors[0]["last_error"] == "timed out" and by_errors[0]["error_rate"] == 1.0
+    assert [f["graph"] for f in log.stats(graph="spoke-okn")["graphs"]] == ["spoke-okn"]
+
+    with pytest.raises(ValueError):
+        log.stats(order_by="bogus")
+
+
+def test_jsonl_file_keeps_slow_and_failed_queries(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    log = QueryLog(path=str(path), slow_ms=500)
+    _record(log, "spoke-okn", "SELECT ?fast WHERE { ?s ?p ?o }", 0.1)
+    _record(log, "spoke-okn", "SELECT ?slow WHERE { ?s ?p ?o }", 0.9)
+    _record(log, "spoke-okn", "SELECT ?failed WHERE { ?s ?p ?o }", 0.1, error="HTTP 500")
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["query"] for line in lines] == ["SELECT ?slow WHERE { ?s ?p ?o }", "SELECT ?failed WHERE { ?s ?p ?o }"]
+    assert lines[0]["outcome"] == "ok" and lines[0]["ms"] == 900
+    assert lines[1]["outcome"] == "error" and lines[1]["error"] == "HTTP 500"
+
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.response = io.BytesIO(body)
+
+    def convert(self):
+        return json.loads(self.response.read())
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+
+    def setQuery(self, query):
+        pass
+
+    def setMethod(self, method):
+        pass
+
+
+    def setTimeout(self, timeout):
+
+        pass
+
+    def query(self):
+        if self.error:
+            raise self.error
+        body = {"head": {"vars": ["s"]}, "results": {"bindings": [{"s": {"value": "x"}}]}}
+        return FakeResponse(json.dumps(body).encode())
+
+
+def test_run_query_is_logged(monkeypatch):
+    log = QueryLog()
+    monkeypatch.setattr(querylog, "QUERY_LOG", log)
+    server = SPARQLServer("https://apps.okn.us/spoke-okn/sparql")
+    query = "SELECT ?s WHERE { ?s ?p ?o } LIMIT 5"
+    server._local.client = FakeClient()
+    server._run_query(query)
+    server._local.client = FakeClient(error=OSError("timed out"))
+    with pytest.raises(OSError):
+        server._run_query(query)
+
+    ok, failed = log.records()
+    assert ok.graph == failed.graph == "spoke-okn"
+    assert ok.fingerprint == QueryAnalyzer.fingerprint(query)
+    assert ok.rows == 1 and ok.nbytes > 0 and ok.error is None
+    assert failed.error == "timed out"
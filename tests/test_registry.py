@@ -1,5 +1,6 @@
 """Unit tests for GraphRegistry (no network required)."""
 
+import json
 import os
 import pytest
 from mcp_proto_okn.registry import GraphRegistry, GraphInfo
@@ -81,6 +82,45 @@ def test_filter_by_entity_type_case_insensitive(registry):
     assert "spoke-okn" in names
 
 
+def test_select_combined_filters(registry):
+    """Facet filters are ANDed and case-insensitive."""
+    assert [g["name"] for g in registry.select(domain="chemistry")["graphs"]] == ["spoke-okn", "biobricks-tox21"]
+    result = registry.select(domain="CHEMISTRY", namespace="cas")
+    assert result["graph_count"] == 1
+    assert result["graphs"][0]["name"] == "biobricks-tox21"
+    assert registry.select(domain="chemistry", predicate="TREATS_CtD")["graphs"][0]["name"] == "spoke-okn"
+    assert registry.select(domain="social_services", entity_type="Gene")["graph_count"] == 0
+
+
+def test_select_paging(registry):
+    """Pages report the total match count and where the next page starts."""
+    first = registry.select(limit=2)
+    assert first["graph_count"] == 3
+    assert len(first["graphs"]) == 2
+    assert first["next_offset"] == 2
+    rest = registry.select(offset=first["next_offset"], limit=2)
+    assert len(rest["graphs"]) == 1
+    assert rest["next_offset"] is None
+    assert [g["name"] for g in first["graphs"] + rest["graphs"]] == [g["name"] for g in registry.list_all()]
+    # An empty page would never advance next_offset
+    for limit in (0, -1):
+        with pytest.raises(ValueError, match="at least 1"):
+            registry.select(offset=1, limit=limit)
+
+
+def test_select_caches_responses(registry):
+    """Repeated filter combinations are served from the response cache."""
+    assert registry.select(domain="biology") is registry.select(domain="Biology", entity_type=None)
+    with pytest.raises(ValueError):
+        registry.select(license="MIT")
+
+
+def test_facet_values(registry):
+    """Graph counts per facet value."""
+    assert registry.facet_values("domain")["chemistry"] == 2
+    assert registry.facet_values("namespace") == {"cas": 1, "chebi": 1, "ensembl": 1, "fips": 1, "inchikey": 1, "mondo": 1}
+
+
 def test_search_relevance_ordering(registry):
     """Graphs with more relevance signals sort first."""
     results = registry.search("drugs treat disease")
@@ -102,6 +142,35 @@ def test_search_no_match(registry):
     assert all(r["relevance_score"] == 0 for r in results)
 
 
+def test_search_stems_and_splits_identifiers(registry):
+    """Plurals, verb forms and camelCase/snake_case names match their terms."""
+    assert registry.search("treatments for drug")[0]["name"] == "spoke-okn"
+    # ChemicalEntity class and TREATS_CtD predicate
+    results = registry.search("chemical entity that treats")
+    assert results[0]["name"] == "spoke-okn"
+
+
+def test_search_limit(registry):
+    results = registry.search("drugs treat disease", limit=2)
+    assert [r["name"] for r in results][:1] == ["spoke-okn"]
+    assert len(results) == 2
+
+
+def test_search_large_registry(tmp_path):
+    """A term unique to one graph ranks it first among thousands."""
+    entries = [
+        {"name": f"kg-{i}", "description_summary": f"Synthetic graph about genes and diseases, part {i}",
+         "domain_tags": ["biology"]}
+        for i in range(3000)
+    ]
+    entries[1234]["description_summary"] += " with wastewater surveillance"
+    path = tmp_path / "registry.json"
+    path.write_text(json.dumps(entries))
+    results = GraphRegistry(str(path)).search("wastewater genes", limit=5)
+    assert results[0]["name"] == "kg-1234"
+    assert len(results) == 5
+
+
 def test_resolve_name(registry):
     """Resolves canonical and alias names."""
     assert registry.resolve_name("spoke-okn") == "spoke-okn"
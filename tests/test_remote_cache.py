@@ -0,0 +1,122 @@
+"""Tests for the stale-while-revalidate metadata cache (no network required)."""
+
+import time
+from unittest.mock import MagicMock, patch
+from urllib.error import HTTPError
+
+from mcp_proto_okn.remote_cache import RemoteTextCache
+from mcp_proto_okn.server import SPARQLServer
+
+
+class FakeUpstream:
+    """Callable standing in for urlopen that records request headers."""
+
+    def __init__(self, body="v1", etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT"):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.status = 200
+        self.requests = []
+
+    def __call__(self, request, timeout=None):
+        self.requests.append(dict(request.header_items()))
+        if self.status == 304:
+            raise HTTPError(request.full_url, 304, "Not Modified", {}, None)
+        if self.status != 200:
+            raise HTTPError(request.full_url, self.status, "Error", {}, None)
+        resp = MagicMock()
+        resp.read.return_value = self.body.encode("utf-8")
+        resp.headers = {"ETag": self.etag, "Last-Modified": self.last_modified}
+        resp.__enter__ = lambda s: s
+        resp.__exit__ = lambda s, *a: None
+        return resp
+
+
+def _wait(cache):
+    for thread in list(cache._pending.values()):
+        thread.join(timeout=5)
+
+
+def test_cold_fetch_then_served_from_cache():
+    """Only the first get() goes upstream while the entry is fresh."""
+    upstream = FakeUpstream()
+    cache = RemoteTextCache(max_age=3600, opener=upstream)
+    assert cache.get("http://x/doc") == "v1"
+    assert cache.get("http://x/doc") == "v1"
+    assert len(upstream.requests) == 1
+
+
+def test_stale_entry_served_immediately_and_revalidated():
+    """A stale entry is returned as-is and revalidated with conditional headers."""
+    upstream = FakeUpstream()
+    cache = RemoteTextCache(max_age=0, opener=upstream)
+    cache.get("http://x/doc")
+
+    upstream.body = "v2"
+    assert cache.get("http://x/doc") == "v1"  # stale copy, no blocking
+    _wait(cache)
+    assert cache.get("http://x/doc") == "v2"
+
+    headers = {k.lower(): v for k, v in upstream.requests[1].items()}
+    assert headers["if-none-match"] == '"abc"'
+    assert headers["if-modified-since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_not_modified_keeps_content():
+    """A 304 response keeps the cached text and validators."""
+    upstream = FakeUpstream()
+    cache = RemoteTextCache(opener=upstream)
+    cache.get("http://x/doc")
+    upstream.status = 304
+    entry = cache.refresh("http://x/doc")
+    assert entry.text == "v1"
+    assert entry.etag == '"abc"'
+
+
+def test_upstream_failure_keeps_last_good_copy():
+    """Server errors during revalidation do not evict the cached document."""
+    upstream = FakeUpstream()
+    cache = RemoteTextCache(opener=upstream)
+    cache.get("http://x/doc")
+    upstream.status = 503
+    assert cache.refresh("http://x/doc").text == "v1"
+
+
+def test_missing_document_is_negatively_cached():
+    """A 404 is remembered so the URL is not re-requested on every call."""
+    upstream = FakeUpstream()
+    upstream.status = 404
+    cache = RemoteTextCache(max_age=3600, opener=upstream)
+    assert cache.get("http://x/missing") is None
+    assert cache.get("http://x/missing") is None
+    assert len(upstream.requests) == 1
+
+
+def test_transient_failure_is_retried_after_failure_ttl():
+    """A network error with no cached copy is not remembered for max_age."""
+    upstream = FakeUpstream()
+    upstream.status = 503
+    cache = RemoteTextCache(max_age=3600, failure_ttl=0.05, opener=upstream)
+    assert cache.get("http://x/doc") is None
+    assert cache.get("http://x/doc") is None
+    assert len(upstream.requests) == 1
+
+    upstream.status = 200
+    time.sleep(0.06)
+    assert cache.get("http://x/doc") == "v1"
+    assert len(upstream.requests) == 2
+
+
+@patch("mcp_proto_okn.server.urlopen")
+def test_build_description_uses_cache(mock_urlopen):
+    """Repeated get_description calls do not refetch the registry or description."""
+    upstream = FakeUpstream(body="# Registry page")
+    mock_urlopen.side_effect = upstream
+
+    server = SPARQLServer(endpoint_url="https://apps.okn.us/spoke-okn/sparql")
+    first = server.build_description()
+    second = server.build_description()
+
+    assert first == second
+    assert "# Registry page" in first
+    assert len(upstream.requests) == 2  # registry markdown + additional description
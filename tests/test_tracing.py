@@ -0,0 +1,137 @@
+"""Tests for OpenTelemetry tracing and query fingerprints (no network required)."""
+
+import io
+import json
+
+import pytest
+
+from mcp_proto_okn import tracing
+from mcp_proto_okn.server import QueryAnalyzer, SPARQLServer
+
+OBO = "http://purl.obolibrary.org/obo/"
+
+
+def test_normalize_query_strips_literals_values_and_limits():
+    query = f"""
+        SELECT ?s WHERE {{  # comment
+            ?s <http://example.org/p#name> "aspirin"@en ; <{OBO}RO_0002200> ?o .
+            ?o <http://example.org/age> 42 .
+            VALUES ?o {{ <{OBO}MONDO_0005578> <{OBO}MONDO_0005579> }}
+        }} LIMIT 100
+    """
+    shape = QueryAnalyzer.normalize_query(query)
+    assert '"aspirin"' not in shape and "42" not in shape and "100" not in shape
+    assert "comment" not in shape
+    assert "VALUES ?o { ? }" in shape
+    assert "<http://example.org/p#name>" in shape
+    assert f"<{OBO}RO_0002200>" in shape
+
+
+def test_fingerprint_groups_queries_by_shape():
+    a = 'SELECT ?s WHERE { ?s ex:name "aspirin" } LIMIT 10'
+    b = 'SELECT ?s\nWHERE { ?s ex:name "ibuprofen" }   LIMIT 500'
+    c = 'SELECT ?s WHERE { ?s ex:label "aspirin" } LIMIT 10'
+    assert QueryAnalyzer.fingerprint(a) == QueryAnalyzer.fingerprint(b)
+    assert QueryAnalyzer.fingerprint(a) != QueryAnalyzer.fingerprint(c)
+    assert len(QueryAnalyzer.fingerprint(a)) == 16
+
+
+def test_disabled_tracing_is_a_no_op():
+    tracing.set_tracer_provider(None)
+    assert not tracing.enabled()
+    with tracing.span("anything", graph_name="x") as current:
+        tracing.set_attributes(current, rows=1)
+        tracing.annotate(rows=2)
+
+    def fn():
+        return 1
+    assert tracing.in_current_context(fn)() == 1
+    assert tracing.traced("name")(fn)() == 1
+
+
+def test_unknown_exporter_leaves_tracing_off():
+    assert tracing.configure("bogus") is False
+    assert not tracing.enabled()
+
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.response = io.BytesIO(body)
+
+    def convert(self):
+        return json.loads(self.response.read())
+
+
+class FakeClient:
+    """Answers descendant queries with one child per root, anything else with one row."""
+
+    def setQuery(self, query):
+        self.query_string = query
+
+    def setMethod(self, method):
+        pass
+
+
+    def setTimeout(self, timeout):
+
+        pass
+
+    def query(self):
+        if "SELECT ?root ?descendant" in self.query_string:
+            roots = {r.split(">")[0] for r in self.query_string.split("<") if r.startswith(OBO + "MONDO")}
+            bindings = [{"root": {"value": root}, "descendant": {"value": f"{root}9"}} for root in sorted(roots)]
+            result = {"head": {"vars": ["root", "descendant"]}, "results": {"bindings": bindings}}
+        else:
+            result = {"head": {"vars": ["s"]}, "results": {"bindings": [{"s": {"value": "x"}}]}}
+        return FakeResponse(json.dumps(result).encode())
+
+
+@pytest.fixture
+def exporter():
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    memory = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(memory))
+    tracing.set_tracer_provider(provider)
+    yield memory
+    tracing.set_tracer_provider(None)
+
+
+@pytest.fixture
+def server():
+    srv = SPARQLServer(endpoint_url="https://apps.okn.us/spoke-okn/sparql")
+    # Worker threads create their own clients
+    srv._new_sparql_client = FakeClient
+    srv._local.client = FakeClient()
+    return srv
+
+
+def test_execute_span_tree(exporter, server):
+    """execute() records analysis, batch and request spans with request details."""
+    server.execute("SELECT ?s WHERE { ?s ?p ?o } LIMIT 5", auto_expand_descendants=False)
+    spans = {s.name: s for s in exporter.get_finished_spans()}
+
+    root = spans["sparql.execute"]
+    assert root.attributes["sparql.graph"] == "spoke-okn"
+    assert spans["query.analyze"].parent.span_id == root.context.span_id
+    assert spans["sparql.batch"].parent.span_id == root.context.span_id
+    request = spans["sparql.request"]
+    assert request.parent.span_id == spans["sparql.batch"].context.span_id
+    assert request.attributes["sparql.rows"] == 1
+    assert request.attributes["sparql.response_bytes"] > 0
+    assert request.attributes["sparql.fingerprint"] == QueryAnalyzer.fingerprint(
+        server._insert_from_clause("SELECT ?s WHERE { ?s ?p ?o } LIMIT 5", "spoke-okn"))
+
+
+def test_concurrent_descendant_fetches_nest_under_caller(exporter, server):
+    """Descendant requests run in worker threads but stay in the caller's trace."""
+    server.MAX_ROOTS_PER_EXPANSION = 1
+    with tracing.span("caller") as caller:
+        server._fetch_descendants_for_uris([f"{OBO}MONDO_0000001", f"{OBO}MONDO_0000002"])
+    fetches = [s for s in exporter.get_finished_spans() if s.name == "expansion.fetch_descendants"]
+    assert len(fetches) == 2
+    assert all(s.parent.span_id == caller.get_span_context().span_id for s in fetches)
@@ -2,10 +2,12 @@
 
 import json
 import os
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from mcp_proto_okn import server as server_module
 from mcp_proto_okn.registry import GraphRegistry
 from mcp_proto_okn.unified_server import UnifiedSPARQLServer
 
@@ -40,6 +42,15 @@ def test_route_query_returns_candidates(unified):
     assert results[0]["relevance_score"] > results[-1]["relevance_score"]
 
 
+def test_route_returns_limited_candidates(unified):
+    """route() ranks all graphs unless a limit asks for the top ones only."""
+    routed = unified.route("drugs treat disease", limit=1)
+    assert [c["name"] for c in routed["candidates"]] == ["spoke-okn"]
+    assert unified.route("drugs treat disease")["candidate_count"] == 3
+    with pytest.raises(ValueError, match="at least 1"):
+        unified.route("drugs treat disease", limit=0)
+
+
 def test_validate_graph_name_valid(unified):
     """Validates and returns canonical name for valid graph."""
     assert unified._validate_graph_name("spoke-okn") == "spoke-okn"
@@ -140,3 +151,84 @@ def test_server_alias_resolution(unified):
         server1 = unified._get_server("spoke-okn")
         server2 = unified._get_server("spoke")
         assert server1 is server2
+
+
+class SlowServer:
+    """Stands in for SPARQLServer.execute with a fixed delay."""
+
+    def __init__(self, delay, rows, fail=False):
+        self.delay = delay
+        self.rows = rows
+        self.fail = fail
+
+    def execute(self, query_string):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("endpoint unavailable")
+        return {"columns": ["x"], "data": self.rows, "count": len(self.rows)}
+
+
+def test_multi_graph_query_runs_concurrently(unified):
+    """Graphs are queried in parallel and merged in request order."""
+    unified._servers.update({
+        "spoke-okn": SlowServer(0.3, [["a"]]),
+        "biobricks-tox21": SlowServer(0.3, [["b"], ["c"]]),
+        "dreamkg": SlowServer(0.3, [], fail=True),
+    })
+    start = time.monotonic()
+    result = unified.multi_graph_query({
+        "biobricks-tox21": "SELECT ...", "spoke-okn": "SELECT ...", "dreamkg": "SELECT ...",
+    })
+    assert time.monotonic() - start < 0.8
+    assert result["data"] == [["biobricks-tox21", "b"], ["biobricks-tox21", "c"], ["spoke-okn", "a"]]
+    assert result["per_graph"]["spoke-okn"]["status"] == "success"
+    assert result["per_graph"]["spoke-okn"]["elapsed_ms"] >= 300
+    assert result["per_graph"]["dreamkg"]["status"] == "error"
+    assert result["partial"] is False
+
+
+def test_multi_graph_query_returns_partial_results_on_timeout(unified):
+    """A slow graph is reported as timed out instead of blocking the call."""
+    unified._servers.update({
+        "spoke-okn": SlowServer(0.0, [["a"]]),
+        "dreamkg": SlowServer(2.0, [["late"]]),
+    })
+    start = time.monotonic()
+    result = unified.multi_graph_query(
+        {"spoke-okn": "SELECT ...", "dreamkg": "SELECT ...", "nonexistent": "SELECT ..."},
+        per_graph_timeout=0.2,
+    )
+    assert time.monotonic() - start < 1.0
+    assert result["data"] == [["spoke-okn", "a"]]
+    assert result["per_graph"]["dreamkg"]["status"] == "timeout"
+    assert "Unknown graph" in result["errors"]["nonexistent"]
+    assert result["partial"] is True
+
+
+def test_multi_graph_query_reports_error_results(unified):
+    """Upstream failures returned by execute() are errors, not empty successes."""
+    class FailingServer(SlowServer):
+        def execute(self, query_string):
+            return {"error": "Query execution failed: EndPointInternalError: HTTP status code 500"}
+
+    unified._servers.update({"spoke-okn": SlowServer(0.0, [["a"]]), "dreamkg": FailingServer(0.0, [])})
+    result = unified.multi_graph_query({"spoke-okn": "SELECT ...", "dreamkg": "SELECT ..."})
+    assert result["data"] == [["spoke-okn", "a"]]
+    assert result["per_graph"]["dreamkg"]["status"] == "error"
+    assert "500" in result["errors"]["dreamkg"]
+    assert result["per_graph"]["spoke-okn"]["status"] == "success"
+
+
+def test_multi_graph_query_passes_deadline_to_upstream_requests(unified):
+    """Each graph's requests are bounded by its deadline, so stragglers stop."""
+    seen = {}
+
+    class DeadlineServer(SlowServer):
+        def execute(self, query_string):
+            seen["deadline"] = server_module._request_deadline.get()
+            return super().execute(query_string)
+
+    unified._servers["spoke-okn"] = DeadlineServer(0.0, [["a"]])
+    start = time.monotonic()
+    unified.multi_graph_query({"spoke-okn": "SELECT ..."}, timeout=30, per_graph_timeout=5)
+    assert start + 5 <= seen["deadline"] < time.monotonic() + 5